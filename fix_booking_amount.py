@@ -7,6 +7,70 @@ import re
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'scripts'))
+from ident_index import load_index
+from prefilter import nocase, select_candidates
+from source_files import PROJECT_ROOT, find_source_files
+
+# Literales necesarios: '.amount'/'amount:' y 'booking' en cualquier capitalización
+CANDIDATE_NEEDLES = [(b'amount',), (nocase(b'booking'),)]
+
+def fix_booking_amount_content(content):
+    """Corrige booking.amount → booking.price en el contenido. Retorna (contenido, correcciones)"""
+    corrections = 0
+
+    # Patrones a corregir
+    patterns = [
+        # booking.amount
+        (r'\.amount\b', '.price', 'booking', ['booking', 'b', 'bkg']),
+        # Booking select/aggregate con amount
+        # Esto es más delicado, solo en contexto de Booking
+    ]
+
+    # Primera pasada: accesos directos a .amount en contexto de booking
+    # Buscar patrones como: booking.amount, b.amount, bkg.amount
+    lines = content.split('\n')
+    new_lines = []
+
+    for line in lines:
+        new_line = line
+
+        # Detectar si la línea tiene acceso a .amount en contexto de Booking
+        # Patrones comunes:
+        # - booking.amount
+        # - b.amount (cuando b es un booking)
+        # - reduce((sum, booking) => sum + booking.amount, 0)
+        # - map(booking => booking.amount)
+
+        # Caso 1: Variable explícitamente llamada 'booking'
+        if 'booking' in line.lower() and '.amount' in line:
+            # No reemplazar si es parte de otro modelo (payment.amount, transaction.amount, etc)
+            if not any(x in line for x in ['payment.amount', 'transaction.amount', 'split.amount',
+                                            'invoice.amount', 'expense.amount', 'fee.amount']):
+                new_line = re.sub(r'(booking[s]?\.)\s*amount\b', r'\1price', new_line, flags=re.IGNORECASE)
+                new_line = re.sub(r'(b\.)\s*amount\b', r'\1price', new_line)
+                new_line = re.sub(r'(bkg\.)\s*amount\b', r'\1price', new_line)
+                if new_line != line:
+                    corrections += 1
+
+        # Caso 2: En select/aggregate de Booking
+        # select: { amount: true } → select: { price: true }
+        if ('Booking' in line or 'booking' in line) and 'select:' in line and 'amount:' in line:
+            new_line = re.sub(r'amount:', 'price:', new_line)
+            if new_line != line:
+                corrections += 1
+
+        # Caso 3: En aggregate
+        # _sum: { amount: true } cuando está en contexto de booking
+        if '_sum:' in line and 'amount:' in line:
+            # Necesitamos contexto - verificar líneas anteriores
+            # Por ahora, marcar para revisión manual
+            pass
+
+        new_lines.append(new_line)
+
+    return '\n'.join(new_lines), corrections
+
 def fix_booking_amount_in_file(file_path):
     """Corrige booking.amount → booking.price en un archivo"""
     try:
@@ -14,59 +78,7 @@ def fix_booking_amount_in_file(file_path):
             content = f.read()
 
         original_content = content
-        corrections = 0
-
-        # Patrones a corregir
-        patterns = [
-            # booking.amount
-            (r'\.amount\b', '.price', 'booking', ['booking', 'b', 'bkg']),
-            # Booking select/aggregate con amount
-            # Esto es más delicado, solo en contexto de Booking
-        ]
-
-        # Primera pasada: accesos directos a .amount en contexto de booking
-        # Buscar patrones como: booking.amount, b.amount, bkg.amount
-        lines = content.split('\n')
-        new_lines = []
-
-        for line in lines:
-            new_line = line
-
-            # Detectar si la línea tiene acceso a .amount en contexto de Booking
-            # Patrones comunes:
-            # - booking.amount
-            # - b.amount (cuando b es un booking)
-            # - reduce((sum, booking) => sum + booking.amount, 0)
-            # - map(booking => booking.amount)
-
-            # Caso 1: Variable explícitamente llamada 'booking'
-            if 'booking' in line.lower() and '.amount' in line:
-                # No reemplazar si es parte de otro modelo (payment.amount, transaction.amount, etc)
-                if not any(x in line for x in ['payment.amount', 'transaction.amount', 'split.amount',
-                                                'invoice.amount', 'expense.amount', 'fee.amount']):
-                    new_line = re.sub(r'(booking[s]?\.)\s*amount\b', r'\1price', new_line, flags=re.IGNORECASE)
-                    new_line = re.sub(r'(b\.)\s*amount\b', r'\1price', new_line)
-                    new_line = re.sub(r'(bkg\.)\s*amount\b', r'\1price', new_line)
-                    if new_line != line:
-                        corrections += 1
-
-            # Caso 2: En select/aggregate de Booking
-            # select: { amount: true } → select: { price: true }
-            if ('Booking' in line or 'booking' in line) and 'select:' in line and 'amount:' in line:
-                new_line = re.sub(r'amount:', 'price:', new_line)
-                if new_line != line:
-                    corrections += 1
-
-            # Caso 3: En aggregate
-            # _sum: { amount: true } cuando está en contexto de booking
-            if '_sum:' in line and 'amount:' in line:
-                # Necesitamos contexto - verificar líneas anteriores
-                # Por ahora, marcar para revisión manual
-                pass
-
-            new_lines.append(new_line)
-
-        new_content = '\n'.join(new_lines)
+        new_content, corrections = fix_booking_amount_content(content)
 
         if new_content != original_content:
             # Crear backup
@@ -87,18 +99,9 @@ def fix_booking_amount_in_file(file_path):
         return 0
 
 def find_files_with_booking_amount():
-    """Encuentra archivos con booking.amount"""
-    import subprocess
-
-    # Buscar archivos que contengan 'booking' y '.amount'
-    cmd = "grep -rl 'booking.*\\.amount' app/ lib/ components/ 2>/dev/null | grep -E '\\.(ts|tsx)$' | grep -v node_modules"
-
-    try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        files = [f.strip() for f in result.stdout.split('\n') if f.strip()]
-        return files
-    except:
-        return []
+    """Encuentra archivos con booking.amount (una lectura por archivo, sin grep)"""
+    files = find_source_files(['app', 'lib', 'components'])
+    return select_candidates(files, {'booking_amount': CANDIDATE_NEEDLES}, index=load_index())['booking_amount']
 
 def main():
     print("=" * 80)
@@ -125,7 +128,7 @@ def main():
         if corrections > 0:
             files_modified += 1
             total_corrections += corrections
-            print(f"✓ {file_path} ({corrections} correcciones)")
+            print(f"✓ {file_path.relative_to(PROJECT_ROOT)} ({corrections} correcciones)")
 
     print()
     print("=" * 80)
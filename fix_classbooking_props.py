@@ -11,6 +11,41 @@ import re
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'scripts'))
+import rule_profiler
+from ident_index import load_index
+from prefilter import select_candidates
+from source_files import PROJECT_ROOT, find_source_files
+
+# Reemplazos directos
+REPLACEMENTS = [
+    (re.compile(r'\.studentName\b'), '.playerName'),
+    (re.compile(r'\.studentEmail\b'), '.playerEmail'),
+    (re.compile(r'\.studentPhone\b'), '.playerPhone'),
+    (re.compile(r'\.attended\b'), '.checkedIn'),
+    (re.compile(r'\.dueAmount\b'), '.paidAmount'),  # Esto puede necesitar lógica adicional
+]
+
+# Un archivo sin ninguno de estos literales no tiene nada que corregir
+CANDIDATE_NEEDLES = [(b'.studentName', b'.studentEmail', b'.studentPhone', b'.attended', b'.dueAmount')]
+
+def fix_classbooking_content(content):
+    """Corrige propiedades de ClassBooking en el contenido. Retorna (contenido, correcciones)"""
+    profiler = rule_profiler.PROFILER
+    corrections = 0
+    if profiler is not None:
+        lines = content.count('\n') + 1
+        for pattern, replacement in REPLACEMENTS:
+            content, count = profiler.subn('classbooking_props', f"{pattern.pattern} → {replacement}",
+                                           pattern, replacement, content, lines)
+            corrections += count
+        return content, corrections
+
+    for pattern, replacement in REPLACEMENTS:
+        content, count = pattern.subn(replacement, content)
+        corrections += count
+    return content, corrections
+
 def fix_classbooking_props(file_path):
     """Corrige propiedades de ClassBooking en un archivo"""
     try:
@@ -18,22 +53,7 @@ def fix_classbooking_props(file_path):
             content = f.read()
 
         original_content = content
-        corrections = 0
-
-        # Reemplazos directos
-        replacements = [
-            (r'\.studentName\b', '.playerName'),
-            (r'\.studentEmail\b', '.playerEmail'),
-            (r'\.studentPhone\b', '.playerPhone'),
-            (r'\.attended\b', '.checkedIn'),
-            (r'\.dueAmount\b', '.paidAmount'),  # Esto puede necesitar lógica adicional
-        ]
-
-        for pattern, replacement in replacements:
-            new_content, count = re.subn(pattern, replacement, content)
-            if count > 0:
-                corrections += count
-                content = new_content
+        content, corrections = fix_classbooking_content(content)
 
         if content != original_content:
             # Crear backup
@@ -54,24 +74,13 @@ def fix_classbooking_props(file_path):
         return 0
 
 def find_files_with_classbooking_props():
-    """Encuentra archivos con propiedades de ClassBooking incorrectas"""
-    import subprocess
-
-    patterns = ['studentName', 'studentEmail', 'studentPhone', 'attended', 'dueAmount']
-
-    files_set = set()
-    for pattern in patterns:
-        cmd = f"grep -rl '\\.{pattern}' app/ lib/ components/ 2>/dev/null | grep -E '\\.(ts|tsx)$' | grep -v node_modules"
-        try:
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-            files = [f.strip() for f in result.stdout.split('\n') if f.strip()]
-            files_set.update(files)
-        except:
-            pass
-
-    return sorted(list(files_set))
+    """Encuentra archivos con propiedades de ClassBooking incorrectas (una lectura por archivo, sin grep)"""
+    files = find_source_files(['app', 'lib', 'components'])
+    return select_candidates(files, {'classbooking': CANDIDATE_NEEDLES}, index=load_index())['classbooking']
 
 def main():
+    profile = rule_profiler.profile_prefix(sys.argv)
+
     print("=" * 80)
     print("🔧 CORRECCIÓN: ClassBooking Properties")
     print("=" * 80)
@@ -92,11 +101,15 @@ def main():
     files_modified = 0
 
     for file_path in files:
-        corrections = fix_classbooking_props(file_path)
+        if rule_profiler.PROFILER is not None:
+            with rule_profiler.PROFILER.for_file(rule_profiler.relative(file_path)):
+                corrections = fix_classbooking_props(file_path)
+        else:
+            corrections = fix_classbooking_props(file_path)
         if corrections > 0:
             files_modified += 1
             total_corrections += corrections
-            print(f"✓ {file_path} ({corrections} correcciones)")
+            print(f"✓ {file_path.relative_to(PROJECT_ROOT)} ({corrections} correcciones)")
 
     print()
     print("=" * 80)
@@ -106,6 +119,7 @@ def main():
     print()
     print("⚠️  NOTA: 'dueAmount' fue reemplazado por 'paidAmount'")
     print("   Verifica si la lógica necesita calcular: Class.price - paidAmount")
+    rule_profiler.finish(profile)
 
 if __name__ == '__main__':
     main()
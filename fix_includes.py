@@ -4,64 +4,47 @@ Script para corregir include statements en archivos TypeScript
 Convierte minúsculas a capitalizadas en bloques include
 """
 
-import re
 import sys
 from pathlib import Path
 
-# Patrones de corrección (minúscula → Capitalizada)
-CORRECTIONS = {
-    'club': 'Club',
-    'court': 'Court',
-    'booking': 'Booking',
-    'bookings': 'Booking',  # plural → singular capitalizado
-    'user': 'User',
-    'payment': 'Payment',
-    'payments': 'Payment',
-    'tournament': 'Tournament',
-    'class': 'Class',
-    'student': 'Student',
-    'instructor': 'Instructor',
-    'coach': 'Coach',
-    'player': 'Player',
-    'invoice': 'Invoice',
-    'bookingGroup': 'BookingGroup',
-    'splitPayments': 'splitPayments',  # Este sí es correcto en minúscula
-}
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'scripts'))
+from codemod_cache import CodemodCache, ruleset_fingerprint, script_modules
+from prisma_types import region_model
+from prefilter import literal_needles
+from relation_maps import load_relation_maps
+from ts_scanner import replace_spans, scan
 
-def fix_include_block(content):
-    """Corrige include blocks sin afectar JSON responses"""
-    lines = content.split('\n')
-    result = []
-    in_include = False
-    indent_level = 0
-
-    for line in lines:
-        # Detectar inicio de include
-        if re.search(r'include:\s*{', line):
-            in_include = True
-            indent_level = len(line) - len(line.lstrip())
-
-        # Si estamos en un include block
-        if in_include:
-            # Aplicar correcciones
-            for old, new in CORRECTIONS.items():
-                # Patron para propiedades: "  old: true" o "  old: {"
-                line = re.sub(
-                    rf'^(\s+){old}(\s*):(.*)',
-                    rf'\1{new}\2:\3',
-                    line
-                )
-
-            # Detectar fin del include block (cierre de llave con mismo indent)
-            if line.strip() in ['}', '},'] and (len(line) - len(line.lstrip())) <= indent_level + 2:
-                result.append(line)
-                if line.strip() == '}':
-                    in_include = False
-                continue
+# Patrones de corrección (minúscula → Capitalizada), generados desde schema.prisma
+CORRECTIONS = dict(load_relation_maps()['relation_fixes'])
+CORRECTIONS.pop('splitPayments', None)  # Este sí es correcto en minúscula (BookingGroup)
 
-        result.append(line)
+# Sin include ni alguna clave corregible no hay nada que hacer (ver scripts/prefilter.py)
+CANDIDATE_NEEDLES = [(b'include',), literal_needles(load_relation_maps()['relation_fixes'])]
 
-    return '\n'.join(result)
+def fix_include_block(content):
+    """
+    Corrige include blocks sin afectar JSON responses.
+    Retorna (contenido, claves corregidas).
+
+    Las claves se toman del índice de ts_scanner: solo las directas de un
+    include (o de un select anidado en un include), sin mirar indentación.
+    Si se conoce el modelo del bloque se usa su mapa exacto del schema.
+    """
+    index = scan(content)
+    by_model = load_relation_maps()['by_model']
+    edits = []
+
+    for region in index.regions('include', 'select'):
+        if region.key == 'select' and 'include' not in region.path:
+            continue
+        model = region_model(region)
+        corrections = by_model.get(model, {}) if model else CORRECTIONS
+        for prop in index.properties_in(region):
+            new = corrections.get(prop.name)
+            if new and new != prop.name:
+                edits.append((prop.start, prop.end, new))
+
+    return replace_spans(content, edits), len(edits)
 
 def process_file(file_path):
     """Procesa un archivo"""
@@ -69,7 +52,7 @@ def process_file(file_path):
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
 
-        new_content = fix_include_block(content)
+        new_content, _ = fix_include_block(content)
 
         if content != new_content:
             # Backup
@@ -117,18 +100,26 @@ def main():
         "app/c/[clubSlug]/dashboard/notifications/page.tsx",
     ]
 
+    cache = CodemodCache('fix_includes', ruleset_fingerprint(Path(__file__), *script_modules(), CORRECTIONS))
+
     count = 0
     for file_rel in files:
         file_path = base / file_rel
         if file_path.exists():
+            if cache.is_clean(file_path):
+                print(f"♻ {file_rel} (sin cambios desde la última pasada)")
+                continue
             if process_file(file_path):
                 print(f"✓ {file_rel}")
                 count += 1
             else:
                 print(f"○ {file_rel} (sin cambios)")
+            cache.mark_clean(file_path)
         else:
             print(f"⚠ {file_rel} (no encontrado)")
 
+    cache.save()
+
     print(f"\n✅ Procesados {count} archivos")
     print("💾 Backups: *.py.bak")
 
@@ -2,9 +2,47 @@
 """
 Agrega campos faltantes en prisma.*.create() para Payment, Transaction, Notification
 """
-import re
 import sys
 from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'scripts'))
+from ident_index import load_index
+from prefilter import select_candidates
+from prisma_calls import call_sites
+from source_files import PROJECT_ROOT, find_source_files
+from ts_scanner import Region, ScanIndex, replace_spans, scan
+
+CREATE_CALLS = {'prisma.payment.create', 'prisma.transaction.create', 'prisma.notification.create'}
+
+# Literales de CREATE_CALLS por separado: el escáner también une `prisma.payment\n  .create(`
+CANDIDATE_NEEDLES = [(b'prisma',), (b'payment', b'transaction', b'notification'), (b'create',)]
+
+def updated_at_edits(content: str, index: ScanIndex, region: Region) -> List[Tuple[int, int, str]]:
+    """
+    Inserciones para agregar updatedAt al final del objeto `data`, respetando
+    el formato: en línea (data: { a } → data: { a, updatedAt: new Date() }) o
+    como una línea más, tras la última propiedad y su comentario si lo tiene.
+    """
+    # Fin de la última propiedad (sin contar comentarios) antes del cierre
+    last = index.code_end(region.close)
+    empty = last == region.open + 1
+    has_comma = content[last - 1] == ','
+    line_start = content.rfind('\n', 0, region.close) + 1
+
+    if empty or content[line_start:region.close].strip():
+        if empty:
+            return [(last, last, ' updatedAt: new Date()' + (' ' if content[last] == '}' else ''))]
+        return [(last, last, f"{'' if has_comma else ','} updatedAt: new Date()")]
+
+    last_line_start = content.rfind('\n', 0, last) + 1
+    last_line_end = content.find('\n', last)
+    last_line = content[last_line_start:last]
+    indent = last_line[:len(last_line) - len(last_line.lstrip())]
+
+    edits = [] if has_comma else [(last, last, ',')]
+    edits.append((last_line_end, last_line_end, f"\n{indent}updatedAt: new Date()" + (',' if has_comma else '')))
+    return edits
 
 def fix_prisma_creates(file_path):
     """Agrega updatedAt a create() calls"""
@@ -15,61 +53,26 @@ def fix_prisma_creates(file_path):
         original_content = content
         modifications = 0
 
-        # Buscar patrones de prisma.payment.create({ data: { ... } })
-        # y agregar updatedAt si no existe
-
-        lines = content.split('\n')
-        new_lines = []
-        i = 0
-
-        while i < len(lines):
-            line = lines[i]
-            new_lines.append(line)
-
-            # Detectar inicio de create
-            if 'prisma.payment.create(' in line or 'prisma.transaction.create(' in line or \
-               'prisma.notification.create(' in line:
-                # Buscar la línea con 'data: {'
-                j = i + 1
-                while j < len(lines) and 'data: {' not in lines[j]:
-                    new_lines.append(lines[j])
-                    j += 1
-
-                if j < len(lines):
-                    # Encontramos data: {
-                    new_lines.append(lines[j])
-                    j += 1
-
-                    # Buscar el cierre de data
-                    indent_count = lines[j].index(lines[j].lstrip()) if lines[j].strip() else 0
-                    has_updated_at = False
-
-                    # Leer todas las propiedades dentro de data
-                    props_start = j
-                    brace_count = 1
-                    while j < len(lines) and brace_count > 0:
-                        if 'updatedAt' in lines[j]:
-                            has_updated_at = True
-                        if '{' in lines[j]:
-                            brace_count += lines[j].count('{')
-                        if '}' in lines[j]:
-                            brace_count -= lines[j].count('}')
-
-                        # Si llegamos al cierre y no tiene updatedAt, agregarlo
-                        if brace_count == 0 and not has_updated_at and '}' in lines[j]:
-                            # Insertar antes del cierre
-                            indent = ' ' * indent_count
-                            new_lines.append(f"{indent}updatedAt: new Date()")
-                            modifications += 1
-
-                        new_lines.append(lines[j])
-                        j += 1
-
-                    i = j - 1
-
-            i += 1
-
-        new_content = '\n'.join(new_lines)
+        # Buscar el argumento data: { ... } de cada prisma.payment.create({ ... })
+        # y agregar updatedAt si no existe. Llamadas y llaves vienen del
+        # escáner léxico: las que están en strings, templates o comentarios no cuentan.
+        index = scan(content)
+        edits = []
+
+        for call in call_sites(content).by_operation('create'):
+            if f"{call.client}.{call.delegate}.{call.operation}" not in CREATE_CALLS:
+                continue
+            data = call.arg('data')
+            region = index.region_at(data.value_start) if data else None
+            if region is None:
+                continue
+            if any(prop.name == 'updatedAt' for prop in index.properties_in(region)):
+                continue
+
+            edits.extend(updated_at_edits(content, index, region))
+            modifications += 1
+
+        new_content = replace_spans(content, edits)
 
         if modifications > 0:
             # Crear backup
@@ -88,17 +91,9 @@ def fix_prisma_creates(file_path):
         return 0
 
 def find_files_with_prisma_create():
-    """Encuentra archivos con prisma.create()"""
-    import subprocess
-
-    cmd = "grep -rl 'prisma\\.\\(payment\\|transaction\\|notification\\)\\.create(' app/ lib/ --include='*.ts' --include='*.tsx' 2>/dev/null"
-
-    try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        files = [f.strip() for f in result.stdout.split('\n') if f.strip()]
-        return files
-    except:
-        return []
+    """Encuentra archivos con prisma.create() (una lectura por archivo, sin grep)"""
+    files = find_source_files(['app', 'lib'])
+    return select_candidates(files, {'prisma_create': CANDIDATE_NEEDLES}, index=load_index())['prisma_create']
 
 def main():
     print("=" * 80)
@@ -124,7 +119,7 @@ def main():
         if modifications > 0:
             files_modified += 1
             total_modifications += modifications
-            print(f"✓ {file_path} ({modifications} modificaciones)")
+            print(f"✓ {file_path.relative_to(PROJECT_ROOT)} ({modifications} modificaciones)")
 
     print()
     print("=" * 80)
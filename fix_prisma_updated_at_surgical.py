@@ -4,30 +4,48 @@ Script quirúrgico para remover updatedAt: new Date() SOLO en prisma.*.create()
 Solo procesa archivos de producción (app/, lib/) y excluye backups
 """
 import re
+import sys
 from pathlib import Path
 
-# Solo estos 3 modelos tienen @updatedAt
-MODELS_WITH_AUTO_UPDATED = ['payment', 'notification', 'transaction']
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'scripts'))
+from prefilter import nocase
+from prisma_calls import call_sites
+from relation_maps import load_relation_maps
+from source_files import EXCLUDE_DIRS, find_source_files
+from ts_scanner import scan
 
-def should_remove_updated_at(line_before, line_with_updated, model_name):
+# Delegates (prisma.<modelo>) cuyos modelos tienen @updatedAt en schema.prisma
+MODELS_WITH_AUTO_UPDATED = load_relation_maps()['delegates_with_updated_at']
+
+# Literales necesarios: la línea updatedAt y un prisma.<modelo>.create (sin mayúsculas)
+CANDIDATE_NEEDLES = [(b'updatedAt:',), (b'new Date()',), (nocase(b'prisma.'),)]
+
+CREATE_OPERATIONS = ('create', 'createMany')
+
+def should_remove_updated_at(sites, offset):
     """
-    Determina si debe remover updatedAt basándose en contexto
+    Determina si debe remover updatedAt basándose en contexto: la llamada
+    que encierra la posición es prisma.<modelo>.create() de uno de los
+    modelos con @updatedAt y la clave está dentro de su argumento `data`.
     """
-    # Verificar que estamos en un .create() de los modelos específicos
-    for model in MODELS_WITH_AUTO_UPDATED:
-        if f'prisma.{model}.create' in line_before.lower():
-            return True
-    return False
+    call = sites.enclosing(offset)
+    if call is None or call.client != 'prisma' or call.operation not in CREATE_OPERATIONS:
+        return False
+    if call.delegate.lower() not in {model.lower() for model in MODELS_WITH_AUTO_UPDATED}:
+        return False
+    arg = call.arg_at(offset)
+    return arg is not None and arg.key == 'data'
 
-def fix_file(file_path):
+def remove_create_updated_at_lines(content):
     """
-    Remueve updatedAt: new Date() solo en contextos seguros
+    Remueve updatedAt: new Date() solo en contextos seguros.
+    Retorna (contenido, números de línea removidos)
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    modified = False
+    lines = content.splitlines(keepends=True)
+    removed = []
     new_lines = []
+    sites = None
+    offset = 0
     i = 0
 
     while i < len(lines):
@@ -35,29 +53,44 @@ def fix_file(file_path):
 
         # Buscar líneas con updatedAt: new Date()
         if 'updatedAt:' in line and 'new Date()' in line:
-            # Obtener contexto (10 líneas anteriores para buscar prisma.*.create)
-            context_before = ''.join(lines[max(0, i-10):i])
+            # Contexto exacto: la llamada Prisma que encierra la clave (en lugar
+            # de buscar "prisma.x.create" en las 10 líneas anteriores)
+            if sites is None:
+                sites = call_sites(content)
+            key_offset = offset + line.index('updatedAt:')
 
-            # Verificar si debemos remover
-            should_remove = False
-            for model in MODELS_WITH_AUTO_UPDATED:
-                if f'prisma.{model}.create' in context_before.lower():
-                    should_remove = True
-                    break
-
-            if should_remove:
+            if scan(content).is_code(key_offset) and should_remove_updated_at(sites, key_offset):
                 # Remover esta línea
-                modified = True
-                print(f"  ✂️  Removing updatedAt from line {i+1}")
+                removed.append(i + 1)
+                offset += len(line)
                 i += 1
                 continue
 
         new_lines.append(line)
+        offset += len(line)
         i += 1
 
-    if modified:
+    return ''.join(new_lines), removed
+
+def strip_create_updated_at(content):
+    """Igual que remove_create_updated_at_lines pero retorna (contenido, líneas removidas)"""
+    content, removed = remove_create_updated_at_lines(content)
+    return content, len(removed)
+
+def fix_file(file_path):
+    """
+    Remueve updatedAt: new Date() solo en contextos seguros
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    new_content, removed = remove_create_updated_at_lines(content)
+    for line_number in removed:
+        print(f"  ✂️  Removing updatedAt from line {line_number}")
+
+    if removed:
         with open(file_path, 'w', encoding='utf-8') as f:
-            f.writelines(new_lines)
+            f.write(new_content)
         return True
     return False
 
@@ -67,24 +100,15 @@ def main():
     """
     count = 0
 
-    # Procesar solo app/ y lib/, excluyendo backups
-    for directory in ['app', 'lib']:
-        for file_path in Path(directory).rglob('*.ts*'):
-            # Excluir archivos innecesarios
-            if (
-                'node_modules' in str(file_path) or
-                '.next' in str(file_path) or
-                '.bak' in str(file_path) or
-                '.backup' in str(file_path) or
-                '_bak' in str(file_path) or
-                '__tests__' in str(file_path) or
-                '.test.ts' in str(file_path)
-            ):
-                continue
+    # Procesar solo app/ y lib/ (el walker ya deja fuera backups como *.ts.bak)
+    for file_path in find_source_files(['app', 'lib'], exclude_dirs=EXCLUDE_DIRS | {'__tests__'}):
+        name = file_path.name
+        if '.test.ts' in name or '.backup' in name or '_bak' in name:
+            continue
 
-            if fix_file(file_path):
-                print(f"✅ Fixed: {file_path}")
-                count += 1
+        if fix_file(file_path):
+            print(f"✅ Fixed: {file_path}")
+            count += 1
 
     print(f"\n📊 Total files fixed: {count}")
     print(f"\n🔍 Models with @updatedAt: {', '.join(MODELS_WITH_AUTO_UPDATED)}")
@@ -4,29 +4,43 @@ Análisis de errores TS2322 (Type not assignable) para identificar patrones
 """
 import re
 import sys
-from collections import defaultdict
+from collections import Counter, defaultdict
+from pathlib import Path
 
-def parse_ts2322_errors(tsc_output):
-    """Parsea errores TS2322 del output de TypeScript"""
-    errors = []
-    lines = tsc_output.strip().split('\n')
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'scripts'))
+from tsc_categories import CATEGORIZER
+from tsc_diagnostics import iter_diagnostics, read_lines
 
-    for line in lines:
-        # Formato: file(line,col): error TS2322: Type 'X' is not assignable to type 'Y'.
-        match = re.match(r'^([^(]+)\((\d+),(\d+)\): error TS2322: Type \'([^\']+)\' is not assignable to type \'([^\']+)\'', line)
-        if match:
-            errors.append({
-                'file': match.group(1),
-                'line': int(match.group(2)),
-                'col': int(match.group(3)),
-                'from_type': match.group(4),
-                'to_type': match.group(5)
-            })
+# Formato del mensaje: Type 'X' is not assignable to type 'Y'.
+TS2322_MESSAGE = re.compile(r"^Type '([^']+)' is not assignable to type '([^']+)'")
 
-    return errors
+def parse_ts2322_errors(tsc_output):
+    """
+    Parsea errores TS2322 del output de TypeScript en streaming.
+
+    tsc_output puede ser un iterable de líneas (archivo abierto, sys.stdin)
+    o el texto completo. Produce un dict por error, con las líneas de
+    continuación del diagnóstico en 'details'.
+    """
+    if isinstance(tsc_output, str):
+        tsc_output = tsc_output.split('\n')
+
+    for diagnostic in iter_diagnostics(tsc_output):
+        if diagnostic.code != 'TS2322':
+            continue
+        match = TS2322_MESSAGE.match(diagnostic.message)
+        if match:
+            yield {
+                'file': diagnostic.file,
+                'line': diagnostic.line,
+                'col': diagnostic.col,
+                'from_type': match.group(1),
+                'to_type': match.group(2),
+                'details': diagnostic.details,
+            }
 
 def categorize_errors(errors):
-    """Categoriza errores por patrones comunes"""
+    """Categoriza errores por patrones comunes (reglas TS2322 de scripts/tsc_categories.py)"""
     categories = {
         'variant_mismatch': [],  # Variantes de tipos (outline vs primary, etc)
         'string_to_date': [],  # string → Date
@@ -38,45 +52,8 @@ def categorize_errors(errors):
         'other': []
     }
 
-    # Patrones de variantes (buttons, badges, etc)
-    variant_keywords = ['outline', 'primary', 'secondary', 'ghost', 'warning', 'success',
-                        'danger', 'info', 'default', 'glass', 'glow', 'gradient']
-
     for error in errors:
-        from_type = error['from_type'].lower()
-        to_type = error['to_type'].lower()
-
-        # Detectar problemas de variantes
-        if any(v in from_type or v in to_type for v in variant_keywords):
-            categories['variant_mismatch'].append(error)
-
-        # Detectar string → Date
-        elif 'string' in from_type and 'date' in to_type:
-            categories['string_to_date'].append(error)
-
-        # Detectar problemas con tipos Prisma
-        elif 'createinput' in from_type.lower() or 'updateinput' in from_type.lower() or \
-             'createinput' in to_type.lower() or 'updateinput' in to_type.lower():
-            categories['prisma_type'].append(error)
-
-        # Detectar problemas de props de componentes
-        elif 'intrinsicattributes' in to_type.lower() or 'props' in to_type.lower():
-            categories['component_props'].append(error)
-
-        # Detectar arrays
-        elif '[]' in from_type or '[]' in to_type:
-            categories['array_types'].append(error)
-
-        # Detectar objetos con propiedades específicas
-        elif '{' in from_type or '{' in to_type:
-            categories['object_shape'].append(error)
-
-        # Detectar enums
-        elif from_type.startswith('"') and to_type.startswith('"'):
-            categories['enum_values'].append(error)
-
-        else:
-            categories['other'].append(error)
+        categories[CATEGORIZER.category('TS2322', error)].append(error)
 
     return categories
 
@@ -140,22 +117,16 @@ def print_analysis(categories, patterns):
             print(f"{'═' * 80}")
 
             # Top archivos afectados
-            file_counts = defaultdict(int)
-            for error in errors:
-                file_counts[error['file']] += 1
+            file_counts = Counter(error['file'] for error in errors)
 
             print("\n🔸 Top archivos afectados:")
-            for file, count in sorted(file_counts.items(), key=lambda x: x[1], reverse=True)[:5]:
+            for file, count in file_counts.most_common(5):
                 print(f"  • {file}: {count} errores")
 
             # Conversiones más comunes
             print("\n🔸 Conversiones más comunes:")
-            type_conversions = defaultdict(int)
-            for error in errors:
-                conversion = f"{error['from_type']} → {error['to_type']}"
-                type_conversions[conversion] += 1
-
-            for conversion, count in sorted(type_conversions.items(), key=lambda x: x[1], reverse=True)[:10]:
+            type_conversions = Counter(f"{error['from_type']} → {error['to_type']}" for error in errors)
+            for conversion, count in type_conversions.most_common(10):
                 # Truncar conversiones muy largas
                 if len(conversion) > 70:
                     conversion = conversion[:67] + "..."
@@ -210,19 +181,18 @@ def suggest_corrections(categories):
         print(f"   📊 {len(categories['object_shape'])} errores")
 
 def main():
-    if len(sys.argv) < 2:
-        print("Uso: python fix_ts2322_analysis.py <archivo_con_errores_tsc.txt>")
+    # Sin argumento pero con pipe: leer de stdin
+    input_file = sys.argv[1] if len(sys.argv) >= 2 else (None if sys.stdin.isatty() else '-')
+
+    if input_file is None:
+        print("Uso: python fix_ts2322_analysis.py <archivo_con_errores_tsc.txt | ->")
         print("\nEjemplo:")
-        print("  npm run type-check 2>&1 | grep 'error TS2322' > errors_ts2322.txt")
-        print("  python fix_ts2322_analysis.py errors_ts2322.txt")
+        print("  npm run type-check > type-check-temp.txt 2>&1")
+        print("  python fix_ts2322_analysis.py type-check-temp.txt")
+        print("  npm run type-check 2>&1 | python fix_ts2322_analysis.py -")
         sys.exit(1)
 
-    input_file = sys.argv[1]
-
-    with open(input_file, 'r', encoding='utf-8') as f:
-        tsc_output = f.read()
-
-    errors = parse_ts2322_errors(tsc_output)
+    errors = list(parse_ts2322_errors(read_lines(input_file)))
 
     if not errors:
         print("❌ No se encontraron errores TS2322 en el archivo")
@@ -5,30 +5,43 @@ y crear estrategias de corrección
 """
 import re
 import sys
-from collections import defaultdict
+from collections import Counter, defaultdict
 from pathlib import Path
 
-def parse_ts2339_errors(tsc_output):
-    """Parsea errores TS2339 del output de TypeScript"""
-    errors = []
-    lines = tsc_output.strip().split('\n')
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'scripts'))
+from tsc_categories import CATEGORIZER
+from tsc_diagnostics import iter_diagnostics, read_lines
 
-    for line in lines:
-        # Formato: file(line,col): error TS2339: Property 'prop' does not exist on type 'Type'.
-        match = re.match(r'^([^(]+)\((\d+),(\d+)\): error TS2339: Property \'([^\']+)\' does not exist on type \'([^\']+)\'', line)
-        if match:
-            errors.append({
-                'file': match.group(1),
-                'line': int(match.group(2)),
-                'col': int(match.group(3)),
-                'property': match.group(4),
-                'type': match.group(5)
-            })
+# Formato del mensaje: Property 'prop' does not exist on type 'Type'.
+TS2339_MESSAGE = re.compile(r"^Property '([^']+)' does not exist on type '([^']+)'")
 
-    return errors
+def parse_ts2339_errors(tsc_output):
+    """
+    Parsea errores TS2339 del output de TypeScript en streaming.
+
+    tsc_output puede ser un iterable de líneas (archivo abierto, sys.stdin)
+    o el texto completo. Produce un dict por error, con las líneas de
+    continuación del diagnóstico en 'details'.
+    """
+    if isinstance(tsc_output, str):
+        tsc_output = tsc_output.split('\n')
+
+    for diagnostic in iter_diagnostics(tsc_output):
+        if diagnostic.code != 'TS2339':
+            continue
+        match = TS2339_MESSAGE.match(diagnostic.message)
+        if match:
+            yield {
+                'file': diagnostic.file,
+                'line': diagnostic.line,
+                'col': diagnostic.col,
+                'property': match.group(1),
+                'type': match.group(2),
+                'details': diagnostic.details,
+            }
 
 def categorize_errors(errors):
-    """Categoriza errores por patrones comunes"""
+    """Categoriza errores por patrones comunes (reglas TS2339 de scripts/tsc_categories.py)"""
     categories = {
         'relation_access': [],  # Acceso a relaciones no incluidas
         'field_name': [],  # Nombres de campos incorrectos
@@ -38,44 +51,8 @@ def categorize_errors(errors):
         'other': []
     }
 
-    # Palabras clave para detectar relaciones de Prisma
-    prisma_relations = ['booking', 'club', 'court', 'player', 'user', 'class', 'tournament',
-                        'payment', 'invoice', 'notification', 'instructor', 'package']
-
-    # Propiedades comunes de agregaciones
-    aggregate_props = ['_sum', '_count', '_avg', '_min', '_max']
-
-    # Propiedades de respuestas API
-    response_props = ['success', 'error', 'errors', 'message', 'data']
-
     for error in errors:
-        prop = error['property']
-        type_str = error['type'].lower()
-
-        # Detectar acceso a relaciones
-        if prop in ['Booking', 'Club', 'Court', 'Player', 'User', 'Class'] or \
-           any(rel in prop.lower() for rel in prisma_relations):
-            categories['relation_access'].append(error)
-
-        # Detectar problemas con agregaciones
-        elif prop in aggregate_props or '_sum' in type_str or '_count' in type_str:
-            categories['aggregate'].append(error)
-
-        # Detectar propiedades de respuesta
-        elif prop in response_props:
-            categories['response_type'].append(error)
-
-        # Detectar nombres de campos comunes (price vs amount, etc)
-        elif prop in ['amount', 'price', 'studentName', 'dueAmount', 'attended',
-                      'isGroup', 'isClass', 'color', 'externalInvoice']:
-            categories['field_name'].append(error)
-
-        # Detectar cadenas opcionales
-        elif 'undefined' in type_str or '| null' in type_str:
-            categories['optional_chain'].append(error)
-
-        else:
-            categories['other'].append(error)
+        categories[CATEGORIZER.category('TS2339', error)].append(error)
 
     return categories
 
@@ -108,20 +85,14 @@ def print_analysis(categories):
 
             # Mostrar top 5 errores de esta categoría
             print("\nTop archivos afectados:")
-            file_counts = defaultdict(int)
-            for error in errors:
-                file_counts[error['file']] += 1
-
-            for file, count in sorted(file_counts.items(), key=lambda x: x[1], reverse=True)[:5]:
+            file_counts = Counter(error['file'] for error in errors)
+            for file, count in file_counts.most_common(5):
                 print(f"  • {file}: {count} errores")
 
             # Mostrar propiedades más comunes
             print("\nPropiedades más frecuentes:")
-            prop_counts = defaultdict(int)
-            for error in errors:
-                prop_counts[error['property']] += 1
-
-            for prop, count in sorted(prop_counts.items(), key=lambda x: x[1], reverse=True)[:10]:
+            prop_counts = Counter(error['property'] for error in errors)
+            for prop, count in prop_counts.most_common(10):
                 print(f"  • {prop}: {count} veces")
 
 def suggest_corrections(categories):
@@ -162,19 +133,18 @@ def suggest_corrections(categories):
         print(f"   📊 {len(categories['optional_chain'])} errores")
 
 def main():
-    if len(sys.argv) < 2:
-        print("Uso: python fix_ts2339_analysis.py <archivo_con_errores_tsc.txt>")
+    # Sin argumento pero con pipe: leer de stdin
+    input_file = sys.argv[1] if len(sys.argv) >= 2 else (None if sys.stdin.isatty() else '-')
+
+    if input_file is None:
+        print("Uso: python fix_ts2339_analysis.py <archivo_con_errores_tsc.txt | ->")
         print("\nEjemplo:")
-        print("  npm run type-check 2>&1 | grep 'error TS2339' > errors_ts2339.txt")
-        print("  python fix_ts2339_analysis.py errors_ts2339.txt")
+        print("  npm run type-check > type-check-temp.txt 2>&1")
+        print("  python fix_ts2339_analysis.py type-check-temp.txt")
+        print("  npm run type-check 2>&1 | python fix_ts2339_analysis.py -")
         sys.exit(1)
 
-    input_file = sys.argv[1]
-
-    with open(input_file, 'r', encoding='utf-8') as f:
-        tsc_output = f.read()
-
-    errors = parse_ts2339_errors(tsc_output)
+    errors = list(parse_ts2339_errors(read_lines(input_file)))
 
     if not errors:
         print("❌ No se encontraron errores TS2339 en el archivo")
@@ -5,93 +5,83 @@ Convierte accesos de propiedades según sugerencias de TypeScript
 """
 
 import re
-import subprocess
 import sys
 from pathlib import Path
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'scripts'))
+from tsc_diagnostics import PROJECT_ROOT, load_diagnostics_from_argv, parse_diagnostic
+from tsc_edits import apply_diagnostic_fixes, nearest_match
+
+IDENT_CHAR = re.compile(r'[\w$]')
+
+# Rutas que no son de producción
+NON_PRODUCTION_PATHS = ['scripts/', '__tests__/', 'tests/', 'padelyzer-mobile/', 'prisma/seed']
+
 def get_ts2551_errors():
-    """Obtiene todos los errores TS2551 de producción"""
-    result = subprocess.run(
-        ['npm', 'run', 'type-check'],
-        capture_output=True,
-        text=True,
-        cwd='/Users/ja/v4/bmad-nextjs-app'
-    )
-
-    errors = []
-    output = result.stdout + result.stderr
-    for line in output.split('\n'):
-        if 'error TS2551' in line and not any(x in line for x in ['scripts/', '__tests__/', 'tests/', 'padelyzer-mobile/', 'prisma/seed']):
-            errors.append(line)
-
-    return errors
+    """
+    Obtiene todos los errores TS2551 de producción.
+
+    Consulta el almacén compartido de diagnósticos (scripts/tsc_diagnostics.py)
+    en lugar de lanzar tsc: --from <log> usa un log guardado, --refresh fuerza
+    una nueva ejecución de type-check.
+    """
+    store = load_diagnostics_from_argv(sys.argv)
+    errors = (from_diagnostic(d) for d in store.query(code='TS2551', exclude=NON_PRODUCTION_PATHS))
+    return [error for error in errors if error]
+
+def from_diagnostic(diagnostic):
+    """
+    Error TS2551 a partir del Diagnostic ya parseado: archivo, posición,
+    propiedad y sugerencia de tsc (sin re-parsear la línea, así las rutas con
+    grupos de Next.js como app/(auth)/... no se pierden).
+    """
+    if diagnostic is None or diagnostic.code != 'TS2551':
+        return None
+    if not diagnostic.property or not diagnostic.suggestion:
+        return None
+    return {
+        'file': diagnostic.file,
+        'line': diagnostic.line,
+        'col': diagnostic.col,
+        'wrong': diagnostic.property,
+        'correct': diagnostic.suggestion
+    }
 
 def parse_error(error_line):
-    """Extrae información del error TS2551"""
-    # Formato: file(line,col): error TS2551: Property 'Wrong' does not exist on type '...'. Did you mean 'correct'?
-    match = re.match(r'^([^(]+)\((\d+),(\d+)\).*Property \'([^\']+)\' does not exist.*Did you mean \'([^\']+)\'', error_line)
-
+    """Extrae información de una línea TS2551 de tsc"""
+    return from_diagnostic(parse_diagnostic(error_line))
+
+def locate_fix(content, offset, line_start, line_end, error):
+    """
+    Edición para un TS2551: tsc apunta al nombre de la propiedad.
+
+    Acepta .Wrong y ['Wrong'] en la columna exacta; si el log está desfasado,
+    busca en la misma línea el acceso más cercano a la columna.
+    """
+    wrong, correct = error['wrong'], error['correct']
+    if content.startswith(wrong, offset) and not IDENT_CHAR.match(content, offset + len(wrong)):
+        return (offset, offset + len(wrong), correct)
+    if content[offset:offset + 1] in ('"', "'") and content.startswith(wrong + content[offset], offset + 1):
+        return (offset + 1, offset + 1 + len(wrong), correct)
+
+    pattern = re.compile(rf'\.({re.escape(wrong)})\b|\[["\']({re.escape(wrong)})["\']\]')
+    match = nearest_match(pattern, content, line_start, line_end, offset)
     if match:
-        return {
-            'file': match.group(1),
-            'line': int(match.group(2)),
-            'col': int(match.group(3)),
-            'wrong': match.group(4),
-            'correct': match.group(5)
-        }
+        group = 1 if match.group(1) else 2
+        return (match.start(group), match.end(group), correct)
     return None
 
-def fix_file(file_path, line_num, col_num, wrong, correct):
-    """Corrige un error específico en un archivo"""
+def fix_file(file_path, errors):
+    """Corrige todos los errores del archivo en una pasada (un backup, una escritura)"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        if line_num > len(lines):
-            return False
-
-        # Obtener la línea (índice 0-based)
-        line_idx = line_num - 1
-        original_line = lines[line_idx]
-
-        # Buscar el acceso a propiedad incorrecto
-        # Patrones: .Wrong o ['Wrong']
-        patterns = [
-            (rf'\.{wrong}\b', f'.{correct}'),  # .PropertyName
-            (rf'\[[\"\']({wrong})[\"\']\]', f'["{correct}"]'),  # ["PropertyName"] o ['PropertyName']
-        ]
-
-        new_line = original_line
-        changed = False
-        for pattern, replacement in patterns:
-            if re.search(pattern, new_line):
-                new_line = re.sub(pattern, replacement, new_line, count=1)
-                changed = True
-                break
-
-        if changed and new_line != original_line:
-            lines[line_idx] = new_line
-
-            # Backup
-            backup_path = str(file_path) + '.ts2551.bak'
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                f.write(''.join(lines))
-
-            # Write fix
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.writelines(lines)
-
-            return True
-
-        return False
-
+        return apply_diagnostic_fixes(file_path, errors, locate_fix, backup_suffix='.ts2551.bak')
     except Exception as e:
-        print(f"❌ Error fixing {file_path}:{line_num}: {e}", file=sys.stderr)
-        return False
+        print(f"❌ Error fixing {file_path}: {e}", file=sys.stderr)
+        return {'fixes': 0, 'skipped': len(errors), 'changed': 0}
 
 def main():
-    base = Path('/Users/ja/v4/bmad-nextjs-app')
+    base = PROJECT_ROOT
 
     print("🔍 Analizando errores TS2551...")
     errors = get_ts2551_errors()
@@ -105,9 +95,7 @@ def main():
     # Agrupar por archivo
     by_file = defaultdict(list)
     for error in errors:
-        parsed = parse_error(error)
-        if parsed:
-            by_file[parsed['file']].append(parsed)
+        by_file[error['file']].append(error)
 
     print(f"📁 Archivos afectados: {len(by_file)}")
 
@@ -121,12 +109,9 @@ def main():
             print(f"⚠️  {file_rel} (no encontrado)")
             continue
 
-        file_fixed = 0
-        # Procesar errores en orden inverso para no afectar números de línea
-        for error in sorted(file_errors, key=lambda e: (e['line'], e['col']), reverse=True):
-            if fix_file(file_path, error['line'], error['col'], error['wrong'], error['correct']):
-                fixed_count += 1
-                file_fixed += 1
+        # Offsets calculados sobre el contenido original: el orden no importa
+        file_fixed = fix_file(file_path, file_errors)['fixes']
+        fixed_count += file_fixed
 
         if file_fixed > 0:
             print(f"✓ {file_rel} ({file_fixed} correcciones)")
@@ -4,17 +4,23 @@ Remove all updatedAt: new Date() from Prisma create() calls
 """
 import re
 import os
+import sys
 from pathlib import Path
 
-def remove_updated_at_from_file(file_path):
-    """Remove updatedAt: new Date() from a single file"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'scripts'))
+from codemod_cache import CodemodCache, ruleset_fingerprint, script_modules
+from codemod_parallel import parse_jobs, process_files, write_source
+from source_files import find_source_files
 
-    original = content
+# Literals strip_updated_at needs before it can change anything (see scripts/prefilter.py)
+CANDIDATE_NEEDLES = [(b'updatedAt',), (b'new Date()',)]
 
+def strip_updated_at(content):
+    """Remove updatedAt: new Date() from file content. Returns (content, removals)"""
     # Pattern 1: updatedAt: new Date(), (with comma)
-    content = re.sub(r',?\s*updatedAt:\s*new Date\(\)\s*,?', '', content)
+    content, removals = re.subn(r',?\s*updatedAt:\s*new Date\(\)\s*,?', '', content)
+    if not removals:
+        return content, 0
 
     # Pattern 2: Clean up double commas
     content = re.sub(r',\s*,', ',', content)
@@ -25,27 +31,46 @@ def remove_updated_at_from_file(file_path):
     # Pattern 4: Clean up orphaned commas at start of lines
     content = re.sub(r'\n\s*,\s*\n', '\n', content)
 
+    return content, removals
+
+def remove_updated_at_from_file(file_path):
+    """Remove updatedAt: new Date() from a single file"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        original = f.read()
+
+    content, _ = strip_updated_at(original)
+
     if content != original:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        write_source(file_path, content)
         return True
     return False
 
+def process_file(file_path, dry_run=False):
+    """remove_updated_at_from_file as a codemod_parallel worker (per-file time budget)"""
+    return {'changed': int(remove_updated_at_from_file(file_path)), 'fixes': 0}
+
 def main():
     """Process all TypeScript files"""
     count = 0
+    # Skip files untouched since the last pass with the same rules
+    cache = CodemodCache('remove_updated_at', ruleset_fingerprint(Path(__file__), *script_modules()))
 
     # Find all TS/TSX files in app and lib
-    for directory in ['app', 'lib']:
-        for file_path in Path(directory).rglob('*.ts*'):
-            if 'node_modules' in str(file_path) or '.next' in str(file_path):
-                continue
+    files = cache.filter(find_source_files(['app', 'lib']))
+
+    # A file over --file-budget (pathological regex backtracking) is left
+    # untouched and quarantined instead of hanging the run
+    for file_path, result in process_files(process_file, files, jobs=parse_jobs(sys.argv)):
+        if result.get('changed'):
+            print(f"Processed: {file_path}")
+            count += 1
+        cache.record(file_path, result)
 
-            if remove_updated_at_from_file(file_path):
-                print(f"Processed: {file_path}")
-                count += 1
+    cache.save()
 
     print(f"\nProcessed {count} files")
+    if cache.skipped:
+        print(f"Skipped {cache.skipped} unchanged files (cache)")
 
 if __name__ == '__main__':
     main()
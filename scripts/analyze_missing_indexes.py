@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Asesor de índices: cruza los campos de where/orderBy/distinct de cada
+consulta Prisma con los índices declarados en schema.prisma.
+
+Para cada llamada findMany/findFirst/count/aggregate/groupBy/updateMany/
+deleteMany del índice de llamadas (prisma_calls.py) se obtiene la forma
+de la consulta sobre el modelo:
+
+- campos de igualdad del where (club: x, status: { in: [...] }, claves
+  abreviadas { clubId } y los objetos de AND: [...]),
+- campos de rango (gte/lt/contains/...), de orden (orderBy) y distinct.
+
+El índice candidato sigue la regla igualdad → orden → rango: primero los
+campos de igualdad (en el orden del schema), luego los de orderBy/distinct
+y al final el primer campo de rango. Se compara con @id, @unique, @@id,
+@@unique y @@index del modelo (el mismo grafo de prisma_schema.py que usa
+parse_prisma_schema en analyze_relation_names.py):
+
+- cubierto: un índice existente empieza por los mismos campos (los de
+  igualdad en cualquier orden), o la igualdad incluye una clave única,
+- parcial: un índice existente empieza por un campo de igualdad,
+- faltante: ninguno sirve.
+
+El ranking suma, por (modelo, índice), el peso de cada llamada: las que
+están bajo app/api (rutas de request) pesan API_WEIGHT, el resto 1; las
+parciales valen la mitad. Un candidato que es prefijo de otro recomendado
+del mismo modelo se suma al más largo (ese índice también lo sirve).
+
+Uso:
+    python scripts/analyze_missing_indexes.py [--top 30] [--sql prisma/suggested_indexes.sql]
+
+Las consultas con where dinámico (where: filtros, { ...base }) no se
+pueden analizar estáticamente y solo se cuentan.
+"""
+
+import re
+import sys
+from collections import Counter, defaultdict
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from codemod_cache import PROJECT_ROOT
+from prisma_calls import WHITESPACE, CallSite, CallSiteCache
+from prisma_schema import Model, PrismaSchema, load_schema, schema_sha1
+from source_files import find_source_files
+from ts_scanner import Region, ScanIndex, scan
+
+SOURCE_DIRS = ['app', 'lib']
+
+# Operaciones que recorren filas (findUnique/update/delete ya exigen una clave única)
+QUERY_OPERATIONS = {
+    'findMany', 'findFirst', 'findFirstOrThrow', 'count', 'aggregate', 'groupBy',
+    'updateMany', 'deleteMany',
+}
+
+# Llamadas en rutas de request (app/api/...) pesan más en el ranking
+API_WEIGHT = 3.0
+PARTIAL_WEIGHT = 0.5
+
+RANGE_OPERATORS = {'gt', 'gte', 'lt', 'lte', 'not', 'notIn', 'contains', 'startsWith', 'endsWith', 'search'}
+EQUALITY_OPERATORS = {'equals', 'in'}
+
+# Postgres corta los identificadores a 63 bytes
+MAX_IDENTIFIER = 63
+
+QUOTED_NAME = re.compile(r'[\'"](\w+)[\'"]')
+
+class QueryShape(NamedTuple):
+    """Campos de la consulta sobre el modelo."""
+    equality: Tuple[str, ...]
+    sort: Tuple[str, ...]
+    ranges: Tuple[str, ...]
+
+class Recommendation(NamedTuple):
+    model: str
+    columns: Tuple[str, ...]
+    status: str                       # 'faltante' | 'parcial'
+    score: float
+    calls: int
+    api_calls: int
+    operations: Counter
+    examples: List[str]
+
+def object_fields(index: ScanIndex, region: Region) -> List[Tuple[str, Optional[Region], int, int]]:
+    """
+    (clave, objeto de su valor o None, inicio, fin del valor) de las claves
+    directas; las abreviadas van al final sin valor.
+    """
+    props = index.properties_in(region)
+    fields = []
+    for i, prop in enumerate(props):
+        value_start = WHITESPACE.match(index.content, prop.colon + 1).end()
+        value_end = props[i + 1].start if i + 1 < len(props) else region.close
+        fields.append((prop.name, index.region_at(value_start) if prop.value == '{' else None,
+                       value_start, value_end))
+    fields.extend((name, None, region.close, region.close) for name, _, _ in index.shorthand_keys(region))
+    return fields
+
+def is_column(model: Model, name: str) -> bool:
+    f = model.fields.get(name)
+    return f is not None and not f.is_relation and not f.is_list
+
+def parse_where(text: str, model: Model, equality: List[str], ranges: List[str]):
+    """Campos de igualdad y de rango del objeto where (y de sus AND: [...])."""
+    index = scan(text)
+    root = index.region_at(0)
+    if root is None:
+        return
+
+    def visit(region: Region):
+        for name, value, value_start, value_end in object_fields(index, region):
+            if name == 'AND':
+                # Objetos directos del array AND: [{ ... }, { ... }]
+                for inner in index.region_list:
+                    if inner.key is None and inner.depth == region.depth + 1 and value_start < inner.open < value_end:
+                        visit(inner)
+                continue
+            if not is_column(model, name):
+                continue
+            operators = {p.name for p in index.properties_in(value)} if value else set()
+            if operators & RANGE_OPERATORS and not operators & EQUALITY_OPERATORS:
+                ranges.append(name)
+            else:
+                equality.append(name)
+
+    visit(root)
+
+def parse_sort(text: str, model: Model) -> List[str]:
+    """Campos escalares de orderBy ({ a: 'asc' } o [{ a: 'asc' }, { b: 'desc' }]) en orden."""
+    index = scan(text)
+    fields = []
+    for region in index.region_list:
+        if region.depth == 0:
+            fields.extend(name for name, *_ in object_fields(index, region) if is_column(model, name))
+    return fields
+
+def query_shape(call: CallSite, content: str, model: Model) -> Optional[QueryShape]:
+    """Forma de la consulta; None si el where es dinámico (variable, spread)."""
+    equality: List[str] = []
+    ranges: List[str] = []
+    sort: List[str] = []
+
+    where = call.arg('where')
+    if where is not None:
+        text = content[where.value_start:where.value_end]
+        if not text.startswith('{') or '...' in text:
+            return None
+        parse_where(text, model, equality, ranges)
+    elif call.args == () and call.close > call.open + 1:
+        # Argumentos en una variable: findMany(query)
+        return None
+
+    for key in ('orderBy', 'distinct', 'by'):
+        arg = call.arg(key)
+        if arg is None:
+            continue
+        text = content[arg.value_start:arg.value_end]
+        if key == 'orderBy':
+            sort.extend(parse_sort(text, model))
+        else:
+            sort.extend(name for name in QUOTED_NAME.findall(text) if is_column(model, name))
+
+    # Igualdad en orden del schema: candidatos iguales comparten forma canónica
+    order = {name: i for i, name in enumerate(model.fields)}
+    equality = sorted(set(equality), key=order.get)
+    sort = [name for i, name in enumerate(sort) if name not in equality and name not in sort[:i]]
+    ranges = [name for name in ranges if name not in equality and name not in sort]
+    return QueryShape(tuple(equality), tuple(sort), tuple(ranges))
+
+def candidate_columns(shape: QueryShape) -> Tuple[str, ...]:
+    """Igualdad → orden → rango (solo el primero: tras un rango el índice ya no ordena)."""
+    return shape.equality + shape.sort + shape.ranges[:1]
+
+def existing_indexes(model: Model) -> List[Tuple[str, ...]]:
+    declared = [model.id_fields] + list(model.unique_constraints) + list(model.indexes)
+    return [tuple(columns) for columns in declared if columns]
+
+def coverage(model: Model, shape: QueryShape, columns: Tuple[str, ...]) -> str:
+    """'cubierto', 'parcial' o 'faltante' según los índices declarados del modelo."""
+    equality = set(shape.equality)
+    uniques = [tuple(u) for u in [model.id_fields] + list(model.unique_constraints) if u]
+    if any(set(unique) <= equality for unique in uniques):
+        return 'cubierto'
+
+    size = len(shape.equality)
+    for index in existing_indexes(model):
+        if set(index[:size]) == equality and index[size:len(columns)] == columns[size:]:
+            return 'cubierto'
+    if any(index[0] in equality or index[0] == columns[0] for index in existing_indexes(model)):
+        return 'parcial'
+    return 'faltante'
+
+def collect(schema: PrismaSchema, files: List[Path]) -> Tuple[List[Recommendation], Dict[str, int]]:
+    """Recorre las llamadas del árbol y agrega candidatos no cubiertos por (modelo, columnas)."""
+    cache = CallSiteCache.open()
+    totals = Counter()
+    grouped: Dict[Tuple[str, Tuple[str, ...]], dict] = {}
+
+    for file_path in files:
+        rel = file_path.relative_to(PROJECT_ROOT).as_posix()
+        try:
+            content = file_path.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+        weight = API_WEIGHT if rel.startswith('app/api/') else 1.0
+
+        for call in cache.for_content(content):
+            if call.operation not in QUERY_OPERATIONS:
+                continue
+            model = schema.model(call.model) if call.model else None
+            if model is None:
+                totals['sin modelo'] += 1
+                continue
+            totals['consultas'] += 1
+            shape = query_shape(call, content, model)
+            if shape is None:
+                totals['dinámicas'] += 1
+                continue
+            columns = candidate_columns(shape)
+            if not columns:
+                totals['sin filtro'] += 1
+                continue
+            status = coverage(model, shape, columns)
+            totals[status] += 1
+            if status == 'cubierto':
+                continue
+
+            entry = grouped.setdefault((model.name, columns), {
+                'score': 0.0, 'calls': 0, 'api_calls': 0, 'partial': 0,
+                'operations': Counter(), 'examples': [],
+            })
+            entry['score'] += weight * (PARTIAL_WEIGHT if status == 'parcial' else 1.0)
+            entry['calls'] += 1
+            entry['api_calls'] += 1 if weight > 1 else 0
+            entry['partial'] += 1 if status == 'parcial' else 0
+            entry['operations'][call.operation] += 1
+            if len(entry['examples']) < 3:
+                entry['examples'].append(f"{rel}:{call.line}")
+
+    cache.save()
+    return merge_prefixes(grouped), dict(totals)
+
+def merge_prefixes(grouped: Dict[Tuple[str, Tuple[str, ...]], dict]) -> List[Recommendation]:
+    """Suma cada candidato al candidato más largo del mismo modelo del que es prefijo."""
+    by_model: Dict[str, List[Tuple[str, ...]]] = defaultdict(list)
+    for model, columns in grouped:
+        by_model[model].append(columns)
+
+    for model, candidates in by_model.items():
+        for columns in sorted(candidates, key=len):
+            longer = [other for other in candidates
+                      if len(other) > len(columns) and other[:len(columns)] == columns
+                      and (model, other) in grouped]
+            if not longer:
+                continue
+            target = grouped[(model, max(longer, key=lambda c: grouped[(model, c)]['score']))]
+            source = grouped.pop((model, columns))
+            for key in ('score', 'calls', 'api_calls', 'partial'):
+                target[key] += source[key]
+            target['operations'].update(source['operations'])
+            target['examples'].extend(source['examples'][:3 - len(target['examples'])])
+
+    recommendations = [
+        Recommendation(model, columns, 'parcial' if entry['partial'] == entry['calls'] else 'faltante',
+                       entry['score'], entry['calls'], entry['api_calls'], entry['operations'], entry['examples'])
+        for (model, columns), entry in grouped.items()
+    ]
+    return sorted(recommendations, key=lambda r: (-r.score, r.model, r.columns))
+
+def index_name(table: str, columns: Tuple[str, ...]) -> str:
+    """Nombre por defecto de Prisma: Tabla_col1_col2_idx (máximo 63 caracteres)."""
+    name = f"{table}_{'_'.join(columns)}_idx"
+    return name if len(name) <= MAX_IDENTIFIER else name[:MAX_IDENTIFIER - 4] + '_idx'
+
+def migration_sql(schema: PrismaSchema, recommendations: List[Recommendation]) -> str:
+    lines = [
+        '-- Índices sugeridos por scripts/analyze_missing_indexes.py — REVISAR antes de aplicar',
+        f'-- Generado: {date.today().isoformat()} (schema sha1 {schema_sha1()[:12]})',
+        '-- Agregar también el @@index al modelo en schema.prisma para que prisma migrate no lo borre.',
+        '-- En producción con tablas grandes: CREATE INDEX CONCURRENTLY (fuera de una transacción).',
+        '',
+    ]
+    for rec in recommendations:
+        table = schema.model(rec.model).db_name or rec.model
+        columns = ', '.join(f'"{c}"' for c in rec.columns)
+        lines.append(f"-- {rec.model}: puntuación {rec.score:.1f}, {rec.calls} llamadas "
+                     f"({rec.api_calls} en app/api), {rec.status}")
+        lines.append(f"-- schema.prisma: @@index([{', '.join(rec.columns)}])")
+        lines.append(f'CREATE INDEX IF NOT EXISTS "{index_name(table, rec.columns)}" ON "{table}"({columns});')
+        lines.append('')
+    return '\n'.join(lines)
+
+def option_value(name: str, default: Optional[str] = None) -> Optional[str]:
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return default
+
+def main():
+    top = int(option_value('--top', '30'))
+    sql_path = option_value('--sql')
+
+    schema = load_schema()
+    declared = sum(len(model.indexes) for model in schema.models.values())
+    print(f"🔍 Schema: {len(schema.models)} modelos, {declared} @@index")
+
+    files = find_source_files(SOURCE_DIRS)
+    recommendations, totals = collect(schema, files)
+
+    print(f"📇 {totals.get('consultas', 0)} consultas analizables en {len(files)} archivos: "
+          f"{totals.get('cubierto', 0)} cubiertas, {totals.get('parcial', 0)} parciales, "
+          f"{totals.get('faltante', 0)} sin índice")
+    print(f"   ({totals.get('dinámicas', 0)} con where dinámico, {totals.get('sin filtro', 0)} sin filtro ni orden, "
+          f"{totals.get('sin modelo', 0)} sobre delegates fuera del schema)")
+
+    if not recommendations:
+        print("\n✅ Todas las consultas analizables tienen un índice que las cubre")
+        return
+
+    print(f"\n🏆 Índices sugeridos (peso app/api ×{API_WEIGHT:g}, parciales ×{PARTIAL_WEIGHT:g}):\n")
+    for rank, rec in enumerate(recommendations[:top], 1):
+        ops = ', '.join(f"{op}×{n}" for op, n in rec.operations.most_common())
+        kind = 'compuesto' if len(rec.columns) > 1 else 'simple'
+        print(f"  {rank:>3}. {rec.model}({', '.join(rec.columns)})  [{kind}, {rec.status}]  "
+              f"puntuación {rec.score:.1f} — {rec.calls} llamadas, {rec.api_calls} en app/api")
+        print(f"       {ops}; ej. {', '.join(rec.examples)}")
+
+    sql = migration_sql(schema, recommendations[:top])
+    if sql_path:
+        Path(sql_path).write_text(sql, encoding='utf-8')
+        print(f"\n💾 Migración para revisar: {sql_path}")
+    else:
+        print("\n📝 Migración sugerida (usa --sql <archivo> para guardarla):\n")
+        print(sql)
+
+if __name__ == '__main__':
+    main()
@@ -10,10 +10,13 @@ Este script:
 """
 
 import re
-import subprocess
+import sys
 from pathlib import Path
 from collections import defaultdict
 
+from prisma_schema import PROJECT_ROOT, SCHEMA_PATH, load_schema
+from tsc_diagnostics import load_diagnostics_from_argv
+
 # Colores para output
 class Colors:
     HEADER = '\033[95m'
@@ -29,85 +32,29 @@ def parse_prisma_schema(schema_path: Path) -> dict:
     """
     Parsea schema.prisma y extrae nombres de relaciones correctos.
 
+    Usa el grafo compartido de prisma_schema.py: una relación es un campo
+    cuyo tipo es otro modelo (los enums opcionales ya no cuentan).
+
     Returns:
         dict: {
-            'Booking': ['Club', 'Court', 'Player', 'BookingGroup', 'Notification', 'Payment', 'SplitPayment', 'Transaction'],
+            'Booking': ['BookingGroup', 'Club', 'Court', 'Notification', 'Payment', 'Player', 'SplitPayment', 'Transaction'],
             'Club': ['Booking', 'BookingGroup', 'Court', 'Class', ...],
             ...
         }
     """
-    schema_content = schema_path.read_text()
-
-    # Regex para encontrar modelos y sus relaciones
-    model_pattern = re.compile(r'^model\s+(\w+)\s*{(.*?)^}', re.MULTILINE | re.DOTALL)
-
-    # Regex para encontrar campos de relación
-    # Formato: nombreCampo  TipoRelacion  @relation(...)
-    # o:       nombreCampo  TipoRelacion? @relation(...)
-    # o:       nombreCampo  TipoRelacion[]
-    relation_pattern = re.compile(r'^\s+(\w+)\s+([\w\?]+)\s+(?:@relation|$)', re.MULTILINE)
-
-    models = {}
-
-    for model_match in model_pattern.finditer(schema_content):
-        model_name = model_match.group(1)
-        model_body = model_match.group(2)
-
-        relations = []
-
-        for line in model_body.split('\n'):
-            line = line.strip()
-
-            # Saltar líneas vacías, comentarios, y campos que no son relaciones
-            if not line or line.startswith('//') or line.startswith('@@'):
-                continue
-
-            # Buscar campos de relación
-            # Formato: NombreCampo TipoRelacion (@relation o sin nada más)
-            # Ejemplos:
-            #   Club                Club           @relation(...)
-            #   Court               Court          @relation(...)
-            #   Booking             Booking[]
-            #   BookingGroup?       BookingGroup?  @relation(...)
-
-            parts = line.split()
-            if len(parts) >= 2:
-                field_name = parts[0]
-                field_type = parts[1]
-
-                # Remover ? y [] del tipo
-                clean_type = field_type.rstrip('?').rstrip('[]')
-
-                # Verificar si es un modelo (empieza con mayúscula)
-                if clean_type and clean_type[0].isupper():
-                    # Verificar que sea una relación (tiene @relation o es un array/opcional)
-                    if '@relation' in line or '[]' in field_type or '?' in field_type:
-                        relations.append(field_name)
-
-        models[model_name] = sorted(set(relations))
-
-    return models
+    schema = load_schema(schema_path)
+    return {name: sorted(model.relations) for name, model in schema.models.items()}
 
 def get_typescript_errors(error_code: str) -> list:
-    """Obtiene errores TypeScript específicos del proyecto."""
+    """
+    Obtiene errores TypeScript específicos del proyecto.
+
+    Consulta el almacén compartido de diagnósticos: tsc se ejecuta como mucho
+    una vez aunque se pidan varios códigos (TS2551 y TS2561).
+    """
     try:
-        result = subprocess.run(
-            ['npm', 'run', 'type-check'],
-            capture_output=True,
-            text=True,
-            timeout=120,
-            cwd='/users/ja/v4/bmad-nextjs-app'
-        )
-
-        output = result.stdout + result.stderr
-
-        # Filtrar solo errores del tipo especificado
-        errors = []
-        for line in output.split('\n'):
-            if f'error {error_code}' in line:
-                errors.append(line)
-
-        return errors
+        store = load_diagnostics_from_argv(sys.argv)
+        return [d.raw for d in store.query(code=error_code)]
     except Exception as e:
         print(f"{Colors.FAIL}Error ejecutando type-check: {e}{Colors.ENDC}")
         return []
@@ -269,7 +216,7 @@ def print_report(analysis: dict):
     print()
 
 def main():
-    schema_path = Path('/users/ja/v4/bmad-nextjs-app/prisma/schema.prisma')
+    schema_path = SCHEMA_PATH
 
     if not schema_path.exists():
         print(f"{Colors.FAIL}❌ Error: No se encontró schema.prisma en {schema_path}{Colors.ENDC}")
@@ -288,7 +235,7 @@ def main():
 
     # Guardar resultados para script de corrección
     import json
-    output_path = Path('/users/ja/v4/bmad-nextjs-app/scripts/relation_fixes.json')
+    output_path = PROJECT_ROOT / 'scripts' / 'relation_fixes.json'
 
     output_data = {
         'fixes': analysis['fixes'],
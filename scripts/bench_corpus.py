@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Generador de un corpus TS/TSX sintético para los benchmarks (bench_suite.py).
+
+El corpus imita el árbol real (app/ lib/ components/):
+- mismo número de archivos por escala (1×, 10×, 100×) y la misma
+  distribución de tamaños (se muestrea de los tamaños reales),
+- la misma proporción de .tsx,
+- contenido construido con los modelos, campos y relaciones de
+  schema.prisma: findMany con include/select (con nombres de relación
+  correctos y en el formato antiguo en minúscula), prisma.<modelo>.create
+  con updatedAt: new Date(), accesos a relaciones, propiedades antiguas de
+  ClassBooking (studentName, attended, ...), booking.amount, awaits
+  secuenciales, consultas dentro de bucles, JSX, comentarios y templates.
+
+Cada archivo se genera con su propia semilla (semilla global + índice), así
+que el archivo i es idéntico en cualquier escala y proceso, y el corpus se
+puede recorrer en streaming: a 100× no se retiene en memoria.
+
+Junto al contenido se generan los diagnósticos de tsc que ese código
+produciría (TS2551 en accesos con el nombre de relación antiguo, TS2561 en
+claves de include, TS2339 en propiedades renombradas, TS2322 sueltos) con
+su línea y columna exactas, para medir los analizadores de la salida de tsc
+y los fixers guiados por diagnósticos.
+
+Uso:
+    corpus = SyntheticCorpus(scale=10)
+    for item in corpus:                       # SyntheticFile(path, content, diagnostics)
+        ...
+
+    python scripts/bench_corpus.py                       # perfil del árbol y muestra
+    python scripts/bench_corpus.py --scale 10 --write /tmp/corpus   # a disco (+ tsc.log)
+"""
+
+import random
+import sys
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from codemod_cache import PROJECT_ROOT
+from prisma_schema import Field, PrismaSchema, load_schema
+from relation_maps import load_relation_maps
+from source_files import find_source_files
+
+SOURCE_DIRS = ['app', 'lib', 'components']
+DEFAULT_SEED = 20240601
+
+# Propiedades antiguas de ClassBooking (fix_classbooking_props) → tipo que tsc citaría
+LEGACY_PROPERTIES = ['studentName', 'studentEmail', 'studentPhone', 'attended', 'dueAmount']
+ASSIGNABILITY = [
+    ("string", "Date"), ("string | null", "string"), ("number", "Decimal"),
+    ('"outline"', '"primary" | "secondary"'), ("undefined", "number"),
+]
+SCALAR_VALUES = {
+    'String': "'{word}'", 'Int': '{number}', 'Float': '{number}.5', 'Boolean': 'true',
+    'DateTime': 'new Date()', 'Decimal': '{number}', 'Json': '{{}}', 'BigInt': '{number}n',
+}
+WORDS = ['club', 'padel', 'court', 'active', 'pending', 'madrid', 'torneo', 'demo', 'reserva', 'pago']
+
+class TreeProfile(NamedTuple):
+    """Forma del árbol real que el corpus reproduce."""
+    files: int
+    bytes: int
+    sizes: Tuple[int, ...]    # ordenados
+    tsx_ratio: float
+
+class Diagnostic(NamedTuple):
+    """Diagnóstico sintético con posición exacta (línea y columna 1-based)."""
+    line: int
+    col: int
+    code: str
+    message: str
+
+class SyntheticFile(NamedTuple):
+    path: str
+    content: str
+    diagnostics: Tuple[Diagnostic, ...]
+
+    def tsc_lines(self) -> List[str]:
+        """Líneas como las imprime tsc (con una continuación en los TS2322)."""
+        lines = []
+        for d in self.diagnostics:
+            lines.append(f"{self.path}({d.line},{d.col}): error {d.code}: {d.message}")
+            if d.code == 'TS2322':
+                lines.append("  Types of property 'value' are incompatible.")
+        return lines
+
+def tree_profile(dirs: Optional[List[str]] = None) -> TreeProfile:
+    """Número de archivos, tamaños y proporción de .tsx del árbol real."""
+    files = find_source_files(dirs or SOURCE_DIRS)
+    sizes = []
+    for file_path in files:
+        try:
+            sizes.append(file_path.stat().st_size)
+        except OSError:
+            continue
+    if not sizes:
+        # Sin árbol (checkout parcial): una forma razonable por defecto
+        sizes = [2000, 5000, 9000, 15000]
+    tsx = sum(1 for f in files if f.suffix == '.tsx')
+    return TreeProfile(len(sizes), sum(sizes), tuple(sorted(sizes)), tsx / len(files) if files else 0.5)
+
+class _Builder:
+    """Acumula el texto de un archivo y los diagnósticos con su offset absoluto."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.size = 0
+        self.marks: List[Tuple[int, str, str]] = []   # (offset, código, mensaje)
+
+    def add(self, text: str, marks: List[Tuple[int, str, str]] = ()):
+        for offset, code, message in marks:
+            self.marks.append((self.size + offset, code, message))
+        self.parts.append(text)
+        self.size += len(text)
+
+    def build(self, path: str) -> SyntheticFile:
+        content = ''.join(self.parts)
+        starts = [0]
+        starts.extend(i + 1 for i, char in enumerate(content) if char == '\n')
+        diagnostics = []
+        for offset, code, message in sorted(self.marks):
+            line = bisect_right(starts, offset)
+            diagnostics.append(Diagnostic(line, offset - starts[line - 1] + 1, code, message))
+        return SyntheticFile(path, content, tuple(diagnostics))
+
+class SyntheticCorpus:
+    """Corpus determinista de profile.files × scale archivos, recorrido en streaming."""
+
+    def __init__(self, scale: float = 1, seed: int = DEFAULT_SEED,
+                 profile: Optional[TreeProfile] = None, schema: Optional[PrismaSchema] = None):
+        self.scale = scale
+        self.seed = seed
+        self.profile = profile or tree_profile()
+        self.schema = schema or load_schema()
+        self.files = max(1, round(self.profile.files * scale))
+
+        self.legacy: Dict[str, str] = load_relation_maps()['relation_fixes']
+        # Modelos con relaciones singulares (accesos) y listas (includes)
+        self.models = sorted(name for name, model in self.schema.models.items() if model.relations)
+
+    def __len__(self) -> int:
+        return self.files
+
+    def __iter__(self) -> Iterator[SyntheticFile]:
+        for i in range(self.files):
+            yield self.file(i)
+
+    # -- piezas ------------------------------------------------------------
+
+    def _var(self, model: str) -> str:
+        return model[0].lower() + model[1:]
+
+    def _legacy_name(self, relation: Field) -> Optional[str]:
+        """Nombre antiguo en minúscula de la relación, si el mapa de correcciones lo conoce."""
+        name = relation.name[0].lower() + relation.name[1:]
+        return name if name != relation.name and self.legacy.get(name) == relation.name else None
+
+    def _value(self, rng: random.Random, f: Field) -> str:
+        if f.is_enum:
+            values = self.schema.enums.get(f.type) or ['ACTIVE']
+            return f"'{rng.choice(values)}'"
+        template = SCALAR_VALUES.get(f.type, "'{word}'")
+        return template.format(word=rng.choice(WORDS), number=rng.randint(1, 500))
+
+    def _scalars(self, model: str) -> List[Field]:
+        return [f for f in self.schema.models[model].fields.values() if not f.is_relation and not f.is_list]
+
+    def _relation_key(self, rng: random.Random, relation: Field, marks: list, text: str, model: str) -> str:
+        """Clave de la relación: la del schema o (1 de cada 3) la antigua, con su TS2561."""
+        legacy = self._legacy_name(relation)
+        if legacy and rng.random() < 0.33:
+            marks.append((len(text), 'TS2561',
+                          f"Object literal may only specify known properties, but '{legacy}' does not exist "
+                          f"in type '{model}Include<DefaultArgs>'. Did you mean to write '{relation.name}'?"))
+            return legacy
+        return relation.name
+
+    def find_many(self, rng: random.Random, indent: str) -> Tuple[str, list]:
+        model = rng.choice(self.models)
+        var = self._var(model)
+        scalars = self._scalars(model)
+        relations = list(self.schema.models[model].relations.values())
+        marks: list = []
+        text = f"{indent}const {var}List = await prisma.{var}.findMany({{\n{indent}  where: {{\n"
+        for f in rng.sample(scalars, min(len(scalars), rng.randint(1, 3))):
+            text += f"{indent}    {f.name}: {self._value(rng, f)},\n"
+        text += f"{indent}  }},\n{indent}  include: {{\n"
+        for relation in rng.sample(relations, min(len(relations), rng.randint(1, 3))):
+            text += f"{indent}    "
+            key = self._relation_key(rng, relation, marks, text, model)
+            if relation.is_list and rng.random() < 0.5:
+                nested = self._scalars(relation.type)
+                field = nested[0].name if nested else 'id'
+                text += f"{key}: {{\n{indent}      select: {{ id: true, {field}: true }},\n"
+                text += f"{indent}      take: {rng.randint(5, 50)}\n{indent}    }},\n"
+            else:
+                text += f"{key}: true,\n"
+        text += f"{indent}  }},\n{indent}  orderBy: {{ createdAt: 'desc' }}"
+        text += f",\n{indent}  take: {rng.randint(10, 100)}\n" if rng.random() < 0.5 else "\n"
+        text += f"{indent}}})\n"
+        return text, marks
+
+    def create(self, rng: random.Random, indent: str) -> Tuple[str, list]:
+        model = rng.choice(self.models)
+        var = self._var(model)
+        text = f"{indent}const created{model} = await prisma.{var}.create({{\n{indent}  data: {{\n"
+        for f in self._scalars(model)[:rng.randint(2, 6)]:
+            if f.name in ('createdAt', 'updatedAt'):
+                continue
+            text += f"{indent}    {f.name}: {self._value(rng, f)},\n"
+        text += f"{indent}    updatedAt: new Date()\n{indent}  }}\n{indent}}})\n"
+        return text, []
+
+    def access(self, rng: random.Random, indent: str) -> Tuple[str, list]:
+        model = rng.choice(self.models)
+        var = self._var(model)
+        singular = [r for r in self.schema.models[model].relations.values() if not r.is_list]
+        if not singular:
+            return f"{indent}const total = {var}List.length\n", []
+        relation = rng.choice(singular)
+        nested = self._scalars(relation.type)
+        field = rng.choice(nested).name if nested else 'id'
+        legacy = self._legacy_name(relation)
+        marks: list = []
+        prefix = f"{indent}const {relation.name[0].lower()}{relation.name[1:]}Label = {var}."
+        if legacy and rng.random() < 0.5:
+            marks.append((len(prefix), 'TS2551', f"Property '{legacy}' does not exist on type '{model}'. "
+                                                 f"Did you mean '{relation.name}'?"))
+            name = legacy
+        else:
+            name = relation.name
+        return f"{prefix}{name}?.{field} ?? ''\n", marks
+
+    def class_booking_props(self, rng: random.Random, indent: str) -> Tuple[str, list]:
+        prop = rng.choice(LEGACY_PROPERTIES)
+        prefix = f"{indent}const {prop}Value = booking."
+        marks = [(len(prefix), 'TS2339', f"Property '{prop}' does not exist on type 'ClassBooking'.")]
+        text = f"{prefix}{prop}\n"
+        if rng.random() < 0.5:
+            line = f"{indent}const price = booking."
+            marks.append((len(text) + len(line), 'TS2339', "Property 'amount' does not exist on type 'Booking'."))
+            text += f"{line}amount / 100\n"
+        return text, marks
+
+    def sequential(self, rng: random.Random, indent: str) -> Tuple[str, list]:
+        text = ''
+        for model in rng.sample(self.models, min(len(self.models), rng.randint(2, 4))):
+            var = self._var(model)
+            if rng.random() < 0.5:
+                text += f"{indent}const {var}Count = await prisma.{var}.count({{ where: {{ clubId }} }})\n"
+            else:
+                text += f"{indent}// Totales de {model}\n"
+                text += f"{indent}const {var}Stats = await prisma.{var}.aggregate({{ _count: {{ id: true }} }})\n"
+        return text, []
+
+    def loop(self, rng: random.Random, indent: str) -> Tuple[str, list]:
+        model = rng.choice(self.models)
+        var = self._var(model)
+        text = f"{indent}for (const item of items) {{\n"
+        text += f"{indent}  const {var} = await prisma.{var}.findFirst({{ where: {{ id: item.{var}Id }} }})\n"
+        text += f"{indent}  results.push({{ ...item, {var} }})\n{indent}}}\n"
+        return text, []
+
+    def auth(self, rng: random.Random, indent: str) -> Tuple[str, list]:
+        return f"{indent}const session = await requireAuthAPI()\n{indent}const clubId = session.user.clubId\n", []
+
+    def misc(self, rng: random.Random, indent: str) -> Tuple[str, list]:
+        word = rng.choice(WORDS)
+        marks: list = []
+        text = f"{indent}// TODO: revisar {word} (include: {{ court: true }} en comentario)\n"
+        text += f"{indent}const label = `${{{rng.choice(WORDS)}}} - {word}: ${{new Date().toISOString()}}`\n"
+        if rng.random() < 0.3:
+            source, target = rng.choice(ASSIGNABILITY)
+            line = f"{indent}const value: {target.split(' ')[0].strip(chr(34))} = "
+            marks.append((len(text) + len(indent) + 6, 'TS2322',
+                          f"Type '{source}' is not assignable to type '{target}'."))
+            text += f"{line}input as any\n"
+        return text, marks
+
+    def jsx(self, rng: random.Random, indent: str, model: str) -> Tuple[str, list]:
+        var = self._var(model)
+        fields = [f.name for f in self._scalars(model)[:3]] or ['id']
+        text = f"{indent}return (\n{indent}  <div className=\"space-y-4 p-6\">\n"
+        text += f"{indent}    <h2 className=\"text-lg font-semibold\">{model}</h2>\n"
+        text += f"{indent}    {{{var}List.map(({var}) => (\n"
+        text += f"{indent}      <Card key={{{var}.id}} className=\"flex items-center gap-2\">\n"
+        for name in fields:
+            text += f"{indent}        <span>{{String({var}.{name})}}</span>\n"
+        text += f"{indent}      </Card>\n{indent}    ))}}\n{indent}  </div>\n{indent})\n"
+        return text, []
+
+    # -- archivos ----------------------------------------------------------
+
+    SERVER_BLOCKS = (('find_many', 5), ('create', 3), ('access', 4), ('class_booking_props', 2),
+                     ('sequential', 2), ('loop', 1), ('misc', 2))
+
+    def _blocks(self, rng: random.Random, count: int, indent: str, builder: _Builder):
+        names = [name for name, _ in self.SERVER_BLOCKS]
+        weights = [weight for _, weight in self.SERVER_BLOCKS]
+        for name in rng.choices(names, weights, k=count):
+            builder.add(*getattr(self, name)(rng, indent))
+
+    def file(self, i: int) -> SyntheticFile:
+        rng = random.Random(f"{self.seed}:{i}")
+        target = rng.choice(self.profile.sizes)
+        tsx = rng.random() < self.profile.tsx_ratio
+        model = rng.choice(self.models)
+        builder = _Builder()
+
+        if tsx:
+            path = f"components/{self._var(model)}/{model}View{i}.tsx"
+            builder.add("'use client'\n\nimport { useEffect, useState } from 'react'\n"
+                        "import { Card } from '@/components/ui/card'\n\n")
+            n = 0
+            while builder.size < target:
+                n += 1
+                shown = rng.choice(self.models)
+                blocks = rng.randint(0, 2)
+                # Con consultas es un server component (async); si no, uno de cliente con estado
+                builder.add(f"export {'async ' if blocks else ''}function {shown}Panel{n}"
+                            f"({{ {self._var(shown)}List }}: Props) {{\n"
+                            + ('' if blocks else "  const [open, setOpen] = useState(false)\n"))
+                self._blocks(rng, blocks, '  ', builder)
+                builder.add(*self.jsx(rng, '  ', shown))
+                builder.add("}\n\n")
+        else:
+            route = rng.random() < 0.6
+            path = (f"app/api/{self._var(model)}s/{i}/route.ts" if route
+                    else f"lib/services/{self._var(model)}-{i}.ts")
+            builder.add("import { NextRequest, NextResponse } from 'next/server'\n"
+                        "import { prisma } from '@/lib/config/prisma'\n"
+                        "import { requireAuthAPI } from '@/lib/auth/actions'\n\n")
+            n = 0
+            while builder.size < target:
+                n += 1
+                name = rng.choice(['GET', 'POST', 'PUT', 'DELETE']) if route and n <= 4 else f"load{model}{n}"
+                builder.add(f"export async function {name}(request: NextRequest) {{\n  try {{\n")
+                builder.add(*self.auth(rng, '    '))
+                builder.add("    const items: any[] = []\n    const results: any[] = []\n")
+                self._blocks(rng, rng.randint(2, 5), '    ', builder)
+                builder.add("    return NextResponse.json({ success: true, data: results })\n"
+                            "  } catch (error) {\n"
+                            "    console.error('Error:', error)\n"
+                            "    return NextResponse.json({ success: false, error: 'Error interno' }, { status: 500 })\n"
+                            "  }\n}\n\n")
+        return builder.build(path)
+
+    def write(self, target_dir: Path) -> Tuple[int, int]:
+        """Escribe el corpus y su tsc.log en target_dir; devuelve (archivos, bytes)."""
+        total = 0
+        with open(target_dir / 'tsc.log', 'w', encoding='utf-8') as log:
+            for item in self:
+                file_path = target_dir / item.path
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                file_path.write_text(item.content, encoding='utf-8')
+                total += len(item.content.encode('utf-8'))
+                for line in item.tsc_lines():
+                    log.write(line + '\n')
+        return self.files, total
+
+def main():
+    scale = float(sys.argv[sys.argv.index('--scale') + 1]) if '--scale' in sys.argv else 1
+    profile = tree_profile()
+    print(f"📂 Árbol real: {profile.files} archivos, {profile.bytes / 1e6:.1f} MB, "
+          f"mediana {profile.sizes[len(profile.sizes) // 2]:,} bytes, {profile.tsx_ratio:.0%} .tsx")
+    corpus = SyntheticCorpus(scale, profile=profile)
+
+    if '--write' in sys.argv:
+        target_dir = Path(sys.argv[sys.argv.index('--write') + 1]).resolve()
+        # Las rutas del corpus (app/, lib/, components/) no pueden caer sobre las reales
+        if any(d in (target_dir, *target_dir.parents) for d in [PROJECT_ROOT] + [PROJECT_ROOT / d for d in SOURCE_DIRS]):
+            raise SystemExit("❌ Escribe el corpus fuera del árbol del proyecto (ej. /tmp/corpus)")
+        target_dir.mkdir(parents=True, exist_ok=True)
+        files, total = corpus.write(target_dir)
+        print(f"💾 {files:,} archivos ({total / 1e6:.1f} MB) + tsc.log en {target_dir}")
+        return
+
+    sample = corpus.file(0)
+    print(f"🧪 Corpus {scale:g}×: {len(corpus):,} archivos (semilla {corpus.seed})")
+    print(f"\n📄 Muestra: {sample.path} ({len(sample.content):,} bytes, {len(sample.diagnostics)} diagnósticos)\n")
+    print(sample.content[:1500])
+    print('\n'.join(sample.tsc_lines()[:5]))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark del motor de reescritura de fix_relations_final.py.
+
+Compara, sobre el árbol real app/ lib/ components/:
+1. Legacy: todos los COMPILED_PATTERNS sobre cada línea (líneas × patrones)
+2. Disparador: una pasada de TRIGGER_PATTERN por línea (apply_patterns)
+
+Verifica además que ambas salidas sean idénticas byte a byte.
+
+Uso:
+    python scripts/bench_fix_relations_final.py [--repeat N]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from fix_relations_final import COMPILED_PATTERNS, PLURAL_RELATIONS, SINGULAR_RELATIONS, apply_patterns
+
+BASE_DIR = Path(__file__).parent.parent
+SOURCE_DIRS = ['app', 'lib', 'components']
+
+# Casos con coincidencias solapadas donde el orden de aplicación importa
+EDGE_CASES = [
+    'const x = club.court.club.name',
+    'include: {club:{club:{club: true}}}',
+    'include: { booking: { include: { court: true, club: true } }, bookings: true }',
+    'booking.club.court.id + court.club.booking.id',
+    'select: { splitPayments: true, payments: { where: {} } }',
+    # Clave que ha estado en SINGULAR y PLURAL a la vez (Transactions / Transaction)
+    'include: { transactions: true }',
+    'include: { club: true, transactions: { where: {} } }',
+]
+
+# Claves presentes en ambos mapas: sus patrones comparten entrada en PATTERN_INDEX
+EDGE_CASES += [
+    line
+    for key in sorted(set(SINGULAR_RELATIONS) & set(PLURAL_RELATIONS))
+    for line in (f'include: {{ {key}: true }}', f'select: {{ id: true, {key}: {{ where: {{}} }} }}')
+]
+
+def legacy_apply(line: str) -> str:
+    """Aplicación original: todos los patrones en secuencia."""
+    for pattern, replacement in COMPILED_PATTERNS:
+        line = pattern.sub(replacement, line)
+    return line
+
+def load_lines() -> list:
+    lines = []
+    for directory in SOURCE_DIRS:
+        for pattern in ('**/*.ts', '**/*.tsx'):
+            for file_path in (BASE_DIR / directory).glob(pattern):
+                try:
+                    lines.extend(file_path.read_text(encoding='utf-8').split('\n'))
+                except (OSError, UnicodeDecodeError):
+                    continue
+    return lines
+
+def time_engine(engine, lines: list, repeat: int) -> tuple:
+    best = float('inf')
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = [engine(line) for line in lines]
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+def main():
+    repeat = int(sys.argv[sys.argv.index('--repeat') + 1]) if '--repeat' in sys.argv else 3
+
+    lines = load_lines() + EDGE_CASES
+    print(f"📂 {len(lines):,} líneas, {len(COMPILED_PATTERNS)} patrones")
+
+    legacy_time, legacy_output = time_engine(legacy_apply, lines, repeat)
+    trigger_time, trigger_output = time_engine(apply_patterns, lines, repeat)
+
+    mismatches = [
+        (original, old, new)
+        for original, old, new in zip(lines, legacy_output, trigger_output)
+        if old != new
+    ]
+    changed = sum(1 for original, old in zip(lines, legacy_output) if original != old)
+
+    print(f"\n⏱️  Legacy (líneas × patrones): {legacy_time:8.3f}s")
+    print(f"⏱️  Disparador único:           {trigger_time:8.3f}s")
+    print(f"🚀 Speedup: {legacy_time / trigger_time:.1f}x")
+    print(f"✏️  Líneas modificadas: {changed:,}")
+
+    if mismatches:
+        print(f"\n❌ {len(mismatches)} líneas difieren del motor original:")
+        for original, old, new in mismatches[:10]:
+            print(f"   {original!r}\n     legacy:    {old!r}\n     disparador: {new!r}")
+        sys.exit(1)
+
+    print("\n✅ Salida idéntica byte a byte")
+
+if __name__ == '__main__':
+    main()
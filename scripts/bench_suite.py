@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks de los fixers y analizadores sobre un corpus sintético.
+
+Para cada escala (1×, 10×, 100× el tamaño del árbol) se genera una vez el
+corpus de bench_corpus.py en un archivo temporal y cada objetivo se mide en
+un proceso NUEVO que lo recorre en streaming:
+
+- throughput (archivos/s y MB/s) sobre el tiempo de la función medida, sin
+  contar la lectura del corpus,
+- latencia por archivo: p50, p90, p99 y máximo,
+- pico de RSS del proceso (ru_maxrss) y cuánto creció durante la medición,
+- unidades de trabajo (fixes, hallazgos o diagnósticos) como comprobación
+  de que el objetivo hizo algo.
+
+Antes de medir, cada proceso calienta el objetivo con unos archivos fuera
+del corpus (imports perezosos, regex compiladas, mapas del schema).
+
+Objetivos: todas las reglas del pipeline (fix_relations_*, remove_updated_at,
+fix_includes, ...), el pipeline completo con prefiltro, los fixers que
+trabajan sobre archivos (fix_prisma_create, fix_ts2551_auto, fix_ts2561_auto,
+sobre un archivo temporal), los analizadores de la salida de tsc
+(fix_ts2339_analysis, fix_ts2322_analysis, tsc_categories,
+tsc_diagnostics) y los de código (ts_scanner, prisma_calls, detect_*,
+analyze_missing_indexes, ...).
+
+El tiempo crece lineal con la escala: todos los objetivos tardan ~1,5 min
+a 1×, así que 100× es una corrida larga (CI nocturno); en local, --scales 1
+o unos pocos --targets.
+
+El resultado va a JSON (por defecto .codemod-cache/bench/<commit>.json)
+para comparar entre commits:
+
+    python scripts/bench_suite.py                          # 1×, 10× y 100×, todo
+    python scripts/bench_suite.py --scales 1,10 --targets relations_v3,pipeline
+    python scripts/bench_suite.py --list
+    python scripts/bench_suite.py --scales 1 --compare .codemod-cache/bench/abc1234.json
+    python scripts/bench_suite.py --compare old.json --fail-above 15   # exit 1 si algo es >15% más lento
+"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: sin ru_maxrss
+    resource = None
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from bench_corpus import DEFAULT_SEED, SyntheticCorpus, SyntheticFile, tree_profile
+from codemod_cache import CACHE_DIR
+
+REPORT_VERSION = 1
+DEFAULT_SCALES = (1, 10, 100)
+WARMUP_FILES = 5
+RESULTS_DIR = CACHE_DIR / 'bench'
+
+# Objetivo preparado: SyntheticFile + directorio de trabajo → unidades de trabajo
+Runner = Callable[[SyntheticFile, Path], int]
+
+class Target(NamedTuple):
+    name: str
+    group: str          # fixer | analyzer | tsc
+    description: str
+    setup: Callable[[], Runner]
+
+TARGETS: Dict[str, Target] = {}
+
+def register(name: str, group: str, description: str):
+    def decorator(setup: Callable[[], Runner]):
+        TARGETS[name] = Target(name, group, description, setup)
+        return setup
+    return decorator
+
+# -- objetivos -------------------------------------------------------------
+
+def _register_pipeline_rules():
+    """Una entrada por regla registrada en codemod_pipeline (mismo orden)."""
+    from codemod_pipeline import RULES, load_rule
+
+    def setup_rule(rule_name: str) -> Callable[[], Runner]:
+        def setup() -> Runner:
+            rule = load_rule(rule_name)
+            return lambda item, workdir: rule(item.content)[1]
+        return setup
+
+    for spec in RULES.values():
+        register(spec.name, 'fixer', f"{spec.module}.{spec.function}")(setup_rule(spec.name))
+
+_register_pipeline_rules()
+
+@register('pipeline', 'fixer', 'codemod_pipeline.run_rules: reglas por defecto con prefiltro')
+def _pipeline() -> Runner:
+    from codemod_pipeline import RULES, candidate_selector, run_rules
+    rule_names = tuple(spec.name for spec in RULES.values() if spec.default)
+    selector = candidate_selector(rule_names)
+
+    def run(item: SyntheticFile, workdir: Path) -> int:
+        active = selector.rules_for(item.content.encode('utf-8'))
+        if not active:
+            return 0
+        _, stats = run_rules(item.content, rule_names, active)
+        return sum(fixes for fixes, _ in stats.values())
+    return run
+
+def _write_item(item: SyntheticFile, workdir: Path) -> Path:
+    file_path = workdir / Path(item.path).name
+    file_path.write_text(item.content, encoding='utf-8')
+    return file_path
+
+@register('prisma_create', 'fixer', 'fix_prisma_create.fix_prisma_creates (archivo temporal)')
+def _prisma_create() -> Runner:
+    from fix_prisma_create import fix_prisma_creates
+    return lambda item, workdir: fix_prisma_creates(_write_item(item, workdir))
+
+def _diagnostic_fixer(module_name: str, code: str) -> Runner:
+    import importlib
+    from tsc_edits import apply_diagnostic_fixes
+    module = importlib.import_module(module_name)
+
+    def run(item: SyntheticFile, workdir: Path) -> int:
+        lines = [line for line in item.tsc_lines() if f"error {code}:" in line]
+        errors = [error for error in map(module.parse_error, lines) if error]
+        if not errors:
+            return 0
+        file_path = _write_item(item, workdir)
+        return apply_diagnostic_fixes(file_path, errors, module.locate_fix, dry_run=True)['fixes']
+    return run
+
+@register('ts2551_auto', 'fixer', 'fix_ts2551_auto: TS2551 → apply_diagnostic_fixes (dry run)')
+def _ts2551() -> Runner:
+    return _diagnostic_fixer('fix_ts2551_auto', 'TS2551')
+
+@register('ts2561_auto', 'fixer', 'fix_ts2561_auto: TS2561 → apply_diagnostic_fixes (dry run)')
+def _ts2561() -> Runner:
+    return _diagnostic_fixer('fix_ts2561_auto', 'TS2561')
+
+@register('ts2339_analysis', 'tsc', 'fix_ts2339_analysis: parse + categorize_errors')
+def _ts2339() -> Runner:
+    from fix_ts2339_analysis import categorize_errors, parse_ts2339_errors
+
+    def run(item: SyntheticFile, workdir: Path) -> int:
+        errors = list(parse_ts2339_errors(item.tsc_lines()))
+        categorize_errors(errors)
+        return len(errors)
+    return run
+
+@register('ts2322_analysis', 'tsc', 'fix_ts2322_analysis: parse + categorize + analyze_patterns')
+def _ts2322() -> Runner:
+    from fix_ts2322_analysis import analyze_patterns, categorize_errors, parse_ts2322_errors
+
+    def run(item: SyntheticFile, workdir: Path) -> int:
+        errors = list(parse_ts2322_errors(item.tsc_lines()))
+        categorize_errors(errors)
+        analyze_patterns(errors)
+        return len(errors)
+    return run
+
+@register('tsc_categories', 'tsc', 'tsc_categories: categorize (todos los códigos, una pasada)')
+def _tsc_categories() -> Runner:
+    from tsc_categories import CATEGORIZER
+    from tsc_diagnostics import iter_diagnostics
+    return lambda item, workdir: CATEGORIZER.categorize(iter_diagnostics(item.tsc_lines())).total
+
+@register('tsc_diagnostics', 'tsc', 'tsc_diagnostics.iter_diagnostics')
+def _tsc_diagnostics() -> Runner:
+    from tsc_diagnostics import iter_diagnostics
+    return lambda item, workdir: sum(1 for _ in iter_diagnostics(item.tsc_lines()))
+
+@register('ts_scanner', 'analyzer', 'ts_scanner.scan (sin memo)')
+def _scanner() -> Runner:
+    from ts_scanner import scan
+    # __wrapped__: la función sin lru_cache, para medir siempre el escaneo
+    return lambda item, workdir: len(scan.__wrapped__(item.content).region_list)
+
+@register('prisma_calls', 'analyzer', 'prisma_calls.extract_calls')
+def _prisma_calls() -> Runner:
+    from prisma_calls import extract_calls
+    return lambda item, workdir: len(extract_calls(item.content))
+
+@register('prisma_types', 'analyzer', 'prisma_types.infer_bindings')
+def _prisma_types() -> Runner:
+    from prisma_types import infer_bindings
+    return lambda item, workdir: len(infer_bindings(item.content).types)
+
+@register('prefilter', 'analyzer', 'prefilter.CandidateSelector.rules_for (reglas por defecto)')
+def _prefilter() -> Runner:
+    from codemod_pipeline import RULES, candidate_selector
+    selector = candidate_selector(tuple(spec.name for spec in RULES.values() if spec.default))
+    return lambda item, workdir: len(selector.rules_for(item.content.encode('utf-8')))
+
+@register('n_plus_one', 'analyzer', 'detect_n_plus_one.analyze_file')
+def _n_plus_one() -> Runner:
+    from detect_n_plus_one import analyze_file
+    from prisma_calls import CallSiteCache
+    from prisma_schema import load_schema
+    schema = load_schema()
+    # Caché en memoria nueva por archivo: la persistente mediría la caché, no el análisis
+    return lambda item, workdir: len(analyze_file(item.path, item.content, CallSiteCache(Path(os.devnull)), schema))
+
+@register('overfetching', 'analyzer', 'detect_overfetching.analyze_call por llamada')
+def _overfetching() -> Runner:
+    from detect_overfetching import DEFAULT_MAX_DEPTH, analyze_call
+    from prisma_calls import call_sites
+    from prisma_schema import load_schema
+    schema = load_schema()
+
+    def run(item: SyntheticFile, workdir: Path) -> int:
+        return sum(len(analyze_call(call, item.content, schema, DEFAULT_MAX_DEPTH))
+                   for call in call_sites(item.content) if call.model)
+    return run
+
+@register('missing_indexes', 'analyzer', 'analyze_missing_indexes.query_shape + coverage por llamada')
+def _missing_indexes() -> Runner:
+    from analyze_missing_indexes import candidate_columns, coverage, query_shape
+    from prisma_calls import call_sites
+    from prisma_schema import load_schema
+    schema = load_schema()
+
+    def run(item: SyntheticFile, workdir: Path) -> int:
+        shapes = 0
+        for call in call_sites(item.content):
+            model = schema.model(call.model) if call.model else None
+            shape = query_shape(call, item.content, model) if model else None
+            if shape is not None:
+                coverage(model, shape, candidate_columns(shape))
+                shapes += 1
+        return shapes
+    return run
+
+@register('sequential_awaits', 'analyzer', 'detect_sequential_awaits.find_runs')
+def _sequential_awaits() -> Runner:
+    from detect_sequential_awaits import find_runs
+    return lambda item, workdir: len(find_runs(item.content))
+
+# -- medición --------------------------------------------------------------
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por el rango más cercano sobre valores ya ordenados."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB, macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def read_spool(spool_path: Path) -> Iterator[SyntheticFile]:
+    from bench_corpus import Diagnostic
+    with open(spool_path, encoding='utf-8') as spool:
+        for line in spool:
+            path, content, diagnostics = json.loads(line)
+            yield SyntheticFile(path, content, tuple(Diagnostic(*d) for d in diagnostics))
+
+def measure(target_name: str, spool_path: str, seed: int, corpus_files: int) -> dict:
+    """Se ejecuta en un proceso nuevo: prepara el objetivo, calienta y recorre el corpus."""
+    run = TARGETS[target_name].setup()
+    with tempfile.TemporaryDirectory(prefix='bench-') as tmp:
+        workdir = Path(tmp)
+        warmup = SyntheticCorpus(1, seed=seed)
+        for i in range(corpus_files, corpus_files + WARMUP_FILES):
+            run(warmup.file(i), workdir)
+
+        rss_before = peak_rss_mb()
+        latencies: List[float] = []
+        total_bytes = 0
+        units = 0
+        for item in read_spool(Path(spool_path)):
+            start = time.perf_counter()
+            units += run(item, workdir) or 0
+            latencies.append(time.perf_counter() - start)
+            total_bytes += len(item.content.encode('utf-8'))
+        rss_after = peak_rss_mb()
+
+    seconds = sum(latencies)
+    latencies.sort()
+    return {
+        'target': target_name,
+        'files': len(latencies),
+        'bytes': total_bytes,
+        'seconds': round(seconds, 4),
+        'files_per_s': round(len(latencies) / seconds, 1) if seconds else None,
+        'mb_per_s': round(total_bytes / 1e6 / seconds, 2) if seconds else None,
+        'latency_ms': {name: round(percentile(latencies, fraction) * 1000, 3)
+                       for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))},
+        'peak_rss_mb': round(rss_after, 1) if rss_after is not None else None,
+        'rss_growth_mb': round(rss_after - rss_before, 1) if rss_after is not None else None,
+        'units': units,
+    }
+
+def write_spool(corpus: SyntheticCorpus, spool_path: Path) -> int:
+    """Genera el corpus una vez en un JSONL que luego leen los procesos de medida."""
+    total = 0
+    with open(spool_path, 'w', encoding='utf-8') as spool:
+        for item in corpus:
+            spool.write(json.dumps([item.path, item.content, [list(d) for d in item.diagnostics]]) + '\n')
+            total += len(item.content.encode('utf-8'))
+    return total
+
+def run_isolated(target_name: str, spool_path: Path, seed: int, corpus_files: int) -> dict:
+    """Un proceso nuevo (spawn) por medida: el pico de RSS es solo de ese objetivo."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(measure, target_name, str(spool_path), seed, corpus_files).result()
+
+def git_revision() -> dict:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(['git', *args], cwd=PROJECT_ROOT, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
+    return {'commit': git('rev-parse', '--short', 'HEAD') or None,
+            'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+# -- informe ---------------------------------------------------------------
+
+def print_results(scale: float, results: List[dict]):
+    print(f"\n📊 Escala {scale:g}×")
+    print(f"   {'objetivo':<20} {'arch/s':>9} {'MB/s':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'RSS MB':>7} {'unidades':>9}")
+    for r in results:
+        lat = r['latency_ms']
+        rss = f"{r['peak_rss_mb']:.0f}" if r['peak_rss_mb'] is not None else '-'
+        print(f"   {r['target']:<20} {r['files_per_s'] or 0:>9,.0f} {r['mb_per_s'] or 0:>7.1f} "
+              f"{lat['p50']:>8.2f} {lat['p90']:>8.2f} {lat['p99']:>8.2f} {lat['max']:>8.1f} "
+              f"{rss:>7} {r['units']:>9,}")
+
+def compare(report: dict, baseline: dict, fail_above: Optional[float]) -> List[str]:
+    """Compara MB/s por (escala, objetivo); devuelve las regresiones por encima del umbral."""
+    old = {(run['scale'], r['target']): r for run in baseline.get('runs', []) for r in run['results']}
+    regressions = []
+    print(f"\n🔁 Comparación con {baseline.get('git', {}).get('commit') or 'línea base'} (MB/s; + = más rápido)")
+    for run in report['runs']:
+        for r in run['results']:
+            before = old.get((run['scale'], r['target']))
+            if not before or not before.get('mb_per_s') or not r.get('mb_per_s'):
+                continue
+            change = (r['mb_per_s'] / before['mb_per_s'] - 1) * 100
+            marker = '🔴' if change < -(fail_above or 10) else '🟢' if change > 10 else '  '
+            print(f"   {marker} {run['scale']:>5g}× {r['target']:<20} {before['mb_per_s']:>8.2f} → "
+                  f"{r['mb_per_s']:>8.2f}  ({change:+.1f}%)")
+            if fail_above is not None and change < -fail_above:
+                regressions.append(f"{run['scale']:g}× {r['target']}: {change:+.1f}%")
+    return regressions
+
+def option_value(name: str) -> Optional[str]:
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return None
+
+def main():
+    if '--list' in sys.argv:
+        print("📋 Objetivos registrados:")
+        for target in TARGETS.values():
+            print(f"   {target.name:<20} [{target.group}]  {target.description}")
+        return
+
+    scales = [float(s) for s in option_value('--scales').split(',')] if option_value('--scales') else list(DEFAULT_SCALES)
+    names = option_value('--targets').split(',') if option_value('--targets') else list(TARGETS)
+    unknown = [name for name in names if name not in TARGETS]
+    if unknown:
+        raise SystemExit(f"❌ Objetivos desconocidos: {', '.join(unknown)} (ver --list)")
+    seed = int(option_value('--seed') or DEFAULT_SEED)
+
+    profile = tree_profile()
+    print(f"📂 Árbol real: {profile.files} archivos, {profile.bytes / 1e6:.1f} MB → escalas "
+          f"{', '.join(f'{s:g}×' for s in scales)}; {len(names)} objetivos (semilla {seed})")
+
+    report = {
+        'version': REPORT_VERSION,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'tree': {'files': profile.files, 'bytes': profile.bytes},
+        'runs': [],
+    }
+
+    for scale in scales:
+        corpus = SyntheticCorpus(scale, seed=seed, profile=profile)
+        with tempfile.TemporaryDirectory(prefix='bench-corpus-') as tmp:
+            spool_path = Path(tmp) / 'corpus.jsonl'
+            start = time.perf_counter()
+            total = write_spool(corpus, spool_path)
+            print(f"\n🧪 Corpus {scale:g}×: {len(corpus):,} archivos, {total / 1e6:.1f} MB "
+                  f"(generado en {time.perf_counter() - start:.1f}s)")
+            results = []
+            for name in names:
+                result = run_isolated(name, spool_path, seed, len(corpus))
+                print(f"   ⏱️  {name:<20} {result['seconds']:>8.2f}s")
+                results.append(result)
+        report['runs'].append({'scale': scale, 'files': len(corpus), 'bytes': total, 'results': results})
+        print_results(scale, results)
+
+    output = Path(option_value('--output') or RESULTS_DIR / f"{report['git']['commit'] or 'bench'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    print(f"\n💾 Resultados: {output}")
+
+    baseline_path = option_value('--compare')
+    if baseline_path:
+        fail_above = float(option_value('--fail-above')) if option_value('--fail-above') else None
+        regressions = compare(report, json.loads(Path(baseline_path).read_text(encoding='utf-8')), fail_above)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regresiones por encima del {fail_above:g}%:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Caché incremental para los codemods (fix_*, remove_updated_at, ...).
+
+Mantiene un manifest en .codemod-cache/manifest.json que asocia cada archivo
+a su hash de contenido y a la huella (fingerprint) de cada conjunto de reglas
+que ya lo dejó limpio:
+
+    {
+      "version": 1,
+      "files": {
+        "app/api/bookings/route.ts": {
+          "mtime_ns": ..., "size": ..., "sha1": "...",
+          "rules": {"fix_relations_final": "3f2a..."}
+        }
+      }
+    }
+
+Si el stat (mtime + tamaño) no cambió y el fingerprint de las reglas es el
+mismo, el archivo se salta SIN abrirlo. Si solo cambió el stat (ej. un
+checkout) se compara el hash de contenido antes de reprocesar.
+
+Uso:
+    cache = CodemodCache('fix_relations_final', ruleset_fingerprint(Path(__file__), *script_modules()))
+    files = cache.filter(files)
+    ...
+    cache.record(file_path, result)  # o mark_clean() tras procesar sin pendientes
+    cache.save()
+
+--no-cache en la línea de comandos desactiva la caché.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = Path(__file__).resolve().parent
+CACHE_DIR = PROJECT_ROOT / '.codemod-cache'
+MANIFEST_PATH = CACHE_DIR / 'manifest.json'
+MANIFEST_VERSION = 1
+
+def ruleset_fingerprint(*parts) -> str:
+    """
+    Huella estable de un conjunto de reglas.
+
+    Acepta rutas (se hashea su contenido, útil para el propio script),
+    patrones compilados y cualquier estructura serializable a JSON.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, Path):
+            digest.update(part.read_bytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=_pattern_repr).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def script_modules() -> List[Path]:
+    """
+    Módulos de scripts/ cargados en este proceso: las reglas y los helpers por
+    los que pasan (ts_scanner, prisma_types, prisma_schema, ...).
+
+    Van en el fingerprint para que un cambio en un helper invalide la caché
+    aunque el script de la regla no haya cambiado.
+    """
+    paths = set()
+    for module in list(sys.modules.values()):
+        module_file = getattr(module, '__file__', None)
+        if module_file and module_file.endswith('.py'):
+            path = Path(module_file).resolve()
+            if path.parent == SCRIPTS_DIR:
+                paths.add(path)
+    return sorted(paths)
+
+def _pattern_repr(value) -> str:
+    pattern = getattr(value, 'pattern', None)
+    if pattern is not None:
+        return f"{pattern}/{getattr(value, 'flags', 0)}"
+    return repr(value)
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+def _cache_key(file_path: Path) -> str:
+    resolved = Path(file_path).resolve()
+    try:
+        return resolved.relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return resolved.as_posix()
+
+class CodemodCache:
+    """Manifest de archivos ya limpios para un conjunto de reglas."""
+
+    def __init__(self, ruleset: str, fingerprint: str,
+                 manifest_path: Path = MANIFEST_PATH, enabled: Optional[bool] = None):
+        self.ruleset = ruleset
+        self.fingerprint = fingerprint
+        self.manifest_path = manifest_path
+        self.enabled = '--no-cache' not in sys.argv if enabled is None else enabled
+        self.files: Dict[str, dict] = {}
+        self.skipped = 0
+        self._dirty = False
+
+        if self.enabled:
+            self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.files = data.get('files', {})
+
+    def is_clean(self, file_path: Path) -> bool:
+        """True si el archivo no cambió desde que estas reglas lo dejaron limpio."""
+        if not self.enabled:
+            return False
+
+        entry = self.files.get(_cache_key(file_path))
+        if not entry or entry['rules'].get(self.ruleset) != self.fingerprint:
+            return False
+
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+
+        if stat.st_mtime_ns == entry['mtime_ns'] and stat.st_size == entry['size']:
+            return True
+
+        # Stat distinto: solo es limpio si el contenido es idéntico
+        if stat.st_size != entry['size']:
+            return False
+        if content_hash(Path(file_path).read_bytes()) != entry['sha1']:
+            return False
+
+        entry['mtime_ns'] = stat.st_mtime_ns
+        self._dirty = True
+        return True
+
+    def filter(self, files: Iterable[Path]) -> List[Path]:
+        """Devuelve solo los archivos que hay que (re)procesar."""
+        pending = []
+        for file_path in files:
+            if self.is_clean(file_path):
+                self.skipped += 1
+            else:
+                pending.append(file_path)
+        return pending
+
+    def mark_clean(self, file_path: Path):
+        """Registra que el contenido actual del archivo ya cumple estas reglas."""
+        if not self.enabled:
+            return
+
+        key = _cache_key(file_path)
+        try:
+            stat = os.stat(file_path)
+            entry = self.files.get(key)
+            if entry and stat.st_mtime_ns == entry['mtime_ns'] and stat.st_size == entry['size']:
+                entry['rules'][self.ruleset] = self.fingerprint
+            else:
+                sha1 = content_hash(Path(file_path).read_bytes())
+                # Contenido nuevo: las demás reglas deben volver a pasar
+                rules = entry['rules'] if entry and entry['sha1'] == sha1 else {}
+                rules[self.ruleset] = self.fingerprint
+                self.files[key] = {
+                    'mtime_ns': stat.st_mtime_ns,
+                    'size': stat.st_size,
+                    'sha1': sha1,
+                    'rules': rules,
+                }
+        except OSError:
+            return
+        self._dirty = True
+
+    def record(self, file_path: Path, result: Dict[str, int], dry_run: bool = False):
+        """
+        Registra un resultado {'changed', 'fixes', 'errors'} de process_file.
+
+        En dry run un archivo con cambios pendientes NO queda limpio; uno en
+        cuarentena (ver codemod_parallel.py) tampoco.
+        """
+        if result.get('errors') or result.get('quarantined'):
+            return
+        if dry_run and result.get('changed'):
+            self.invalidate(file_path)
+        else:
+            self.mark_clean(file_path)
+
+    def invalidate(self, file_path: Path):
+        """Olvida el estado de estas reglas para el archivo (ej. cambios pendientes)."""
+        entry = self.files.get(_cache_key(file_path))
+        if entry and entry['rules'].pop(self.ruleset, None) is not None:
+            self._dirty = True
+
+    def save(self):
+        """Escribe el manifest de forma atómica (tmp + rename)."""
+        if not self.enabled or not self._dirty:
+            return
+
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        tmp_path.write_text(
+            json.dumps({'version': MANIFEST_VERSION, 'files': self.files}, separators=(',', ':')),
+            encoding='utf-8'
+        )
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Modo paralelo (--jobs N) para los scripts fix_relations_*.py.
+
+Reparte la lista de archivos en chunks sobre un pool de procesos y devuelve
+los resultados por archivo ({'changed', 'fixes', 'errors'}) EN EL ORDEN
+ORIGINAL, de modo que el resumen y la salida de progreso son los mismos que
+en la ejecución secuencial.
+
+La salida impresa por process_file dentro de los workers se captura y se
+reimprime desde el proceso principal al consumir cada resultado.
+
+Presupuesto por archivo (--file-budget S, por defecto 10s; 0 lo desactiva):
+un archivo que lo excede (típicamente un regex con backtracking catastrófico
+sobre un archivo minificado o generado) se interrumpe, se deja tal como
+estaba (los process_file escriben con write_source, que guarda el
+contenido previo justo antes de sobrescribirlo) y queda en cuarentena en .codemod-cache/quarantine.json. Las pasadas
+siguientes del mismo script lo saltan mientras su contenido no cambie
+(--retry-quarantine lo reintenta) y el lote sigue en lugar de colgarse.
+Para ver qué patrón es el culpable: python scripts/regex_audit.py.
+"""
+
+import io
+import json
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from codemod_cache import CACHE_DIR, PROJECT_ROOT, content_hash
+
+ProcessFile = Callable[..., Dict[str, int]]
+
+DEFAULT_FILE_BUDGET = 10.0
+QUARANTINE_PATH = CACHE_DIR / 'quarantine.json'
+QUARANTINE_VERSION = 1
+
+class FileBudgetExceeded(BaseException):
+    """
+    Un archivo excedió su presupuesto de tiempo.
+
+    Hereda de BaseException (como KeyboardInterrupt) para que los
+    `except Exception` de cada process_file no la conviertan en un error más.
+    """
+
+@contextmanager
+def time_budget(seconds: Optional[float]):
+    """
+    Interrumpe el bloque con FileBudgetExceeded si tarda más de `seconds`.
+
+    Usa SIGALRM: el motor de `re` atiende señales durante el matching, así
+    que corta también un regex que no termina. Sin SIGALRM (Windows) o fuera
+    del hilo principal el bloque corre sin límite.
+    """
+    if not seconds or not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expired(signum, frame):
+        raise FileBudgetExceeded(seconds)
+
+    previous = signal.signal(signal.SIGALRM, expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def parse_budget(argv: List[str]) -> float:
+    """Lee --file-budget S (o --file-budget=S); 0 desactiva el límite."""
+    value = None
+    for i, arg in enumerate(argv):
+        if arg == '--file-budget' and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith('--file-budget='):
+            value = arg.split('=', 1)[1]
+    return DEFAULT_FILE_BUDGET if value is None else max(0.0, float(value))
+
+def _quarantine_key(file_path: Path) -> str:
+    resolved = Path(file_path).resolve()
+    try:
+        return resolved.relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return resolved.as_posix()
+
+class Quarantine:
+    """
+    Archivos que excedieron el presupuesto, por script:
+
+        {"version": 1, "tools": {"fix_relations_final": {
+            "app/generated/client.ts": {"sha1": "...", "budget": 10.0, "date": "..."}}}}
+
+    Un archivo sigue en cuarentena mientras su contenido (sha1) no cambie.
+    """
+
+    def __init__(self, tool: str, path: Path = QUARANTINE_PATH, retry: Optional[bool] = None):
+        self.tool = tool
+        self.path = path
+        self.retry = '--retry-quarantine' in sys.argv if retry is None else retry
+        self.tools: Dict[str, Dict[str, dict]] = {}
+        self.added: List[str] = []
+        self.held: List[str] = []
+        self._dirty = False
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            data = {}
+        if data.get('version') == QUARANTINE_VERSION:
+            self.tools = data.get('tools', {})
+
+    @property
+    def entries(self) -> Dict[str, dict]:
+        return self.tools.setdefault(self.tool, {})
+
+    def holds(self, file_path: Path) -> bool:
+        """True si el archivo está en cuarentena con su contenido actual (y no se pidió reintentar)."""
+        entry = self.entries.get(_quarantine_key(file_path))
+        if entry is None or self.retry:
+            return False
+        try:
+            if content_hash(Path(file_path).read_bytes()) == entry['sha1']:
+                self.held.append(_quarantine_key(file_path))
+                return True
+        except OSError:
+            pass
+        # El contenido cambió: se vuelve a intentar
+        self.release(file_path)
+        return False
+
+    def add(self, file_path: Path, budget: float):
+        key = _quarantine_key(file_path)
+        try:
+            sha1 = content_hash(Path(file_path).read_bytes())
+        except OSError:
+            return
+        self.entries[key] = {'sha1': sha1, 'budget': budget, 'date': datetime.now().isoformat(timespec='seconds')}
+        self.added.append(key)
+        self._dirty = True
+
+    def release(self, file_path: Path):
+        if self.entries.pop(_quarantine_key(file_path), None) is not None:
+            self._dirty = True
+
+    def save(self):
+        """Escribe el archivo de cuarentena de forma atómica (tmp + rename)."""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tools = {tool: entries for tool, entries in self.tools.items() if entries}
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({'version': QUARANTINE_VERSION, 'tools': tools}, indent=2) + '\n',
+                            encoding='utf-8')
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def report(self, budget: float):
+        if self.added:
+            print(f"\n⏱️  {len(self.added)} archivos excedieron el presupuesto de {budget:g}s y quedan en cuarentena:")
+            for key in self.added:
+                print(f"   - {key}")
+        if self.held:
+            print(f"\n⏸️  {len(self.held)} archivos en cuarentena omitidos (--retry-quarantine para reintentarlos):")
+            for key in self.held:
+                print(f"   - {key}")
+        if self.added or self.held:
+            print(f"   Detalle en {_quarantine_key(self.path)}; patrones sospechosos: python scripts/regex_audit.py")
+
+def quarantined_result(budget: float) -> Dict[str, int]:
+    return {'changed': 0, 'fixes': 0, 'errors': 0, 'quarantined': 1, 'budget': budget}
+
+# Contenido previo de los archivos que write_source sobrescribe dentro del
+# process_file con presupuesto en curso (solo esos: un dry run no lee nada
+# de más); None fuera de run_with_budget
+_SNAPSHOTS: Optional[Dict[Path, bytes]] = None
+
+def write_source(file_path: Path, content: str):
+    """
+    Escribe el resultado de un process_file. Guarda antes el contenido previo
+    para que run_with_budget pueda restaurarlo si el presupuesto interrumpe
+    la escritura a medias.
+    """
+    path = Path(file_path)
+    if _SNAPSHOTS is not None and path not in _SNAPSHOTS:
+        _SNAPSHOTS[path] = path.read_bytes()
+    path.write_text(content, encoding='utf-8')
+
+def run_with_budget(process_file: ProcessFile, file_path: Path, budget: float, **kwargs) -> Dict[str, int]:
+    """
+    process_file con presupuesto de tiempo. Si lo excede, devuelve
+    quarantined_result() y deja como estaban los archivos que había
+    empezado a escribir con write_source.
+    """
+    global _SNAPSHOTS
+    if not budget:
+        return process_file(file_path, **kwargs)
+    snapshots = _SNAPSHOTS = {}
+    try:
+        with time_budget(budget):
+            return process_file(file_path, **kwargs)
+    except FileBudgetExceeded:
+        for path, original in snapshots.items():
+            if path.read_bytes() != original:
+                path.write_bytes(original)
+        print(f"⏱️  {file_path}: más de {budget:g}s, interrumpido")
+        return quarantined_result(budget)
+    finally:
+        _SNAPSHOTS = None
+
+def parse_jobs(argv: List[str]) -> int:
+    """
+    Lee --jobs N (o --jobs=N) de argv.
+
+    --jobs 0 usa todos los cores disponibles. Sin la opción se mantiene
+    la ejecución secuencial (1).
+    """
+    value = None
+    for i, arg in enumerate(argv):
+        if arg == '--jobs' and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith('--jobs='):
+            value = arg.split('=', 1)[1]
+
+    if value is None:
+        return 1
+
+    jobs = int(value)
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+def _run_captured(process_file: ProcessFile, dry_run: bool, budget: float,
+                  file_path: Path) -> Tuple[Dict[str, int], str]:
+    """Ejecuta process_file en un worker capturando lo que imprime."""
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        result = run_with_budget(process_file, file_path, budget, dry_run=dry_run)
+    return result, buffer.getvalue()
+
+def process_files(
+    process_file: ProcessFile,
+    files: List[Path],
+    dry_run: bool = False,
+    jobs: int = 1,
+    budget: Optional[float] = None,
+    quarantine: Optional[Quarantine] = None,
+) -> Iterator[Tuple[Path, Dict[str, int]]]:
+    """
+    Aplica process_file a cada archivo y produce (archivo, resultado) en orden.
+
+    Con jobs == 1 se ejecuta en el proceso actual, igual que antes.
+    Si el consumidor deja de iterar (ej. el dry run que corta a los N
+    archivos), los chunks pendientes se cancelan.
+
+    Cada archivo tiene `budget` segundos (por defecto --file-budget); los que
+    lo exceden o siguen en cuarentena producen {'quarantined': 1} sin cambios.
+    """
+    budget = parse_budget(sys.argv) if budget is None else budget
+    quarantine = quarantine or Quarantine(Path(sys.argv[0]).stem)
+    held = {file_path for file_path in files if quarantine.holds(file_path)} if quarantine.entries else set()
+    pending = [file_path for file_path in files if file_path not in held]
+
+    def results() -> Iterator[Tuple[Path, Dict[str, int]]]:
+        if jobs <= 1 or len(pending) <= 1:
+            for file_path in pending:
+                yield file_path, run_with_budget(process_file, file_path, budget, dry_run=dry_run)
+            return
+
+        # Chunks de ~4 por worker: reparto equilibrado sin saturar de IPC
+        chunksize = max(1, len(pending) // (jobs * 4))
+        worker = partial(_run_captured, process_file, dry_run, budget)
+
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        try:
+            for file_path, (result, output) in zip(pending, executor.map(worker, pending, chunksize=chunksize)):
+                if output:
+                    sys.stdout.write(output)
+                yield file_path, result
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    processed = results()
+    try:
+        for file_path in files:
+            if file_path in held:
+                yield file_path, quarantined_result(budget)
+                continue
+            file_path, result = next(processed)
+            if result.get('quarantined'):
+                quarantine.add(file_path, budget)
+            yield file_path, result
+        quarantine.report(budget)
+    finally:
+        processed.close()
+        quarantine.save()
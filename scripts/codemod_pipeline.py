@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Pipeline de reglas: todos los fixers en UNA pasada por el árbol.
+
+Cada fixer (remove_updated_at, fix_classbooking_props, fix_includes,
+fix_relations_*, ...) expone una función pura contenido → (contenido, fixes)
+que aquí se registra como regla. El pipeline lee cada archivo una vez,
+aplica las reglas seleccionadas en orden sobre el buffer en memoria y
+escribe como mucho una vez.
+
+Los scripts originales siguen funcionando por separado; el pipeline evita
+releer los ~1.650 archivos una vez por script en una sesión de limpieza.
+
+Antes de decodificar, un prefiltro de bytes (prefilter.py) busca en una
+pasada los literales que cada regla necesita (CANDIDATE_NEEDLES de su
+módulo) y solo se ejecutan las reglas que pueden cambiar algo. Con el
+índice de identificadores (ident_index.py, en .codemod-cache/) los
+archivos que ninguna regla puede cambiar ni siquiera se abren.
+
+Uso:
+    python scripts/codemod_pipeline.py --list
+    python scripts/codemod_pipeline.py                          # dry run, reglas por defecto
+    python scripts/codemod_pipeline.py --rules includes,relations_v3 --apply
+    python scripts/codemod_pipeline.py --rules booking_amount app/api/bookings
+    python scripts/codemod_pipeline.py --apply --jobs 0 --backup
+    python scripts/codemod_pipeline.py --candidates             # candidatos por regla
+    python scripts/codemod_pipeline.py --rules parallel_awaits --diff parallel.diff
+
+Opciones:
+    --rules a,b,c   Reglas a aplicar, en ese orden (por defecto las marcadas *)
+    --apply         Escribir cambios (sin ella es dry run)
+    --backup        Guardar <archivo>.pipeline.bak antes de escribir
+    --jobs N        Procesos en paralelo (0 = todos los cores)
+    --no-cache      Ignorar el manifest y el índice de .codemod-cache/
+    --git           Descubrir archivos con git ls-files en lugar de recorrer el disco
+    --no-prefilter  Ejecutar todas las reglas en todos los archivos
+    --candidates    Solo mostrar cuántos archivos son candidatos de cada regla
+    --diff FILE     Escribir un diff unificado antes/después de los cambios (también en dry run)
+    --profile P     Perfil por regla, patrón y archivo en P.jsonl y P.folded (ver rule_profiler.py)
+    --file-budget S Segundos por archivo antes de ponerlo en cuarentena (10; 0 = sin límite)
+    --retry-quarantine  Reintentar los archivos en cuarentena (ver codemod_parallel.py)
+"""
+
+import difflib
+import importlib
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from codemod_cache import CodemodCache, ruleset_fingerprint, script_modules
+from codemod_parallel import parse_jobs, process_files, write_source
+from ident_index import load_index
+from prefilter import CandidateSelector
+import rule_profiler
+from relation_maps import load_relation_maps
+from source_files import find_source_files
+
+SOURCE_DIRS = ['app', 'lib', 'components']
+
+RuleFunction = Callable[[str], Tuple[str, int]]
+
+class RuleSpec(NamedTuple):
+    """Regla registrada: módulo y función pura contenido → (contenido, fixes)."""
+    name: str
+    module: str
+    function: str
+    description: str
+    default: bool
+
+# Registro en el orden por defecto de aplicación
+RULES: Dict[str, RuleSpec] = {}
+
+def register(name: str, module: str, function: str, description: str, default: bool = False):
+    RULES[name] = RuleSpec(name, module, function, description, default)
+
+register('remove_updated_at', 'remove_updated_at', 'strip_updated_at',
+         'Quita TODO updatedAt: new Date() (agresivo)')
+register('updated_at_surgical', 'fix_prisma_updated_at_surgical', 'strip_create_updated_at',
+         'Quita updatedAt: new Date() en create() de modelos con @updatedAt', default=True)
+register('classbooking_props', 'fix_classbooking_props', 'fix_classbooking_content',
+         'ClassBooking: studentName → playerName, attended → checkedIn, ...', default=True)
+register('booking_amount', 'fix_booking_amount', 'fix_booking_amount_content',
+         'booking.amount → booking.price', default=True)
+register('includes', 'fix_includes', 'fix_include_block',
+         'Claves de include en minúscula → relación del schema', default=True)
+register('relations_v2', 'fix_relations_v2', 'fix_content',
+         'Relaciones en include/select/where (línea a línea)')
+register('relations_surgical', 'fix_relations_surgical', 'fix_content',
+         'Relaciones en bloques include/select/where + accesos tipados')
+register('relations_final', 'fix_relations_final', 'fix_content',
+         'Patrones precompilados con prefijos seguros')
+register('relations_v3', 'fix_relations_v3', 'fix_content',
+         'include/select/where/_count con escáner léxico + accesos tipados', default=True)
+register('parallel_awaits', 'detect_sequential_awaits', 'parallelize_content',
+         'awaits de lectura Prisma consecutivos e independientes → Promise.all')
+
+_LOADED: Dict[str, RuleFunction] = {}
+
+def load_rule(name: str) -> RuleFunction:
+    """Importa (una vez por proceso) la función de la regla."""
+    if name not in _LOADED:
+        spec = RULES[name]
+        _LOADED[name] = getattr(importlib.import_module(spec.module), spec.function)
+    return _LOADED[name]
+
+def rule_needles(name: str) -> list:
+    """Requisitos del prefiltro de la regla; sin CANDIDATE_NEEDLES se ejecuta siempre."""
+    return getattr(importlib.import_module(RULES[name].module), 'CANDIDATE_NEEDLES', [])
+
+_SELECTORS: Dict[Tuple[str, ...], CandidateSelector] = {}
+
+def candidate_selector(rule_names: Tuple[str, ...]) -> CandidateSelector:
+    """
+    Selector por conjunto de reglas y proceso: cada aguja se busca con
+    `bytes in` una sola vez por archivo y se comparte entre las reglas.
+    """
+    if rule_names not in _SELECTORS:
+        _SELECTORS[rule_names] = CandidateSelector({name: rule_needles(name) for name in rule_names})
+    return _SELECTORS[rule_names]
+
+def parse_rules(argv: List[str]) -> List[str]:
+    """Lee --rules a,b,c (o --rules=a,b,c); sin la opción, las reglas por defecto."""
+    value = None
+    for i, arg in enumerate(argv):
+        if arg == '--rules' and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith('--rules='):
+            value = arg.split('=', 1)[1]
+
+    if value is None:
+        return [spec.name for spec in RULES.values() if spec.default]
+
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in RULES]
+    if unknown:
+        raise SystemExit(f"❌ Reglas desconocidas: {', '.join(unknown)} (ver --list)")
+    return names
+
+def run_rules(content: str, rule_names: Tuple[str, ...],
+              active: Optional[List[str]] = None) -> Tuple[str, Dict[str, list]]:
+    """
+    Aplica las reglas en orden sobre el buffer. Stats: {regla: [fixes, segundos]}.
+
+    Con `active` (salida del prefiltro) se saltan las demás reglas; si una
+    regla cambia el buffer se recalcula, porque puede habilitar a las siguientes.
+    """
+    stats = {}
+    profiler = rule_profiler.PROFILER
+    for name in rule_names:
+        if active is not None and name not in active:
+            continue
+        start = time.perf_counter()
+        new_content, fixes = load_rule(name)(content)
+        stats[name] = [fixes, time.perf_counter() - start]
+        if profiler is not None:
+            profiler.record(name, rule_profiler.RULE_TOTAL, stats[name][1], content.count('\n') + 1,
+                            fixes, fixes)
+        if active is not None and new_content != content:
+            active = candidate_selector(rule_names).rules_for(new_content.encode('utf-8'))
+        content = new_content
+    return content, stats
+
+def unified_diff(file_path: Path, original: str, content: str) -> str:
+    rel = file_path.relative_to(PROJECT_ROOT).as_posix()
+    return ''.join(difflib.unified_diff(original.splitlines(keepends=True), content.splitlines(keepends=True),
+                                        fromfile=f"a/{rel}", tofile=f"b/{rel}"))
+
+@rule_profiler.profiled_file
+def _pipeline_file(file_path: Path, rule_names: Tuple[str, ...], **options) -> dict:
+    """pipeline_file con el archivo delante, como lo espera rule_profiler.profiled_file."""
+    return pipeline_file(rule_names, file_path, **options)
+
+def pipeline_file(rule_names: Tuple[str, ...], file_path: Path, dry_run: bool = False,
+                  backup: bool = False, prefilter: bool = True, diff: bool = False) -> dict:
+    """Lee el archivo una vez, aplica las reglas y escribe como mucho una vez."""
+    try:
+        data = file_path.read_bytes()
+        active = candidate_selector(rule_names).rules_for(data) if prefilter else None
+        if active == []:
+            return {'changed': 0, 'fixes': 0, 'prefiltered': 1, 'rules': {}}
+        original = data.decode('utf-8')
+        content, stats = run_rules(original, rule_names, active)
+    except Exception as e:
+        print(f"❌ Error processing {file_path}: {e}")
+        return {'changed': 0, 'fixes': 0, 'errors': 1, 'rules': {}}
+
+    fixes = sum(rule_fixes for rule_fixes, _ in stats.values())
+    if content == original:
+        return {'changed': 0, 'fixes': fixes, 'rules': stats}
+
+    applied = ', '.join(f"{name}: {rule_fixes}" for name, (rule_fixes, _) in stats.items() if rule_fixes)
+    result = {'changed': 1, 'fixes': fixes, 'rules': stats}
+    if diff:
+        result['diff'] = unified_diff(file_path, original, content)
+    if dry_run:
+        print(f"  Would fix {file_path.relative_to(PROJECT_ROOT)} ({applied})")
+    else:
+        if backup:
+            file_path.with_name(file_path.name + '.pipeline.bak').write_text(original, encoding='utf-8')
+        write_source(file_path, content)
+        print(f"  ✓ {file_path.relative_to(PROJECT_ROOT)} ({applied})")
+    return result
+
+def print_stats(rule_names: List[str], totals: Dict[str, list], elapsed: float):
+    print("\n📊 Estadísticas por regla:")
+    print(f"   {'regla':<22} {'archivos':>9} {'fixes':>7} {'tiempo':>9}")
+    for name in rule_names:
+        files_changed, fixes, seconds = totals[name]
+        print(f"   {name:<22} {files_changed:>9} {fixes:>7} {seconds * 1000:>7.0f}ms")
+    print(f"   {'total (pared)':<22} {'':>9} {'':>7} {elapsed * 1000:>7.0f}ms")
+
+def main():
+    if '--list' in sys.argv:
+        print("📋 Reglas registradas (orden por defecto; * = incluida por defecto):")
+        for spec in RULES.values():
+            marker = '*' if spec.default else ' '
+            print(f"  {marker} {spec.name:<22} {spec.module}.{spec.function}  — {spec.description}")
+        return
+
+    rule_names = parse_rules(sys.argv)
+    profile = rule_profiler.profile_prefix(sys.argv)
+    dry_run = '--apply' not in sys.argv
+    option_values = {'--rules', '--jobs', '--diff', '--profile', '--file-budget'}
+    paths = [a for i, a in enumerate(sys.argv[1:], 1)
+             if not a.startswith('--') and sys.argv[i - 1] not in option_values]
+
+    files = find_source_files([Path(p).resolve() for p in paths] or SOURCE_DIRS,
+                              use_git='--git' in sys.argv)
+    print(f"🔍 Encontrados {len(files)} archivos TS/TSX")
+    print(f"🧩 Reglas: {' → '.join(rule_names)}")
+
+    # La huella cubre el código de cada regla, los helpers que importan
+    # (ya cargados en sys.modules) y los mapas del schema
+    modules = [importlib.import_module(RULES[name].module) for name in rule_names]
+    fingerprint = ruleset_fingerprint(Path(__file__), *[Path(m.__file__) for m in modules],
+                                      *script_modules(), load_relation_maps()['schema_sha1'])
+    cache = CodemodCache('pipeline:' + ','.join(rule_names), fingerprint)
+    files = cache.filter(files)
+    if cache.skipped:
+        print(f"♻️  {cache.skipped} archivos sin cambios desde la última pasada (caché)")
+
+    index = load_index() if '--no-prefilter' not in sys.argv else None
+
+    if '--candidates' in sys.argv:
+        start = time.perf_counter()
+        candidates = candidate_selector(tuple(rule_names)).select(files, index)
+        print(f"\n🎯 Candidatos por regla (prefiltro en {(time.perf_counter() - start) * 1000:.0f}ms):")
+        for name in rule_names:
+            print(f"   {name:<22} {len(candidates[name]):>6}")
+        return
+
+    if index is not None:
+        narrowed = candidate_selector(tuple(rule_names)).narrow(files, index)
+        if len(narrowed) < len(files):
+            print(f"📇 {len(files) - len(narrowed)} archivos descartados por el índice (sin abrirlos)")
+        files = narrowed
+
+    print("\n🧪 DRY RUN\n" if dry_run else "\n🚀 Aplicando correcciones...\n")
+
+    diff_path = sys.argv[sys.argv.index('--diff') + 1] if '--diff' in sys.argv[:-1] else None
+    worker = partial(_pipeline_file, rule_names=tuple(rule_names), backup='--backup' in sys.argv,
+                     prefilter='--no-prefilter' not in sys.argv, diff=diff_path is not None)
+    diffs: List[str] = []
+    totals = {name: [0, 0, 0.0] for name in rule_names}
+    stats = {'changed': 0, 'fixes': 0, 'errors': 0, 'prefiltered': 0, 'quarantined': 0}
+    start = time.perf_counter()
+
+    for file_path, result in process_files(worker, files, dry_run=dry_run, jobs=parse_jobs(sys.argv)):
+        cache.record(file_path, result, dry_run=dry_run)
+        rule_profiler.collect(result)
+        if result.get('diff'):
+            diffs.append(result['diff'])
+        for key in stats:
+            stats[key] += result.get(key, 0)
+        for name, (fixes, seconds) in result.get('rules', {}).items():
+            totals[name][0] += 1 if fixes else 0
+            totals[name][1] += fixes
+            totals[name][2] += seconds
+
+    cache.save()
+    print_stats(rule_names, totals, time.perf_counter() - start)
+    rule_profiler.finish(profile)
+    if diff_path is not None:
+        Path(diff_path).write_text(''.join(diffs), encoding='utf-8')
+        print(f"\n📝 Diff de {len(diffs)} archivos: {diff_path}")
+
+    print(f"\n{'📊 Dry run completado' if dry_run else '✅ Completado'}:")
+    print(f"   - Archivos con cambios: {stats['changed']}")
+    print(f"   - Correcciones: {stats['fixes']}")
+    print(f"   - Errores: {stats['errors']}")
+    if stats['prefiltered']:
+        print(f"   - Descartados por el prefiltro (sin decodificar): {stats['prefiltered']}")
+    if stats['quarantined']:
+        print(f"   - En cuarentena (presupuesto por archivo excedido): {stats['quarantined']}")
+    if dry_run:
+        print("\n⚠️  Para aplicar los cambios, ejecuta:")
+        print(f"   python scripts/codemod_pipeline.py --rules {','.join(rule_names)} --apply")
+    else:
+        print("\n🔍 Ejecuta 'npm run type-check' para validar")
+
+if __name__ == '__main__':
+    main()
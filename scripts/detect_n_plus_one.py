@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Detector estático de consultas N+1 en las rutas de la API (app/api/**/route.ts).
+
+Busca llamadas Prisma (prisma_calls.py) dentro de:
+- bucles for / for...of / for await / while (un round trip secuencial por fila),
+- callbacks de .map/.forEach/.reduce/.flatMap/.filter/... (Promise.all(items.map(...))
+  lanza N consultas en paralelo y agota el pool de conexiones),
+
+con el mismo escaneo léxico que usan fix_include_block y los fixers de
+relaciones (ts_scanner.scan): los bucles y callbacks salen de las llamadas
+que registra el escáner, así que lo que está en strings o comentarios no
+cuenta.
+
+Cada hallazgo lleva una sugerencia con la forma en lote, usando los nombres
+de relación de schema.prisma:
+- where: { id: booking.courtId } y Booking.Court usa courtId → include: { Court: true }
+  en la consulta que carga booking,
+- where: { bookingId: booking.id } y Payment.Booking → Booking.Payment → include: { Payment: true },
+- si no hay relación: findMany({ where: { campo: { in: ids } } }) y un Map,
+- count/aggregate → groupBy con in:, create → createMany, update/delete →
+  updateMany/deleteMany con in: o un único $transaction([...]).
+
+Severidad: high para bucles secuenciales (for/while/reduce) y forEach
+(async sin esperar), medium para map & co. (paralelo), low dentro de
+$transaction([...]) o $transaction(rows.map(...)) (un lote en una ida y
+vuelta). En la forma interactiva $transaction(async tx => { for ... }) el
+bucle conserva su severidad: son N idas y vueltas con la transacción abierta.
+
+Salida legible por máquina para usarlo como gate en los PRs:
+    python scripts/detect_n_plus_one.py                         # resumen por ruta
+    python scripts/detect_n_plus_one.py --json                  # JSON a stdout
+    python scripts/detect_n_plus_one.py --output n1.json        # JSON a archivo
+    python scripts/detect_n_plus_one.py --baseline n1.json --fail-on medium
+        (exit 1 si hay hallazgos NUEVOS respecto a la línea base de severidad >= medium)
+    python scripts/detect_n_plus_one.py lib/services            # otras rutas
+"""
+
+import hashlib
+import json
+import re
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from codemod_cache import PROJECT_ROOT
+from prisma_calls import WHITESPACE, CallSite, CallSiteCache, property_spans
+from prisma_schema import PrismaSchema, load_schema
+from prisma_types import infer_bindings
+from source_files import find_source_files
+from ts_scanner import ScanIndex, scan
+
+REPORT_VERSION = 1
+SOURCE_DIRS = ['app/api']
+
+LOOP_KEYWORDS = ('for', 'while')
+ITERATOR_METHODS = {'map', 'forEach', 'reduce', 'flatMap', 'filter', 'some', 'every', 'find'}
+SEQUENTIAL_ITERATORS = {'reduce'}
+
+READ_OPERATIONS = {'findUnique', 'findUniqueOrThrow', 'findFirst', 'findFirstOrThrow', 'findMany'}
+AGGREGATE_OPERATIONS = {'count', 'aggregate'}
+# Métricas de aggregate que groupBy acepta igual
+AGGREGATE_KEYS = ('_count', '_sum', '_avg', '_min', '_max')
+
+SEVERITIES = ('low', 'medium', 'high')
+
+HTTP_HANDLER = re.compile(
+    r'export\s+(?:async\s+)?function\s+(GET|POST|PUT|PATCH|DELETE|HEAD|OPTIONS)\b'
+    r'|export\s+const\s+(GET|POST|PUT|PATCH|DELETE|HEAD|OPTIONS)\s*='
+)
+MEMBER_VALUE = re.compile(r'(?P<var>[A-Za-z_$][\w$]*)\??\.(?P<attr>[A-Za-z_$][\w$]*)\Z')
+FOR_AWAIT = re.compile(r'\bfor\s*\Z')
+FOR_OF_VARIABLE = re.compile(r'\(\s*(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s+(?:of|in)\b')
+# Primer argumento de $transaction(...) que es una función: forma interactiva
+TRANSACTION_CALLBACK = re.compile(r'(?:async\b\s*)?(?:function\b|\(|[A-Za-z_$][\w$]*\s*=>)')
+CALLBACK_PARAM = re.compile(r'\(\s*(?:async\s*)?(?:function\s*)?\(?\s*([A-Za-z_$][\w$]*)')
+
+class Loop(NamedTuple):
+    """Bucle o callback de iteración: el cuerpo es [body_start, body_end)."""
+    kind: str
+    start: int
+    body_start: int
+    body_end: int
+    variable: Optional[str]   # elemento de cada iteración (for (const x of ...), .map(x => ...))
+
+def loop_spans(index: ScanIndex) -> List[Loop]:
+    """Bucles y callbacks de iteración del archivo, a partir de las llamadas del escáner."""
+    content = index.content
+    loops = []
+    for call in index.call_list:
+        name = call.name.split('.')[-1]
+        keyword = call.name in LOOP_KEYWORDS or (
+            call.name == 'await' and FOR_AWAIT.search(content, max(0, call.start - 20), call.start))
+        if keyword:
+            body = WHITESPACE.match(content, call.close + 1).end()
+            block = index.region_at(body) if content.startswith('{', body) else None
+            if block is not None:
+                body_end = block.close + 1
+            else:
+                # Cuerpo de una sola sentencia: hasta el ';' o el fin de línea
+                ends = [end for end in (content.find(';', body), content.find('\n', body)) if end >= 0]
+                body_end = min(ends) if ends else len(content)
+            header = FOR_OF_VARIABLE.match(content, call.open)
+            loops.append(Loop('for' if call.name == 'await' else call.name, call.start, body, body_end,
+                              header.group(1) if header else None))
+        elif name in ITERATOR_METHODS and (
+                '.' in call.name or content[max(0, call.start - 40):call.start].rstrip().endswith('.')):
+            # items.map(...) o (await x).map(...); una función map(...) suelta no cuenta
+            param = CALLBACK_PARAM.match(content, call.open)
+            loops.append(Loop(name, call.start, call.open, call.close + 1, param.group(1) if param else None))
+    return loops
+
+def innermost(loops: List[Loop], offset: int) -> Optional[Loop]:
+    inside = [loop for loop in loops if loop.body_start <= offset < loop.body_end]
+    return max(inside, key=lambda loop: loop.body_start) if inside else None
+
+def enclosing_calls(index: ScanIndex, offset: int, suffix: str) -> bool:
+    """True si alguna llamada cuyo nombre termina en `suffix` encierra el offset."""
+    return any(call.name.endswith(suffix) and call.open < offset < call.close for call in index.call_list)
+
+def in_batch_transaction(index: ScanIndex, offset: int) -> bool:
+    """
+    True si el $transaction(...) más interno que encierra el offset es la forma
+    en lote ($transaction([...]) o $transaction(rows.map(...))), no un callback.
+    """
+    transactions = [call for call in index.call_list
+                    if call.name.endswith('$transaction') and call.open < offset < call.close]
+    if not transactions:
+        return False
+    call = max(transactions, key=lambda c: c.open)
+    argument = WHITESPACE.match(index.content, call.open + 1).end()
+    return not TRANSACTION_CALLBACK.match(index.content, argument)
+
+def route_for(rel: str) -> Optional[str]:
+    """app/api/(grupo)/bookings/[id]/route.ts → /api/bookings/[id] (None si no es una ruta)."""
+    path = Path(rel)
+    if path.parts[:2] != ('app', 'api') or not path.name.startswith('route.'):
+        return None
+    segments = [part for part in path.parent.parts[1:] if not (part.startswith('(') and part.endswith(')'))]
+    return '/' + '/'.join(segments)
+
+def handler_at(content: str, offset: int) -> Optional[str]:
+    """Método HTTP del handler exportado que contiene el offset (el último declarado antes)."""
+    method = None
+    for match in HTTP_HANDLER.finditer(content, 0, offset):
+        method = match.group(1) or match.group(2)
+    return method
+
+def where_fields(call: CallSite, content: str) -> Dict[str, str]:
+    """Claves directas del where literal → texto de su valor."""
+    where = call.arg('where')
+    if where is None:
+        return {}
+    text = content[where.value_start:where.value_end]
+    if not text.startswith('{'):
+        return {}
+    index = scan(text)
+    root = index.region_at(0)
+    if root is None:
+        return {}
+    return {span.key: text[span.value_start:span.value_end].strip() for span in property_spans(index, root)}
+
+def relation_suggestion(call: CallSite, fields: Dict[str, str], schema: PrismaSchema,
+                        types: dict) -> Optional[dict]:
+    """include: { Relación: true } si el where sigue una relación del schema."""
+    for field, value in fields.items():
+        member = MEMBER_VALUE.match(value)
+        if not member:
+            continue
+        var, attr = member.group('var'), member.group('attr')
+        known = types.get(var)
+        owner_model = known.model if known is not None else None
+
+        # Hacia delante: where: { id: booking.courtId } ↔ Booking.Court (fields: [courtId])
+        forward = [f for f in schema.reverse_relations(call.model)
+                   if f.relation_fields == (attr,) and f.relation_references == (field,)
+                   and owner_model in (None, f.model)]
+        # Hacia atrás: where: { bookingId: booking.id } ↔ Payment.Booking → Booking.Payment
+        backward = []
+        own = schema.model(call.model)
+        for f in (own.relations.values() if own else ()):
+            if f.relation_fields == (field,) and f.relation_references == (attr,) and owner_model in (None, f.type):
+                opposite = schema.opposite(f)
+                if opposite is not None:
+                    backward.append(opposite)
+
+        candidates = forward + backward
+        if len({(f.model, f.name) for f in candidates}) != 1:
+            continue
+        relation = candidates[0]
+        # Sin tipo inferido, el nombre de la variable tiene que ser el del modelo (booking ~ Booking)
+        if owner_model is None and var.lower().rstrip('s') != relation.model.lower():
+            continue
+        return {
+            'kind': 'include',
+            'relation': f"{relation.model}.{relation.name}",
+            'text': f"Cargar la relación {relation.model}.{relation.name} con la consulta que trae `{var}` "
+                    f"en lugar de una consulta por fila",
+            'code': f"include: {{ {relation.name}: true }}",
+        }
+    return None
+
+def aggregate_metrics(call: CallSite, content: str) -> List[str]:
+    """Métricas de la llamada (count → _count: true; aggregate → sus _sum/_avg/...)."""
+    if call.operation == 'count':
+        return ['_count: true']
+    metrics = []
+    for key in AGGREGATE_KEYS:
+        arg = call.arg(key)
+        if arg is not None:
+            metrics.append(f"{key}: {' '.join(content[arg.value_start:arg.value_end].split())}")
+    return metrics
+
+def batch_suggestion(call: CallSite, content: str, fields: Dict[str, str], variable: Optional[str]) -> dict:
+    """Forma en lote genérica según la operación."""
+    delegate = f"{call.client}.{call.delegate}"
+    # La clave que cambia en cada vuelta: la que usa el elemento del bucle, si no la primera no literal
+    varying = re.compile(r'(?<![\w$.])' + re.escape(variable) + r'\b') if variable else None
+    key = next((field for field, value in fields.items() if varying and varying.search(value)), None)
+    key = key or next((field for field, value in fields.items() if not value.startswith(('{', "'", '"'))), None)
+    key = key or next(iter(fields), 'id')
+
+    if call.operation in AGGREGATE_OPERATIONS:
+        # Sin métricas literales (ej. argumentos en una variable) no se propone código
+        metrics = aggregate_metrics(call, content)
+        return {
+            'kind': 'groupBy',
+            'text': f"Una sola consulta agrupada por {key} antes del bucle",
+            'code': f"{delegate}.groupBy({{ by: ['{key}'], where: {{ {key}: {{ in: values }} }}, "
+                    f"{', '.join(metrics)} }})" if metrics else None,
+        }
+    if call.operation in READ_OPERATIONS:
+        return {
+            'kind': 'in',
+            'text': f"Traer todas las filas con {key}: {{ in: [...] }} antes del bucle e indexarlas en un Map por {key}",
+            'code': f"{delegate}.findMany({{ where: {{ {key}: {{ in: values }} }} }})",
+        }
+    if call.operation == 'create':
+        return {
+            'kind': 'createMany',
+            'text': "Construir las filas en el bucle e insertarlas con un único createMany",
+            'code': f"{delegate}.createMany({{ data: rows }})",
+        }
+    if call.operation in ('update', 'delete', 'updateMany', 'deleteMany') and fields:
+        batched = 'updateMany' if call.operation.startswith('update') else 'deleteMany'
+        return {
+            'kind': batched,
+            'text': f"Si los datos son iguales para todas las filas: un {batched} con {key}: {{ in: [...] }}; "
+                    f"si no, un único $transaction([...]) con las operaciones",
+            'code': f"{delegate}.{batched}({{ where: {{ {key}: {{ in: values }} }}"
+                    + (", data })" if batched == 'updateMany' else " })"),
+        }
+    return {
+        'kind': 'transaction',
+        'text': "Agrupar las operaciones en un único prisma.$transaction([...])",
+        'code': f"prisma.$transaction(rows.map(row => {delegate}.{call.operation}(...)))",
+    }
+
+def severity_for(loop: Loop, batched: bool) -> str:
+    if batched:
+        return 'low'
+    if loop.kind in LOOP_KEYWORDS or loop.kind in SEQUENTIAL_ITERATORS or loop.kind == 'forEach':
+        return 'high'
+    return 'medium'
+
+def finding_id(rel: str, call_text: str, occurrence: int) -> str:
+    """Id estable ante cambios de línea: ruta + texto normalizado de la llamada."""
+    normalized = ' '.join(call_text.split())
+    return hashlib.sha1(f"{rel}\0{normalized}\0{occurrence}".encode('utf-8')).hexdigest()[:12]
+
+def analyze_file(rel: str, content: str, cache: CallSiteCache, schema: PrismaSchema) -> List[dict]:
+    """Hallazgos N+1 de un archivo."""
+    sites = cache.for_content(content)
+    if not len(sites):
+        return []
+    index = scan(content)
+    loops = loop_spans(index)
+    if not loops:
+        return []
+
+    findings = []
+    types = None
+    seen = Counter()
+    for call in sites:
+        loop = innermost(loops, call.start)
+        if loop is None:
+            continue
+        if types is None:
+            types = infer_bindings(content).types
+
+        in_transaction = enclosing_calls(index, loop.start, '$transaction')
+        fields = where_fields(call, content)
+        suggestion = None
+        if call.operation in READ_OPERATIONS and call.model:
+            suggestion = relation_suggestion(call, fields, schema, types)
+        suggestion = suggestion or batch_suggestion(call, content, fields, loop.variable)
+
+        call_text = content[call.start:call.end]
+        seen[call_text] += 1
+        findings.append({
+            'id': finding_id(rel, call_text, seen[call_text]),
+            'file': rel,
+            'line': call.line,
+            'method': handler_at(content, call.start),
+            'call': f"{call.client}.{call.delegate}.{call.operation}",
+            'model': call.model,
+            'operation': call.operation,
+            'loop': {'kind': loop.kind, 'line': content.count('\n', 0, loop.start) + 1, 'variable': loop.variable},
+            'parallel': enclosing_calls(index, loop.start, 'Promise.all'),
+            'transaction': in_transaction,
+            'severity': severity_for(loop, in_batch_transaction(index, loop.start)),
+            'suggestion': suggestion,
+        })
+    return findings
+
+def build_report(files: List[Path], baseline: Optional[set] = None) -> dict:
+    schema = load_schema()
+    cache = CallSiteCache.open()
+    routes: Dict[str, dict] = {}
+
+    for file_path in files:
+        rel = file_path.relative_to(PROJECT_ROOT).as_posix()
+        try:
+            content = file_path.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+        findings = analyze_file(rel, content, cache, schema)
+        if not findings:
+            continue
+        for finding in findings:
+            finding['new'] = baseline is None or finding['id'] not in baseline
+        route = route_for(rel)
+        routes[rel] = {'route': route, 'file': rel, 'findings': findings}
+
+    cache.save()
+    all_findings = [f for entry in routes.values() for f in entry['findings']]
+    return {
+        'version': REPORT_VERSION,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'files_scanned': len(files),
+        'summary': {
+            'findings': len(all_findings),
+            'new': sum(1 for f in all_findings if f['new']),
+            'routes': sum(1 for entry in routes.values() if entry['route']),
+            'by_severity': {s: sum(1 for f in all_findings if f['severity'] == s) for s in SEVERITIES},
+            'by_model': dict(Counter(f['model'] or '?' for f in all_findings).most_common()),
+        },
+        'routes': sorted(routes.values(), key=lambda e: (-len(e['findings']), e['file'])),
+    }
+
+def load_baseline(path: str) -> set:
+    data = json.loads(Path(path).read_text(encoding='utf-8'))
+    return {f['id'] for entry in data.get('routes', []) for f in entry['findings']}
+
+def gate_failures(report: dict, threshold: str) -> List[dict]:
+    minimum = SEVERITIES.index(threshold)
+    return [f for entry in report['routes'] for f in entry['findings']
+            if f['new'] and SEVERITIES.index(f['severity']) >= minimum]
+
+def print_report(report: dict):
+    summary = report['summary']
+    print(f"🔍 {report['files_scanned']} archivos analizados: {summary['findings']} consultas dentro de bucles "
+          f"en {len(report['routes'])} archivos ({summary['routes']} rutas)")
+    print(f"   high {summary['by_severity']['high']} · medium {summary['by_severity']['medium']} · "
+          f"low {summary['by_severity']['low']}" + (f" — {summary['new']} nuevas" if summary['new'] != summary['findings'] else ''))
+
+    icons = {'high': '🔴', 'medium': '🟠', 'low': '🟡'}
+    for entry in report['routes']:
+        print(f"\n📁 {entry['route'] or entry['file']}  ({entry['file']})")
+        for f in entry['findings']:
+            method = f"{f['method']} " if f['method'] else ''
+            context = ' en Promise.all' if f['parallel'] else ' en $transaction' if f['transaction'] else ''
+            print(f"  {icons[f['severity']]} {method}L{f['line']}: {f['call']} dentro de {f['loop']['kind']} "
+                  f"(L{f['loop']['line']}){context}")
+            print(f"      💡 {f['suggestion']['text']}")
+            if f['suggestion']['code']:
+                print(f"         {f['suggestion']['code']}")
+
+def option_value(name: str) -> Optional[str]:
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return None
+
+def main():
+    option_values = {'--output', '--baseline', '--fail-on'}
+    paths = [a for i, a in enumerate(sys.argv[1:], 1)
+             if not a.startswith('--') and sys.argv[i - 1] not in option_values]
+    threshold = option_value('--fail-on')
+    if threshold is not None and threshold not in SEVERITIES:
+        print(f"❌ --fail-on debe ser uno de: {', '.join(SEVERITIES)}")
+        sys.exit(2)
+
+    baseline_path = option_value('--baseline')
+    baseline = load_baseline(baseline_path) if baseline_path else None
+    files = find_source_files([Path(p).resolve() for p in paths] or SOURCE_DIRS)
+    report = build_report(files, baseline)
+
+    output = option_value('--output')
+    if output:
+        Path(output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    if '--json' in sys.argv:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+        if output:
+            print(f"\n💾 Reporte JSON: {output}")
+
+    if threshold:
+        failures = gate_failures(report, threshold)
+        if failures:
+            if '--json' not in sys.argv:
+                print(f"\n❌ {len(failures)} hallazgos nuevos con severidad >= {threshold}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
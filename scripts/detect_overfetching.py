@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Detector de consultas sin límite y de includes que traen árboles enteros.
+
+Sobre el índice de llamadas (prisma_calls.py) marca:
+- unbounded: findMany sin `take` ni `cursor` (trae todas las filas que
+  cumplan el where),
+- list_include: include/select de una relación lista del schema (Booking[],
+  Payment[], Transaction[], ...) con `true`: todas las filas relacionadas,
+- list_include_unbounded: la misma relación con { select/include/where }
+  pero sin `take`,
+- deep_include: include/select anidados más allá de --max-depth niveles
+  (por defecto 2).
+
+Cada hallazgo se pondera con las filas estimadas del modelo que se trae,
+según los `counts` de backups/backup-metadata.json (el mayor de todos los
+backups; los modelos que no aparecen cuentan DEFAULT_ROWS). Las llamadas
+bajo app/api (rutas de request) pesan API_WEIGHT veces más.
+
+Uso:
+    python scripts/detect_overfetching.py [rutas...] [--top 30] [--max-depth 2]
+    python scripts/detect_overfetching.py --json            # JSON a stdout
+    python scripts/detect_overfetching.py --output of.json  # JSON a archivo
+"""
+
+import json
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from codemod_cache import PROJECT_ROOT
+from prisma_calls import CallSite, CallSiteCache, property_spans
+from prisma_schema import PrismaSchema, load_schema
+from source_files import find_source_files
+from ts_scanner import Region, ScanIndex, scan
+
+REPORT_VERSION = 1
+SOURCE_DIRS = ['app', 'lib']
+BACKUP_METADATA = PROJECT_ROOT / 'backups' / 'backup-metadata.json'
+
+DEFAULT_ROWS = 100
+DEFAULT_MAX_DEPTH = 2
+API_WEIGHT = 3.0
+
+# Operaciones que aceptan include/select anidados
+INCLUDE_OPERATIONS = {
+    'findUnique', 'findUniqueOrThrow', 'findFirst', 'findFirstOrThrow', 'findMany',
+    'create', 'update', 'upsert', 'delete',
+}
+NESTED_KEYS = ('include', 'select')
+
+KIND_LABELS = {
+    'unbounded': 'findMany sin take ni cursor',
+    'list_include': 'relación lista con true',
+    'list_include_unbounded': 'relación lista sin take',
+    'deep_include': 'include anidado demasiado profundo',
+}
+
+def estimated_rows(schema: PrismaSchema, metadata_path: Path = BACKUP_METADATA) -> Dict[str, int]:
+    """
+    Modelo → filas estimadas: el mayor `counts` de los backups. Las claves
+    son delegates en plural o singular (bookings, classes, budget).
+    """
+    try:
+        backups = json.loads(metadata_path.read_text(encoding='utf-8')).get('backups', [])
+    except (OSError, ValueError):
+        return {}
+
+    rows: Dict[str, int] = {}
+    for backup in backups:
+        for key, count in backup.get('counts', {}).items():
+            singular = (key, key[:-1] if key.endswith('s') else None, key[:-2] if key.endswith('es') else None)
+            model = next((schema.model_for_delegate(name) for name in singular
+                          if name and schema.model_for_delegate(name)), None)
+            if model:
+                rows[model] = max(rows.get(model, 0), int(count or 0))
+    return rows
+
+def nested_region(index: ScanIndex, start: int) -> Optional[Region]:
+    return index.region_at(start) if index.content.startswith('{', start) else None
+
+def walk_includes(index: ScanIndex, region: Region, model: str, schema: PrismaSchema,
+                  path: Tuple[str, ...], found: List[Tuple[str, Tuple[str, ...], str]],
+                  depth_seen: List[Tuple[str, ...]]):
+    """
+    Recorre include/select anidados: relaciones lista sin take y profundidad.
+    found recibe (kind, ruta, modelo relacionado).
+    """
+    text = index.content
+    for span in property_spans(index, region):
+        f = schema.field(model, span.key)
+        if f is None or not f.is_relation:
+            continue
+        relation_path = path + (span.key,)
+        depth_seen.append(relation_path)
+        value = text[span.value_start:span.value_end].strip()
+        nested = nested_region(index, span.value_start)
+        nested_spans = {s.key: s for s in property_spans(index, nested)} if nested else {}
+
+        if f.is_list and 'take' not in nested_spans:
+            found.append(('list_include' if value == 'true' else 'list_include_unbounded', relation_path, f.type))
+
+        for key in NESTED_KEYS:
+            inner = nested_spans.get(key)
+            inner_region = nested_region(index, inner.value_start) if inner else None
+            if inner_region is not None:
+                walk_includes(index, inner_region, f.type, schema, relation_path, found, depth_seen)
+
+def analyze_call(call: CallSite, content: str, schema: PrismaSchema, max_depth: int) -> List[dict]:
+    """Hallazgos de una llamada (sin ponderar)."""
+    findings = []
+    arguments = content[call.open + 1:call.close]
+
+    if call.operation == 'findMany':
+        # Argumentos en una variable o con spread: el take puede venir de fuera
+        dynamic = (not call.args and arguments.strip()) or '...' in arguments
+        if not dynamic and call.arg('take') is None and call.arg('cursor') is None:
+            findings.append({'kind': 'unbounded', 'path': [], 'fetched': call.model})
+
+    if call.operation not in INCLUDE_OPERATIONS:
+        return findings
+
+    for key in NESTED_KEYS:
+        arg = call.arg(key)
+        if arg is None:
+            continue
+        text = content[arg.value_start:arg.value_end]
+        index = scan(text)
+        root = index.region_at(0)
+        if root is None:
+            continue
+        found: List[Tuple[str, Tuple[str, ...], str]] = []
+        depth_seen: List[Tuple[str, ...]] = []
+        walk_includes(index, root, call.model, schema, (), found, depth_seen)
+        findings.extend({'kind': kind, 'path': list(path), 'fetched': fetched} for kind, path, fetched in found)
+
+        deepest = max(depth_seen, key=len, default=())
+        if len(deepest) > max_depth:
+            findings.append({'kind': 'deep_include', 'path': list(deepest), 'fetched': None, 'depth': len(deepest)})
+    return findings
+
+def build_report(files: List[Path], max_depth: int) -> dict:
+    schema = load_schema()
+    rows = estimated_rows(schema)
+    cache = CallSiteCache.open()
+    findings: List[dict] = []
+    analyzed = Counter()
+
+    for file_path in files:
+        rel = file_path.relative_to(PROJECT_ROOT).as_posix()
+        try:
+            content = file_path.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+        weight = API_WEIGHT if rel.startswith('app/api/') else 1.0
+
+        for call in cache.for_content(content):
+            if not call.model or schema.model(call.model) is None:
+                continue
+            analyzed[call.operation] += 1
+            for finding in analyze_call(call, content, schema, max_depth):
+                # Filas que trae: el modelo de la relación (o el de la llamada); en un
+                # include profundo, la suma de los modelos de la ruta
+                if finding['kind'] == 'deep_include':
+                    model, walked = call.model, []
+                    for name in finding['path']:
+                        f = schema.field(model, name)
+                        model = f.type if f else model
+                        walked.append(model)
+                    estimate = sum(rows.get(m, DEFAULT_ROWS) for m in walked)
+                else:
+                    estimate = rows.get(finding['fetched'], DEFAULT_ROWS)
+                finding.update({
+                    'file': rel,
+                    'line': call.line,
+                    'call': f"{call.client}.{call.delegate}.{call.operation}",
+                    'model': call.model,
+                    'estimated_rows': estimate,
+                    'rows_known': finding['kind'] == 'deep_include' or finding['fetched'] in rows,
+                    'score': round(estimate * weight, 1),
+                })
+                findings.append(finding)
+
+    cache.save()
+    findings.sort(key=lambda f: (-f['score'], f['file'], f['line']))
+    return {
+        'version': REPORT_VERSION,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'files_scanned': len(files),
+        'max_depth': max_depth,
+        'estimated_rows': rows,
+        'calls_analyzed': dict(analyzed),
+        'summary': {
+            'findings': len(findings),
+            'by_kind': {kind: sum(1 for f in findings if f['kind'] == kind) for kind in KIND_LABELS},
+        },
+        'findings': findings,
+    }
+
+def print_report(report: dict, top: int):
+    summary = report['summary']
+    print(f"🔍 {report['files_scanned']} archivos, {report['calls_analyzed'].get('findMany', 0)} findMany, "
+          f"{sum(report['calls_analyzed'].values())} llamadas sobre modelos del schema")
+    if report['estimated_rows']:
+        biggest = sorted(report['estimated_rows'].items(), key=lambda item: -item[1])[:5]
+        print(f"📦 Filas estimadas (backups): {', '.join(f'{m} {n:,}' for m, n in biggest)}; "
+              f"resto {DEFAULT_ROWS}")
+    else:
+        print(f"⚠️  Sin {BACKUP_METADATA.relative_to(PROJECT_ROOT)}: todos los modelos cuentan {DEFAULT_ROWS} filas")
+
+    print(f"\n📊 Hallazgos: {summary['findings']}")
+    for kind, count in summary['by_kind'].items():
+        print(f"   {KIND_LABELS[kind]:<36} {count:>6}")
+
+    print(f"\n🏆 Top {top} por filas estimadas (app/api ×{API_WEIGHT:g}):\n")
+    for f in report['findings'][:top]:
+        where = '.'.join(f['path'])
+        target = f" → {where}" if where else ''
+        rows = f"{f['estimated_rows']:,}" + ('' if f['rows_known'] else '?')
+        print(f"  {f['score']:>9,.0f}  {f['file']}:{f['line']}  {f['call']}{target}  "
+              f"[{KIND_LABELS[f['kind']]}, ~{rows} filas]")
+
+def option_value(name: str, default: Optional[str] = None) -> Optional[str]:
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return default
+
+def main():
+    option_values = {'--output', '--top', '--max-depth'}
+    paths = [a for i, a in enumerate(sys.argv[1:], 1)
+             if not a.startswith('--') and sys.argv[i - 1] not in option_values]
+    files = find_source_files([Path(p).resolve() for p in paths] or SOURCE_DIRS)
+    report = build_report(files, int(option_value('--max-depth', str(DEFAULT_MAX_DEPTH))))
+
+    output = option_value('--output')
+    if output:
+        Path(output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    if '--json' in sys.argv:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+
+    print_report(report, int(option_value('--top', '30')))
+    if output:
+        print(f"\n💾 Reporte JSON: {output}")
+
+if __name__ == '__main__':
+    main()
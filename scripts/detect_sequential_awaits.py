@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Detector de awaits secuenciales de Prisma que pueden ir en Promise.all.
+
+Los dashboards e informes hacen
+
+    const total = await prisma.booking.count({ where })
+    const revenue = await prisma.payment.aggregate({ _sum: { amount: true } })
+    const latest = await prisma.booking.findMany({ take: 10 })
+
+y la latencia de la página es la SUMA de las consultas en lugar de la más
+lenta. Sobre el índice de llamadas (prisma_calls.py) se buscan tramos de
+sentencias consecutivas del mismo bloque, cada una de la forma
+
+    [const|let|var destino =] await prisma.<modelo>.<lectura>(...)[;]
+
+separadas solo por líneas en blanco o comentarios //, en las que los
+argumentos de cada llamada no mencionan ninguna variable declarada por las
+anteriores del tramo (comprobación conservadora: cualquier aparición del
+nombre cuenta como dependencia).
+
+Solo entran lecturas (find*, count, aggregate, groupBy) con los clientes
+prisma/db: las escrituras pueden depender unas de otras por claves
+foráneas u orden, y dentro de un $transaction interactivo (tx, trx) las
+consultas van por una única conexión, así que paralelizarlas no gana nada.
+
+La reescritura es opt-in y es una regla más del pipeline (parallel_awaits,
+fuera de las reglas por defecto):
+
+    const [total, revenue, latest] = await Promise.all([
+      prisma.booking.count({ where }),
+      prisma.payment.aggregate({ _sum: { amount: true } }),
+      prisma.booking.findMany({ take: 10 }),
+    ])
+
+Uso:
+    python scripts/detect_sequential_awaits.py [rutas...]       # tramos por archivo
+    python scripts/detect_sequential_awaits.py --json           # JSON a stdout
+    python scripts/detect_sequential_awaits.py --output s.json  # JSON a archivo
+    python scripts/codemod_pipeline.py --rules parallel_awaits --diff parallel.diff
+    python scripts/codemod_pipeline.py --rules parallel_awaits --apply --diff parallel.diff
+"""
+
+import hashlib
+import json
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+from codemod_cache import PROJECT_ROOT
+from detect_n_plus_one import handler_at, route_for
+from prisma_calls import CallSite, CallSiteCache, call_sites
+from source_files import find_source_files
+from ts_scanner import ScanIndex, replace_spans, scan
+
+REPORT_VERSION = 1
+SOURCE_DIRS = ['app', 'lib']
+
+# Requisitos del prefiltro (prefilter.py)
+CANDIDATE_NEEDLES = [(b'await',), (b'prisma.', b'db.')]
+
+PARALLEL_CLIENTS = {'prisma', 'db'}
+READ_OPERATIONS = {
+    'findUnique', 'findUniqueOrThrow', 'findFirst', 'findFirstOrThrow', 'findMany',
+    'count', 'aggregate', 'groupBy',
+}
+
+# Lo que precede a la llamada en su línea: sangría, declaración opcional y await
+STATEMENT_PREFIX = re.compile(
+    r'(?P<indent>[ \t]*)'
+    r'(?:(?P<decl>const|let|var)\s+(?P<target>[A-Za-z_$][\w$]*|\{[^{}]*\}|\[[^\[\]]*\])\s*=\s*)?'
+    r'await\s+\Z'
+)
+# Lo que sigue al ')' de cierre: ';' opcional y fin de línea
+STATEMENT_SUFFIX = re.compile(r'[ \t]*(?P<semi>;?)[ \t]*(?:\n|\Z)')
+IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*')
+
+class Statement(NamedTuple):
+    """`[decl destino =] await llamada[;]` en su propia línea."""
+    call: CallSite
+    indent: str
+    decl: Optional[str]
+    target: Optional[str]
+    names: Tuple[str, ...]   # variables que declara
+    start: int               # inicio de la línea
+    end: int                 # tras el ';' (o el ')') de la sentencia
+    semicolon: bool
+
+class Run(NamedTuple):
+    """Tramo de sentencias consecutivas e independientes (dos o más)."""
+    statements: Tuple[Statement, ...]
+
+    @property
+    def start(self) -> int:
+        return self.statements[0].start
+
+    @property
+    def end(self) -> int:
+        return self.statements[-1].end
+
+def bound_names(target: Optional[str]) -> Tuple[str, ...]:
+    """Variables que declara un destino: x, { a, b: c, ...rest } o [a, , b = 1]."""
+    if not target:
+        return ()
+    if target[0] not in '{[':
+        return (target,)
+    names = []
+    for part in target[1:-1].split(','):
+        part = part.split('=')[0]
+        if target[0] == '{' and ':' in part:
+            part = part.split(':', 1)[1]
+        match = IDENTIFIER.search(part)
+        if match:
+            names.append(match.group(0))
+    return tuple(names)
+
+def statement_for(call: CallSite, content: str) -> Optional[Statement]:
+    """La sentencia await de la llamada, o None si la llamada no ocupa una sentencia entera."""
+    if call.parent != -1 or call.client not in PARALLEL_CLIENTS or call.operation not in READ_OPERATIONS:
+        return None
+    line_start = content.rfind('\n', 0, call.start) + 1
+    prefix = STATEMENT_PREFIX.match(content, line_start, call.start)
+    if prefix is None or prefix.end() != call.start:
+        return None
+    suffix = STATEMENT_SUFFIX.match(content, call.end)
+    if suffix is None:
+        return None
+    end = content.index(';', call.end) + 1 if suffix.group('semi') else call.end
+    return Statement(call, prefix.group('indent'), prefix.group('decl'), prefix.group('target'),
+                     bound_names(prefix.group('target')), line_start, end, bool(suffix.group('semi')))
+
+def gap_comments(content: str, before: Statement, after: Statement) -> Optional[List[str]]:
+    """Comentarios // entre dos sentencias; None si hay algo más que blancos y comentarios."""
+    comments = []
+    for line in content[before.end:after.start].split('\n'):
+        text = line.strip()
+        if text.startswith('//'):
+            comments.append(text)
+        elif text:
+            return None
+    return comments
+
+def references(content: str, statement: Statement, names: set) -> bool:
+    """True si los argumentos de la llamada mencionan alguna de las variables."""
+    arguments = content[statement.call.open:statement.call.end]
+    return any(re.search(r'(?<![\w$.])' + re.escape(name) + r'(?![\w$])', arguments) for name in names)
+
+def find_runs(content: str, sites=None) -> List[Run]:
+    """Tramos de awaits de lectura consecutivos e independientes del archivo."""
+    sites = call_sites(content) if sites is None else sites
+    statements = [s for s in (statement_for(call, content) for call in sites) if s is not None]
+
+    runs = []
+    current: List[Statement] = []
+    bound: set = set()
+
+    def close():
+        if len(current) > 1:
+            runs.append(Run(tuple(current)))
+
+    for statement in statements:
+        previous = current[-1] if current else None
+        # Una sola declaración por tramo (const/let/var); las sentencias sueltas encajan con cualquiera
+        decl = next((s.decl for s in current if s.decl), None)
+        joins = (
+            previous is not None
+            and statement.indent == previous.indent
+            and gap_comments(content, previous, statement) is not None
+            and (statement.decl is None or decl is None or statement.decl == decl)
+            and not references(content, statement, bound)
+        )
+        if not joins:
+            close()
+            current, bound = [], set()
+        current.append(statement)
+        bound.update(statement.names)
+    close()
+    return runs
+
+def _reindent(index: ScanIndex, start: int, end: int, extra: str) -> str:
+    """Texto de start..end con `extra` delante de cada línea siguiente que empieza en código."""
+    lines = index.content[start:end].split('\n')
+    pos = start + len(lines[0]) + 1
+    for i in range(1, len(lines)):
+        line_start, pos = pos, pos + len(lines[i]) + 1
+        # Una línea que empieza dentro de un template literal se deja tal cual
+        if lines[i] and index.is_code(line_start):
+            lines[i] = extra + lines[i]
+    return '\n'.join(lines)
+
+def promise_all(index: ScanIndex, run: Run) -> str:
+    """Sentencia Promise.all equivalente al tramo (con la sangría del primero)."""
+    content = index.content
+    statements = run.statements
+    indent = statements[0].indent
+    inner = indent + '  '
+    decl = next((s.decl for s in statements if s.decl), None)
+
+    lines = []
+    for i, statement in enumerate(statements):
+        if i:
+            lines.extend(inner + comment for comment in gap_comments(content, statements[i - 1], statement))
+        call = statement.call
+        lines.append(inner + _reindent(index, call.start, call.end, '  ') + ',')
+
+    semicolon = ';' if any(s.semicolon for s in statements) else ''
+    if decl is None:
+        head = f"{indent}await Promise.all(["
+    else:
+        slots = [s.target or '' for s in statements]
+        while slots and not slots[-1]:
+            slots.pop()
+        head = f"{indent}{decl} [{', '.join(slots)}] = await Promise.all(["
+    return '\n'.join([head] + lines + [f"{indent}]){semicolon}"])
+
+def parallelize_content(content: str) -> Tuple[str, int]:
+    """Regla del pipeline: cada tramo → un Promise.all. Fixes = awaits secuenciales eliminados."""
+    runs = find_runs(content)
+    if not runs:
+        return content, 0
+    # Todas las ediciones sobre el mismo escaneo y aplicadas de una vez
+    index = scan(content)
+    edits = [(run.start, run.end, promise_all(index, run)) for run in runs]
+    return replace_spans(content, edits), sum(len(run.statements) - 1 for run in runs)
+
+def run_id(rel: str, content: str, run: Run) -> str:
+    """Id estable ante cambios de línea: ruta + texto normalizado de las llamadas."""
+    text = '\0'.join(' '.join(content[s.call.start:s.call.end].split()) for s in run.statements)
+    return hashlib.sha1(f"{rel}\0{text}".encode('utf-8')).hexdigest()[:12]
+
+def analyze_file(rel: str, content: str, cache: CallSiteCache) -> List[dict]:
+    sites = cache.for_content(content)
+    if len(sites) < 2:
+        return []
+    findings = []
+    for run in find_runs(content, sites):
+        first, last = run.statements[0], run.statements[-1]
+        findings.append({
+            'id': run_id(rel, content, run),
+            'file': rel,
+            'route': route_for(rel),
+            'method': handler_at(content, first.call.start),
+            'line': first.call.line,
+            'end_line': content.count('\n', 0, last.end) + 1,
+            'queries': len(run.statements),
+            'round_trips_saved': len(run.statements) - 1,
+            'calls': [{
+                'line': s.call.line,
+                'call': f"{s.call.client}.{s.call.delegate}.{s.call.operation}",
+                'model': s.call.model,
+                'target': s.target,
+            } for s in run.statements],
+        })
+    return findings
+
+def build_report(files: List[Path]) -> dict:
+    cache = CallSiteCache.open()
+    findings: List[dict] = []
+    for file_path in files:
+        rel = file_path.relative_to(PROJECT_ROOT).as_posix()
+        try:
+            content = file_path.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+        findings.extend(analyze_file(rel, content, cache))
+    cache.save()
+
+    findings.sort(key=lambda f: (-f['queries'], f['file'], f['line']))
+    return {
+        'version': REPORT_VERSION,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'files_scanned': len(files),
+        'summary': {
+            'runs': len(findings),
+            'files': len({f['file'] for f in findings}),
+            'queries': sum(f['queries'] for f in findings),
+            'round_trips_saved': sum(f['round_trips_saved'] for f in findings),
+        },
+        'runs': findings,
+    }
+
+def print_report(report: dict):
+    summary = report['summary']
+    print(f"🔍 {report['files_scanned']} archivos: {summary['runs']} tramos de awaits secuenciales "
+          f"en {summary['files']} archivos ({summary['queries']} consultas, "
+          f"{summary['round_trips_saved']} round trips evitables)")
+
+    current = None
+    for run in sorted(report['runs'], key=lambda f: (f['file'], f['line'])):
+        if run['file'] != current:
+            current = run['file']
+            print(f"\n📁 {run['route'] or run['file']}  ({run['file']})")
+        method = f"{run['method']} " if run['method'] else ''
+        print(f"  ⏱️  {method}L{run['line']}-{run['end_line']}: {run['queries']} consultas en serie")
+        for call in run['calls']:
+            target = f"{call['target']} = " if call['target'] else ''
+            print(f"      L{call['line']}: {target}{call['call']}")
+
+    if summary['runs']:
+        print("\n💡 Para combinarlos en Promise.all (dry run con diff):")
+        print("   python scripts/codemod_pipeline.py --rules parallel_awaits --diff parallel-awaits.diff")
+
+def option_value(name: str) -> Optional[str]:
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return None
+
+def main():
+    option_values = {'--output'}
+    paths = [a for i, a in enumerate(sys.argv[1:], 1)
+             if not a.startswith('--') and sys.argv[i - 1] not in option_values]
+    files = find_source_files([Path(p).resolve() for p in paths] or SOURCE_DIRS)
+    report = build_report(files)
+
+    output = option_value('--output')
+    if output:
+        Path(output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    if '--json' in sys.argv:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+
+    print_report(report)
+    if output:
+        print(f"\n💾 Reporte JSON: {output}")
+
+if __name__ == '__main__':
+    main()
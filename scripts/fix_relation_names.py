@@ -14,6 +14,11 @@ import json
 from pathlib import Path
 from collections import defaultdict
 
+from codemod_cache import PROJECT_ROOT, CodemodCache, ruleset_fingerprint, script_modules
+from prisma_schema import SCHEMA_PATH, load_schema
+from relation_maps import validate_fixes
+from source_files import find_source_files
+
 # Colores
 class Colors:
     HEADER = '\033[95m'
@@ -27,7 +32,7 @@ class Colors:
 
 def load_fix_mapping() -> dict:
     """Carga el mapeo de correcciones desde relation_fixes.json"""
-    fixes_path = Path('/users/ja/v4/bmad-nextjs-app/scripts/relation_fixes.json')
+    fixes_path = PROJECT_ROOT / 'scripts' / 'relation_fixes.json'
 
     if not fixes_path.exists():
         print(f"{Colors.FAIL}❌ Error: No se encontró relation_fixes.json{Colors.ENDC}")
@@ -35,11 +40,19 @@ def load_fix_mapping() -> dict:
         return {}
 
     data = json.loads(fixes_path.read_text())
-    return data['fixes']
+    fixes = data['fixes']
+
+    # Descartar correcciones cuyo destino no es una relación del schema
+    # (ej. 'booking' → 'bookingId' es un campo escalar, no un include válido)
+    invalid = validate_fixes(fixes)
+    for incorrect, correct in sorted(invalid.items()):
+        print(f"{Colors.WARNING}⚠️  Ignorando {incorrect} → {correct}: no es una relación en schema.prisma{Colors.ENDC}")
+    return {k: v for k, v in fixes.items() if k not in invalid}
 
 def parse_prisma_schema_full() -> dict:
     """
-    Parsea schema.prisma para obtener el mapeo completo de relaciones.
+    Obtiene el mapeo completo de relaciones desde el grafo compartido
+    de prisma_schema.py (memoizado: no relee schema.prisma si no cambió).
 
     Returns:
         dict: {
@@ -47,46 +60,16 @@ def parse_prisma_schema_full() -> dict:
                 'Club': 'Club',
                 'Court': 'Court',
                 'BookingGroup': 'BookingGroup',
-                'clubId': 'clubId',  # IDs también para referencia
                 ...
             },
             ...
         }
     """
-    schema_path = Path('/users/ja/v4/bmad-nextjs-app/prisma/schema.prisma')
-    schema_content = schema_path.read_text()
-
-    model_pattern = re.compile(r'^model\s+(\w+)\s*{(.*?)^}', re.MULTILINE | re.DOTALL)
-
-    models_relations = {}
-
-    for model_match in model_pattern.finditer(schema_content):
-        model_name = model_match.group(1)
-        model_body = model_match.group(2)
-
-        relations = {}
-
-        for line in model_body.split('\n'):
-            line = line.strip()
-
-            if not line or line.startswith('//') or line.startswith('@@'):
-                continue
-
-            parts = line.split()
-            if len(parts) >= 2:
-                field_name = parts[0]
-                field_type = parts[1]
-
-                # Limpiar tipo
-                clean_type = field_type.rstrip('?').rstrip('[]')
-
-                # Si empieza con mayúscula, es una relación
-                if clean_type and clean_type[0].isupper():
-                    relations[field_name] = clean_type
-
-        models_relations[model_name] = relations
-
-    return models_relations
+    schema = load_schema(SCHEMA_PATH)
+    return {
+        name: {field_name: f.type for field_name, f in model.relations.items()}
+        for name, model in schema.models.items()
+    }
 
 def fix_include_statements(content: str, fixes: dict) -> tuple[str, int]:
     """
@@ -205,30 +188,7 @@ def fix_file(file_path: Path, fixes: dict, dry_run: bool = True) -> dict:
 
 def find_typescript_files() -> list[Path]:
     """Encuentra todos los archivos TypeScript del proyecto (excluyendo node_modules)."""
-    project_root = Path('/users/ja/v4/bmad-nextjs-app')
-
-    patterns = [
-        'app/**/*.ts',
-        'app/**/*.tsx',
-        'lib/**/*.ts',
-        'lib/**/*.tsx',
-        'components/**/*.ts',
-        'components/**/*.tsx',
-    ]
-
-    files = []
-    for pattern in patterns:
-        files.extend(project_root.glob(pattern))
-
-    # Excluir node_modules, .next, etc.
-    excluded = {'node_modules', '.next', 'dist', 'build', '.git'}
-
-    filtered_files = []
-    for file in files:
-        if not any(exc in file.parts for exc in excluded):
-            filtered_files.append(file)
-
-    return filtered_files
+    return find_source_files(['app', 'lib', 'components'])
 
 def main():
     print(f"\n{Colors.HEADER}{'='*80}{Colors.ENDC}")
@@ -252,7 +212,14 @@ def main():
 
     print(f"\n{Colors.CYAN}🔍 Buscando archivos TypeScript...{Colors.ENDC}")
     files = find_typescript_files()
-    print(f"{Colors.GREEN}✓ {len(files)} archivos encontrados{Colors.ENDC}\n")
+    print(f"{Colors.GREEN}✓ {len(files)} archivos encontrados{Colors.ENDC}")
+
+    # El mapeo forma parte de las reglas: si cambia, se reprocesa todo
+    cache = CodemodCache('fix_relation_names', ruleset_fingerprint(Path(__file__), *script_modules(), fixes))
+    files = cache.filter(files)
+    if cache.skipped:
+        print(f"{Colors.CYAN}♻️  {cache.skipped} archivos sin cambios desde la última pasada (caché){Colors.ENDC}")
+    print()
 
     # Preguntar modo
     print(f"{Colors.BOLD}Modo de ejecución:{Colors.ENDC}")
@@ -278,6 +245,7 @@ def main():
     for i, file_path in enumerate(files, 1):
         result = fix_file(file_path, fixes, dry_run)
         results.append(result)
+        cache.record(file_path, {'changed': result['changes'], 'errors': 'error' in result}, dry_run)
 
         total_changes += result['changes']
         total_include_fixes += result['include_fixes']
@@ -288,7 +256,7 @@ def main():
 
         if result['changes'] > 0:
             # Mostrar progreso para archivos con cambios
-            rel_path = Path(result['file']).relative_to('/users/ja/v4/bmad-nextjs-app')
+            rel_path = Path(result['file']).relative_to(PROJECT_ROOT)
             print(f"  {Colors.GREEN}✓{Colors.ENDC} {rel_path}")
             print(f"    {result['include_fixes']} include fixes, {result['access_fixes']} property access fixes")
 
@@ -296,6 +264,8 @@ def main():
         if i % 50 == 0:
             print(f"{Colors.CYAN}    Procesados {i}/{len(files)} archivos...{Colors.ENDC}")
 
+    cache.save()
+
     # Reporte final
     print(f"\n{Colors.HEADER}{'='*80}{Colors.ENDC}")
     print(f"{Colors.HEADER}REPORTE FINAL{Colors.ENDC}")
@@ -318,7 +288,7 @@ def main():
     if top_files:
         print(f"\n{Colors.BOLD}📁 Top 10 archivos más modificados:{Colors.ENDC}\n")
         for i, result in enumerate(top_files, 1):
-            rel_path = Path(result['file']).relative_to('/users/ja/v4/bmad-nextjs-app')
+            rel_path = Path(result['file']).relative_to(PROJECT_ROOT)
             print(f"  {i:2}. {str(rel_path):70} ({result['changes']:3} cambios)")
 
     if dry_run:
@@ -1,37 +1,33 @@
 #!/usr/bin/env python3
 """
 Script FINAL para corregir capitalizaciones de relaciones Prisma.
-Versión optimizada con regex precompilados.
+Versión optimizada con regex precompilados y un único regex disparador
+por línea (ver apply_patterns).
+
+--profile PREFIJO registra tiempo, líneas, matches y reemplazos de cada
+patrón por archivo (ver rule_profiler.py).
 """
 
 import re
+import sys
+import time
 from pathlib import Path
 from typing import Dict, List, Tuple
 
-# Mapeo de relaciones singulares
-SINGULAR_RELATIONS = {
-    'club': 'Club',
-    'court': 'Court',
-    'booking': 'Booking',
-    'player': 'Player',
-    'payment': 'Payment',
-    'user': 'User',
-    'tournament': 'Tournament',
-    'notification': 'Notification',
-    'pricing': 'Pricing',
-    'schedule': 'Schedule',
-}
-
-# Relaciones plurales (arrays en schema) - solo las más comunes
-PLURAL_RELATIONS = {
-    'courts': 'Court',
-    'bookings': 'Booking',
-    'players': 'Player',
-    'payments': 'Payment',
-    'users': 'User',
-    'schedules': 'Schedule',
-    'splitPayments': 'SplitPayment',
-}
+import rule_profiler
+from codemod_cache import CodemodCache, ruleset_fingerprint, script_modules
+from codemod_parallel import parse_jobs, process_files, write_source
+from prefilter import literal_needles
+from relation_maps import load_relation_maps
+from source_files import find_source_files
+
+# Mapas de relaciones generados desde schema.prisma (ver relation_maps.py)
+RELATION_MAPS = load_relation_maps()
+SINGULAR_RELATIONS: Dict[str, str] = RELATION_MAPS['singular']
+PLURAL_RELATIONS: Dict[str, str] = RELATION_MAPS['plural']
+
+# Todo patrón empieza por una clave de relación (ver prefilter.py)
+CANDIDATE_NEEDLES = [literal_needles(list(SINGULAR_RELATIONS) + list(PLURAL_RELATIONS))]
 
 # Prefijos seguros para property access
 SAFE_PREFIXES = ['booking', 'court', 'club', 'player', 'payment', 'user', 'item', 'row', 'record', 'splitPayment']
@@ -39,12 +35,28 @@ SAFE_PREFIXES = ['booking', 'court', 'club', 'player', 'payment', 'user', 'item'
 # Pre-compilar patrones para rendimiento
 COMPILED_PATTERNS: List[Tuple[re.Pattern, str]] = []
 
+# Nombre legible de cada patrón (mismo índice), para el perfilado por patrón
+PATTERN_LABELS: List[str] = []
+
+# Índice de disparadores: clave del match combinado → índices en COMPILED_PATTERNS
+PATTERN_INDEX: Dict[Tuple[str, ...], List[int]] = {}
+
+# Regex combinado (una sola pasada por línea) que detecta qué patrones pueden aplicar
+TRIGGER_PATTERN: re.Pattern = None
+
+def _alternation(words) -> str:
+    """Alternancia regex con las palabras más largas primero."""
+    return '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
 def compile_patterns():
     """Pre-compila todos los patrones de regex para mejor rendimiento."""
-    global COMPILED_PATTERNS
+    global COMPILED_PATTERNS, TRIGGER_PATTERN
 
     # PATRÓN 1: { club: true } → { Club: true }
     for inc, cor in SINGULAR_RELATIONS.items():
+        # Aditivo: una clave en SINGULAR y PLURAL dispara los patrones de ambos
+        PATTERN_INDEX.setdefault(('key', inc), []).extend([len(COMPILED_PATTERNS), len(COMPILED_PATTERNS) + 1])
+        PATTERN_LABELS.extend([f"{{{inc}: true|{{", f",{inc}: true|{{"])
         COMPILED_PATTERNS.append((
             re.compile(r'(\{\s*)' + re.escape(inc) + r'(\s*:\s*(true|\{))'),
             r'\1' + cor + r'\2'
@@ -57,6 +69,8 @@ def compile_patterns():
     # PATRÓN 2: booking.club.id → booking.Club.id
     for inc, cor in SINGULAR_RELATIONS.items():
         for prefix in SAFE_PREFIXES:
+            PATTERN_INDEX.setdefault(('access', prefix, inc), []).append(len(COMPILED_PATTERNS))
+            PATTERN_LABELS.append(f"{prefix}.{inc}.")
             COMPILED_PATTERNS.append((
                 re.compile(r'\b' + prefix + r'\.' + re.escape(inc) + r'\.'),
                 prefix + '.' + cor + '.'
@@ -64,6 +78,8 @@ def compile_patterns():
 
     # PATRÓN 3: { bookings: → { Booking:
     for inc, cor in PLURAL_RELATIONS.items():
+        PATTERN_INDEX.setdefault(('key', inc), []).extend([len(COMPILED_PATTERNS), len(COMPILED_PATTERNS) + 1])
+        PATTERN_LABELS.extend([f"{{{inc}:", f",{inc}:"])
         COMPILED_PATTERNS.append((
             re.compile(r'(\{\s*)' + re.escape(inc) + r'(\s*:)'),
             r'\1' + cor + r'\2'
@@ -73,30 +89,101 @@ def compile_patterns():
             r'\1' + cor + r'\2'
         ))
 
+    # Disparador combinado: un lookahead de ancho cero para que finditer
+    # reporte TODAS las posiciones candidatas, incluso si se solapan
+    # (ej. club.court.club. contiene club.court. y court.club.)
+    keys = _alternation(list(SINGULAR_RELATIONS) + list(PLURAL_RELATIONS))
+    TRIGGER_PATTERN = re.compile(
+        r'(?=[{,]\s*(?P<key>' + keys + r')\s*:'
+        r'|\b(?P<prefix>' + _alternation(SAFE_PREFIXES) + r')\.'
+        r'(?P<rel>' + _alternation(SINGULAR_RELATIONS) + r')\.)'
+    )
+
 # Compilar patrones al inicio
 compile_patterns()
 
+def candidate_patterns(line: str) -> List[int]:
+    """
+    Índices (en orden original) de los patrones que pueden aplicar a la línea.
+
+    Los reemplazos solo capitalizan palabras en minúscula, así que nunca crean
+    coincidencias nuevas: todo patrón que aplique en la secuencia original ya
+    coincide en la línea sin modificar y aparece como candidato.
+    """
+    indices = set()
+    for match in TRIGGER_PATTERN.finditer(line):
+        key = match.group('key')
+        if key is not None:
+            indices.update(PATTERN_INDEX[('key', key)])
+        else:
+            indices.update(PATTERN_INDEX[('access', match.group('prefix'), match.group('rel'))])
+    return sorted(indices)
+
+def apply_patterns(line: str) -> str:
+    """
+    Aplica COMPILED_PATTERNS a una línea con una sola pasada del disparador.
+
+    El resultado es idéntico byte a byte a ejecutar todos los patrones en
+    secuencia: solo se omiten los que no pueden coincidir.
+    """
+    for index in candidate_patterns(line):
+        pattern, replacement = COMPILED_PATTERNS[index]
+        line = pattern.sub(replacement, line)
+    return line
+
+def fix_content(content: str) -> Tuple[str, int]:
+    """Aplica los patrones precompilados línea a línea. Devuelve (contenido, líneas cambiadas)."""
+    profiler = rule_profiler.PROFILER
+    if profiler is not None:
+        return fix_content_profiled(content, profiler)
+
+    lines = content.split('\n')
+    changes = 0
+
+    for i, line in enumerate(lines):
+        original_line = line
+
+        # Aplicar solo los patrones precompilados que pueden coincidir
+        line = apply_patterns(line)
+
+        if line != original_line:
+            lines[i] = line
+            changes += 1
+
+    return '\n'.join(lines), changes
+
+def fix_content_profiled(content: str, profiler: rule_profiler.RuleProfiler) -> Tuple[str, int]:
+    """fix_content registrando tiempo, líneas, matches y reemplazos del disparador y de cada patrón."""
+    lines = content.split('\n')
+    changes = 0
+    trigger_time = 0.0
+
+    for i, line in enumerate(lines):
+        original_line = line
+        start = time.perf_counter()
+        candidates = candidate_patterns(line)
+        trigger_time += time.perf_counter() - start
+
+        for index in candidates:
+            pattern, replacement = COMPILED_PATTERNS[index]
+            line, _ = profiler.subn('relations_final', PATTERN_LABELS[index], pattern, replacement, line)
+
+        if line != original_line:
+            lines[i] = line
+            changes += 1
+
+    profiler.record('relations_final', '(disparador)', trigger_time, len(lines))
+    return '\n'.join(lines), changes
+
+@rule_profiler.profiled_file
 def process_file(file_path: Path, dry_run: bool = False) -> Dict[str, int]:
     """Procesa un archivo aplicando todos los patrones precompilados."""
     try:
-        content = file_path.read_text(encoding='utf-8')
-        lines = content.split('\n')
-        changes = 0
-
-        for i, line in enumerate(lines):
-            original_line = line
-
-            # Aplicar todos los patrones precompilados
-            for pattern, replacement in COMPILED_PATTERNS:
-                line = pattern.sub(replacement, line)
-
-            if line != original_line:
-                lines[i] = line
-                changes += 1
+        content, changes = fix_content(file_path.read_text(encoding='utf-8'))
 
         # Escribir solo si hay cambios
         if changes > 0 and not dry_run:
-            file_path.write_text('\n'.join(lines), encoding='utf-8')
+            write_source(file_path, content)
             return {'changed': 1, 'fixes': changes}
         elif changes > 0 and dry_run:
             rel_path = file_path.relative_to(Path.cwd())
@@ -110,27 +197,26 @@ def process_file(file_path: Path, dry_run: bool = False) -> Dict[str, int]:
         return {'changed': 0, 'fixes': 0, 'errors': 1}
 
 def main():
-    base_dir = Path(__file__).parent.parent
-
-    # Archivos a procesar
-    patterns = ['**/*.ts', '**/*.tsx']
-    exclude_dirs = {'.next', 'node_modules', '.git', 'dist', 'build', '.vercel'}
+    profile = rule_profiler.profile_prefix(sys.argv)
 
-    files_to_process = []
-    for pattern in patterns:
-        for file_path in base_dir.glob(pattern):
-            if any(excluded in file_path.parts for excluded in exclude_dirs):
-                continue
-            files_to_process.append(file_path)
+    # Recorrido con poda de node_modules/.next y respetando .gitignore
+    files_to_process = find_source_files()
 
     print(f"🔍 Encontrados {len(files_to_process)} archivos TS/TSX")
+
+    cache = CodemodCache('fix_relations_final', ruleset_fingerprint(Path(__file__), *script_modules(), SINGULAR_RELATIONS, PLURAL_RELATIONS))
+    files_to_process = cache.filter(files_to_process)
+    if cache.skipped:
+        print(f"♻️  {cache.skipped} archivos sin cambios desde la última pasada (caché)")
+
     print("\n🧪 DRY RUN - Mostrando primeros 30 archivos con cambios...\n")
 
     dry_run_stats = {'changed': 0, 'fixes': 0}
     shown = 0
 
-    for file_path in files_to_process:
-        result = process_file(file_path, dry_run=True)
+    for file_path, result in process_files(process_file, files_to_process, dry_run=True, jobs=parse_jobs(sys.argv)):
+        cache.record(file_path, result, dry_run=True)
+        rule_profiler.collect(result)
         dry_run_stats['changed'] += result.get('changed', 0)
         dry_run_stats['fixes'] += result.get('fixes', 0)
 
@@ -139,9 +225,12 @@ def main():
             if shown >= 30:
                 break
 
+    cache.save()
+
     print(f"\n📊 Dry run completado:")
     print(f"   - Archivos con cambios: {dry_run_stats['changed']}")
     print(f"   - Total líneas corregidas: {dry_run_stats['fixes']}")
+    rule_profiler.finish(profile)
 
     print("\n⚠️  Para aplicar los cambios, ejecuta:")
     print("   python scripts/fix_relations_final.py --apply")
@@ -149,34 +238,35 @@ def main():
     print("   npm run type-check")
 
 if __name__ == '__main__':
-    import sys
-
     if '--apply' in sys.argv:
-        base_dir = Path(__file__).parent.parent
-        patterns = ['**/*.ts', '**/*.tsx']
-        exclude_dirs = {'.next', 'node_modules', '.git', 'dist', 'build', '.vercel'}
+        profile = rule_profiler.profile_prefix(sys.argv)
 
-        files_to_process = []
-        for pattern in patterns:
-            for file_path in base_dir.glob(pattern):
-                if any(excluded in file_path.parts for excluded in exclude_dirs):
-                    continue
-                files_to_process.append(file_path)
+        # Recorrido con poda de node_modules/.next y respetando .gitignore
+        files_to_process = find_source_files()
+
+        cache = CodemodCache('fix_relations_final', ruleset_fingerprint(Path(__file__), *script_modules(), SINGULAR_RELATIONS, PLURAL_RELATIONS))
+        files_to_process = cache.filter(files_to_process)
+        if cache.skipped:
+            print(f"♻️  {cache.skipped} archivos sin cambios desde la última pasada (caché)")
 
         print(f"🚀 Aplicando correcciones a {len(files_to_process)} archivos...\n")
 
         stats = {'changed': 0, 'fixes': 0, 'errors': 0}
 
-        for file_path in files_to_process:
-            result = process_file(file_path, dry_run=False)
+        for file_path, result in process_files(process_file, files_to_process, dry_run=False, jobs=parse_jobs(sys.argv)):
+            cache.record(file_path, result)
+            rule_profiler.collect(result)
             stats['changed'] += result.get('changed', 0)
             stats['fixes'] += result.get('fixes', 0)
             stats['errors'] += result.get('errors', 0)
 
+        cache.save()
+
         print(f"\n✅ Completado:")
         print(f"   - Archivos modificados: {stats['changed']}")
         print(f"   - Líneas corregidas: {stats['fixes']}")
         print(f"   - Errores: {stats['errors']}")
+        rule_profiler.finish(profile)
 
         print("\n🔍 Ejecuta 'npm run type-check' para validar")
     else:
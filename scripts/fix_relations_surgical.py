@@ -5,27 +5,24 @@ Solo corrige patrones específicos y obvios en contextos include/select/where.
 """
 
 import re
+import sys
 from pathlib import Path
 from typing import Dict, List, Tuple
 
-# Mapeo correcto desde schema.prisma
+from codemod_cache import CodemodCache, ruleset_fingerprint, script_modules
+from codemod_parallel import parse_jobs, process_files, write_source
+from prisma_types import infer_bindings, rewrite_relation_access
+from prefilter import literal_needles
+from relation_maps import load_relation_maps
+from source_files import find_source_files
+
+# Mapeo generado desde schema.prisma (ver relation_maps.py)
 # Solo relaciones que se usan en include/select/where
-RELATION_FIXES = {
-    'club': 'Club',
-    'court': 'Court',
-    'booking': 'Booking',
-    'player': 'Player',
-    'payment': 'Payment',
-    'user': 'User',
-    'tournament': 'Tournament',
-    'tournamentRegistration': 'TournamentRegistration',
-    'tournamentMatch': 'TournamentMatch',
-    'tournamentRound': 'TournamentRound',
-    'notification': 'Notification',
-    'pricing': 'Pricing',
-    'schedule': 'Schedule',
-    'attendance': 'Attendance',
-}
+RELATION_FIXES: Dict[str, str] = load_relation_maps()['singular']
+
+# Literales sin los que fix_content no puede cambiar nada (ver prefilter.py):
+# las claves de los accesos tipados (por modelo) también están en relation_fixes
+CANDIDATE_NEEDLES = [literal_needles(load_relation_maps()['relation_fixes'])]
 
 def fix_include_select_blocks(content: str) -> Tuple[str, int]:
     """
@@ -35,32 +32,31 @@ def fix_include_select_blocks(content: str) -> Tuple[str, int]:
     """
     changes = 0
 
-    for incorrect, correct in RELATION_FIXES.items():
-        # Solo cambiar dentro de include/select
-        # Patrón más restrictivo: debe estar dentro de un bloque include o select
-
-        # Buscar bloques include/select y cambiar solo dentro de ellos
-        # Patrón: include: { ... club: true ... }
-        def replace_in_include_select(match):
-            block_content = match.group(0)
-            for inc, cor in RELATION_FIXES.items():
-                # Cambiar { club: true } o , club: true dentro del bloque
-                block_content = re.sub(
-                    r'(\{\s*)' + re.escape(inc) + r'(\s*:\s*(true|\{))',
-                    r'\1' + cor + r'\2',
-                    block_content
-                )
-                block_content = re.sub(
-                    r'(,\s*)' + re.escape(inc) + r'(\s*:\s*(true|\{))',
-                    r'\1' + cor + r'\2',
-                    block_content
-                )
-            return block_content
-
-        # Buscar bloques include/select con su contenido
-        pattern = r'(include|select)\s*:\s*\{[^}]*\}'
-        content, count = re.subn(pattern, replace_in_include_select, content)
-        changes += count
+    # Buscar bloques include/select y cambiar solo dentro de ellos
+    # Patrón: include: { ... club: true ... }
+    def replace_in_include_select(match):
+        nonlocal changes
+        block_content = match.group(0)
+        for inc, cor in RELATION_FIXES.items():
+            # Cambiar { club: true } o , club: true dentro del bloque
+            block_content = re.sub(
+                r'(\{\s*)' + re.escape(inc) + r'(\s*:\s*(true|\{))',
+                r'\1' + cor + r'\2',
+                block_content
+            )
+            block_content = re.sub(
+                r'(,\s*)' + re.escape(inc) + r'(\s*:\s*(true|\{))',
+                r'\1' + cor + r'\2',
+                block_content
+            )
+        if block_content != match.group(0):
+            changes += 1
+        return block_content
+
+    # Buscar bloques include/select con su contenido (un solo recorrido:
+    # antes se repetía por cada relación y contaba bloques sin cambios)
+    pattern = r'(include|select)\s*:\s*\{[^}]*\}'
+    content = re.sub(pattern, replace_in_include_select, content)
 
     return content, changes
 
@@ -84,40 +80,34 @@ def fix_property_access(content: str) -> Tuple[str, int]:
     """
     Corrige acceso a propiedades de relaciones.
     Patrón: booking.court.name → booking.Court.name
-    PERO NO: prisma.booking (esto está correcto)
+    Solo cuando el modelo inferido del receptor tiene esa relación en el
+    schema; prisma.booking, tx.club o variables sin tipo conocido no se tocan.
     """
-    changes = 0
+    return rewrite_relation_access(content, infer_bindings(content))
 
-    for incorrect, correct in RELATION_FIXES.items():
-        # Patrón: cualquier cosa seguida de .court. pero NO prisma.court.
-        pattern = r'(?<!prisma)(\.\s*)' + re.escape(incorrect) + r'(\s*\.)'
-        replacement = r'\1' + correct + r'\2'
-        content, count = re.subn(pattern, replacement, content)
-        changes += count
+def fix_content(content: str) -> Tuple[str, int]:
+    """Aplica todas las correcciones al contenido. Devuelve (contenido, cambios)."""
+    total_changes = 0
 
-    return content, changes
+    content, changes1 = fix_include_select_blocks(content)
+    total_changes += changes1
 
-def process_file(file_path: Path, dry_run: bool = False) -> Dict[str, int]:
-    """Procesa un archivo aplicando todas las correcciones."""
-    try:
-        content = file_path.read_text(encoding='utf-8')
-        original_content = content
-
-        total_changes = 0
+    content, changes2 = fix_where_blocks(content)
+    total_changes += changes2
 
-        # Aplicar correcciones
-        content, changes1 = fix_include_select_blocks(content)
-        total_changes += changes1
+    content, changes3 = fix_property_access(content)
+    total_changes += changes3
 
-        content, changes2 = fix_where_blocks(content)
-        total_changes += changes2
+    return content, total_changes
 
-        content, changes3 = fix_property_access(content)
-        total_changes += changes3
+def process_file(file_path: Path, dry_run: bool = False) -> Dict[str, int]:
+    """Procesa un archivo aplicando todas las correcciones."""
+    try:
+        content, total_changes = fix_content(file_path.read_text(encoding='utf-8'))
 
         # Escribir solo si hay cambios
         if total_changes > 0 and not dry_run:
-            file_path.write_text(content, encoding='utf-8')
+            write_source(file_path, content)
             return {'changed': 1, 'fixes': total_changes}
         elif total_changes > 0 and dry_run:
             print(f"  Would fix {total_changes} issues in {file_path.relative_to(Path.cwd())}")
@@ -130,31 +120,24 @@ def process_file(file_path: Path, dry_run: bool = False) -> Dict[str, int]:
         return {'changed': 0, 'fixes': 0, 'errors': 1}
 
 def main():
-    base_dir = Path(__file__).parent.parent
-
-    # Archivos a procesar (TypeScript/TypeScriptReact)
-    patterns = ['**/*.ts', '**/*.tsx']
+    # Recorrido con poda de node_modules/.next y respetando .gitignore
+    files_to_process = find_source_files()
 
-    # Directorios a excluir
-    exclude_dirs = {'.next', 'node_modules', '.git', 'dist', 'build'}
+    print(f"🔍 Encontrados {len(files_to_process)} archivos TS/TSX")
 
-    files_to_process = []
-    for pattern in patterns:
-        for file_path in base_dir.glob(pattern):
-            # Excluir directorios
-            if any(excluded in file_path.parts for excluded in exclude_dirs):
-                continue
-            files_to_process.append(file_path)
+    cache = CodemodCache('fix_relations_surgical', ruleset_fingerprint(Path(__file__), *script_modules(), RELATION_FIXES))
+    files_to_process = cache.filter(files_to_process)
+    if cache.skipped:
+        print(f"♻️  {cache.skipped} archivos sin cambios desde la última pasada (caché)")
 
-    print(f"🔍 Encontrados {len(files_to_process)} archivos TS/TSX")
     print("\n🧪 DRY RUN - Mostrando primeros 10 archivos con cambios...\n")
 
     # Dry run en primeros archivos
     dry_run_stats = {'changed': 0, 'fixes': 0}
     shown = 0
 
-    for file_path in files_to_process:
-        result = process_file(file_path, dry_run=True)
+    for file_path, result in process_files(process_file, files_to_process, dry_run=True, jobs=parse_jobs(sys.argv)):
+        cache.record(file_path, result, dry_run=True)
         dry_run_stats['changed'] += result.get('changed', 0)
         dry_run_stats['fixes'] += result.get('fixes', 0)
 
@@ -163,6 +146,8 @@ def main():
             if shown >= 10:
                 break
 
+    cache.save()
+
     print(f"\n📊 Dry run completado:")
     print(f"   - Archivos con cambios: {dry_run_stats['changed']}")
     print(f"   - Total correcciones: {dry_run_stats['fixes']}")
@@ -172,30 +157,27 @@ def main():
     print("   python scripts/fix_relations_surgical.py --apply")
 
 if __name__ == '__main__':
-    import sys
-
     if '--apply' in sys.argv:
-        base_dir = Path(__file__).parent.parent
-        patterns = ['**/*.ts', '**/*.tsx']
-        exclude_dirs = {'.next', 'node_modules', '.git', 'dist', 'build'}
+        # Recorrido con poda de node_modules/.next y respetando .gitignore
+        files_to_process = find_source_files()
 
-        files_to_process = []
-        for pattern in patterns:
-            for file_path in base_dir.glob(pattern):
-                if any(excluded in file_path.parts for excluded in exclude_dirs):
-                    continue
-                files_to_process.append(file_path)
+        cache = CodemodCache('fix_relations_surgical', ruleset_fingerprint(Path(__file__), *script_modules(), RELATION_FIXES))
+        files_to_process = cache.filter(files_to_process)
+        if cache.skipped:
+            print(f"♻️  {cache.skipped} archivos sin cambios desde la última pasada (caché)")
 
         print(f"🚀 Aplicando correcciones a {len(files_to_process)} archivos...\n")
 
         stats = {'changed': 0, 'fixes': 0, 'errors': 0}
 
-        for file_path in files_to_process:
-            result = process_file(file_path, dry_run=False)
+        for file_path, result in process_files(process_file, files_to_process, dry_run=False, jobs=parse_jobs(sys.argv)):
+            cache.record(file_path, result)
             stats['changed'] += result.get('changed', 0)
             stats['fixes'] += result.get('fixes', 0)
             stats['errors'] += result.get('errors', 0)
 
+        cache.save()
+
         print(f"\n✅ Completado:")
         print(f"   - Archivos modificados: {stats['changed']}")
         print(f"   - Correcciones aplicadas: {stats['fixes']}")
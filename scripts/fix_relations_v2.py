@@ -5,26 +5,21 @@ Enfoque: Solo corregir patrones MUY específicos para evitar falsos positivos.
 """
 
 import re
+import sys
 from pathlib import Path
 from typing import Dict, List, Tuple
 
-# Mapeo correcto desde schema.prisma
-RELATION_FIXES = {
-    'club': 'Club',
-    'court': 'Court',
-    'booking': 'Booking',
-    'player': 'Player',
-    'payment': 'Payment',
-    'user': 'User',
-    'tournament': 'Tournament',
-    'tournamentRegistration': 'TournamentRegistration',
-    'tournamentMatch': 'TournamentMatch',
-    'tournamentRound': 'TournamentRound',
-    'notification': 'Notification',
-    'pricing': 'Pricing',
-    'schedule': 'Schedule',
-    'attendance': 'Attendance',
-}
+from codemod_cache import CodemodCache, ruleset_fingerprint, script_modules
+from codemod_parallel import parse_jobs, process_files, write_source
+from prefilter import literal_needles
+from relation_maps import load_relation_maps
+from source_files import find_source_files
+
+# Mapeo generado desde schema.prisma (ver relation_maps.py)
+RELATION_FIXES: Dict[str, str] = load_relation_maps()['singular']
+
+# Literales sin los que fix_content no puede cambiar nada (ver prefilter.py)
+CANDIDATE_NEEDLES = [(b'include:', b'select:', b'where:'), literal_needles(RELATION_FIXES)]
 
 def fix_simple_include_patterns(content: str) -> Tuple[str, int]:
     """
@@ -57,10 +52,13 @@ def fix_simple_include_patterns(content: str) -> Tuple[str, int]:
     return content, changes
 
 def fix_file_manual_patterns(file_path: Path) -> Tuple[str, int]:
+    """Lee el archivo y aplica fix_content."""
+    return fix_content(file_path.read_text(encoding='utf-8'))
+
+def fix_content(content: str) -> Tuple[str, int]:
     """
     Aplica correcciones línea por línea para mayor precisión.
     """
-    content = file_path.read_text(encoding='utf-8')
     lines = content.split('\n')
     changes = 0
 
@@ -100,7 +98,7 @@ def process_file(file_path: Path, dry_run: bool = False) -> Dict[str, int]:
 
         # Escribir solo si hay cambios
         if total_changes > 0 and not dry_run:
-            file_path.write_text(new_content, encoding='utf-8')
+            write_source(file_path, new_content)
             return {'changed': 1, 'fixes': total_changes}
         elif total_changes > 0 and dry_run:
             print(f"  Would fix {total_changes} lines in {file_path.relative_to(Path.cwd())}")
@@ -113,31 +111,24 @@ def process_file(file_path: Path, dry_run: bool = False) -> Dict[str, int]:
         return {'changed': 0, 'fixes': 0, 'errors': 1}
 
 def main():
-    base_dir = Path(__file__).parent.parent
+    # Recorrido con poda de node_modules/.next y respetando .gitignore
+    files_to_process = find_source_files()
 
-    # Archivos a procesar (TypeScript/TypeScriptReact)
-    patterns = ['**/*.ts', '**/*.tsx']
-
-    # Directorios a excluir
-    exclude_dirs = {'.next', 'node_modules', '.git', 'dist', 'build'}
+    print(f"🔍 Encontrados {len(files_to_process)} archivos TS/TSX")
 
-    files_to_process = []
-    for pattern in patterns:
-        for file_path in base_dir.glob(pattern):
-            # Excluir directorios
-            if any(excluded in file_path.parts for excluded in exclude_dirs):
-                continue
-            files_to_process.append(file_path)
+    cache = CodemodCache('fix_relations_v2', ruleset_fingerprint(Path(__file__), *script_modules(), RELATION_FIXES))
+    files_to_process = cache.filter(files_to_process)
+    if cache.skipped:
+        print(f"♻️  {cache.skipped} archivos sin cambios desde la última pasada (caché)")
 
-    print(f"🔍 Encontrados {len(files_to_process)} archivos TS/TSX")
     print("\n🧪 DRY RUN - Mostrando primeros 10 archivos con cambios...\n")
 
     # Dry run en primeros archivos
     dry_run_stats = {'changed': 0, 'fixes': 0}
     shown = 0
 
-    for file_path in files_to_process:
-        result = process_file(file_path, dry_run=True)
+    for file_path, result in process_files(process_file, files_to_process, dry_run=True, jobs=parse_jobs(sys.argv)):
+        cache.record(file_path, result, dry_run=True)
         dry_run_stats['changed'] += result.get('changed', 0)
         dry_run_stats['fixes'] += result.get('fixes', 0)
 
@@ -146,6 +137,8 @@ def main():
             if shown >= 10:
                 break
 
+    cache.save()
+
     print(f"\n📊 Dry run completado:")
     print(f"   - Archivos con cambios: {dry_run_stats['changed']}")
     print(f"   - Total líneas corregidas: {dry_run_stats['fixes']}")
@@ -155,30 +148,27 @@ def main():
     print("   python scripts/fix_relations_v2.py --apply")
 
 if __name__ == '__main__':
-    import sys
-
     if '--apply' in sys.argv:
-        base_dir = Path(__file__).parent.parent
-        patterns = ['**/*.ts', '**/*.tsx']
-        exclude_dirs = {'.next', 'node_modules', '.git', 'dist', 'build'}
+        # Recorrido con poda de node_modules/.next y respetando .gitignore
+        files_to_process = find_source_files()
 
-        files_to_process = []
-        for pattern in patterns:
-            for file_path in base_dir.glob(pattern):
-                if any(excluded in file_path.parts for excluded in exclude_dirs):
-                    continue
-                files_to_process.append(file_path)
+        cache = CodemodCache('fix_relations_v2', ruleset_fingerprint(Path(__file__), *script_modules(), RELATION_FIXES))
+        files_to_process = cache.filter(files_to_process)
+        if cache.skipped:
+            print(f"♻️  {cache.skipped} archivos sin cambios desde la última pasada (caché)")
 
         print(f"🚀 Aplicando correcciones a {len(files_to_process)} archivos...\n")
 
         stats = {'changed': 0, 'fixes': 0, 'errors': 0}
 
-        for file_path in files_to_process:
-            result = process_file(file_path, dry_run=False)
+        for file_path, result in process_files(process_file, files_to_process, dry_run=False, jobs=parse_jobs(sys.argv)):
+            cache.record(file_path, result)
             stats['changed'] += result.get('changed', 0)
             stats['fixes'] += result.get('fixes', 0)
             stats['errors'] += result.get('errors', 0)
 
+        cache.save()
+
         print(f"\n✅ Completado:")
         print(f"   - Archivos modificados: {stats['changed']}")
         print(f"   - Líneas corregidas: {stats['fixes']}")
@@ -6,190 +6,137 @@ Enfoque dual:
 2. Corregir acceso a propiedades de relaciones (court.club.id → court.Club.id)
 """
 
-import re
+import sys
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 
-# Mapeo correcto desde schema.prisma
+from codemod_cache import CodemodCache, ruleset_fingerprint, script_modules
+from codemod_parallel import parse_jobs, process_files, write_source
+from prisma_types import Bindings, infer_bindings, region_model, rewrite_relation_access
+from prefilter import literal_needles
+from relation_maps import load_relation_maps
+from source_files import find_source_files
+from ts_scanner import Region, ScanIndex, replace_spans, scan
+
+# Mapas generados desde schema.prisma (ver relation_maps.py)
 # Nota: booking-singular es relación, bookings-plural es array
-SINGULAR_RELATIONS = {
-    'club': 'Club',
-    'court': 'Court',
-    'booking': 'Booking',
-    'player': 'Player',
-    'payment': 'Payment',
-    'user': 'User',
-    'tournament': 'Tournament',
-    'tournamentRegistration': 'TournamentRegistration',
-    'tournamentMatch': 'TournamentMatch',
-    'tournamentRound': 'TournamentRound',
-    'notification': 'Notification',
-    'pricing': 'Pricing',
-    'schedule': 'Schedule',
-    'attendance': 'Attendance',
-}
+RELATION_MAPS = load_relation_maps()
+SINGULAR_RELATIONS: Dict[str, str] = RELATION_MAPS['singular']
 
 # Relaciones plurales (arrays)
-PLURAL_RELATIONS = {
-    'courts': 'Court',
-    'bookings': 'Booking',
-    'players': 'Player',
-    'payments': 'Payment',
-    'users': 'User',
-    'tournaments': 'Tournament',
-    'tournamentRegistrations': 'TournamentRegistration',
-    'tournamentMatches': 'TournamentMatch',
-    'tournamentRounds': 'TournamentRound',
-    'notifications': 'Notification',
-    'pricings': 'Pricing',
-    'schedules': 'Schedule',
-    'attendances': 'Attendance',
-    'splitPayments': 'SplitPayment',
-}
-
-def fix_include_select(line: str, in_include_block: bool) -> Tuple[str, bool]:
+PLURAL_RELATIONS: Dict[str, str] = RELATION_MAPS['plural']
+
+# Toda corrección (también las por modelo) parte de una clave de relation_fixes
+CANDIDATE_NEEDLES = [literal_needles(RELATION_MAPS['relation_fixes'])]
+
+# (inicio, fin, texto nuevo) sobre el contenido del archivo
+Edit = Tuple[int, int, str]
+
+def correction_for(region: Region, name: str, relations: Dict[str, str]) -> Optional[str]:
+    """
+    Nombre correcto de la clave `name` dentro de la región.
+
+    Si se sabe a qué modelo pertenece la región (prisma.<modelo>.findX y las
+    relaciones anidadas) se usa el mapa exacto de ese modelo, que nunca toca
+    claves válidas (ej. BookingGroup.bookings); si no, el mapa global.
+    """
+    model = region_model(region)
+    if model:
+        return RELATION_MAPS['by_model'].get(model, {}).get(name)
+    return relations.get(name)
+
+def fix_include_select(index: ScanIndex) -> List[Edit]:
     """
     Corrige relaciones en include/select:
     - club: true → Club: true
     - courts: true → Court: true (array)
 
-    Retorna: (línea corregida, estamos en bloque include)
+    Las regiones salen del índice de ts_scanner (llaves reales, sin contar
+    las que aparecen dentro de strings o comentarios).
     """
-    # Detectar si entramos en un bloque include/select
-    if re.search(r'\b(include|select)\s*:\s*\{', line):
-        in_include_block = True
-
-    # Si estamos en bloque include/select, aplicar correcciones
-    if in_include_block:
-        # Corregir relaciones singulares
-        for incorrect, correct in SINGULAR_RELATIONS.items():
-            # { club: o , club:
-            line = re.sub(
-                r'(\{\s*)' + re.escape(incorrect) + r'(\s*:\s*(true|\{))',
-                r'\1' + correct + r'\2',
-                line
-            )
-            line = re.sub(
-                r'(,\s*)' + re.escape(incorrect) + r'(\s*:\s*(true|\{))',
-                r'\1' + correct + r'\2',
-                line
-            )
-
-        # Corregir relaciones plurales (arrays)
-        for incorrect, correct in PLURAL_RELATIONS.items():
-            # { bookings: o , bookings:
-            line = re.sub(
-                r'(\{\s*)' + re.escape(incorrect) + r'(\s*:)',
-                r'\1' + correct + r'\2',
-                line
-            )
-            line = re.sub(
-                r'(,\s*)' + re.escape(incorrect) + r'(\s*:)',
-                r'\1' + correct + r'\2',
-                line
-            )
-
-        # Detectar si salimos del bloque (línea con })
-        # Contamos llaves para saber cuándo salimos
-        if '}' in line and '{' not in line:
-            in_include_block = False
-
-    return line, in_include_block
-
-def fix_property_access(line: str) -> str:
+    edits = []
+    for region in index.regions('include', 'select'):
+        for prop in index.properties_in(region):
+            # Relaciones singulares: solo con valor true o { ... }
+            correct = correction_for(region, prop.name, SINGULAR_RELATIONS) if prop.value in ('true', '{') else None
+            # Relaciones plurales (arrays)
+            correct = correct or correction_for(region, prop.name, PLURAL_RELATIONS)
+            if correct:
+                edits.append((prop.start, prop.end, correct))
+    return edits
+
+def fix_property_access(content: str, bindings: Bindings) -> str:
     """
     Corrige acceso a propiedades de relaciones:
     - court.club.id → court.Club.id
     - booking.court.name → booking.Court.name
 
+    Solo si el receptor tiene un modelo inferido (prisma.<modelo>.findX,
+    callbacks de .map, ...) y ese modelo tiene la relación en el schema.
     NO corrige:
     - prisma.club (esto es un modelo)
-    - tx.club (modelo en transacción)
-    - result.club (propiedad de objeto plano)
+    - result.club (variable sin tipo Prisma conocido)
     """
-    for incorrect, correct in SINGULAR_RELATIONS.items():
-        # Patrón: .club. pero NO prisma.club. y NO tx.club. y NO result.club.
-        # Solo cambiar si viene después de una variable que probablemente sea un resultado de DB
-        # Patrones seguros: booking.club, court.club, player.club, etc.
-
-        # Lista de prefijos que indican que es un resultado de DB
-        safe_prefixes = ['booking', 'court', 'club', 'player', 'payment', 'user',
-                        'tournament', 'notification', 'splitPayment', 'item', 'row']
-
-        for prefix in safe_prefixes:
-            pattern = r'\b' + prefix + r'\.' + re.escape(incorrect) + r'\.'
-            replacement = prefix + '.' + correct + '.'
-            line = re.sub(pattern, replacement, line)
-
-    return line
+    content, _ = rewrite_relation_access(content, bindings)
+    return content
 
-def fix_where_filters(line: str) -> str:
+def fix_where_filters(index: ScanIndex) -> List[Edit]:
     """
     Corrige filtros en where:
     - where: { booking: { → where: { Booking: {
     - where: { club: { → where: { Club: {
     """
-    if 'where' not in line:
-        return line
-
-    for incorrect, correct in SINGULAR_RELATIONS.items():
-        # where: { club: {
-        line = re.sub(
-            r'(where\s*:\s*\{\s*)' + re.escape(incorrect) + r'(\s*:\s*\{)',
-            r'\1' + correct + r'\2',
-            line
-        )
-
-    return line
-
-def fix_count_selects(line: str) -> str:
+    edits = []
+    for region in index.regions('where'):
+        for prop in index.properties_in(region):
+            correct = correction_for(region, prop.name, SINGULAR_RELATIONS)
+            if correct and prop.value == '{':
+                edits.append((prop.start, prop.end, correct))
+    return edits
+
+def fix_count_selects(index: ScanIndex) -> List[Edit]:
     """
     Corrige _count selects:
     - users: true → User: true
     - bookings: true → Booking: true
     """
-    if '_count' not in line:
-        return line
-
-    for incorrect, correct in PLURAL_RELATIONS.items():
-        # users: true → User: true en contexto _count
-        line = re.sub(
-            r'(\{\s*)' + re.escape(incorrect) + r'(\s*:\s*true)',
-            r'\1' + correct + r'\2',
-            line
-        )
-        line = re.sub(
-            r'(,\s*)' + re.escape(incorrect) + r'(\s*:\s*true)',
-            r'\1' + correct + r'\2',
-            line
-        )
-
-    return line
+    edits = []
+    for region in index.regions('_count', 'select'):
+        if region.key == 'select' and region.path[-1:] != ('_count',):
+            continue
+        for prop in index.properties_in(region):
+            correct = correction_for(region, prop.name, PLURAL_RELATIONS)
+            if correct and prop.value == 'true':
+                edits.append((prop.start, prop.end, correct))
+    return edits
+
+def fix_content(content: str) -> Tuple[str, int]:
+    """Aplica todas las correcciones. Devuelve (contenido, líneas cambiadas)."""
+    original_lines = content.split('\n')
+
+    # Un solo escaneo léxico para include/select/where/_count
+    index = scan(content)
+    edits = fix_include_select(index) + fix_where_filters(index) + fix_count_selects(index)
+    content = replace_spans(content, edits)
+
+    # Tipos de las variables del archivo (inferencia sin flujo)
+    bindings = infer_bindings(content)
+
+    # Sobre el archivo entero: un comentario /* ... */ o un template de
+    # varias líneas solo se reconocen con el contexto completo
+    content = fix_property_access(content, bindings)
+    changes = sum(1 for before, after in zip(original_lines, content.split('\n')) if before != after)
+
+    return content, changes
 
 def process_file(file_path: Path, dry_run: bool = False) -> Dict[str, int]:
     """Procesa un archivo aplicando correcciones línea por línea."""
     try:
-        content = file_path.read_text(encoding='utf-8')
-        lines = content.split('\n')
-        changes = 0
-        in_include_block = False
-
-        for i, line in enumerate(lines):
-            original_line = line
-
-            # Aplicar todas las correcciones
-            line, in_include_block = fix_include_select(line, in_include_block)
-            line = fix_property_access(line)
-            line = fix_where_filters(line)
-            line = fix_count_selects(line)
-
-            if line != original_line:
-                lines[i] = line
-                changes += 1
+        content, changes = fix_content(file_path.read_text(encoding='utf-8'))
 
         # Escribir solo si hay cambios
         if changes > 0 and not dry_run:
-            file_path.write_text('\n'.join(lines), encoding='utf-8')
+            write_source(file_path, content)
             return {'changed': 1, 'fixes': changes}
         elif changes > 0 and dry_run:
             print(f"  Would fix {changes} lines in {file_path.relative_to(Path.cwd())}")
@@ -202,27 +149,23 @@ def process_file(file_path: Path, dry_run: bool = False) -> Dict[str, int]:
         return {'changed': 0, 'fixes': 0, 'errors': 1}
 
 def main():
-    base_dir = Path(__file__).parent.parent
+    # Recorrido con poda de node_modules/.next y respetando .gitignore
+    files_to_process = find_source_files()
 
-    # Archivos a procesar
-    patterns = ['**/*.ts', '**/*.tsx']
-    exclude_dirs = {'.next', 'node_modules', '.git', 'dist', 'build'}
+    print(f"🔍 Encontrados {len(files_to_process)} archivos TS/TSX")
 
-    files_to_process = []
-    for pattern in patterns:
-        for file_path in base_dir.glob(pattern):
-            if any(excluded in file_path.parts for excluded in exclude_dirs):
-                continue
-            files_to_process.append(file_path)
+    cache = CodemodCache('fix_relations_v3', ruleset_fingerprint(Path(__file__), *script_modules(), SINGULAR_RELATIONS, PLURAL_RELATIONS))
+    files_to_process = cache.filter(files_to_process)
+    if cache.skipped:
+        print(f"♻️  {cache.skipped} archivos sin cambios desde la última pasada (caché)")
 
-    print(f"🔍 Encontrados {len(files_to_process)} archivos TS/TSX")
     print("\n🧪 DRY RUN - Mostrando primeros 20 archivos con cambios...\n")
 
     dry_run_stats = {'changed': 0, 'fixes': 0}
     shown = 0
 
-    for file_path in files_to_process:
-        result = process_file(file_path, dry_run=True)
+    for file_path, result in process_files(process_file, files_to_process, dry_run=True, jobs=parse_jobs(sys.argv)):
+        cache.record(file_path, result, dry_run=True)
         dry_run_stats['changed'] += result.get('changed', 0)
         dry_run_stats['fixes'] += result.get('fixes', 0)
 
@@ -231,6 +174,8 @@ def main():
             if shown >= 20:
                 break
 
+    cache.save()
+
     print(f"\n📊 Dry run completado:")
     print(f"   - Archivos con cambios: {dry_run_stats['changed']}")
     print(f"   - Total líneas corregidas: {dry_run_stats['fixes']}")
@@ -239,30 +184,27 @@ def main():
     print("   python scripts/fix_relations_v3.py --apply")
 
 if __name__ == '__main__':
-    import sys
-
     if '--apply' in sys.argv:
-        base_dir = Path(__file__).parent.parent
-        patterns = ['**/*.ts', '**/*.tsx']
-        exclude_dirs = {'.next', 'node_modules', '.git', 'dist', 'build'}
+        # Recorrido con poda de node_modules/.next y respetando .gitignore
+        files_to_process = find_source_files()
 
-        files_to_process = []
-        for pattern in patterns:
-            for file_path in base_dir.glob(pattern):
-                if any(excluded in file_path.parts for excluded in exclude_dirs):
-                    continue
-                files_to_process.append(file_path)
+        cache = CodemodCache('fix_relations_v3', ruleset_fingerprint(Path(__file__), *script_modules(), SINGULAR_RELATIONS, PLURAL_RELATIONS))
+        files_to_process = cache.filter(files_to_process)
+        if cache.skipped:
+            print(f"♻️  {cache.skipped} archivos sin cambios desde la última pasada (caché)")
 
         print(f"🚀 Aplicando correcciones a {len(files_to_process)} archivos...\n")
 
         stats = {'changed': 0, 'fixes': 0, 'errors': 0}
 
-        for file_path in files_to_process:
-            result = process_file(file_path, dry_run=False)
+        for file_path, result in process_files(process_file, files_to_process, dry_run=False, jobs=parse_jobs(sys.argv)):
+            cache.record(file_path, result)
             stats['changed'] += result.get('changed', 0)
             stats['fixes'] += result.get('fixes', 0)
             stats['errors'] += result.get('errors', 0)
 
+        cache.save()
+
         print(f"\n✅ Completado:")
         print(f"   - Archivos modificados: {stats['changed']}")
         print(f"   - Líneas corregidas: {stats['fixes']}")
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Índice invertido persistente de identificadores del árbol TS/TSX.
+
+Casi todo análisis aquí pregunta "¿qué archivos mencionan studentName,
+prisma.payment.create o .amount?", y cada script lo resolvía recorriendo
+el árbol entero otra vez. Este índice guarda, por token, las posiciones
+(archivo, línea) donde aparece:
+
+- token `nombre`  → identificador suelto (const booking, studentName: ...)
+- token `.nombre` → acceso a miembro (booking.amount, booking?.amount)
+
+Se indexan todas las secuencias [\\w$]+ del texto (también dentro de
+strings y comentarios), salvo los números, así que cualquier literal de
+búsqueda con letras aparece dentro de algún token (ver files_containing).
+
+Persistencia en .codemod-cache/ident-index.json.gz:
+- archivos: [ruta, sha1, mtime_ns, tamaño] (el id es la posición),
+- postings por token como texto "id,n,Δlínea×n,id,n,..." (zlib): json
+  solo parsea strings al cargar y se decodifica únicamente el token
+  consultado (una lista de enteros por token tardaba 5 veces más).
+
+Solo se reindexan los archivos cuyo contenido cambió (stat y, si hace
+falta, sha1, igual que codemod_cache).
+
+Uso:
+    index = IdentIndex.open()                 # carga + actualiza lo que cambió
+    index.files('studentName')                # ['app/...', ...]
+    index.lines('prisma.payment.create')      # {'app/...': [12, 40]}
+    index.files_containing('studentName', 'attended')  # tokens que los contienen
+
+CLI:
+    python scripts/ident_index.py                       # actualizar y resumen
+    python scripts/ident_index.py .amount prisma.payment.create [--files] [--rebuild]
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from codemod_cache import CACHE_DIR, PROJECT_ROOT, content_hash
+from source_files import find_source_files
+
+INDEX_PATH = CACHE_DIR / 'ident-index.json.gz'
+INDEX_VERSION = 1
+
+WORD_RUN = re.compile(r'[\w$]+')
+
+def tokenizer_fingerprint() -> str:
+    return hashlib.sha1(WORD_RUN.pattern.encode('utf-8') + str(INDEX_VERSION).encode()).hexdigest()[:16]
+
+def tokenize(content: str) -> Dict[str, List[int]]:
+    """Token → líneas (1-based, sin repetir) donde aparece."""
+    postings: Dict[str, List[int]] = defaultdict(list)
+    line = 1
+    last = 0
+    for match in WORD_RUN.finditer(content):
+        name = match.group()
+        if name.isdigit():
+            continue
+        start = match.start()
+        line += content.count('\n', last, start)
+        last = start
+        # Miembro: '.x' o '?.x', pero no '...x' (spread)
+        if start and content[start - 1] == '.' and content[start - 3:start] != '...':
+            name = '.' + name
+        lines = postings[name]
+        if not lines or lines[-1] != line:
+            lines.append(line)
+    return postings
+
+def encode_postings(entries: Dict[int, List[int]]) -> List[int]:
+    flat: List[int] = []
+    for file_id in sorted(entries):
+        lines = entries[file_id]
+        flat.append(file_id)
+        flat.append(len(lines))
+        previous = 0
+        for line in lines:
+            flat.append(line - previous)
+            previous = line
+    return flat
+
+def decode_postings(flat: List[int]) -> Dict[int, List[int]]:
+    entries: Dict[int, List[int]] = {}
+    i = 0
+    while i < len(flat):
+        file_id, count = flat[i], flat[i + 1]
+        lines = []
+        line = 0
+        for delta in flat[i + 2:i + 2 + count]:
+            line += delta
+            lines.append(line)
+        entries[file_id] = lines
+        i += 2 + count
+    return entries
+
+def _without(flat: List[int], stale: Set[int]) -> List[int]:
+    """Lista plana sin los archivos `stale` (sin decodificar las líneas)."""
+    out: List[int] = []
+    i = 0
+    while i < len(flat):
+        count = flat[i + 1]
+        if flat[i] not in stale:
+            out.extend(flat[i:i + 2 + count])
+        i += 2 + count
+    return out
+
+def _relative(file_path: Path) -> str:
+    resolved = Path(file_path).resolve()
+    try:
+        return resolved.relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return resolved.as_posix()
+
+class IdentIndex:
+    """Índice token → {archivo: [líneas]}, incremental y persistente."""
+
+    def __init__(self, index_path: Path = INDEX_PATH):
+        self.index_path = index_path
+        self.file_list: List[Optional[list]] = []   # id → [ruta, sha1, mtime_ns, tamaño] o None
+        # token → lista plana [id, n, Δlíneas...]; str tal cual se leyó hasta que se usa
+        self.postings: Dict[str, Union[str, List[int]]] = {}
+        self.reindexed = 0
+        self._dirty = False
+
+    @classmethod
+    def open(cls, files: Optional[Iterable[Path]] = None, index_path: Path = INDEX_PATH,
+             rebuild: bool = False) -> 'IdentIndex':
+        """Carga el índice y lo pone al día con los archivos (por defecto, todo el árbol TS/TSX)."""
+        index = cls(index_path)
+        if not rebuild:
+            index._load()
+        index.refresh(find_source_files() if files is None else files)
+        index.save()
+        return index
+
+    def _load(self):
+        try:
+            data = json.loads(zlib.decompress(self.index_path.read_bytes()))
+        except (OSError, ValueError, zlib.error):
+            return
+        if data.get('version') == INDEX_VERSION and data.get('tokenizer') == tokenizer_fingerprint():
+            self.file_list = data['files']
+            self.postings = data['postings']
+
+    def save(self):
+        if not self._dirty:
+            return
+        # Compactar si más de la mitad de los ids quedaron libres
+        if self.file_list and self.file_list.count(None) * 2 > len(self.file_list):
+            self._compact()
+        data = {
+            'version': INDEX_VERSION,
+            'tokenizer': tokenizer_fingerprint(),
+            'files': self.file_list,
+            'postings': {token: flat if isinstance(flat, str) else ','.join(map(str, flat))
+                         for token, flat in self.postings.items()},
+        }
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.tmp')
+        tmp_path.write_bytes(zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'), 6))
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def _compact(self):
+        remap = {}
+        file_list = []
+        for file_id, entry in enumerate(self.file_list):
+            if entry is not None:
+                remap[file_id] = len(file_list)
+                file_list.append(entry)
+        self.file_list = file_list
+        self.postings = {
+            token: encode_postings({remap[f]: lines for f, lines in decode_postings(self._flat(token)).items()})
+            for token in self.postings
+        }
+
+    def refresh(self, files: Iterable[Path]):
+        """Reindexa solo los archivos nuevos o modificados y olvida los que ya no existen."""
+        ids = {entry[0]: file_id for file_id, entry in enumerate(self.file_list) if entry}
+        seen: Set[int] = set()
+        stale: Set[int] = set()
+        pending = []
+
+        for file_path in files:
+            rel = _relative(file_path)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            file_id = ids.get(rel)
+            if file_id is not None:
+                seen.add(file_id)
+                entry = self.file_list[file_id]
+                if entry[2] == stat.st_mtime_ns and entry[3] == stat.st_size:
+                    continue
+                data = Path(file_path).read_bytes()
+                sha1 = content_hash(data)
+                if sha1 == entry[1]:
+                    entry[2] = stat.st_mtime_ns
+                    self._dirty = True
+                    continue
+                stale.add(file_id)
+            else:
+                data = Path(file_path).read_bytes()
+                sha1 = content_hash(data)
+                file_id = len(self.file_list)
+                self.file_list.append(None)
+                seen.add(file_id)
+            pending.append((file_id, [rel, sha1, stat.st_mtime_ns, stat.st_size], data))
+
+        removed = {file_id for file_id, entry in enumerate(self.file_list) if entry and file_id not in seen}
+        stale |= removed
+        for file_id in removed:
+            self.file_list[file_id] = None
+
+        if stale:
+            self.postings = {token: flat for token, flat in
+                             ((token, _without(self._flat(token), stale)) for token in self.postings) if flat}
+
+        for file_id, entry, data in pending:
+            self.file_list[file_id] = entry
+            for token, lines in tokenize(data.decode('utf-8', 'replace')).items():
+                flat = self._flat(token) if token in self.postings else self.postings.setdefault(token, [])
+                flat.append(file_id)
+                flat.append(len(lines))
+                previous = 0
+                for line in lines:
+                    flat.append(line - previous)
+                    previous = line
+
+        self.reindexed = len(pending)
+        if pending or stale:
+            self._dirty = True
+
+    # ---- consultas -------------------------------------------------------
+
+    def _flat(self, token: str) -> List[int]:
+        """Lista plana del token, decodificada (y guardada) la primera vez que se usa."""
+        flat = self.postings[token]
+        if isinstance(flat, str):
+            flat = self.postings[token] = [int(value) for value in flat.split(',')]
+        return flat
+
+    def _token_lines(self, token: str) -> Dict[int, List[int]]:
+        return decode_postings(self._flat(token)) if token in self.postings else {}
+
+    def _term_lines(self, term: str) -> Dict[int, List[int]]:
+        """
+        `x` → identificador o miembro; `.x` → solo miembro;
+        `a.b.c` → líneas donde aparecen a, .b y .c a la vez.
+        """
+        if term.startswith('.') and '.' not in term[1:]:
+            return self._token_lines(term)
+
+        head, *members = term.split('.')
+        result = self._token_lines(head)
+        for file_id, lines in self._token_lines('.' + head).items():
+            result[file_id] = sorted(set(result.get(file_id, [])) | set(lines))
+
+        for member in members:
+            other = self._token_lines('.' + member)
+            narrowed = {}
+            for file_id, lines in result.items():
+                if file_id in other:
+                    same_line = set(other[file_id]).intersection(lines)
+                    if same_line:
+                        narrowed[file_id] = sorted(same_line)
+            result = narrowed
+        return result
+
+    def lines(self, term: str) -> Dict[str, List[int]]:
+        """Archivo → líneas donde aparece el término."""
+        return {self.file_list[file_id][0]: lines
+                for file_id, lines in sorted(self._term_lines(term).items())}
+
+    def files(self, term: str) -> List[str]:
+        return sorted(self.file_list[file_id][0] for file_id in self._term_lines(term))
+
+    def files_containing(self, *fragments: str, ignore_case: bool = False) -> Set[str]:
+        """
+        Archivos con algún token que contiene alguno de los fragmentos
+        (recorre el vocabulario una vez, no el árbol). Todo literal con
+        letras que aparece en un archivo está dentro de uno de sus tokens,
+        así que esto nunca descarta un archivo que contenga el literal.
+        """
+        if not fragments:
+            return set()
+        pattern = re.compile('|'.join(re.escape(f) for f in fragments), re.IGNORECASE if ignore_case else 0)
+        file_ids: Set[int] = set()
+        for token in self.postings:
+            if pattern.search(token):
+                flat = self._flat(token)
+                i = 0
+                while i < len(flat):
+                    file_ids.add(flat[i])
+                    i += 2 + flat[i + 1]
+        return {self.file_list[file_id][0] for file_id in file_ids}
+
+    def paths(self) -> Set[str]:
+        """Rutas (relativas al proyecto) que el índice cubre."""
+        return {entry[0] for entry in self.file_list if entry}
+
+    def stats(self) -> dict:
+        return {
+            'files': sum(1 for entry in self.file_list if entry),
+            'tokens': len(self.postings),
+            'postings': sum(flat[i + 1] for flat in map(self._flat, list(self.postings))
+                            for i in _entry_offsets(flat)),
+        }
+
+def _entry_offsets(flat: List[int]):
+    i = 0
+    while i < len(flat):
+        yield i
+        i += 2 + flat[i + 1]
+
+def load_index(argv: Optional[List[str]] = None) -> Optional[IdentIndex]:
+    """Índice al día para los scripts; None con --no-cache (se recorre el árbol como antes)."""
+    if '--no-cache' in (sys.argv if argv is None else argv):
+        return None
+    return IdentIndex.open()
+
+def main():
+    terms = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    start = time.perf_counter()
+    index = IdentIndex.open(rebuild='--rebuild' in sys.argv)
+    elapsed = time.perf_counter() - start
+
+    stats = index.stats()
+    size = index.index_path.stat().st_size if index.index_path.exists() else 0
+    print(f"📇 Índice: {stats['files']} archivos, {stats['tokens']:,} tokens, {stats['postings']:,} postings "
+          f"({size / 1024:.0f} KB) — {index.reindexed} reindexados en {elapsed * 1000:.0f}ms")
+
+    for term in terms:
+        start = time.perf_counter()
+        found = index.lines(term)
+        elapsed = time.perf_counter() - start
+        total = sum(len(lines) for lines in found.values())
+        print(f"\n🔎 {term}: {len(found)} archivos, {total} líneas ({elapsed * 1000:.1f}ms)")
+        for rel, lines in found.items():
+            if '--files' in sys.argv:
+                print(f"   {rel}")
+            else:
+                print(f"   {rel}: {', '.join(map(str, lines))}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Preselección de candidatos en proceso: búsqueda de literales sobre bytes.
+
+Los fixers buscaban candidatos lanzando `grep -rl` (uno por propiedad en
+fix_classbooking_props, con shell=True y tuberías en fix_booking_amount y
+fix_prisma_create). Aquí cada regla declara los literales que su código
+NECESITA encontrar para poder cambiar algo (CANDIDATE_NEEDLES) y:
+
+- cada archivo se lee una vez como bytes, sin decodificar UTF-8 ni
+  ejecutar las regex de las reglas,
+- las agujas de TODAS las reglas se resuelven sobre esa lectura, cada una
+  como mucho una vez (memo compartido entre reglas) y con cortocircuito:
+  un grupo cumplido no mira sus demás agujas, una regla descartada no
+  mira sus demás grupos,
+- se devuelven a la vez los candidatos de cada regla.
+
+Cada aguja se busca con `in` sobre bytes (búsqueda rápida de CPython,
+acelerada con memchr). Una única regex con todas las agujas alternadas
+hace una sola pasada, pero en CPython resultó entre 3 y 6 veces más lenta
+sobre el árbol (el motor prueba la alternancia en cada posición).
+
+Con un índice de identificadores (ident_index.py) select() ni siquiera
+abre los archivos que el índice descarta: cada aguja se reduce a su tramo
+alfanumérico más largo y se buscan en el vocabulario los tokens que lo
+contienen (O(vocabulario + postings) en vez de O(árbol)).
+
+Formato de los requisitos: lista de grupos; cada grupo es una alternativa
+(basta una aguja del grupo) y deben cumplirse TODOS los grupos:
+
+    CANDIDATE_NEEDLES = [(b'updatedAt',), (b'new Date()',)]
+    CANDIDATE_NEEDLES = [(b'.studentName', b'.studentEmail', b'.attended')]
+    CANDIDATE_NEEDLES = [(b'amount',), (nocase(b'booking'),)]
+
+Uso:
+    selector = CandidateSelector({'classbooking': NEEDLES_A, 'amount': NEEDLES_B})
+    selector.rules_for(file_path.read_bytes())         # ['amount']
+    select_candidates(files, {...})                    # {'classbooking': [...], 'amount': [...]}
+    select_candidates(files, {...}, index=load_index())
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from codemod_cache import PROJECT_ROOT
+
+Requirement = Sequence[Sequence[bytes]]
+
+WORD_FRAGMENT = re.compile(rb'[\w$]+')
+
+class NoCase(bytes):
+    """Aguja que se busca sin distinguir mayúsculas/minúsculas (solo ASCII)."""
+
+def nocase(needle: bytes) -> NoCase:
+    return NoCase(needle.lower())
+
+def literal_needles(words: Iterable[str]) -> tuple:
+    """Grupo de alternativas a partir de palabras (ej. claves de un mapa de correcciones)."""
+    return tuple(sorted({word.encode('utf-8') for word in words}))
+
+def needle_fragment(needle: bytes) -> Optional[str]:
+    """Tramo alfanumérico más largo de la aguja; None si no tiene (no se puede usar el índice)."""
+    fragments = [f for f in WORD_FRAGMENT.findall(needle) if not f.isdigit()]
+    return max(fragments, key=len).decode('ascii') if fragments else None
+
+def _relative(file_path: Path) -> str:
+    try:
+        return Path(file_path).resolve().relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return ''
+
+class CandidateSelector:
+    """Decide qué reglas pueden aplicar a unos bytes, con una sola lectura."""
+
+    def __init__(self, rules: Dict[str, Requirement]):
+        # (aguja, sin_mayúsculas): NoCase(b'x') == b'x' como bytes, la tupla las distingue
+        self.rules: Dict[str, List[Tuple[Tuple[bytes, bool], ...]]] = {
+            name: [tuple((bytes(n), isinstance(n, NoCase)) for n in group) for group in groups]
+            for name, groups in rules.items()
+        }
+
+    def index_candidates(self, index) -> Dict[str, Optional[Set[str]]]:
+        """
+        Por regla, las rutas que el índice no descarta (None = no se puede
+        acotar: alguna aguja sin letras en todos sus grupos).
+        """
+        allowed: Dict[str, Optional[Set[str]]] = {}
+        memo: Dict[tuple, Set[str]] = {}
+        for name, groups in self.rules.items():
+            files: Optional[Set[str]] = None
+            for group in groups:
+                fragments = [needle_fragment(text) for text, _ in group]
+                if None in fragments:
+                    continue
+                # Sin distinguir mayúsculas si alguna aguja del grupo lo pide (superconjunto)
+                key = (tuple(sorted(set(fragments))), any(ignore_case for _, ignore_case in group))
+                if key not in memo:
+                    memo[key] = index.files_containing(*key[0], ignore_case=key[1])
+                files = memo[key] if files is None else files & memo[key]
+            allowed[name] = files
+        return allowed
+
+    def rules_for(self, data: bytes, names: Optional[Iterable[str]] = None) -> List[str]:
+        """Reglas (en orden de registro) que PUEDEN cambiar algo en estos bytes."""
+        present: Dict[Tuple[bytes, bool], bool] = {}
+        lowered = None
+
+        def has(needle: Tuple[bytes, bool]) -> bool:
+            nonlocal lowered
+            found = present.get(needle)
+            if found is None:
+                text, ignore_case = needle
+                if ignore_case:
+                    if lowered is None:
+                        lowered = data.lower()
+                    found = text in lowered
+                else:
+                    found = text in data
+                present[needle] = found
+            return found
+
+        rules = self.rules if names is None else {name: self.rules[name] for name in names}
+        return [name for name, groups in rules.items()
+                if all(any(has(needle) for needle in group) for group in groups)]
+
+    def possible_rules(self, file_path: Path, allowed: Dict[str, Optional[Set[str]]],
+                       indexed: Set[str]) -> List[str]:
+        """Reglas que el índice no descarta para el archivo (todas si no está indexado)."""
+        rel = _relative(file_path)
+        if rel not in indexed:
+            return list(self.rules)
+        return [name for name in self.rules if allowed.get(name) is None or rel in allowed[name]]
+
+    def narrow(self, files: Iterable[Path], index) -> List[Path]:
+        """Archivos que alguna regla puede cambiar según el índice, sin abrir ninguno."""
+        allowed = self.index_candidates(index)
+        indexed = index.paths()
+        return [f for f in files if self.possible_rules(f, allowed, indexed)]
+
+    def select(self, files: Iterable[Path], index=None) -> Dict[str, List[Path]]:
+        """Lee cada archivo una vez (solo si el índice no lo descarta) y reparte los candidatos por regla."""
+        candidates: Dict[str, List[Path]] = {name: [] for name in self.rules}
+        allowed = self.index_candidates(index) if index is not None else {}
+        indexed = index.paths() if index is not None else set()
+        for file_path in files:
+            names = self.possible_rules(file_path, allowed, indexed)
+            if not names:
+                continue
+            try:
+                data = Path(file_path).read_bytes()
+            except OSError:
+                continue
+            for name in self.rules_for(data, names):
+                candidates[name].append(file_path)
+        return candidates
+
+def select_candidates(files: Iterable[Path], rules: Dict[str, Requirement],
+                      index=None) -> Dict[str, List[Path]]:
+    return CandidateSelector(rules).select(files, index)
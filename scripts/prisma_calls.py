@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Índice de llamadas Prisma por archivo: prisma.<modelo>.<operación>(...) y
+tx.<modelo>.<operación>(...) con sus spans exactos.
+
+Los fixers adivinaban el contexto de cada posición: fix_prisma_updated_at_surgical
+unía las 10 líneas anteriores a cada updatedAt buscando "prisma.x.create",
+fix_prisma_create avanzaba hasta el primer `data: {` y fix_booking_amount
+miraba solo la línea actual. Aquí, en la misma pasada del escáner léxico
+(ts_scanner.scan), se registra cada llamada con:
+
+- el span de la llamada (inicio de la cadena hasta el ')' de cierre),
+- el cliente (prisma, tx, db, trx), el delegate y el modelo del schema,
+- las claves de primer nivel del objeto de argumentos (where, data,
+  include, select, orderBy, ...) con el span de la clave y de su valor.
+
+Las llamadas anidan o son disjuntas (los paréntesis cierran en orden), así
+que cada una guarda a su padre y "¿qué llamada encierra este offset?" es
+una búsqueda binaria más subir por la cadena de padres: O(log n + anidamiento).
+
+Caché persistente en .codemod-cache/prisma-calls.json.gz, por sha1 del
+contenido: solo se reescanean los archivos cuyo contenido cambió.
+
+Uso:
+    sites = call_sites(content)                     # memoizado por contenido
+    call = sites.enclosing(offset)                  # la llamada más interna o None
+    arg = call.arg('data') if call else None        # ArgSpan(key, key_start, ...)
+    sites.by_operation('create', 'createMany')
+
+    cache = CallSiteCache.open()
+    sites = cache.for_file(file_path)               # reescanea solo si cambió el sha1
+    cache.save()
+
+CLI:
+    python scripts/prisma_calls.py                          # resumen del árbol
+    python scripts/prisma_calls.py app/api/bookings/route.ts [línea]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from bisect import bisect_right
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import ts_scanner
+from codemod_cache import CACHE_DIR, PROJECT_ROOT, content_hash, ruleset_fingerprint
+from prisma_schema import PrismaSchema, load_schema
+from prisma_types import PRISMA_CLIENTS
+from source_files import find_source_files
+from ts_scanner import ScanIndex, scan
+
+CACHE_PATH = CACHE_DIR / 'prisma-calls.json.gz'
+CACHE_VERSION = 1
+
+WHITESPACE = re.compile(r'\s*')
+
+OPERATIONS = {
+    'findUnique', 'findUniqueOrThrow', 'findFirst', 'findFirstOrThrow', 'findMany',
+    'create', 'createMany', 'update', 'updateMany', 'upsert', 'delete', 'deleteMany',
+    'count', 'aggregate', 'groupBy',
+}
+
+class ArgSpan(NamedTuple):
+    """Clave de primer nivel del objeto de argumentos y el span de su valor."""
+    key: str
+    key_start: int
+    key_end: int
+    value_start: int
+    value_end: int
+
+class CallSite(NamedTuple):
+    """Llamada Prisma: start..end cubre `prisma.booking.findMany(...)` entera."""
+    client: str
+    delegate: str
+    model: Optional[str]
+    operation: str
+    start: int
+    open: int
+    close: int
+    line: int
+    args: Tuple[ArgSpan, ...]
+    parent: int  # índice de la llamada que la encierra en CallSites.calls (-1 si ninguna)
+
+    @property
+    def end(self) -> int:
+        return self.close + 1
+
+    def arg(self, key: str) -> Optional[ArgSpan]:
+        return next((arg for arg in self.args if arg.key == key), None)
+
+    def arg_at(self, offset: int) -> Optional[ArgSpan]:
+        """Argumento de primer nivel cuyo valor contiene el offset."""
+        return next((arg for arg in self.args if arg.value_start <= offset < arg.value_end), None)
+
+# Registro sin modelo ni padre, tal cual se guarda en la caché:
+# [cadena, start, open, close, line, [[clave, key_start, key_end, value_start, value_end], ...]]
+RawCall = list
+
+def property_spans(index: ScanIndex, region: ts_scanner.Region) -> List[ArgSpan]:
+    """
+    Claves directas de un objeto con el span de su valor.
+
+    El valor termina donde empieza la siguiente clave (sin la coma ni los
+    comentarios intermedios) o en el cierre del objeto; si el valor es un
+    objeto, en su '}'. Las claves abreviadas ({ where }) van al final.
+    """
+    content = index.content
+    props = index.properties_in(region)
+    spans = []
+    for i, prop in enumerate(props):
+        value_start = WHITESPACE.match(content, prop.colon + 1).end()
+        nested = index.region_at(value_start) if prop.value == '{' else None
+        if nested is not None:
+            value_end = nested.close + 1
+        else:
+            value_end = index.code_end(props[i + 1].start if i + 1 < len(props) else region.close)
+            if content[value_end - 1] == ',':
+                value_end = index.code_end(value_end - 1)
+        spans.append(ArgSpan(prop.name, prop.start, prop.end, value_start, max(value_end, value_start)))
+    # Abreviadas ({ where, orderBy }): el valor es la propia variable
+    spans.extend(ArgSpan(name, start, end, start, end) for name, start, end in index.shorthand_keys(region))
+    return spans
+
+def _argument_spans(index: ScanIndex, call: ts_scanner.Call) -> List[list]:
+    """Claves del objeto literal que es el primer argumento (si lo es)."""
+    first = WHITESPACE.match(index.content, call.open + 1).end()
+    region = index.region_at(first) if index.content.startswith('{', first) else None
+    if region is None:
+        return []
+    return [list(span) for span in property_spans(index, region)]
+
+def extract_calls(content: str) -> List[RawCall]:
+    """Llamadas Prisma del archivo en orden de aparición (un solo escaneo léxico)."""
+    index = scan(content)
+    raw = []
+    line, last = 1, 0
+    for call in index.call_list:
+        parts = call.name.split('.')
+        if len(parts) < 3 or parts[-3] not in PRISMA_CLIENTS or parts[-1] not in OPERATIONS:
+            continue
+        line += content.count('\n', last, call.start)
+        last = call.start
+        raw.append([call.name, call.start, call.open, call.close, line, _argument_spans(index, call)])
+    return raw
+
+class CallSites:
+    """Llamadas Prisma de un archivo, con búsqueda por intervalo."""
+
+    def __init__(self, raw: Iterable[RawCall], schema: Optional[PrismaSchema] = None):
+        schema = schema or load_schema()
+        self.calls: List[CallSite] = []
+        self._starts: List[int] = []
+        open_calls: List[int] = []  # pila de índices de llamadas aún abiertas
+        for name, start, open_pos, close, line, args in sorted(raw, key=lambda r: r[1]):
+            while open_calls and self.calls[open_calls[-1]].close < start:
+                open_calls.pop()
+            client, delegate, operation = name.split('.')[-3:]
+            self.calls.append(CallSite(client, delegate, schema.model_for_delegate(delegate), operation,
+                                       start, open_pos, close, line,
+                                       tuple(ArgSpan(*arg) for arg in args),
+                                       open_calls[-1] if open_calls else -1))
+            self._starts.append(start)
+            open_calls.append(len(self.calls) - 1)
+
+    def __iter__(self):
+        return iter(self.calls)
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    def enclosing(self, offset: int) -> Optional[CallSite]:
+        """La llamada más interna cuyo span contiene el offset."""
+        i = bisect_right(self._starts, offset) - 1
+        # Si la anterior no lo contiene, solo puede contenerlo alguna que la encierre
+        while i >= 0 and self.calls[i].end <= offset:
+            i = self.calls[i].parent
+        return self.calls[i] if i >= 0 else None
+
+    def by_operation(self, *operations: str) -> List[CallSite]:
+        return [call for call in self.calls if call.operation in operations]
+
+    def by_model(self, *models: str) -> List[CallSite]:
+        return [call for call in self.calls if call.model in models]
+
+@lru_cache(maxsize=4)
+def call_sites(content: str) -> CallSites:
+    """Llamadas del contenido; memoizado como scan() para compartirlo entre reglas."""
+    return CallSites(extract_calls(content))
+
+def extractor_fingerprint() -> str:
+    return ruleset_fingerprint(Path(__file__), Path(ts_scanner.__file__), CACHE_VERSION)
+
+class CallSiteCache:
+    """sha1 del contenido → llamadas extraídas, persistido en .codemod-cache/."""
+
+    def __init__(self, cache_path: Path = CACHE_PATH):
+        self.cache_path = cache_path
+        self.entries: Dict[str, List[RawCall]] = {}
+        self.used = set()
+        self.scanned = 0
+        self._dirty = False
+
+    @classmethod
+    def open(cls, cache_path: Path = CACHE_PATH) -> 'CallSiteCache':
+        cache = cls(cache_path)
+        cache._load()
+        return cache
+
+    def _load(self):
+        try:
+            data = json.loads(zlib.decompress(self.cache_path.read_bytes()))
+        except (OSError, ValueError, zlib.error):
+            return
+        if data.get('version') == CACHE_VERSION and data.get('extractor') == extractor_fingerprint():
+            self.entries = data.get('entries', {})
+
+    def for_content(self, content: str) -> CallSites:
+        key = content_hash(content.encode('utf-8'))
+        self.used.add(key)
+        raw = self.entries.get(key)
+        if raw is None:
+            raw = self.entries[key] = extract_calls(content)
+            self.scanned += 1
+            self._dirty = True
+        return CallSites(raw)
+
+    def for_file(self, file_path: Path) -> CallSites:
+        return self.for_content(Path(file_path).read_text(encoding='utf-8'))
+
+    def save(self, prune: bool = False):
+        """Guarda si hubo cambios; con prune descarta los contenidos no consultados."""
+        if prune and set(self.entries) != self.used:
+            self.entries = {key: raw for key, raw in self.entries.items() if key in self.used}
+            self._dirty = True
+        if not self._dirty:
+            return
+        data = {'version': CACHE_VERSION, 'extractor': extractor_fingerprint(), 'entries': self.entries}
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix('.tmp')
+        tmp_path.write_bytes(zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'), 6))
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+def index_tree(files: Optional[Iterable[Path]] = None) -> Dict[str, CallSites]:
+    """Llamadas de todo el árbol (ruta relativa → CallSites), usando y podando la caché."""
+    cache = CallSiteCache.open()
+    found = {}
+    for file_path in (find_source_files() if files is None else files):
+        try:
+            sites = cache.for_file(file_path)
+        except (OSError, UnicodeDecodeError):
+            continue
+        if len(sites):
+            found[Path(file_path).resolve().relative_to(PROJECT_ROOT).as_posix()] = sites
+    cache.save(prune=files is None)
+    return found
+
+def describe(call: CallSite) -> str:
+    keys = ', '.join(arg.key for arg in call.args) or '…'
+    return f"{call.line:>5}: {call.client}.{call.delegate}.{call.operation}({{ {keys} }}) → {call.model or '?'}"
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if args:
+        content = Path(args[0]).read_text(encoding='utf-8')
+        sites = call_sites(content)
+        if len(args) > 1:
+            # Llamada que encierra el inicio de la línea pedida
+            starts = [0] + [i + 1 for i, char in enumerate(content) if char == '\n']
+            line_start = starts[int(args[1]) - 1]
+            offset = line_start + len(content[line_start:]) - len(content[line_start:].lstrip(' \t'))
+            call = sites.enclosing(offset)
+            if call is None:
+                print(f"📍 Línea {args[1]}: fuera de toda llamada Prisma")
+                return
+            arg = call.arg_at(offset)
+            print(f"📍 Línea {args[1]}: {describe(call)}" + (f" — dentro de `{arg.key}`" if arg else ''))
+            return
+        print(f"📄 {args[0]}: {len(sites)} llamadas Prisma")
+        for call in sites:
+            print(f"  {describe(call)}")
+        return
+
+    start = time.perf_counter()
+    tree = index_tree()
+    elapsed = time.perf_counter() - start
+    calls = [call for sites in tree.values() for call in sites]
+    print(f"📇 {len(calls)} llamadas Prisma en {len(tree)} archivos ({elapsed * 1000:.0f}ms)")
+    print("\n📊 Por operación:")
+    for operation, count in Counter(call.operation for call in calls).most_common():
+        print(f"   {operation:<20} {count:>6}")
+    print("\n📊 Modelos más consultados:")
+    for model, count in Counter(call.model or '?' for call in calls).most_common(10):
+        print(f"   {model:<20} {count:>6}")
+
+if __name__ == '__main__':
+    main()
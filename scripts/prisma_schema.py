@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Modelo en memoria de prisma/schema.prisma (fuente de verdad de los fixers).
+
+Parsea modelos, enums, tipos de campo, opcionalidad, listas, @relation
+(nombre/fields/references), @id, @unique, @updatedAt, @default, @@id,
+@@unique, @@index y @@map a un grafo compacto con búsquedas O(1):
+
+    schema = load_schema()
+    schema.field('Booking', 'Club')           # Field(...) o None
+    schema.relations('Booking')               # {'Club': Field, 'Court': Field, ...}
+    schema.reverse_relations('Club')          # campos de otros modelos que apuntan a Club
+    schema.models_with_updated_at             # ['Class', 'ClassBooking', ...]
+    schema.model_for_delegate('classBooking') # 'ClassBooking' (prisma.classBooking)
+
+load_schema() memoiza el resultado por mtime + hash del archivo: llamarlo
+repetidamente no vuelve a leer ni a parsear el schema si no cambió.
+
+CLI:
+    python scripts/prisma_schema.py [Modelo[.campo]]
+"""
+
+import hashlib
+import os
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SCHEMA_PATH = PROJECT_ROOT / 'prisma' / 'schema.prisma'
+
+SCALAR_TYPES = {'String', 'Int', 'BigInt', 'Float', 'Decimal', 'Boolean', 'DateTime', 'Json', 'Bytes'}
+
+BLOCK_PATTERN = re.compile(r'^(model|enum)\s+(\w+)\s*\{(.*?)^\}', re.MULTILINE | re.DOTALL)
+FIELD_PATTERN = re.compile(r'^(\w+)\s+(\w+)(\[\])?(\?)?(?:\s+(.*))?$')
+ATTRIBUTE_PATTERN = re.compile(r'@@?(\w+(?:\.\w+)?)')
+NAMED_ARG_PATTERN = re.compile(r'(\w+)\s*:\s*(\[[^\]]*\]|"[^"]*"|[\w.]+(?:\([^)]*\))?)')
+
+class Field(NamedTuple):
+    model: str
+    name: str
+    type: str                         # tipo base, sin ? ni []
+    optional: bool
+    is_list: bool
+    is_relation: bool                 # el tipo es otro modelo
+    is_enum: bool
+    is_id: bool
+    is_unique: bool
+    updated_at: bool                  # @updatedAt
+    default: Optional[str]            # contenido de @default(...)
+    relation_name: Optional[str]
+    relation_fields: Tuple[str, ...]
+    relation_references: Tuple[str, ...]
+
+class Model(NamedTuple):
+    name: str
+    fields: Dict[str, Field]
+    id_fields: Tuple[str, ...]                 # @id o @@id([...])
+    unique_constraints: List[Tuple[str, ...]]  # @unique y @@unique([...])
+    indexes: List[Tuple[str, ...]]             # @@index([...])
+    db_name: Optional[str]                     # @@map("...")
+
+    @property
+    def relations(self) -> Dict[str, Field]:
+        return {name: f for name, f in self.fields.items() if f.is_relation}
+
+def strip_comment(line: str) -> str:
+    """Quita comentarios // que no estén dentro de un string."""
+    in_string = False
+    for i, char in enumerate(line):
+        if char == '"' and (i == 0 or line[i - 1] != '\\'):
+            in_string = not in_string
+        elif char == '/' and not in_string and line[i:i + 2] == '//':
+            return line[:i].rstrip()
+    return line.rstrip()
+
+def attribute_args(text: str, start: int) -> Tuple[str, int]:
+    """Devuelve el contenido entre paréntesis balanceados que empieza en start."""
+    if start >= len(text) or text[start] != '(':
+        return '', start
+    depth = 0
+    in_string = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if char == '"' and text[i - 1] != '\\':
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return text[start + 1:i], i + 1
+    return text[start + 1:], len(text)
+
+def parse_attributes(text: str) -> List[Tuple[str, str]]:
+    """[('relation', 'fields: [a], references: [id]'), ('default', 'now()'), ...]"""
+    attributes = []
+    pos = 0
+    while True:
+        match = ATTRIBUTE_PATTERN.search(text, pos)
+        if not match:
+            return attributes
+        args, pos = attribute_args(text, match.end())
+        attributes.append((match.group(1), args))
+        pos = max(pos, match.end())
+
+def field_list(args: str) -> Tuple[str, ...]:
+    """'[clubId, date(sort: Desc)], name: "x"' → ('clubId', 'date')"""
+    match = re.search(r'\[([^\]]*)\]', args)
+    if not match:
+        return ()
+    names = []
+    for item in match.group(1).split(','):
+        item = item.strip()
+        if item:
+            names.append(re.match(r'\w+', item).group(0))
+    return tuple(names)
+
+def parse_relation(args: str) -> Tuple[Optional[str], Tuple[str, ...], Tuple[str, ...]]:
+    name = None
+    positional = re.match(r'\s*"([^"]*)"', args)
+    if positional:
+        name = positional.group(1)
+
+    named = dict(NAMED_ARG_PATTERN.findall(args))
+    if 'name' in named:
+        name = named['name'].strip('"')
+    return name, field_list(named.get('fields', '')), field_list(named.get('references', ''))
+
+class PrismaSchema:
+    """Grafo de modelos con índices precomputados."""
+
+    def __init__(self, models: Dict[str, Model], enums: Dict[str, List[str]]):
+        self.models = models
+        self.enums = enums
+
+        self._reverse: Dict[str, List[Field]] = defaultdict(list)
+        self._by_field_name: Dict[str, List[Field]] = defaultdict(list)
+        self._delegates = {self.delegate(name): name for name in models}
+        for model in models.values():
+            for f in model.fields.values():
+                self._by_field_name[f.name].append(f)
+                if f.is_relation:
+                    self._reverse[f.type].append(f)
+
+        self.models_with_updated_at = sorted(
+            name for name, model in models.items()
+            if any(f.updated_at for f in model.fields.values())
+        )
+
+    def model(self, name: str) -> Optional[Model]:
+        return self.models.get(name)
+
+    def field(self, model: str, name: str) -> Optional[Field]:
+        entry = self.models.get(model)
+        return entry.fields.get(name) if entry else None
+
+    def relations(self, model: str) -> Dict[str, Field]:
+        entry = self.models.get(model)
+        return entry.relations if entry else {}
+
+    def reverse_relations(self, model: str) -> List[Field]:
+        """Campos de relación (en cualquier modelo) cuyo tipo es `model`."""
+        return self._reverse.get(model, [])
+
+    def opposite(self, f: Field) -> Optional[Field]:
+        """Lado contrario de una relación (mismo nombre de @relation)."""
+        for candidate in self.reverse_relations(f.model):
+            if candidate.model == f.type and candidate is not f and candidate.relation_name == f.relation_name:
+                return candidate
+        return None
+
+    def fields_named(self, name: str) -> List[Field]:
+        """Todos los campos llamados `name` en cualquier modelo."""
+        return self._by_field_name.get(name, [])
+
+    @staticmethod
+    def delegate(model: str) -> str:
+        """Nombre del delegate del cliente: ClassBooking → classBooking."""
+        return model[:1].lower() + model[1:]
+
+    def model_for_delegate(self, delegate: str) -> Optional[str]:
+        return self._delegates.get(delegate)
+
+def parse_schema(content: str) -> PrismaSchema:
+    """Parsea el texto de un schema.prisma."""
+    blocks = [(kind, name, body) for kind, name, body in BLOCK_PATTERN.findall(content)]
+    enums = {}
+    for kind, name, body in blocks:
+        if kind == 'enum':
+            values = [strip_comment(line).strip() for line in body.split('\n')]
+            enums[name] = [v.split()[0] for v in values if v and not v.startswith('@@')]
+
+    model_names = {name for kind, name, _ in blocks if kind == 'model'}
+    models = {}
+
+    for kind, name, body in blocks:
+        if kind != 'model':
+            continue
+
+        fields: Dict[str, Field] = {}
+        id_fields: Tuple[str, ...] = ()
+        unique_constraints: List[Tuple[str, ...]] = []
+        indexes: List[Tuple[str, ...]] = []
+        db_name = None
+
+        for raw_line in body.split('\n'):
+            line = strip_comment(raw_line).strip()
+            if not line:
+                continue
+
+            if line.startswith('@@'):
+                for attr, args in parse_attributes(line):
+                    if attr == 'index':
+                        indexes.append(field_list(args))
+                    elif attr == 'unique':
+                        unique_constraints.append(field_list(args))
+                    elif attr == 'id':
+                        id_fields = field_list(args)
+                    elif attr == 'map':
+                        db_name = args.strip().strip('"')
+                continue
+
+            match = FIELD_PATTERN.match(line)
+            if not match:
+                continue
+
+            field_name, field_type, list_marker, optional_marker, rest = match.groups()
+            attributes = parse_attributes(rest or '')
+            attr_names = {attr for attr, _ in attributes}
+
+            relation_name, relation_fields, relation_references = None, (), ()
+            default = None
+            for attr, args in attributes:
+                if attr == 'relation':
+                    relation_name, relation_fields, relation_references = parse_relation(args)
+                elif attr == 'default':
+                    default = args
+
+            fields[field_name] = Field(
+                model=name,
+                name=field_name,
+                type=field_type,
+                optional=bool(optional_marker),
+                is_list=bool(list_marker),
+                is_relation=field_type in model_names,
+                is_enum=field_type in enums,
+                is_id='id' in attr_names,
+                is_unique='unique' in attr_names,
+                updated_at='updatedAt' in attr_names,
+                default=default,
+                relation_name=relation_name,
+                relation_fields=relation_fields,
+                relation_references=relation_references,
+            )
+            if 'id' in attr_names:
+                id_fields = (field_name,)
+            if 'unique' in attr_names:
+                unique_constraints.append((field_name,))
+
+        models[name] = Model(name, fields, id_fields, unique_constraints, indexes, db_name)
+
+    return PrismaSchema(models, enums)
+
+# path → (mtime_ns, size, sha1, schema)
+_SCHEMA_CACHE: Dict[str, tuple] = {}
+
+def load_schema(schema_path: Path = SCHEMA_PATH) -> PrismaSchema:
+    """
+    Carga el schema memoizado por mtime + hash.
+
+    Si el stat no cambió se devuelve el grafo ya parseado sin tocar el
+    archivo; si cambió pero el hash es igual (ej. touch/checkout) tampoco
+    se vuelve a parsear.
+    """
+    key = str(Path(schema_path).resolve())
+    stat = os.stat(key)
+    cached = _SCHEMA_CACHE.get(key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[3]
+
+    data = Path(key).read_bytes()
+    sha1 = hashlib.sha1(data).hexdigest()
+    if cached and cached[2] == sha1:
+        schema = cached[3]
+    else:
+        schema = parse_schema(data.decode('utf-8'))
+    _SCHEMA_CACHE[key] = (stat.st_mtime_ns, stat.st_size, sha1, schema)
+    return schema
+
+def schema_sha1(schema_path: Path = SCHEMA_PATH) -> str:
+    """Hash del schema ya memoizado (carga el schema si hace falta)."""
+    load_schema(schema_path)
+    return _SCHEMA_CACHE[str(Path(schema_path).resolve())][2]
+
+def describe_field(f: Field) -> str:
+    suffix = '[]' if f.is_list else ('?' if f.optional else '')
+    flags = []
+    if f.is_id:
+        flags.append('@id')
+    if f.is_unique:
+        flags.append('@unique')
+    if f.updated_at:
+        flags.append('@updatedAt')
+    if f.default is not None:
+        flags.append(f'@default({f.default})')
+    if f.relation_fields:
+        flags.append(f"@relation({f.relation_name or ''} {list(f.relation_fields)} → {list(f.relation_references)})")
+    return f"{f.name:24} {f.type + suffix:22} {' '.join(flags)}"
+
+def main():
+    schema = load_schema()
+
+    if len(sys.argv) < 2:
+        relations = sum(len(m.relations) for m in schema.models.values())
+        indexes = sum(len(m.indexes) for m in schema.models.values())
+        print(f"📐 {len(schema.models)} modelos, {len(schema.enums)} enums")
+        print(f"🔗 {relations} campos de relación, {indexes} @@index")
+        print(f"🕒 Modelos con @updatedAt: {', '.join(schema.models_with_updated_at)}")
+        return
+
+    model_name, _, field_name = sys.argv[1].partition('.')
+    model = schema.model(model_name)
+    if not model:
+        print(f"❌ Modelo no encontrado: {model_name}")
+        sys.exit(1)
+
+    fields = [model.fields[field_name]] if field_name in model.fields else list(model.fields.values())
+    print(f"model {model.name}" + (f'  (@@map "{model.db_name}")' if model.db_name else ''))
+    for f in fields:
+        print(f"  {describe_field(f)}")
+    if not field_name:
+        print(f"  id: {list(model.id_fields)}  unique: {model.unique_constraints}  index: {model.indexes}")
+        print(f"  ← referenciado por: {', '.join(f'{f.model}.{f.name}' for f in schema.reverse_relations(model.name))}")
+
+if __name__ == '__main__':
+    main()
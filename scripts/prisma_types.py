@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Inferencia ligera de tipos Prisma por variable, para reescribir accesos a
+relaciones solo cuando el modelo del receptor realmente tiene esa relación.
+
+Sustituye las heurísticas por nombre de variable (safe_prefixes en
+fix_relations_v3, lookbehind (?<!prisma) en fix_relations_surgical), que
+o se quedaban cortas o reescribían lo que no debían.
+
+Vínculos que se reconocen (por archivo, sin flujo):
+- const booking = await prisma.booking.findUnique(...)   → Booking
+- const bookings = await tx.booking.findMany(...)        → Booking[]
+- bookings.map(b => ...), .forEach/.filter/.find/...     → b: Booking
+- for (const b of booking.Payment)                        → b: Payment
+- const court = booking.Court                             → Court
+- function f(booking: Booking) (si Booking se importa de @prisma/client)
+
+Un nombre declarado en el archivo de otra forma (ej. const booking = await
+res.json(), o un parámetro de otro callback) o con dos modelos distintos
+se considera ambiguo y NO se reescribe: se prefiere no tocar a romper.
+
+Uso:
+    bindings = infer_bindings(content)
+    content, changes = rewrite_relation_access(content, bindings)
+
+CLI (diagnóstico):
+    python scripts/prisma_types.py app/api/bookings/route.ts
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from prisma_schema import PrismaSchema, load_schema
+from relation_maps import load_relation_maps
+from ts_scanner import Region, scan
+
+# Nombres habituales del cliente Prisma (prisma.$transaction(async (tx) => ...))
+PRISMA_CLIENTS = ('prisma', 'tx', 'db', 'trx')
+
+SINGLE_METHODS = {
+    'findUnique', 'findUniqueOrThrow', 'findFirst', 'findFirstOrThrow',
+    'create', 'update', 'upsert', 'delete',
+}
+LIST_METHODS = {'findMany'}
+
+# Métodos de array cuyo primer parámetro del callback es un elemento
+ITERATOR_METHODS = ('map', 'forEach', 'filter', 'find', 'findIndex', 'some', 'every', 'flatMap')
+
+IDENT = r'[A-Za-z_$][\w$]*'
+CHAIN = IDENT + r'(?:\??\.' + IDENT + r')*'
+
+QUERY_BINDING = re.compile(
+    r'\b(?:const|let|var)\s+(?P<name>' + IDENT + r')\s*(?::\s*[^=;\n]+)?=\s*(?:await\s+)?'
+    r'(?P<client>' + '|'.join(PRISMA_CLIENTS) + r')\.(?P<delegate>\w+)\.(?P<method>\w+)\s*\('
+)
+ALIAS_BINDING = re.compile(
+    r'\b(?:const|let|var)\s+(?P<name>' + IDENT + r')\s*=\s*(?P<chain>' + CHAIN + r')\s*(?=;|\n|$)'
+)
+CALLBACK_BINDING = re.compile(
+    r'(?<![\w$.])(?P<chain>' + CHAIN + r')\??\.(?:' + '|'.join(ITERATOR_METHODS) + r')\(\s*(?:async\s+)?'
+    r'(?:\(\s*(?P<param>' + IDENT + r')\s*(?::[^,)]*)?(?:,[^)]*)?\)|(?P<bare>' + IDENT + r'))\s*=>'
+)
+FOR_OF_BINDING = re.compile(
+    r'\bfor\s*\(\s*(?:const|let|var)\s+(?P<name>' + IDENT + r')\s+of\s+(?P<chain>' + CHAIN + r')\s*\)'
+)
+ANNOTATED_BINDING = re.compile(
+    r'(?<![\w$.])(?P<name>' + IDENT + r')\??\s*:\s*(?P<type>[A-Z]\w*)(?P<list>\[\])?\s*(?=[,)=;|}\n])'
+)
+PRISMA_IMPORT = re.compile(r'import\s+(?:type\s+)?\{(?P<names>[^}]*)\}\s*from\s*[\'"]@prisma/client[\'"]')
+
+# Cualquier otra declaración del nombre (para detectar ambigüedad)
+DECLARATION = re.compile(r'\b(?:const|let|var)\s+(?P<name>' + IDENT + r')\b')
+DESTRUCTURING = re.compile(r'\b(?:const|let|var)\s+[{\[](?P<names>[^}\]=]*)[}\]]')
+ARROW_PARAMS = re.compile(r'\((?P<params>[^()]*)\)\s*(?::\s*[^=>{]+)?=>|(?<![\w$.])(?P<bare>' + IDENT + r')\s*=>')
+FUNCTION_PARAMS = re.compile(r'\bfunction\b\s*' + IDENT + r'?\s*(?:<[^>]*>)?\s*\((?P<params>[^()]*)\)')
+PARAM_NAME = re.compile(r'(?:^|,)\s*(?:\.\.\.)?(?P<name>' + IDENT + r')')
+
+ACCESS_CHAIN = re.compile(r'(?<![\w$.])(?P<root>' + IDENT + r')(?P<rest>(?:\??\.' + IDENT + r')+)')
+SEGMENT = re.compile(r'\??\.(' + IDENT + r')')
+
+class RelationType(NamedTuple):
+    """Tipo inferido de una expresión: modelo y si es una lista."""
+    model: str
+    is_list: bool
+
+class Bindings(NamedTuple):
+    """Resultado de la inferencia para un archivo."""
+    types: Dict[str, RelationType]
+    ambiguous: Set[str]
+
+_SCHEMA: Optional[PrismaSchema] = None
+
+def _default_schema() -> PrismaSchema:
+    """Grafo del schema, resuelto una vez por proceso (load_schema hace stat en cada llamada)."""
+    global _SCHEMA
+    if _SCHEMA is None:
+        _SCHEMA = load_schema()
+    return _SCHEMA
+
+def _field_type(schema: PrismaSchema, model: str, name: str) -> Optional[RelationType]:
+    f = schema.field(model, name)
+    if f is None or not f.is_relation:
+        return None
+    return RelationType(f.type, f.is_list)
+
+def walk_chain(root: str, segments: List[Tuple[str, int]], types: Dict[str, RelationType],
+               schema: PrismaSchema, by_model: Dict[str, Dict[str, str]]
+               ) -> Tuple[Optional[RelationType], List[Tuple[int, str, str]]]:
+    """
+    Recorre root.seg1.seg2... siguiendo el schema.
+
+    Devuelve el tipo final (None si se pierde el rastro) y las correcciones
+    (posición, incorrecto, correcto) para segmentos que no existen en el
+    modelo del receptor pero sí tienen una relación equivalente en él.
+    """
+    current = types.get(root)
+    edits = []
+    for name, offset in segments:
+        if current is None or current.is_list:
+            return None, edits
+
+        f = schema.field(current.model, name)
+        if f is not None:
+            current = RelationType(f.type, f.is_list) if f.is_relation else None
+            continue
+
+        correct = by_model.get(current.model, {}).get(name)
+        if correct is None:
+            return None, edits
+        edits.append((offset, name, correct))
+        current = _field_type(schema, current.model, correct)
+    return current, edits
+
+def _segments(rest: str, start: int) -> List[Tuple[str, int]]:
+    return [(m.group(1), start + m.start(1)) for m in SEGMENT.finditer(rest)]
+
+def _resolve(chain: str, types: Dict[str, RelationType], schema: PrismaSchema,
+             by_model: Dict[str, Dict[str, str]]) -> Optional[RelationType]:
+    root, _, rest = chain.partition('.')
+    root = root.rstrip('?')
+    rest = '.' + rest if rest else ''
+    result, _ = walk_chain(root, _segments(rest, 0), types, schema, by_model)
+    return result
+
+def _param_names(params: str, start: int) -> List[Tuple[str, int]]:
+    # Se ignoran los destructurings ({ a, b }) y los tipos de cada parámetro
+    depth = 0
+    names = []
+    for m in PARAM_NAME.finditer(params):
+        prefix = params[:m.start('name')]
+        depth = prefix.count('{') + prefix.count('[') - prefix.count('}') - prefix.count(']')
+        if depth == 0 and not prefix.rstrip().endswith(':'):
+            names.append((m.group('name'), start + m.start('name')))
+    return names
+
+def _declarations(content: str) -> List[Tuple[str, int]]:
+    """Todas las declaraciones de nombres del archivo (nombre, posición)."""
+    found = [(m.group('name'), m.start('name')) for m in DECLARATION.finditer(content)]
+    for m in DESTRUCTURING.finditer(content):
+        found.extend(_param_names(m.group('names'), m.start('names')))
+    for m in ARROW_PARAMS.finditer(content):
+        if m.group('bare'):
+            found.append((m.group('bare'), m.start('bare')))
+        else:
+            found.extend(_param_names(m.group('params'), m.start('params')))
+    for m in FUNCTION_PARAMS.finditer(content):
+        found.extend(_param_names(m.group('params'), m.start('params')))
+    return found
+
+def infer_bindings(content: str, schema: Optional[PrismaSchema] = None,
+                   by_model: Optional[Dict[str, Dict[str, str]]] = None) -> Bindings:
+    """Infiere el modelo Prisma de cada variable del archivo que se pueda tipar."""
+    schema = schema or _default_schema()
+    by_model = by_model if by_model is not None else load_relation_maps()['by_model']
+
+    typed: Dict[int, Tuple[str, RelationType]] = {}
+
+    for m in QUERY_BINDING.finditer(content):
+        model = schema.model_for_delegate(m.group('delegate'))
+        method = m.group('method')
+        if model and (method in SINGLE_METHODS or method in LIST_METHODS):
+            typed[m.start('name')] = (m.group('name'), RelationType(model, method in LIST_METHODS))
+
+    prisma_imports = set()
+    for m in PRISMA_IMPORT.finditer(content):
+        prisma_imports.update(name.strip().split(' as ')[-1].strip() for name in m.group('names').split(','))
+    for m in ANNOTATED_BINDING.finditer(content):
+        type_name = m.group('type')
+        if type_name in prisma_imports and schema.model(type_name):
+            typed.setdefault(m.start('name'), (m.group('name'), RelationType(type_name, bool(m.group('list')))))
+
+    # Alias y callbacks dependen de otros vínculos: iterar hasta punto fijo
+    for _ in range(5):
+        types = _collapse(typed, set())
+        before = len(typed)
+        for m in ALIAS_BINDING.finditer(content):
+            resolved = _resolve(m.group('chain'), types, schema, by_model)
+            if resolved:
+                typed.setdefault(m.start('name'), (m.group('name'), resolved))
+        for pattern in (CALLBACK_BINDING, FOR_OF_BINDING):
+            for m in pattern.finditer(content):
+                resolved = _resolve(m.group('chain'), types, schema, by_model)
+                if resolved and resolved.is_list:
+                    group = 'name' if pattern is FOR_OF_BINDING else ('param' if m.group('param') else 'bare')
+                    typed.setdefault(m.start(group), (m.group(group), RelationType(resolved.model, False)))
+        if len(typed) == before:
+            break
+
+    untyped = {name for name, position in _declarations(content) if position not in typed}
+    types = _collapse(typed, untyped)
+    ambiguous = {name for _, (name, _) in typed.items()} - set(types)
+    return Bindings(types, ambiguous)
+
+def _collapse(typed: Dict[int, Tuple[str, RelationType]], untyped: Set[str]) -> Dict[str, RelationType]:
+    """Un tipo por nombre; los nombres con tipos en conflicto o sin tipar se descartan."""
+    candidates: Dict[str, Set[RelationType]] = {}
+    for name, relation_type in typed.values():
+        candidates.setdefault(name, set()).add(relation_type)
+    return {
+        name: next(iter(types))
+        for name, types in candidates.items()
+        if len(types) == 1 and name not in untyped
+    }
+
+# Claves de los argumentos de Prisma que no cambian de modelo al anidarse
+QUERY_KEYS = {
+    'include', 'select', 'where', 'data', '_count', 'orderBy', 'cursor',
+    'some', 'every', 'none', 'is', 'isNot', 'AND', 'OR', 'NOT',
+    'create', 'createMany', 'connect', 'connectOrCreate', 'disconnect', 'set',
+    'update', 'updateMany', 'upsert', 'delete', 'deleteMany',
+}
+
+def region_model(region: Region, schema: Optional[PrismaSchema] = None) -> Optional[str]:
+    """
+    Modelo al que pertenecen las claves de una región de argumentos Prisma.
+
+    prisma.bookingGroup.findUnique({ include: { Booking: { include: {...} } } })
+    → la región include interior es de Booking. None si no se puede saber
+    (llamada que no es prisma/tx, o una clave intermedia desconocida).
+    """
+    if not region.call:
+        return None
+    parts = region.call.split('.')
+    if len(parts) != 3 or parts[0] not in PRISMA_CLIENTS:
+        return None
+
+    schema = schema or _default_schema()
+    model = schema.model_for_delegate(parts[1])
+    for key in region.path + ((region.key,) if region.key else ()):
+        if model is None:
+            return None
+        if key in QUERY_KEYS:
+            continue
+        f = schema.field(model, key)
+        model = f.type if f is not None and f.is_relation else None
+    return model
+
+def rewrite_relation_access(content: str, bindings: Optional[Bindings] = None,
+                            schema: Optional[PrismaSchema] = None,
+                            by_model: Optional[Dict[str, Dict[str, str]]] = None) -> Tuple[str, int]:
+    """
+    Corrige receptor.relacion solo si el modelo del receptor tiene esa relación
+    con otro nombre en el schema (booking.court → booking.Court).
+
+    Los accesos dentro de strings, comentarios o regex no se tocan (son texto,
+    no código); los huecos ${...} de un template sí son código y se corrigen.
+    """
+    if bindings is not None and not bindings.types:
+        return content, 0
+    schema = schema or _default_schema()
+    by_model = by_model if by_model is not None else load_relation_maps()['by_model']
+    bindings = bindings or infer_bindings(content, schema, by_model)
+
+    index = scan(content)
+    edits = []
+    for m in ACCESS_CHAIN.finditer(content):
+        if m.group('root') not in bindings.types or not index.is_code(m.start('root')):
+            continue
+        _, chain_edits = walk_chain(m.group('root'), _segments(m.group('rest'), m.start('rest')),
+                                    bindings.types, schema, by_model)
+        edits.extend(chain_edits)
+
+    for offset, incorrect, correct in sorted(edits, reverse=True):
+        content = content[:offset] + correct + content[offset + len(incorrect):]
+    return content, len(edits)
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python scripts/prisma_types.py <archivo.ts> [...]")
+        sys.exit(1)
+
+    for file_arg in sys.argv[1:]:
+        content = Path(file_arg).read_text(encoding='utf-8')
+        bindings = infer_bindings(content)
+        print(f"\n📄 {file_arg}")
+        for name, relation_type in sorted(bindings.types.items()):
+            suffix = '[]' if relation_type.is_list else ''
+            print(f"   {name:25} : {relation_type.model}{suffix}")
+        if bindings.ambiguous:
+            print(f"   ⚠️  Ambiguos (no se reescriben): {', '.join(sorted(bindings.ambiguous))}")
+
+        fixed, changes = rewrite_relation_access(content, bindings)
+        if changes:
+            print(f"   ✏️  {changes} accesos a relaciones corregidos:")
+            for number, (old, new) in enumerate(zip(content.split('\n'), fixed.split('\n')), 1):
+                if old != new:
+                    print(f"     {number:>5}: {new.strip()[:100]}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,682 @@
+#!/usr/bin/env python3
+"""
+Auditoría estática de coste de los regex de las reglas (backtracking).
+
+Recorre los patrones de las reglas registradas en codemod_pipeline.py
+(objetos Pattern del módulo, como COMPILED_PATTERNS, y los literales de
+cada llamada re.compile/sub/subn/search/... del código fuente) y analiza
+su árbol (el parser de `re`) buscando formas con coste super-lineal:
+
+- nested_quantifier (exponencial): cuantificador ilimitado dentro de otro
+  cuyas iteraciones pueden repartirse el mismo texto, ej. (\\w+\\s?)*,
+- overlapping_branches (exponencial): alternativas de un grupo repetido
+  que aceptan el mismo texto, ej. (\\\\.|[^"])*,
+- adjacent_quantifiers (polinómica): dos cuantificadores ilimitados
+  seguidos que comparten caracteres, ej. \\s*[^}]*\\s*:,
+- rescan (polinómica): un cuantificador ilimitado que puede tragarse el
+  propio inicio del patrón, así que cada posible inicio del search vuelve
+  a recorrer el resto del archivo, ej. `,?\\s*updatedAt` sobre una racha
+  de espacios o `include\\s*:\\s*\\{[^}]*\\}` sobre un archivo minificado.
+  Se marca si el cuantificador cruza líneas (el peor caso en archivos
+  generados).
+
+Los nombres que llegan por variable (re.escape(incorrect), f-strings) se
+sustituyen por un identificador de ejemplo y el patrón se marca dinámico.
+
+Con --measure cada hallazgo se confirma empíricamente: se construye una
+entrada de ataque (prefijo + bombeo × n + sufijo) y se mide el tiempo al
+duplicar n, con un presupuesto por patrón (codemod_parallel.time_budget).
+El guard en tiempo de ejecución (presupuesto por archivo y cuarentena)
+está en codemod_parallel.py.
+
+Uso:
+    python scripts/regex_audit.py                        # reglas del pipeline
+    python scripts/regex_audit.py scripts/fix_relation_names.py   # + otros scripts (solo AST)
+    python scripts/regex_audit.py --all                  # + todos los fix_*.py / remove_*.py
+    python scripts/regex_audit.py --measure              # confirma con entradas de ataque
+    python scripts/regex_audit.py --fail-on exponential  # exit 1 si hay hallazgos de esa gravedad
+    python scripts/regex_audit.py --json | --output audit.json
+"""
+
+import ast
+import importlib
+import json
+import math
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+from codemod_cache import PROJECT_ROOT
+from codemod_parallel import FileBudgetExceeded, time_budget
+
+REPORT_VERSION = 1
+PLACEHOLDER = 'campo'
+
+C = sre_constants
+MAXREPEAT = C.MAXREPEAT
+BACKTRACKING_REPEATS = {C.MAX_REPEAT, C.MIN_REPEAT}
+REPEATS = BACKTRACKING_REPEATS | {getattr(C, 'POSSESSIVE_REPEAT', C.MAX_REPEAT)}
+ATOMIC_GROUP = getattr(C, 'ATOMIC_GROUP', None)
+
+# Alfabeto representativo: ASCII imprimible, espacios y un no-ASCII
+SPACE = frozenset(' \t\n\r\x0b\x0c')
+ALPHABET = frozenset(chr(code) for code in range(32, 127)) | SPACE | frozenset('é')
+DIGIT = frozenset('0123456789')
+WORD = frozenset(ch for ch in ALPHABET if ch.isalnum() or ch == '_')
+CATEGORIES = {
+    C.CATEGORY_DIGIT: DIGIT, C.CATEGORY_NOT_DIGIT: ALPHABET - DIGIT,
+    C.CATEGORY_SPACE: SPACE, C.CATEGORY_NOT_SPACE: ALPHABET - SPACE,
+    C.CATEGORY_WORD: WORD, C.CATEGORY_NOT_WORD: ALPHABET - WORD,
+}
+# Orden de preferencia al elegir un carácter de bombeo: separadores primero
+# (no rompen los \b del prefijo), luego letras
+PUMP_PREFERENCE = ' ,;.#!-=' + 'aAx0_' + ''.join(sorted(ALPHABET))
+
+SEVERITY = {
+    'nested_quantifier': 'exponential',
+    'overlapping_branches': 'exponential',
+    'adjacent_quantifiers': 'polynomial',
+    'rescan': 'polynomial',
+}
+SEVERITY_ORDER = {'polynomial': 1, 'exponential': 2}
+KIND_LABELS = {
+    'nested_quantifier': 'cuantificador anidado',
+    'overlapping_branches': 'alternativas solapadas en repetición',
+    'adjacent_quantifiers': 'cuantificadores adyacentes solapados',
+    'rescan': 'reescaneo desde cada inicio',
+}
+
+Node = Tuple[object, object]
+Attack = Tuple[str, str, str]   # (prefijo, bombeo, sufijo)
+
+class Finding(NamedTuple):
+    kind: str
+    fragment: str
+    crosses_lines: bool
+    attack: Optional[Attack]
+
+class PatternSource(NamedTuple):
+    """Un patrón y dónde aparece (regla del registro y archivo:línea o módulo.NOMBRE)."""
+    pattern: str
+    flags: int
+    rule: str
+    where: str
+    dynamic: bool
+
+# -- conjuntos de caracteres y propiedades de los nodos -----------------------
+
+def _with_case(chars: Set[str], flags: int) -> Set[str]:
+    if flags & re.IGNORECASE:
+        return chars | {ch.swapcase() for ch in chars}
+    return chars
+
+def char_set(op, av, flags: int) -> Optional[FrozenSet[str]]:
+    """Caracteres que acepta un nodo de exactamente un carácter (None si no lo es)."""
+    if op is C.LITERAL:
+        return frozenset(_with_case({chr(av)}, flags))
+    if op is C.NOT_LITERAL:
+        return ALPHABET - _with_case({chr(av)}, flags)
+    if op is C.ANY:
+        return ALPHABET if flags & re.DOTALL else ALPHABET - {'\n'}
+    if op is C.IN:
+        negate, chars = False, set()
+        for item_op, item_av in av:
+            if item_op is C.NEGATE:
+                negate = True
+            elif item_op is C.LITERAL:
+                chars.add(chr(item_av))
+            elif item_op is C.RANGE:
+                low, high = item_av
+                chars.update(ch for ch in ALPHABET if low <= ord(ch) <= high)
+            elif item_op is C.CATEGORY:
+                chars.update(CATEGORIES.get(item_av, ALPHABET))
+        chars = _with_case(chars, flags)
+        return ALPHABET - chars if negate else frozenset(chars)
+    return None
+
+def children(op, av) -> List[list]:
+    """Subsecuencias de un nodo compuesto."""
+    if op in REPEATS:
+        return [list(av[2])]
+    if op is C.SUBPATTERN:
+        return [list(av[3])]
+    if op is C.BRANCH:
+        return [list(alternative) for alternative in av[1]]
+    if op is ATOMIC_GROUP:
+        return [list(av)]
+    if op in (C.ASSERT, C.ASSERT_NOT):
+        return [list(av[1])]
+    return []
+
+def all_chars(items: list, flags: int) -> FrozenSet[str]:
+    """Todo carácter que puede consumir la secuencia (las aserciones no consumen)."""
+    chars: Set[str] = set()
+    for op, av in items:
+        single = char_set(op, av, flags)
+        if single is not None:
+            chars |= single
+        elif op is C.GROUPREF:
+            chars |= ALPHABET
+        elif op not in (C.ASSERT, C.ASSERT_NOT):
+            for child in children(op, av):
+                chars |= all_chars(child, flags)
+    return frozenset(chars)
+
+def nullable(op, av) -> bool:
+    """True si el nodo puede no consumir nada."""
+    if char_set(op, av, 0) is not None:
+        return False
+    if op in REPEATS:
+        return av[0] == 0 or all(nullable(*node) for node in av[2])
+    if op is C.BRANCH:
+        return any(all(nullable(*node) for node in alternative) for alternative in av[1])
+    if op in (C.SUBPATTERN, ATOMIC_GROUP):
+        return all(nullable(*node) for node in children(op, av)[0])
+    return True
+
+def first(items: list, flags: int) -> Tuple[FrozenSet[str], bool]:
+    """
+    (caracteres con que puede empezar la secuencia, si acepta siempre el
+    texto vacío). Las aserciones ($, \\b, lookarounds) no consumen pero
+    pueden fallar, así que cortan como un carácter obligatorio.
+    """
+    chars: Set[str] = set()
+    for op, av in items:
+        single = char_set(op, av, flags)
+        if single is not None:
+            return frozenset(chars | single), False
+        if op in (C.ASSERT, C.ASSERT_NOT, C.AT):
+            return frozenset(chars), False
+        if op is C.GROUPREF:
+            chars |= ALPHABET
+        for child in children(op, av):
+            chars |= first(child, flags)[0]
+        if not nullable(op, av):
+            return frozenset(chars), False
+    return frozenset(chars), True
+
+def flatten(items) -> List[Node]:
+    """La secuencia con los grupos (capturantes o no) en línea."""
+    flat: List[Node] = []
+    for op, av in items:
+        if op is C.SUBPATTERN:
+            flat.extend(flatten(av[3]))
+        else:
+            flat.append((op, av))
+    return flat
+
+def pick(chars: FrozenSet[str]) -> Optional[str]:
+    return next((ch for ch in PUMP_PREFERENCE if ch in chars), None)
+
+def sample(items, flags: int) -> str:
+    """Un texto mínimo que acepta la secuencia (primera alternativa, mínimas repeticiones)."""
+    text = []
+    for op, av in items:
+        single = char_set(op, av, flags)
+        if op is C.LITERAL:
+            text.append(chr(av))
+        elif single is not None:
+            text.append(pick(single) or '')
+        elif op in REPEATS:
+            text.append(sample(av[2], flags) * av[0])
+        elif op in (C.SUBPATTERN, C.BRANCH, ATOMIC_GROUP):
+            text.append(sample(children(op, av)[0], flags))
+    return ''.join(text)
+
+def unbounded(op, av) -> bool:
+    return op in BACKTRACKING_REPEATS and av[1] == MAXREPEAT
+
+# -- representación legible de un nodo ----------------------------------------
+
+CATEGORY_TEXT = {
+    C.CATEGORY_DIGIT: r'\d', C.CATEGORY_NOT_DIGIT: r'\D', C.CATEGORY_SPACE: r'\s',
+    C.CATEGORY_NOT_SPACE: r'\S', C.CATEGORY_WORD: r'\w', C.CATEGORY_NOT_WORD: r'\W',
+}
+CONTROL_TEXT = {'\n': r'\n', '\t': r'\t', '\r': r'\r', '\x0b': r'\v', '\x0c': r'\f', ' ': ' '}
+AT_TEXT = {C.AT_BEGINNING: '^', C.AT_END: '$', C.AT_BOUNDARY: r'\b', C.AT_NON_BOUNDARY: r'\B',
+           C.AT_BEGINNING_STRING: r'\A', C.AT_END_STRING: r'\Z'}
+
+def _escape(ch: str) -> str:
+    return CONTROL_TEXT.get(ch) or re.escape(ch)
+
+def render(items) -> str:
+    """Regex (aproximado) de una secuencia del árbol, para los reportes."""
+    out = []
+    for op, av in items:
+        if op is C.LITERAL:
+            out.append(_escape(chr(av)))
+        elif op is C.NOT_LITERAL:
+            out.append(f"[^{_escape(chr(av))}]")
+        elif op is C.ANY:
+            out.append('.')
+        elif op is C.IN:
+            parts = []
+            for item_op, item_av in av:
+                if item_op is C.NEGATE:
+                    parts.append('^')
+                elif item_op is C.LITERAL:
+                    parts.append(_escape(chr(item_av)))
+                elif item_op is C.RANGE:
+                    parts.append(f"{_escape(chr(item_av[0]))}-{_escape(chr(item_av[1]))}")
+                elif item_op is C.CATEGORY:
+                    parts.append(CATEGORY_TEXT.get(item_av, '?'))
+            text = ''.join(parts)
+            out.append(text if len(parts) == 1 and item_op is C.CATEGORY else f"[{text}]")
+        elif op in REPEATS:
+            body = render(av[2])
+            if len(av[2]) > 1:
+                body = f"(?:{body})"
+            low, high = av[0], av[1]
+            quantifier = {(0, MAXREPEAT): '*', (1, MAXREPEAT): '+', (0, 1): '?'}.get(
+                (low, high), f"{{{low},{'' if high == MAXREPEAT else high}}}")
+            suffix = '?' if op is C.MIN_REPEAT else '+' if op not in BACKTRACKING_REPEATS else ''
+            out.append(body + quantifier + suffix)
+        elif op is C.SUBPATTERN:
+            out.append(f"({render(av[3])})")
+        elif op is C.BRANCH:
+            out.append('(?:' + '|'.join(render(alternative) for alternative in av[1]) + ')')
+        elif op is C.AT:
+            out.append(AT_TEXT.get(av, ''))
+        elif op in (C.ASSERT, C.ASSERT_NOT):
+            out.append(f"(?{'=' if op is C.ASSERT else '!'}{render(av[1])})")
+        elif op is ATOMIC_GROUP:
+            out.append(f"(?>{render(av)})")
+        elif op is C.GROUPREF:
+            out.append(f"\\{av}")
+    return ''.join(out)
+
+# -- análisis -----------------------------------------------------------------
+
+def _nested(node: Node, flags: int, prefix: str, follow: Tuple[FrozenSet[str], bool],
+            findings: List[Finding]):
+    """Repetición ilimitada cuyas iteraciones se pueden repartir el mismo texto."""
+    if follow[1]:
+        return
+    body = flatten(node[1][2])
+    body_chars = all_chars(body, flags)
+    breaker = pick(ALPHABET - body_chars - follow[0]) or ''
+
+    for j, (op, av) in enumerate(body):
+        if not unbounded(op, av):
+            continue
+        shared = all_chars(av[2], flags)
+        for other_op, other_av in body[:j] + body[j + 1:]:
+            if nullable(other_op, other_av):
+                continue
+            single = char_set(other_op, other_av, flags)
+            shared = shared & single if single is not None else frozenset()
+            if not shared:
+                break
+        pump = pick(shared - follow[0])
+        if pump:
+            findings.append(Finding('nested_quantifier', render([node]), '\n' in shared,
+                                    (prefix, pump, breaker)))
+            return
+
+    # (x|y)* donde una alternativa de un carácter acepta lo que consume otra
+    alternatives = [flatten(alternative) for op, av in body if op is C.BRANCH for alternative in av[1]]
+    for k, covering in enumerate(alternatives):
+        single = char_set(*covering[0], flags) if len(covering) == 1 else None
+        if single is None:
+            continue
+        for m, covered in enumerate(alternatives):
+            text = sample(covered, flags)
+            if m != k and text and set(text) <= single and not set(text) & follow[0]:
+                findings.append(Finding('overlapping_branches', render([node]), '\n' in single,
+                                        (prefix, text, breaker)))
+                return
+
+def _walk(items, flags: int, prefix: str, follow: Tuple[FrozenSet[str], bool], top: bool,
+          findings: List[Finding]):
+    seq = flatten(items)
+    # Cuantificadores ilimitados "abiertos": (índice, caracteres que aún pueden compartir)
+    open_repeats: List[Tuple[int, FrozenSet[str]]] = []
+
+    for i, (op, av) in enumerate(seq):
+        rest_first, rest_nullable = first(seq[i + 1:], flags)
+        cont = (rest_first | follow[0], follow[1]) if rest_nullable else (rest_first, False)
+        here = prefix + sample(seq[:i], flags)
+
+        if unbounded(op, av):
+            _nested((op, av), flags, here, cont, findings)
+            # Adyacentes y reescaneo: solo repeticiones de un carácter ([^}]*, \s*, .*),
+            # donde el conjunto de caracteres describe exactamente lo que consumen
+            body = flatten(av[2])
+            body_chars = char_set(*body[0], flags) if len(body) == 1 else None
+            if body_chars is None:
+                open_repeats = []
+            else:
+                for start, shared in open_repeats:
+                    common = shared & body_chars
+                    pump = pick(common - cont[0]) if not cont[1] else None
+                    if pump:
+                        breaker = pick(ALPHABET - common - cont[0]) or ''
+                        findings.append(Finding('adjacent_quantifiers', render(seq[start:i + 1]), '\n' in common,
+                                                (prefix + sample(seq[:start], flags), pump, breaker)))
+
+                # Cada inicio del search que el cuantificador puede tragarse se reescanea
+                usable = body_chars - cont[0]
+                anchored = any(node_op is C.AT and node_av in (C.AT_BEGINNING, C.AT_BEGINNING_STRING)
+                               for node_op, node_av in seq[:i])
+                if top and not anchored and not cont[1] and set(here) <= usable:
+                    pump = pick(usable - WORD) or pick(usable)
+                    if pump:
+                        findings.append(Finding('rescan', render(seq[:i + 1]), '\n' in body_chars, ('', here + pump, '')))
+                open_repeats.append((i, body_chars))
+        else:
+            single = char_set(op, av, flags)
+            if single is not None:
+                open_repeats = [(start, shared & single) for start, shared in open_repeats if shared & single]
+            elif not nullable(op, av):
+                open_repeats = []
+
+        for child in children(op, av):
+            if op in REPEATS:
+                child_follow = (first(child, flags)[0] | cont[0], cont[1]) if av[1] > 1 else cont
+                _walk(child, flags, here, child_follow, False, findings)
+            elif op is C.BRANCH:
+                _walk(child, flags, here, cont, top, findings)
+            else:
+                _walk(child, flags, here, cont, False, findings)
+
+def analyze(pattern: str, flags: int = 0) -> List[Finding]:
+    """Hallazgos de coste super-lineal de un patrón (sin duplicados)."""
+    parsed = sre_parse.parse(pattern, flags)
+    findings: List[Finding] = []
+    _walk(list(parsed), parsed.state.flags, '', (frozenset(), True), True, findings)
+    unique: Dict[Tuple[str, str], Finding] = {}
+    for finding in findings:
+        unique.setdefault((finding.kind, finding.fragment), finding)
+    return sorted(unique.values(), key=lambda f: -SEVERITY_ORDER[SEVERITY[f.kind]])
+
+# -- medición empírica --------------------------------------------------------
+
+MEASURE_BUDGET = 1.0      # segundos por patrón
+MEASURE_STOP = 0.05       # deja de duplicar n al pasar de aquí
+MAX_PUMPS = 1 << 15
+
+def measure(compiled, attack: Attack, budget: float = MEASURE_BUDGET) -> dict:
+    """
+    Tiempo de recorrer (finditer, como sub/subn) la entrada de ataque al
+    duplicar n. growth ≈ exponente k de O(n^k) entre las dos últimas medidas.
+    """
+    prefix, pump, suffix = attack
+    timings: List[Tuple[int, float]] = []
+    deadline = time.perf_counter() + budget
+    n, timed_out = 8, False
+    while n <= MAX_PUMPS:
+        text = prefix + pump * n + suffix
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            timed_out = True
+            break
+        start = time.perf_counter()
+        try:
+            with time_budget(remaining):
+                for _ in compiled.finditer(text):
+                    pass
+        except FileBudgetExceeded:
+            timed_out = True
+            break
+        timings.append((len(text), time.perf_counter() - start))
+        if timings[-1][1] > MEASURE_STOP:
+            break
+        n *= 2
+
+    growth = None
+    if len(timings) >= 2 and timings[-2][1] > 1e-5:
+        (size1, time1), (size2, time2) = timings[-2:]
+        growth = round(math.log(time2 / time1) / math.log(size2 / size1), 2)
+    size, seconds = timings[-1] if timings else (0, 0.0)
+    return {'growth': growth, 'timed_out': timed_out, 'size': size,
+            'ms': round(seconds * 1000, 2), 'next_size': len(prefix + pump * n + suffix) if timed_out else None}
+
+def growth_label(result: dict) -> str:
+    if result['timed_out']:
+        return f"sin terminar con {result['next_size']:,} caracteres (exponencial o peor)"
+    growth = result['growth']
+    if growth is None:
+        return f"{result['ms']}ms con {result['size']:,} caracteres"
+    order = 'lineal' if growth < 1.4 else 'cuadrática' if growth < 2.5 else 'cúbica' if growth < 3.5 else 'explosiva'
+    return f"≈O(n^{growth:g}) ({order}), {result['ms']}ms con {result['size']:,} caracteres"
+
+# -- recolección de patrones --------------------------------------------------
+
+RE_FUNCTIONS = {'compile': 1, 'search': 2, 'match': 2, 'fullmatch': 2, 'findall': 2,
+                'finditer': 2, 'split': 3, 'sub': 4, 'subn': 4}
+
+def _flags_value(node: ast.AST) -> int:
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == 're':
+        return int(getattr(re, node.attr, 0))
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        return _flags_value(node.left) | _flags_value(node.right)
+    return 0
+
+class _SourcePatterns(ast.NodeVisitor):
+    """Patrones literales (o casi) de las llamadas re.* de un archivo."""
+
+    def __init__(self):
+        self.assignments: Dict[str, List[Tuple[int, ast.AST]]] = {}
+        self.calls: List[ast.Call] = []
+
+    def visit_Assign(self, node: ast.Assign):
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                self.assignments.setdefault(target.id, []).append((node.lineno, node.value))
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call):
+        func = node.func
+        if (isinstance(func, ast.Attribute) and func.attr in RE_FUNCTIONS
+                and isinstance(func.value, ast.Name) and func.value.id == 're' and node.args):
+            self.calls.append(node)
+        self.generic_visit(node)
+
+    def resolve(self, node: ast.AST, line: int, depth: int = 0) -> Optional[Tuple[str, bool]]:
+        """(texto del patrón, dinámico) o None si no hay nada literal."""
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value, False
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            left, right = self.resolve(node.left, line, depth), self.resolve(node.right, line, depth)
+            if left is None and right is None:
+                return None
+            left, right = left or (PLACEHOLDER, True), right or (PLACEHOLDER, True)
+            return left[0] + right[0], left[1] or right[1]
+        if isinstance(node, ast.JoinedStr):
+            parts = [self.resolve(value, line, depth) if isinstance(value, ast.Constant) else (PLACEHOLDER, True)
+                     for value in node.values]
+            return ''.join(text for text, _ in parts), any(dynamic for _, dynamic in parts)
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'escape'
+                and node.args and isinstance(node.args[0], ast.Constant)):
+            return re.escape(str(node.args[0].value)), False
+        if isinstance(node, ast.Name) and depth < 5:
+            earlier = [value for lineno, value in self.assignments.get(node.id, []) if lineno <= line]
+            if earlier:
+                return self.resolve(earlier[-1], line, depth + 1)
+        return None
+
+def source_patterns(path: Path, rule: str) -> Iterator[PatternSource]:
+    try:
+        tree = ast.parse(path.read_text(encoding='utf-8'))
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return
+    visitor = _SourcePatterns()
+    visitor.visit(tree)
+    try:
+        rel = path.resolve().relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        rel = str(path)
+    for call in visitor.calls:
+        resolved = visitor.resolve(call.args[0], call.lineno)
+        if resolved is None:
+            continue
+        position = RE_FUNCTIONS[call.func.attr]
+        flags_node = next((keyword.value for keyword in call.keywords if keyword.arg == 'flags'),
+                          call.args[position] if len(call.args) > position else None)
+        yield PatternSource(resolved[0], _flags_value(flags_node) if flags_node is not None else 0,
+                            rule, f"{rel}:{call.lineno}", resolved[1])
+
+def _compiled(value) -> Iterator[Tuple[str, re.Pattern]]:
+    """Patrones dentro de un valor de módulo (Pattern, listas/tuplas/dicts de ellos)."""
+    if isinstance(value, re.Pattern):
+        yield '', value
+    elif isinstance(value, (list, tuple)):
+        for i, item in enumerate(value):
+            for suffix, pattern in _compiled(item) if isinstance(item, (re.Pattern, tuple)) else ():
+                yield f"[{i}]{suffix}", pattern
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, re.Pattern):
+                yield f"[{key!r}]", item
+
+def registry_patterns() -> Iterator[PatternSource]:
+    """Patrones de cada regla registrada en el pipeline: objetos del módulo y llamadas re.*."""
+    from codemod_pipeline import RULES
+
+    seen_modules: Set[str] = set()
+    for spec in RULES.values():
+        if spec.module in seen_modules:
+            continue
+        seen_modules.add(spec.module)
+        module = importlib.import_module(spec.module)
+        for name, value in vars(module).items():
+            if name.startswith('__'):
+                continue
+            for suffix, pattern in _compiled(value):
+                yield PatternSource(pattern.pattern, pattern.flags, spec.name, f"{spec.module}.{name}{suffix}", False)
+        yield from source_patterns(Path(module.__file__), spec.name)
+
+def extra_scripts() -> List[Path]:
+    """--all: los fixers sueltos que no están en el registro (solo su código fuente)."""
+    scripts = PROJECT_ROOT / 'scripts'
+    return sorted({*PROJECT_ROOT.glob('fix_*.py'), *PROJECT_ROOT.glob('remove_*.py'), *scripts.glob('fix_*.py')})
+
+def collect(paths: List[Path], include_all: bool) -> List[PatternSource]:
+    sources = list(registry_patterns())
+    for path in paths + (extra_scripts() if include_all else []):
+        sources.extend(source_patterns(path, path.stem))
+
+    # Un patrón por (texto, flags): el primer lugar donde aparece
+    unique: Dict[Tuple[str, int], PatternSource] = {}
+    for source in sources:
+        flags = source.flags & ~re.UNICODE
+        unique.setdefault((source.pattern, flags), source._replace(flags=flags))
+    return list(unique.values())
+
+# -- reporte ------------------------------------------------------------------
+
+def build_report(sources: List[PatternSource], measure_attacks: bool) -> dict:
+    entries = []
+    invalid = []
+    for source in sources:
+        try:
+            compiled = re.compile(source.pattern, source.flags)
+            findings = analyze(source.pattern, source.flags)
+        except (re.error, RecursionError) as e:
+            invalid.append({'where': source.where, 'pattern': source.pattern, 'error': str(e)})
+            continue
+        if not findings:
+            continue
+        items = []
+        for finding in findings:
+            item = {'kind': finding.kind, 'severity': SEVERITY[finding.kind], 'fragment': finding.fragment,
+                    'crosses_lines': finding.crosses_lines,
+                    'attack': list(finding.attack) if finding.attack else None}
+            if measure_attacks and finding.attack:
+                item['measured'] = measure(compiled, finding.attack)
+            items.append(item)
+        entries.append({'rule': source.rule, 'where': source.where, 'pattern': source.pattern,
+                        'flags': source.flags, 'dynamic': source.dynamic, 'findings': items})
+
+    def rank(entry):
+        worst = max(SEVERITY_ORDER[item['severity']] for item in entry['findings'])
+        return (-worst, entry['rule'], entry['where'])
+
+    entries.sort(key=rank)
+    by_kind: Dict[str, int] = {kind: 0 for kind in KIND_LABELS}
+    for entry in entries:
+        for item in entry['findings']:
+            by_kind[item['kind']] += 1
+    return {
+        'version': REPORT_VERSION,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'patterns_analyzed': len(sources),
+        'summary': {
+            'patterns_flagged': len(entries),
+            'by_kind': by_kind,
+            'by_rule': {rule: sum(1 for e in entries if e['rule'] == rule)
+                        for rule in sorted({e['rule'] for e in entries})},
+        },
+        'patterns': entries,
+        'invalid': invalid,
+    }
+
+def print_report(report: dict, top: int):
+    summary = report['summary']
+    print(f"🔍 {report['patterns_analyzed']} patrones distintos analizados; "
+          f"{summary['patterns_flagged']} con coste super-lineal")
+    for kind, count in summary['by_kind'].items():
+        print(f"   {KIND_LABELS[kind]:<38} {count:>5}  ({SEVERITY[kind]})")
+    if summary['by_rule']:
+        print("\n📋 Por regla/script: " + ', '.join(f"{rule} {count}" for rule, count in summary['by_rule'].items()))
+
+    shown = report['patterns'][:top]
+    if shown:
+        print(f"\n⚠️  Patrones (los {len(shown)} más graves):\n")
+    for entry in shown:
+        dynamic = f" (dinámico: {PLACEHOLDER} = valor de variable)" if entry['dynamic'] else ''
+        print(f"  {entry['where']}  [{entry['rule']}]{dynamic}")
+        print(f"    {entry['pattern']}")
+        for item in entry['findings']:
+            lines = ', cruza líneas' if item['crosses_lines'] else ''
+            print(f"    → {KIND_LABELS[item['kind']]} ({item['severity']}{lines}): {item['fragment']}")
+            if 'measured' in item:
+                print(f"      medido: {growth_label(item['measured'])}")
+        print()
+    for entry in report['invalid']:
+        print(f"  ❌ {entry['where']}: no compila ({entry['error']})")
+
+def option_value(name: str, default: Optional[str] = None) -> Optional[str]:
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return default
+
+def main():
+    option_values = {'--output', '--top', '--fail-on'}
+    paths = [Path(a).resolve() for i, a in enumerate(sys.argv[1:], 1)
+             if not a.startswith('--') and sys.argv[i - 1] not in option_values]
+    fail_on = option_value('--fail-on')
+    if fail_on is not None and fail_on not in SEVERITY_ORDER:
+        raise SystemExit(f"❌ --fail-on acepta: {', '.join(SEVERITY_ORDER)}")
+
+    report = build_report(collect(paths, '--all' in sys.argv), '--measure' in sys.argv)
+
+    output = option_value('--output')
+    if output:
+        Path(output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    if '--json' in sys.argv:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report, int(option_value('--top', '40')))
+        if output:
+            print(f"💾 Reporte JSON: {output}")
+
+    if fail_on is not None:
+        threshold = SEVERITY_ORDER[fail_on]
+        if any(SEVERITY_ORDER[item['severity']] >= threshold
+               for entry in report['patterns'] for item in entry['findings']):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Generador de mapas de corrección de relaciones a partir de schema.prisma.
+
+Sustituye los diccionarios mantenidos a mano en los fixers
+(SINGULAR_RELATIONS, PLURAL_RELATIONS, RELATION_FIXES, CORRECTIONS,
+MODELS_WITH_AUTO_UPDATED), que ya se habían desincronizado del schema.
+
+En una sola pasada sobre el grafo de prisma_schema.py genera:
+- singular:  'club' → 'Club'       (relación con nombre capitalizado, en minúscula)
+- plural:    'bookings' → 'Booking' (relación lista, en plural y minúscula)
+- by_model:  {'Booking': {'club': 'Club', ...}} correcciones exactas por modelo
+- conflicts: claves con más de un destino posible (dentro de un mapa o entre
+             singular y plural); se elige uno y se listan aquí
+- ambiguous: claves que en algún modelo SON el nombre correcto (ej. 'club' en
+             ClubSubscription); los fixers sin contexto las aplican igual,
+             el pase con tipos (por modelo) las resuelve con precisión
+- models_with_updated_at / delegates_with_updated_at: modelos con @updatedAt
+
+El resultado se guarda versionado en .codemod-cache/relation-maps.json junto
+con el hash del schema; load_relation_maps() lo lee en milisegundos y solo
+regenera si el schema (o este generador) cambió.
+
+CLI:
+    python scripts/relation_maps.py                 # regenera y muestra resumen
+    python scripts/relation_maps.py --validate scripts/relation_fixes.json
+"""
+
+import hashlib
+import json
+import os
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Optional
+
+from prisma_schema import SCHEMA_PATH, PrismaSchema, load_schema, schema_sha1
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MAPS_PATH = PROJECT_ROOT / '.codemod-cache' / 'relation-maps.json'
+MAPS_VERSION = 1
+
+def lower_first(name: str) -> str:
+    return name[:1].lower() + name[1:]
+
+def pluralize(name: str) -> str:
+    """Plural inglés sencillo, suficiente para los nombres de modelo."""
+    if name.endswith('s') or name.endswith('x') or name.endswith('ch') or name.endswith('sh'):
+        return name + 'es'
+    if name.endswith('y') and name[-2:-1] not in 'aeiou':
+        return name[:-1] + 'ies'
+    return name + 's'
+
+def _resolve(candidates: Dict[str, Counter], conflicts: Dict[str, list]) -> Dict[str, str]:
+    """Elige el destino más frecuente por clave y registra los conflictos."""
+    resolved = {}
+    for key in sorted(candidates):
+        targets = candidates[key]
+        if len(targets) > 1:
+            conflicts[key] = sorted(targets)
+        resolved[key] = sorted(targets.items(), key=lambda item: (-item[1], item[0]))[0][0]
+    return resolved
+
+def _drop_cross_map_conflicts(singular_map: Dict[str, str], plural_map: Dict[str, str],
+                              conflicts: Dict[str, list]):
+    """
+    Claves en ambos mapas con destinos distintos (ej. 'transactions' →
+    'Transactions' en singular y → 'Transaction' en plural): gana el singular,
+    cuya clave es el nombre exacto de un campo, y no un plural deducido. Se
+    registran en conflicts; by_model mantiene la corrección precisa por modelo.
+    """
+    for key in sorted(set(singular_map) & set(plural_map)):
+        if singular_map[key] != plural_map[key]:
+            conflicts[key] = sorted(set(conflicts.get(key, [])) | {singular_map[key], plural_map[key]})
+        del plural_map[key]
+
+def generate_maps(schema: PrismaSchema) -> dict:
+    """Genera todos los mapas en una sola pasada sobre los modelos."""
+    singular = defaultdict(Counter)
+    plural = defaultdict(Counter)
+    by_model = {}
+    valid_as_is = defaultdict(list)
+
+    for model in schema.models.values():
+        model_fixes = {}
+        for field_name, f in model.relations.items():
+            if field_name[0].islower():
+                valid_as_is[field_name].append(model.name)
+                continue
+
+            keys = {lower_first(field_name)}
+            singular[lower_first(field_name)][field_name] += 1
+            if f.is_list and not field_name.endswith('s'):
+                plural_key = lower_first(pluralize(field_name))
+                plural[plural_key][field_name] += 1
+                keys.add(plural_key)
+
+            for key in keys:
+                if key not in model.fields:
+                    model_fixes[key] = field_name
+        if model_fixes:
+            by_model[model.name] = dict(sorted(model_fixes.items()))
+
+    conflicts: Dict[str, list] = {}
+    singular_map = _resolve(singular, conflicts)
+    plural_map = _resolve(plural, conflicts)
+    _drop_cross_map_conflicts(singular_map, plural_map, conflicts)
+
+    ambiguous = {
+        key: sorted(valid_as_is[key])
+        for key in sorted(set(singular_map) | set(plural_map))
+        if key in valid_as_is
+    }
+
+    return {
+        'singular': singular_map,
+        'plural': plural_map,
+        'relation_fixes': {**singular_map, **plural_map},
+        'by_model': by_model,
+        'ambiguous': ambiguous,
+        'conflicts': conflicts,
+        'relation_names': sorted({f.name for m in schema.models.values() for f in m.relations.values()}),
+        'models_with_updated_at': schema.models_with_updated_at,
+        'delegates_with_updated_at': [schema.delegate(m) for m in schema.models_with_updated_at],
+    }
+
+def generator_fingerprint() -> str:
+    return hashlib.sha1(Path(__file__).read_bytes()).hexdigest()[:16]
+
+def build_maps(schema_path: Path = SCHEMA_PATH, maps_path: Path = MAPS_PATH) -> dict:
+    """Regenera los mapas desde el schema y los persiste."""
+    maps = generate_maps(load_schema(schema_path))
+    data = {
+        'version': MAPS_VERSION,
+        'schema_sha1': schema_sha1(schema_path),
+        'generator': generator_fingerprint(),
+        **maps,
+    }
+    maps_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = maps_path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps(data, indent=1, sort_keys=True), encoding='utf-8')
+    os.replace(tmp_path, maps_path)
+    return data
+
+_LOADED: Optional[dict] = None
+
+def load_relation_maps(schema_path: Path = SCHEMA_PATH, maps_path: Path = MAPS_PATH) -> dict:
+    """
+    Devuelve los mapas generados desde el caché.
+
+    Se valida con el hash del schema (y la huella del generador); si no
+    coincide, se regeneran. El schema solo se parsea en ese caso.
+    """
+    global _LOADED
+    if _LOADED is not None:
+        return _LOADED
+
+    try:
+        data = json.loads(maps_path.read_text(encoding='utf-8'))
+        current_sha1 = hashlib.sha1(Path(schema_path).read_bytes()).hexdigest()
+        if (data.get('version') != MAPS_VERSION or data.get('schema_sha1') != current_sha1
+                or data.get('generator') != generator_fingerprint()):
+            data = None
+    except (OSError, ValueError):
+        data = None
+
+    _LOADED = data or build_maps(schema_path, maps_path)
+    return _LOADED
+
+def validate_fixes(fixes: Dict[str, str], maps: Optional[dict] = None) -> Dict[str, str]:
+    """
+    Devuelve las entradas de un mapeo externo (ej. relation_fixes.json) cuyo
+    destino NO es un nombre de relación del schema (ej. 'booking' → 'bookingId').
+    """
+    relation_names = set((maps or load_relation_maps())['relation_names'])
+    return {wrong: right for wrong, right in fixes.items() if right not in relation_names}
+
+def main():
+    if '--validate' in sys.argv:
+        fixes_path = Path(sys.argv[sys.argv.index('--validate') + 1])
+        fixes = json.loads(fixes_path.read_text())
+        fixes = fixes.get('fixes', fixes)
+        invalid = validate_fixes(fixes)
+        print(f"🔍 {len(fixes)} correcciones en {fixes_path}, {len(invalid)} inválidas según el schema")
+        for wrong, right in sorted(invalid.items()):
+            print(f"  ❌ {wrong:25} → {right}")
+        sys.exit(1 if invalid else 0)
+
+    maps = build_maps()
+    print(f"✅ Mapas generados en {MAPS_PATH.relative_to(PROJECT_ROOT)}")
+    print(f"   - singular: {len(maps['singular'])}")
+    print(f"   - plural:   {len(maps['plural'])}")
+    print(f"   - modelos con correcciones propias: {len(maps['by_model'])}")
+    print(f"   - modelos con @updatedAt: {', '.join(maps['models_with_updated_at'])}")
+    if maps['conflicts']:
+        print("\n⚠️  Claves con varios destinos posibles:")
+        for key, targets in maps['conflicts'].items():
+            print(f"   {key:20} → {maps['relation_fixes'][key]:20} (candidatos: {', '.join(targets)})")
+    if maps['ambiguous']:
+        print("\n⚠️  Claves que son válidas tal cual en algún modelo:")
+        for key, models in maps['ambiguous'].items():
+            print(f"   {key:20} → {maps['relation_fixes'][key]:20} (válida en {', '.join(models)})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Perfilado opt-in por regla y por patrón de los fixers.
+
+Cuando una pasada de relaciones es lenta o da cuentas sospechosas, los
+totales por regla del pipeline no dicen cuál de los ~180 patrones de
+COMPILED_PATTERNS (fix_relations_final.py) o de REPLACEMENTS
+(fix_classbooking_props.py) es el responsable. Con el perfilado activo se
+acumula, por (regla, patrón, archivo):
+
+- segundos dentro del patrón,
+- líneas examinadas (las que el patrón llega a recorrer),
+- matches del regex,
+- reemplazos (matches cuya sustitución cambió el texto).
+
+Desactivado cuesta una lectura de `rule_profiler.PROFILER` por archivo:
+los fixers comprueban si es None y, solo si no lo es, usan su variante
+instrumentada. Así puede quedarse cableado en las pasadas de producción.
+
+Se activa con --profile PREFIJO en codemod_pipeline.py, fix_relations_final.py
+y fix_classbooking_props.py (o con CODEMOD_PROFILE=1 en el entorno, que
+heredan los workers de --jobs). Al terminar se escriben:
+
+- PREFIJO.jsonl: una fila por (regla, patrón, archivo),
+- PREFIJO.folded: stacks colapsados regla;patrón;archivo con microsegundos,
+  para flamegraph.pl, speedscope o inferno.
+
+El patrón '*' es el total de la regla en el archivo (lo registra el
+pipeline); en el .folded su tiempo no atribuido a patrones sale como
+'(resto)'.
+
+Uso en un fixer:
+    profiler = rule_profiler.PROFILER
+    if profiler is not None:
+        return fix_content_profiled(content, profiler)
+
+    @rule_profiler.profiled_file                 # atribuye al archivo y adjunta al resultado
+    def process_file(file_path, dry_run=False): ...
+
+    prefix = rule_profiler.profile_prefix(sys.argv)
+    for file_path, result in process_files(process_file, files, jobs=...):
+        rule_profiler.collect(result)
+    rule_profiler.finish(prefix)
+
+    python scripts/rule_profiler.py perfil.jsonl [--top 20]    # resumen de un perfil guardado
+"""
+
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from codemod_cache import PROJECT_ROOT
+
+ENV_VAR = 'CODEMOD_PROFILE'
+RULE_TOTAL = '*'
+FIELDS = ('seconds', 'lines', 'matches', 'replacements')
+
+Key = Tuple[str, str, str]   # (regla, patrón, archivo)
+
+class RuleProfiler:
+    """Acumulador de (segundos, líneas, matches, reemplazos) por regla, patrón y archivo."""
+
+    def __init__(self):
+        self.stats: Dict[Key, List[float]] = defaultdict(lambda: [0.0, 0, 0, 0])
+        self.file = '-'
+
+    @contextmanager
+    def for_file(self, rel: str):
+        """Atribuye a `rel` lo que se registre dentro del bloque."""
+        previous, self.file = self.file, rel
+        try:
+            yield self
+        finally:
+            self.file = previous
+
+    def record(self, rule: str, pattern: str, seconds: float, lines: int = 0,
+               matches: int = 0, replacements: int = 0):
+        entry = self.stats[(rule, pattern, self.file)]
+        entry[0] += seconds
+        entry[1] += lines
+        entry[2] += matches
+        entry[3] += replacements
+
+    def subn(self, rule: str, label: str, pattern: Pattern, replacement: str, text: str,
+             lines: int = 1) -> Tuple[str, int]:
+        """pattern.subn instrumentado: además cuenta los matches que no cambian el texto."""
+        changed = 0
+
+        def substitute(match):
+            nonlocal changed
+            new = match.expand(replacement)
+            if new != match.group(0):
+                changed += 1
+            return new
+
+        start = time.perf_counter()
+        text, count = pattern.subn(substitute, text)
+        self.record(rule, label, time.perf_counter() - start, lines, count, changed)
+        return text, count
+
+    # -- transporte entre procesos (resultado de process_file) -------------
+
+    def drain(self) -> List[list]:
+        """Filas acumuladas hasta ahora (y las olvida): viajan en el dict de resultado."""
+        rows = [[*key, *values] for key, values in self.stats.items()]
+        self.stats.clear()
+        return rows
+
+    def merge(self, rows: Iterable[list]):
+        for rule, pattern, file, *values in rows:
+            entry = self.stats[(rule, pattern, file)]
+            for i, value in enumerate(values):
+                entry[i] += value
+
+    def attach(self, result: dict) -> dict:
+        """En el worker: adjunta lo registrado para este archivo al resultado."""
+        result['profile'] = self.drain()
+        return result
+
+    # -- exportación -------------------------------------------------------
+
+    def rows(self) -> List[dict]:
+        return [{'rule': rule, 'pattern': pattern, 'file': file,
+                 'seconds': round(values[0], 6), 'lines': values[1],
+                 'matches': values[2], 'replacements': values[3]}
+                for (rule, pattern, file), values in sorted(self.stats.items())]
+
+    def write_jsonl(self, path: Path):
+        with open(path, 'w', encoding='utf-8') as out:
+            for row in self.rows():
+                out.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def write_collapsed(self, path: Path):
+        """Stacks colapsados `regla;patrón;archivo microsegundos` (tiempo propio de cada hoja)."""
+        patterns_time: Dict[Tuple[str, str], float] = defaultdict(float)
+        for (rule, pattern, file), values in self.stats.items():
+            if pattern != RULE_TOTAL:
+                patterns_time[(rule, file)] += values[0]
+
+        def frame(text: str) -> str:
+            return text.replace(';', ':').replace('\n', ' ')
+
+        lines = []
+        for (rule, pattern, file), values in sorted(self.stats.items()):
+            seconds = values[0]
+            if pattern == RULE_TOTAL:
+                seconds -= patterns_time.get((rule, file), 0.0)
+                pattern = '(resto)'
+            micros = int(round(seconds * 1e6))
+            if micros > 0:
+                lines.append(f"{frame(rule)};{frame(pattern)};{frame(file)} {micros}")
+        Path(path).write_text('\n'.join(lines) + ('\n' if lines else ''), encoding='utf-8')
+
+    def write(self, prefix: str) -> Tuple[Path, Path]:
+        jsonl, folded = Path(prefix + '.jsonl'), Path(prefix + '.folded')
+        jsonl.parent.mkdir(parents=True, exist_ok=True)
+        self.write_jsonl(jsonl)
+        self.write_collapsed(folded)
+        return jsonl, folded
+
+def summarize(rows: List[dict]) -> Dict[Tuple[str, str], List[float]]:
+    """(regla, patrón) → [segundos, líneas, matches, reemplazos, archivos]."""
+    totals: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0.0, 0, 0, 0, 0])
+    for row in rows:
+        entry = totals[(row['rule'], row['pattern'])]
+        for i, field in enumerate(FIELDS):
+            entry[i] += row[field]
+        entry[4] += 1
+    return totals
+
+def print_summary(rows: List[dict], top: int = 20):
+    totals = summarize(rows)
+    rules = {rule: values for (rule, pattern), values in totals.items() if pattern == RULE_TOTAL}
+    if rules:
+        print("\n🔬 Perfil por regla:")
+        for rule, values in sorted(rules.items(), key=lambda item: -item[1][0]):
+            print(f"   {rule:<22} {values[0] * 1000:>9.1f}ms en {values[4]:>5} archivos")
+
+    patterns = sorted(((key, values) for key, values in totals.items() if key[1] != RULE_TOTAL),
+                      key=lambda item: -item[1][0])
+    if patterns:
+        print(f"\n🔬 Top {min(top, len(patterns))} patrones por tiempo:")
+        print(f"   {'regla':<20} {'patrón':<34} {'ms':>9} {'líneas':>9} {'matches':>8} {'reempl.':>8}")
+        for (rule, pattern), values in patterns[:top]:
+            print(f"   {rule:<20} {pattern[:34]:<34} {values[0] * 1000:>9.2f} {values[1]:>9,} "
+                  f"{values[2]:>8,} {values[3]:>8,}")
+        # Matches que no cambian nada: patrón que trabaja sin efecto (o cuentas sospechosas)
+        idle = [(key, values) for key, values in patterns if values[2] and not values[3]]
+        if idle:
+            print(f"\n⚠️  {len(idle)} patrones con matches pero sin reemplazos efectivos")
+
+# Perfilador del proceso (None = desactivado); los workers lo heredan por el entorno
+PROFILER: Optional[RuleProfiler] = RuleProfiler() if os.environ.get(ENV_VAR) else None
+
+def enable() -> RuleProfiler:
+    """Activa el perfilado en este proceso y en los workers que lance."""
+    global PROFILER
+    os.environ[ENV_VAR] = '1'
+    if PROFILER is None:
+        PROFILER = RuleProfiler()
+    return PROFILER
+
+def relative(file_path: Path) -> str:
+    try:
+        return Path(file_path).resolve().relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return str(file_path)
+
+def profiled_file(process_file: Callable[..., dict]) -> Callable[..., dict]:
+    """
+    Decorador de process_file(file_path, ...): con el perfilado activo atribuye
+    lo registrado al archivo y lo adjunta al resultado (para merge() en el padre).
+    """
+    @wraps(process_file)
+    def wrapper(file_path, *args, **kwargs):
+        profiler = PROFILER
+        if profiler is None:
+            return process_file(file_path, *args, **kwargs)
+        with profiler.for_file(relative(file_path)):
+            return profiler.attach(process_file(file_path, *args, **kwargs))
+    return wrapper
+
+def collect(result: dict):
+    """En el padre: suma lo que un worker adjuntó a su resultado."""
+    if PROFILER is not None and result.get('profile'):
+        PROFILER.merge(result['profile'])
+
+def profile_prefix(argv: List[str]) -> Optional[str]:
+    """--profile PREFIJO (o --profile=PREFIJO); activa el perfilado si está."""
+    for i, arg in enumerate(argv):
+        if arg == '--profile' and i + 1 < len(argv):
+            prefix = argv[i + 1]
+        elif arg.startswith('--profile='):
+            prefix = arg.split('=', 1)[1]
+        else:
+            continue
+        enable()
+        return prefix
+    return None
+
+def finish(prefix: Optional[str], top: int = 20):
+    """Escribe PREFIJO.jsonl y PREFIJO.folded y muestra el resumen."""
+    if prefix is None or PROFILER is None:
+        return
+    print_summary(PROFILER.rows(), top)
+    jsonl, folded = PROFILER.write(prefix)
+    print(f"\n💾 Perfil: {jsonl} (JSONL), {folded} (stacks colapsados)")
+
+def main():
+    option_values = {'--top'}
+    args = [a for i, a in enumerate(sys.argv[1:], 1)
+            if not a.startswith('--') and sys.argv[i - 1] not in option_values]
+    if not args:
+        print("Uso: python scripts/rule_profiler.py <perfil.jsonl> [--top N]")
+        sys.exit(1)
+    top = int(sys.argv[sys.argv.index('--top') + 1]) if '--top' in sys.argv else 20
+    with open(args[0], encoding='utf-8') as source:
+        rows = [json.loads(line) for line in source if line.strip()]
+    print(f"📄 {args[0]}: {len(rows):,} filas, {len({r['file'] for r in rows}):,} archivos")
+    print_summary(rows, top)
+
+if __name__ == '__main__':
+    main()
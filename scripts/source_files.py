@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Descubrimiento de archivos fuente compartido por los codemods.
+
+Los scripts hacían base_dir.glob('**/*.ts') (y otra vez para '**/*.tsx')
+recorriendo node_modules y .next enteros para después descartar las
+coincidencias con `excluded in file_path.parts`. Aquí:
+
+- se recorre con os.scandir y los directorios excluidos se podan ANTES
+  de descender (node_modules, .next, .git, ...),
+- se respetan .gitignore (también los anidados) y .vercelignore,
+- las extensiones se comprueban en la misma pasada con str.endswith,
+- opcionalmente se usa `git ls-files` (índice de git, sin recorrer disco).
+
+Uso:
+    files = find_source_files()                        # todo el proyecto
+    files = find_source_files(['app', 'lib'])          # solo esas raíces
+    files = find_source_files(use_git=True)            # vía git ls-files
+
+CLI:
+    python scripts/source_files.py [--git] [--compare-glob] [ruta ...]
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+SOURCE_EXTENSIONS = ('.ts', '.tsx')
+EXCLUDE_DIRS = frozenset({'node_modules', '.next', '.git', 'dist', 'build', '.vercel',
+                          '.codemod-cache', '__pycache__'})
+IGNORE_FILES = ('.gitignore', '.vercelignore')
+
+class IgnoreRule:
+    """Una línea de .gitignore compilada a regex."""
+
+    __slots__ = ('regex', 'negated', 'dir_only', 'anchored')
+
+    def __init__(self, pattern: str):
+        self.negated = pattern.startswith('!')
+        if self.negated:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        # Con una barra al inicio o en medio, el patrón es relativo al .gitignore
+        self.anchored = '/' in pattern
+        self.regex = re.compile(translate_pattern(pattern.lstrip('/')))
+
+    def matches(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        return bool(self.regex.match(rel_path if self.anchored else name))
+
+def translate_pattern(pattern: str) -> str:
+    """Glob de gitignore → regex ('*' no cruza '/', '**' sí)."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == len(pattern):
+            out.append('/.*')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            out.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            out.append('[^/]')
+            i += 1
+        elif pattern[i] == '[' and ']' in pattern[i + 1:]:
+            end = pattern.index(']', i + 1)
+            body = pattern[i + 1:end]
+            out.append('[' + ('^' + body[1:] if body.startswith('!') else body) + ']')
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(out) + r'\Z'
+
+def parse_ignore_file(path: Path) -> List[IgnoreRule]:
+    try:
+        lines = path.read_text(encoding='utf-8').splitlines()
+    except (OSError, UnicodeDecodeError):
+        return []
+    rules = []
+    for line in lines:
+        line = line.rstrip()
+        if line and not line.startswith('#'):
+            rules.append(IgnoreRule(line))
+    return rules
+
+# Reglas activas: (prefijo relativo del archivo de ignore, reglas)
+RuleScope = Tuple[str, List[IgnoreRule]]
+
+def is_ignored(scopes: Sequence[RuleScope], rel_path: str, name: str, is_dir: bool) -> bool:
+    """Gana la última regla que coincide (los archivos más profundos van después)."""
+    ignored = False
+    for prefix, rules in scopes:
+        if prefix and not rel_path.startswith(prefix):
+            continue
+        local = rel_path[len(prefix):]
+        for rule in rules:
+            if rule.matches(local, name, is_dir):
+                ignored = not rule.negated
+    return ignored
+
+def load_scopes(directory: Path, rel_dir: str, ignore_files: Sequence[str]) -> List[RuleScope]:
+    scopes = []
+    for ignore_name in ignore_files:
+        rules = parse_ignore_file(directory / ignore_name)
+        if rules:
+            scopes.append((rel_dir + '/' if rel_dir else '', rules))
+    return scopes
+
+def _scan(directory: str, rel_dir: str, scopes: List[RuleScope], extensions: Tuple[str, ...],
+          exclude_dirs: frozenset, respect_ignore: bool) -> Iterator[str]:
+    if respect_ignore and rel_dir:
+        scopes = scopes + load_scopes(Path(directory), rel_dir, ('.gitignore',))
+    try:
+        entries = sorted(os.scandir(directory), key=lambda e: e.name)
+    except OSError:
+        return
+
+    for entry in entries:
+        name = entry.name
+        rel_path = rel_dir + '/' + name if rel_dir else name
+        if entry.is_dir(follow_symlinks=False):
+            if name in exclude_dirs:
+                continue
+            if respect_ignore and is_ignored(scopes, rel_path, name, True):
+                continue
+            yield from _scan(entry.path, rel_path, scopes, extensions, exclude_dirs, respect_ignore)
+        elif name.endswith(extensions):
+            if respect_ignore and is_ignored(scopes, rel_path, name, False):
+                continue
+            yield rel_path
+
+def root_scopes(root: Path, rel_dir: str) -> List[RuleScope]:
+    """Reglas de la raíz y de los directorios intermedios hasta rel_dir."""
+    scopes = load_scopes(root, '', IGNORE_FILES)
+    parts = rel_dir.split('/') if rel_dir else []
+    for i in range(1, len(parts)):
+        scopes += load_scopes(root.joinpath(*parts[:i]), '/'.join(parts[:i]), ('.gitignore',))
+    return scopes
+
+def git_ls_files(root: Path, rel_roots: Sequence[str]) -> Optional[List[str]]:
+    """Archivos versionados + no ignorados según git; None si git no está disponible."""
+    try:
+        output = subprocess.run(
+            ['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard', '--', *rel_roots],
+            cwd=root, capture_output=True, check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return sorted(set(output.decode('utf-8', 'surrogateescape').split('\0')) - {''})
+
+def _relative(root: Path, path: Path) -> Optional[str]:
+    try:
+        rel = path.resolve().relative_to(root)
+    except ValueError:
+        return None
+    return '' if str(rel) == '.' else rel.as_posix()
+
+def iter_source_files(roots: Optional[Iterable] = None, extensions: Tuple[str, ...] = SOURCE_EXTENSIONS,
+                      exclude_dirs: Iterable[str] = EXCLUDE_DIRS, respect_ignore: bool = True,
+                      use_git: bool = False, root: Path = PROJECT_ROOT) -> Iterator[Path]:
+    """
+    Produce los archivos con alguna de las extensiones bajo cada raíz
+    (relativas al proyecto o absolutas), en orden estable.
+
+    Con use_git=True se parte de `git ls-files` (git ya aplica .gitignore;
+    .vercelignore y exclude_dirs se aplican encima). Si git falla se
+    recorre el disco.
+    """
+    root = Path(root).resolve()
+    exclude_dirs = frozenset(exclude_dirs)
+    extensions = tuple(extensions)
+    rel_roots = []
+    for item in (roots or ['']):
+        path = Path(item) if Path(item).is_absolute() else root / item
+        rel = _relative(root, path)
+        if rel is None:
+            continue
+        if path.is_file():
+            yield path
+        elif path.is_dir():
+            rel_roots.append(rel)
+
+    listed = git_ls_files(root, rel_roots or ['.']) if use_git and rel_roots else None
+    if listed is not None:
+        vercel = load_scopes(root, '', ('.vercelignore',)) if respect_ignore else []
+        for rel_path in listed:
+            parts = rel_path.split('/')
+            if not rel_path.endswith(extensions) or exclude_dirs.intersection(parts[:-1]):
+                continue
+            if vercel and any(is_ignored(vercel, '/'.join(parts[:i]), parts[i - 1], i < len(parts))
+                              for i in range(1, len(parts) + 1)):
+                continue
+            yield root / rel_path
+        return
+
+    for rel in rel_roots:
+        scopes = root_scopes(root, rel) if respect_ignore else []
+        for rel_path in _scan(str(root / rel) if rel else str(root), rel, scopes,
+                              extensions, exclude_dirs, respect_ignore):
+            yield root / rel_path
+
+def find_source_files(roots: Optional[Iterable] = None, **options) -> List[Path]:
+    """Lista de iter_source_files (mismas opciones)."""
+    return list(iter_source_files(roots, **options))
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    use_git = '--git' in sys.argv
+
+    start = time.perf_counter()
+    files = find_source_files(args or None, use_git=use_git)
+    elapsed = time.perf_counter() - start
+    print(f"🔍 {len(files)} archivos TS/TSX en {elapsed * 1000:.1f}ms "
+          f"({'git ls-files' if use_git else 'os.scandir'})")
+
+    if '--compare-glob' in sys.argv:
+        start = time.perf_counter()
+        legacy = set()
+        for base in ([PROJECT_ROOT / a for a in args] or [PROJECT_ROOT]):
+            for pattern in ('**/*.ts', '**/*.tsx'):
+                for file_path in base.glob(pattern):
+                    if not EXCLUDE_DIRS.intersection(file_path.parts):
+                        legacy.add(file_path)
+        glob_elapsed = time.perf_counter() - start
+        print(f"🐢 glob('**/*.ts') + filtro: {len(legacy)} archivos en {glob_elapsed * 1000:.1f}ms")
+        only_glob = sorted(legacy - set(files))
+        if only_glob:
+            print(f"   {len(only_glob)} solo en glob (ignorados por .gitignore/.vercelignore), ej.:")
+            for file_path in only_glob[:5]:
+                print(f"   - {file_path.relative_to(PROJECT_ROOT)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Escáner léxico mínimo de TS/TSX para los codemods.
+
+Recorre el archivo UNA vez y produce un índice de spans:
+- Regiones de objeto ({ ... }) con la clave que las abre (include, select,
+  where, data, _count, ...), la llamada que las contiene
+  (prisma.payment.create) y la pila de claves que las anidan.
+- Claves de propiedad directas de cada objeto (club: true, Court: { ... }),
+  con el primer token de su valor.
+- Llamadas con nombre (prisma.booking.findMany(...)): inicio de la cadena
+  y posiciones de los paréntesis.
+- Spans que NO son código: strings, template literals, comentarios y
+  literales regex.
+
+Así los fixers dejan de decidir dónde termina un bloque por indentación o
+contando llaves con str.count (que se equivoca con llaves dentro de strings,
+templates o comentarios) y no reescanean el archivo por cada regla.
+
+Limitaciones asumidas (basta para código de app, no es un parser completo):
+- El texto JSX se trata como código; un apóstrofe suelto solo afecta
+  a su propia línea porque los strings no cruzan saltos de línea.
+- Los literales regex se reconocen por el token previo.
+
+Uso:
+    index = scan(content)
+    edits = []
+    for region in index.regions('include', 'select'):
+        for prop in index.properties_in(region):
+            edits.append((prop.start, prop.end, 'Club'))
+    content = replace_spans(content, edits)
+
+CLI (diagnóstico):
+    python scripts/ts_scanner.py app/api/bookings/route.ts [clave ...]
+"""
+
+import re
+import sys
+from bisect import bisect_right
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+TOKEN = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>'(?:[^'\\\n]|\\.)*'?|"(?:[^"\\\n]|\\.)*"?)
+  | (?P<template>`)
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<number>\d[\w.]*)
+  | (?P<punct>[{}()\[\]:,;?.=<>!&|+\-*%^~@#/])
+  | (?P<other>.)
+''', re.VERBOSE | re.DOTALL)
+
+TEMPLATE_CHUNK = re.compile(r'(?:[^`\\$]|\\.|\$(?!\{))*(`|\$\{)?', re.DOTALL)
+REGEX_LITERAL = re.compile(r'/(?![/*])(?:[^/\\\n\[]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*')
+
+SHORTHAND_KEY = re.compile(r'[A-Za-z_$][\w$]*\Z')
+
+# Tras estos tokens, '/' abre un literal regex y no es una división
+REGEX_PRECEDERS = set('(,=:[!&|?{;+-*%~^')
+REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'yield', 'await'}
+
+class Region(NamedTuple):
+    """Objeto literal { ... } (open/close son las posiciones de las llaves)."""
+    key: Optional[str]
+    open: int
+    close: int
+    depth: int
+    path: Tuple[str, ...]
+    call: Optional[str]
+
+class Property(NamedTuple):
+    """Clave de propiedad `name:` directamente dentro de un objeto."""
+    name: str
+    start: int
+    end: int
+    colon: int
+    parent: int
+    path: Tuple[str, ...]
+    value: Optional[str]
+
+class Call(NamedTuple):
+    """Llamada `a.b.c(...)`: start es el inicio de la cadena; open/close, los paréntesis."""
+    name: str
+    start: int
+    open: int
+    close: int
+
+class ScanIndex:
+    """Índice de spans de un archivo, calculado una sola vez."""
+
+    def __init__(self, content: str, region_list: List[Region], property_list: List[Property],
+                 non_code: List[Tuple[int, int]], call_list: Optional[List[Call]] = None):
+        self.content = content
+        self.region_list = sorted(region_list, key=lambda r: r.open)
+        self.property_list = property_list
+        self.non_code = non_code
+        self.call_list = sorted(call_list or [], key=lambda c: c.start)
+        self._non_code_starts = [start for start, _ in non_code]
+
+        self._by_key: Dict[Optional[str], List[Region]] = defaultdict(list)
+        self._by_open: Dict[int, Region] = {}
+        for region in self.region_list:
+            self._by_key[region.key].append(region)
+            self._by_open[region.open] = region
+
+        self._children: Dict[int, List[Property]] = defaultdict(list)
+        for prop in property_list:
+            self._children[prop.parent].append(prop)
+
+    def regions(self, *keys: str) -> List[Region]:
+        """Regiones abiertas por alguna de las claves, en orden de aparición."""
+        if len(keys) == 1:
+            return list(self._by_key.get(keys[0], []))
+        found = [region for key in keys for region in self._by_key.get(key, [])]
+        return sorted(found, key=lambda r: r.open)
+
+    def region_at(self, open_offset: int) -> Optional[Region]:
+        return self._by_open.get(open_offset)
+
+    def properties_in(self, region: Region) -> List[Property]:
+        """Claves directas del objeto (no las de objetos anidados)."""
+        return self._children.get(region.open, [])
+
+    def shorthand_keys(self, region: Region) -> List[Tuple[str, int, int]]:
+        """
+        Claves abreviadas del objeto ({ clubId, status }) como (nombre, inicio, fin):
+        properties_in solo ve las de la forma `clave:`.
+        """
+        content = self.content
+        keys = []
+        depth = 0
+        segment_start = region.open + 1
+        for pos in range(region.open + 1, region.close + 1):
+            char = content[pos]
+            if char not in '{[(}]),' or not self.is_code(pos):
+                continue
+            if char in '{[(':
+                depth += 1
+            elif char in '}])' and pos != region.close:
+                depth -= 1
+            elif char == ',' and depth == 0 or pos == region.close:
+                segment = content[segment_start:pos]
+                name = segment.strip()
+                if SHORTHAND_KEY.match(name):
+                    start = segment_start + segment.index(name)
+                    keys.append((name, start, start + len(name)))
+                segment_start = pos + 1
+        return keys
+
+    def parent_key(self, prop: Property) -> Optional[str]:
+        region = self._by_open.get(prop.parent)
+        return region.key if region else None
+
+    def is_code(self, offset: int) -> bool:
+        """False si la posición cae dentro de un string, template, comentario o regex."""
+        i = bisect_right(self._non_code_starts, offset) - 1
+        return i < 0 or offset >= self.non_code[i][1]
+
+    def code_end(self, before: int) -> int:
+        """Posición tras el último carácter no blanco antes de `before`, saltando comentarios."""
+        last = len(self.content[:before].rstrip())
+        while last > 0:
+            i = bisect_right(self._non_code_starts, last - 1) - 1
+            if i < 0 or last - 1 >= self.non_code[i][1]:
+                break
+            start = self.non_code[i][0]
+            if not self.content.startswith(('//', '/*'), start):
+                break
+            last = len(self.content[:start].rstrip())
+        return last
+
+@lru_cache(maxsize=4)
+def scan(content: str) -> ScanIndex:
+    """
+    Tokeniza el archivo y construye el índice de regiones y propiedades.
+
+    Memoizado por contenido: varias reglas sobre el mismo buffer (pipeline)
+    comparten un único escaneo mientras ninguna lo modifique.
+    """
+    regions: List[Region] = []
+    properties: List[list] = []
+    calls: List[Call] = []
+    call_starts: Dict[int, int] = {}  # '(' → inicio de su cadena
+    non_code: List[Tuple[int, int]] = []
+
+    # Pila de agrupadores: (carácter, posición, clave, llamada)
+    stack: List[tuple] = []
+    path: List[Optional[str]] = []
+    prev: Optional[str] = None        # último token significativo
+    prev2: Optional[str] = None       # el anterior a ese
+    prev_ident: Optional[Tuple[str, int, int]] = None
+    chain: List[str] = []             # cadena ident(.ident)* justo antes de '('
+    chain_start = 0
+    pending_value: Optional[list] = None  # propiedad cuyo valor aún no se vio
+
+    def scan_template(pos: int) -> int:
+        m = TEMPLATE_CHUNK.match(content, pos)
+        non_code.append((pos, m.end()))
+        if m.group(1) == '${':
+            stack.append(('${', m.end() - 2, None, None))
+        return m.end()
+
+    length = len(content)
+    pos = 0
+    while pos < length:
+        m = TOKEN.match(content, pos)
+        kind = m.lastgroup
+        text = m.group(kind)
+        end = m.end()
+
+        if kind == 'ws' or kind == 'comment':
+            if kind == 'comment':
+                non_code.append((pos, end))
+            pos = end
+            continue
+
+        if kind == 'string':
+            non_code.append((pos, end))
+            text = '"'
+        elif kind == 'template':
+            end = scan_template(end)
+            text = '`'
+        elif text == '/' and (prev is None or prev in REGEX_PRECEDERS or prev in REGEX_KEYWORDS):
+            literal = REGEX_LITERAL.match(content, pos)
+            if literal:
+                non_code.append((pos, literal.end()))
+                end = literal.end()
+                text = '/regex/'
+        elif text == '{':
+            key = None
+            if pending_value is not None:
+                key = pending_value[0]
+            call = next((entry[3] for entry in reversed(stack) if entry[0] == '('), None)
+            stack.append(('{', pos, key, call))
+            path.append(key)
+        elif text == '(':
+            stack.append(('(', pos, None, '.'.join(chain) if prev_ident and chain else None))
+            if stack[-1][3]:
+                call_starts[pos] = chain_start
+        elif text == '[':
+            stack.append(('[', pos, None, None))
+        elif text in ')]':
+            if stack and stack[-1][0] == ('(' if text == ')' else '['):
+                _, open_pos, _, call = stack.pop()
+                if call:
+                    calls.append(Call(call, call_starts[open_pos], open_pos, pos))
+        elif text == '}':
+            if stack and stack[-1][0] == '${':
+                stack.pop()
+                end = scan_template(end)
+                text = '`'
+            elif stack and stack[-1][0] == '{':
+                _, open_pos, key, call = stack.pop()
+                path.pop()
+                regions.append(Region(key, open_pos, pos, len(path), tuple(k for k in path if k), call))
+        elif text == ':':
+            # Clave de objeto: ident precedido de '{' o ',' directamente en un objeto
+            if prev_ident and prev2 in ('{', ',') and stack and stack[-1][0] == '{':
+                name, start, name_end = prev_ident
+                properties.append([name, start, name_end, pos, stack[-1][1],
+                                   tuple(k for k in path if k), None])
+                prev2, prev = prev, text
+                prev_ident = None
+                pending_value = properties[-1]
+                chain = []
+                pos = end
+                continue
+
+        # Token significativo: actualizar el contexto
+        if pending_value is not None:
+            pending_value[6] = text
+            pending_value = None
+        if kind == 'ident':
+            if not (prev == '.' and chain):
+                chain_start = pos
+            chain = chain + [text] if prev == '.' and chain else [text]
+            prev_ident = (text, pos, end)
+        else:
+            if text != '.':
+                chain = []
+            prev_ident = None
+        prev2, prev = prev, text
+        pos = end
+
+    return ScanIndex(content, regions, [Property(*p) for p in properties], non_code, calls)
+
+def replace_spans(content: str, edits: Iterable[Tuple[int, int, str]]) -> str:
+    """
+    Aplica reemplazos (inicio, fin, texto) de una vez.
+
+    Con el mismo span gana el primero de la lista (como si las reglas se
+    aplicaran una detrás de otra); un span que pisa a otro anterior se descarta.
+    """
+    first: Dict[Tuple[int, int], str] = {}
+    for start, end, text in edits:
+        first.setdefault((start, end), text)
+
+    parts = []
+    last = 0
+    for (start, end), text in sorted(first.items()):
+        if start < last:
+            continue
+        parts.append(content[last:start])
+        parts.append(text)
+        last = end
+    parts.append(content[last:])
+    return ''.join(parts)
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python scripts/ts_scanner.py <archivo.ts> [clave ...]")
+        sys.exit(1)
+
+    content = Path(sys.argv[1]).read_text(encoding='utf-8')
+    keys = sys.argv[2:] or ['include', 'select', 'where', 'data', '_count']
+    index = scan(content)
+
+    print(f"📄 {sys.argv[1]}: {len(index.region_list)} objetos, {len(index.property_list)} claves, "
+          f"{len(index.non_code)} spans sin código")
+    for region in index.regions(*keys):
+        line = content.count('\n', 0, region.open) + 1
+        names = ', '.join(p.name for p in index.properties_in(region))
+        via = f" en {region.call}()" if region.call else ''
+        print(f"  {line:>5}: {'.'.join(region.path + (region.key,))}{via} → {{ {names} }}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Categorizador declarativo de diagnósticos de tsc, para todos los códigos.
+
+Cada código tiene una forma de mensaje (MESSAGE_SHAPES: regex con grupos
+con nombre → campos como property, type, from_type, name) y una lista
+ordenada de reglas (RULES): la primera cuyas condiciones se cumplen todas
+da la categoría; si ninguna, 'other'. Las condiciones son datos:
+
+    contains(campos, *palabras)   alguna palabra aparece (sin mayúsculas)
+    one_of(campos, *valores)      el campo es exactamente uno de los valores
+    starts_with(campos, *prefijos)
+    matches(campos, regex)
+
+Al construir el Categorizer las reglas se compilan por código:
+- todas las palabras de `contains` de un mismo campo van a UNA regex
+  combinada (lookahead en cada posición, palabras más largas primero) y
+  una tabla palabra → condiciones que cumple (también las palabras que
+  contiene, ej. 'createinput' cumple 'input'); un escaneo en C por campo
+  reemplaza los `any(rel in prop.lower() for rel in ...)`,
+- one_of son frozensets,
+- el resultado se memoriza por (código, valores de los campos usados):
+  los diagnósticos repetidos (la misma propiedad en decenas de archivos)
+  no se reevalúan.
+
+categorize() recorre los diagnósticos UNA vez y acumula Counters por
+(código, categoría), por clave (propiedad, conversión, nombre, ...) y por
+archivo; los top-k salen de Counter.most_common(k) (un heap), sin ordenar
+tablas enteras. fix_ts2339_analysis.py y fix_ts2322_analysis.py usan este
+motor para su categorize_errors.
+
+Uso:
+    python scripts/tsc_categories.py                          # caché de tsc_diagnostics o tsc
+    python scripts/tsc_categories.py --from type-check-temp.txt [--top 5]
+    python scripts/tsc_categories.py --from type-check-temp.txt --code TS2353
+    python scripts/tsc_categories.py --from type-check-temp.txt --json | --output cat.json
+"""
+
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Pattern, Tuple, Union
+
+from tsc_diagnostics import Diagnostic, load_diagnostics_from_argv
+
+REPORT_VERSION = 1
+OTHER = 'other'
+UNPARSED = 'unparsed'
+
+Fields = Union[str, Tuple[str, ...]]
+
+class Condition(NamedTuple):
+    kind: str                 # contains | one_of | starts_with | matches
+    fields: Tuple[str, ...]   # se cumple si se cumple en alguno
+    values: Tuple[str, ...]
+
+class Rule(NamedTuple):
+    codes: Tuple[str, ...]
+    category: str
+    conditions: Tuple[Condition, ...]
+    hint: str
+
+class MessageShape(NamedTuple):
+    pattern: Pattern
+    key: Tuple[str, ...]      # campos que identifican el caso en el top-k
+
+def _fields(fields: Fields) -> Tuple[str, ...]:
+    return (fields,) if isinstance(fields, str) else tuple(fields)
+
+def contains(fields: Fields, *words: str) -> Condition:
+    return Condition('contains', _fields(fields), tuple(word.lower() for word in words))
+
+def one_of(fields: Fields, *values: str) -> Condition:
+    return Condition('one_of', _fields(fields), values)
+
+def starts_with(fields: Fields, *prefixes: str) -> Condition:
+    return Condition('starts_with', _fields(fields), prefixes)
+
+def matches(fields: Fields, pattern: str) -> Condition:
+    return Condition('matches', _fields(fields), (pattern,))
+
+def rule(codes: Union[str, Tuple[str, ...]], category: str, *conditions: Condition, hint: str = '') -> Rule:
+    return Rule(_fields(codes), category, conditions, hint)
+
+def shape(pattern: str, *key: str) -> MessageShape:
+    return MessageShape(re.compile(pattern), key)
+
+# -- formas de mensaje ----------------------------------------------------------
+
+_PROPERTY_ON = r"^Property '(?P<property>[^']+)' does not exist on type '(?P<type>[^']+)'"
+_KNOWN_PROPERTIES = r"^Object literal may only specify known properties, (?:and|but) '(?P<property>[^']+)' does not exist in type '(?P<type>[^']+)'"
+_ASSIGNABLE = r"^(?:Type|Argument of type) '(?P<from_type>[^']+)' is not assignable to (?:type|parameter of type) '(?P<to_type>[^']+)'"
+_IMPLICIT_ANY_VARIABLE = r"^Variable '(?P<name>[^']+)' implicitly has (?:an? )?(?:type )?'(?P<type>[^']+)'"
+
+MESSAGE_SHAPES: Dict[str, MessageShape] = {
+    'TS2339': shape(_PROPERTY_ON, 'property'),
+    'TS2551': shape(_PROPERTY_ON + r"\. Did you mean '(?P<suggestion>[^']+)'\?", 'property', 'suggestion'),
+    'TS2353': shape(_KNOWN_PROPERTIES, 'property', 'type'),
+    'TS2561': shape(_KNOWN_PROPERTIES + r"\. Did you mean to write '(?P<suggestion>[^']+)'\?", 'property', 'suggestion'),
+    'TS2322': shape(_ASSIGNABLE, 'from_type', 'to_type'),
+    'TS2345': shape(_ASSIGNABLE, 'from_type', 'to_type'),
+    'TS2820': shape(_ASSIGNABLE + r"\. Did you mean '(?P<suggestion>[^']+)'\?", 'from_type', 'suggestion'),
+    'TS2678': shape(r"^Type '(?P<from_type>[^']+)' is not comparable to type '(?P<to_type>[^']+)'", 'from_type', 'to_type'),
+    'TS2739': shape(r"^Type '(?P<from_type>[^']+)' is missing the following properties from type '(?P<to_type>[^']+)'", 'to_type'),
+    'TS2741': shape(r"^Property '(?P<property>[^']+)' is missing in type '(?P<from_type>[^']+)' but required in type '(?P<to_type>[^']+)'", 'property', 'to_type'),
+    'TS2344': shape(r"^Type '(?P<from_type>[^']+)' does not satisfy the constraint '(?P<to_type>[^']+)'", 'to_type'),
+    'TS2367': shape(r"^This comparison appears to be unintentional because the types '(?P<left>[^']+)' and '(?P<right>[^']+)' have no overlap", 'left', 'right'),
+    'TS2365': shape(r"^Operator '(?P<operator>[^']+)' cannot be applied to types '(?P<left>[^']+)' and '(?P<right>[^']+)'", 'operator', 'left', 'right'),
+    'TS7006': shape(r"^Parameter '(?P<name>[^']+)' implicitly has an '(?P<type>[^']+)' type", 'name'),
+    'TS7018': shape(r"^Object literal's property '(?P<property>[^']+)' implicitly has an '(?P<type>[^']+)' type", 'property'),
+    'TS7005': shape(_IMPLICIT_ANY_VARIABLE, 'name'),
+    'TS7034': shape(_IMPLICIT_ANY_VARIABLE, 'name'),
+    'TS7053': shape(r"^Element implicitly has an 'any' type because expression of type '(?P<index_type>[^']+)' can't be used to index type '(?P<type>[^']+)'", 'index_type'),
+    'TS2304': shape(r"^Cannot find name '(?P<name>[^']+)'", 'name'),
+    'TS2300': shape(r"^Duplicate identifier '(?P<name>[^']+)'", 'name'),
+    'TS2307': shape(r"^Cannot find module '(?P<module>[^']+)'", 'module'),
+    'TS7016': shape(r"^Could not find a declaration file for module '(?P<module>[^']+)'", 'module'),
+    'TS2305': shape(r"^Module '\"?(?P<module>[^'\"]+)\"?' has no exported member '(?P<name>[^']+)'", 'module', 'name'),
+    'TS2554': shape(r"^Expected (?P<expected>[\d-]+) arguments?, but got (?P<got>\d+)", 'expected', 'got'),
+}
+
+# -- vocabulario del proyecto ---------------------------------------------------
+
+PRISMA_RELATIONS = ('booking', 'club', 'court', 'player', 'user', 'class', 'tournament',
+                    'payment', 'invoice', 'notification', 'instructor', 'package')
+AGGREGATE_PROPERTIES = ('_sum', '_count', '_avg', '_min', '_max')
+RESPONSE_PROPERTIES = ('success', 'error', 'errors', 'message', 'data')
+RENAMED_FIELDS = ('amount', 'price', 'studentName', 'dueAmount', 'attended',
+                  'isGroup', 'isClass', 'color', 'externalInvoice')
+VARIANT_KEYWORDS = ('outline', 'primary', 'secondary', 'ghost', 'warning', 'success',
+                    'danger', 'info', 'default', 'glass', 'glow', 'gradient')
+PRISMA_DATA_TYPES = ('CreateInput', 'UpdateInput', 'CreateManyInput', 'UpsertInput')
+EVENT_PARAMETERS = ('e', 'event', 'evt', 'ev')
+CALLBACK_PARAMETERS = ('item', 'index', 'i', 'idx', 'acc', 'sum', 'total', 'a', 'b', 'x', 'n', 'el',
+                       'value', 'key', 'row', 'p', 'c', 's', 't', 'b2', 'prev', 'curr')
+
+# -- reglas (en orden: gana la primera) -----------------------------------------
+
+RULES: List[Rule] = [
+    # TS2339: Property 'x' does not exist on type 'T' (mismo criterio que fix_ts2339_analysis)
+    rule('TS2339', 'relation_access', contains('property', *PRISMA_RELATIONS),
+         hint="include: { Relación: true } en la consulta, o select de los campos"),
+    rule('TS2339', 'aggregate', one_of('property', *AGGREGATE_PROPERTIES),
+         hint="aggregate._sum.campo ?? 0; pedir el campo en el aggregate"),
+    rule('TS2339', 'aggregate', contains('type', '_sum', '_count'),
+         hint="aggregate._sum.campo ?? 0; pedir el campo en el aggregate"),
+    rule('TS2339', 'response_type', one_of('property', *RESPONSE_PROPERTIES),
+         hint="type guards ('success' in response) o unions discriminadas"),
+    rule('TS2339', 'field_name', one_of('property', *RENAMED_FIELDS),
+         hint="campo renombrado: fix_booking_amount, fix_classbooking_props"),
+    rule('TS2339', 'optional_chain', contains('type', 'undefined', '| null'),
+         hint="obj?.prop o un guard antes de acceder"),
+
+    # TS2322 / TS2345: Type 'A' is not assignable to type 'B' (mismo criterio que fix_ts2322_analysis)
+    rule(('TS2322', 'TS2345'), 'variant_mismatch', contains(('from_type', 'to_type'), *VARIANT_KEYWORDS),
+         hint="añadir la variante al union del componente o usar una válida"),
+    rule(('TS2322', 'TS2345'), 'string_to_date', contains('from_type', 'string'), contains('to_type', 'date'),
+         hint="new Date(valor)"),
+    rule(('TS2322', 'TS2345'), 'prisma_type', contains(('from_type', 'to_type'), 'createinput', 'updateinput'),
+         hint="ajustar los campos del data al schema (requeridos vs opcionales)"),
+    rule(('TS2322', 'TS2345'), 'component_props', contains('to_type', 'intrinsicattributes', 'props'),
+         hint="declarar la prop en el componente o quitarla"),
+    rule(('TS2322', 'TS2345'), 'array_types', contains(('from_type', 'to_type'), '[]'),
+         hint=".map() a los elementos esperados o ajustar el tipo"),
+    rule(('TS2322', 'TS2345'), 'object_shape', contains(('from_type', 'to_type'), '{'),
+         hint="ajustar la forma del objeto"),
+    rule(('TS2322', 'TS2345'), 'enum_values', starts_with('from_type', '"'), starts_with('to_type', '"'),
+         hint="literal fuera del union: usar un valor válido"),
+
+    # TS2551 / TS2561: con sugerencia de tsc (automatizables)
+    rule(('TS2551', 'TS2561'), 'relation_name', contains('suggestion', *PRISMA_RELATIONS),
+         hint="fix_ts2551_auto.py / fix_ts2561_auto.py (nombre de relación del schema)"),
+    rule(('TS2551', 'TS2561'), 'suggested_name', matches('suggestion', r'.'),
+         hint="fix_ts2551_auto.py / fix_ts2561_auto.py"),
+
+    # TS2353: propiedad desconocida en un literal (casi siempre argumentos de Prisma)
+    rule('TS2353', 'prisma_include', contains('type', 'include<', 'select<', 'includeinput', 'selectinput'),
+         hint="relación mal nombrada en include/select: fix_includes, relations_v3"),
+    rule('TS2353', 'prisma_aggregate', contains('type', 'aggregateinputtype'),
+         hint="campo inexistente en _sum/_avg/_count del aggregate"),
+    rule('TS2353', 'prisma_where', contains('type', 'whereinput', 'whereuniqueinput'),
+         hint="campo o relación inexistente en where"),
+    rule('TS2353', 'prisma_order_by', contains('type', 'orderby'),
+         hint="campo inexistente en orderBy"),
+    rule('TS2353', 'prisma_data', contains('type', *PRISMA_DATA_TYPES),
+         hint="campo que ya no está en el modelo (ej. updatedAt manual): remove_updated_at"),
+    rule('TS2353', 'component_state', contains('type', 'setstateaction', 'props'),
+         hint="ajustar el tipo del estado/props"),
+
+    # TS2741 / TS2739 / TS2344: propiedades requeridas o constraint de Prisma
+    rule(('TS2739', 'TS2741', 'TS2344'), 'prisma_data', contains('to_type', *PRISMA_DATA_TYPES + ('unchecked',)),
+         hint="campos requeridos del create/update según el schema"),
+    rule(('TS2739', 'TS2741', 'TS2344'), 'prisma_args', contains('to_type', 'defaultargs'),
+         hint="include/select con campos escalares o relaciones inexistentes"),
+
+    # Enums y literales
+    rule(('TS2820', 'TS2678'), 'enum_case', matches(('from_type', 'to_type'), r'^"'),
+         hint="usar el miembro del enum de Prisma (mayúsculas/minúsculas del schema)"),
+    rule('TS2365', 'unknown_operand', one_of(('left', 'right'), 'unknown'),
+         hint="tipar el resultado (ej. reduce<number>, Object.values de un Record tipado)"),
+    rule('TS2367', 'literal_comparison', starts_with('left', '"'), starts_with('right', '"'),
+         hint="comparación entre literales que nunca coinciden: revisar el union"),
+
+    # any implícito
+    rule('TS7006', 'event_handler', one_of('name', *EVENT_PARAMETERS),
+         hint="tipar el evento (React.ChangeEvent<...>, ...)"),
+    rule('TS7006', 'callback_param', one_of('name', *CALLBACK_PARAMETERS),
+         hint="tipar el array de origen para que se infiera el parámetro"),
+    rule('TS7006', 'entity_param', contains('name', *PRISMA_RELATIONS),
+         hint="tipar con el modelo de Prisma (Booking, Club, ...) o su payload con include"),
+    rule(('TS7005', 'TS7034'), 'untyped_array', contains('type', '[]'),
+         hint="declarar el tipo del array: const x: T[] = []"),
+    rule('TS7053', 'string_index', one_of('index_type', 'string', 'any'),
+         hint="keyof typeof obj o Record<string, T>"),
+
+    # Nombres y módulos
+    rule('TS2304', 'missing_type', matches('name', r'^[A-Z]'),
+         hint="importar el tipo/componente"),
+    rule('TS2304', 'undeclared_variable', matches('name', r'^[a-z_$]'),
+         hint="variable fuera de alcance (ej. id de params sin desestructurar)"),
+    rule(('TS2307', 'TS2305'), 'alias_path', starts_with('module', '@/', './', '../'),
+         hint="ruta o export inexistente en el proyecto"),
+    rule(('TS2307', 'TS7016'), 'package', matches('module', r'.'),
+         hint="instalar el paquete o sus @types"),
+]
+
+class _CompiledCode(NamedTuple):
+    shape: Optional[MessageShape]
+    scanners: Tuple[Tuple[str, Pattern, Dict[str, FrozenSet[int]]], ...]
+    rules: Tuple[Tuple[str, Tuple[tuple, ...]], ...]
+    used_fields: Tuple[str, ...]
+    categories: Tuple[str, ...]
+
+def _compile_code(code: str, rules: List[Rule]) -> _CompiledCode:
+    words_by_field: Dict[str, Dict[str, set]] = defaultdict(lambda: defaultdict(set))
+    compiled_rules = []
+    used_fields: Dict[str, None] = {}
+    condition_id = 0
+
+    for spec in rules:
+        checks = []
+        for condition in spec.conditions:
+            used_fields.update(dict.fromkeys(condition.fields))
+            if condition.kind == 'contains':
+                for field in condition.fields:
+                    for word in condition.values:
+                        words_by_field[field][word].add(condition_id)
+                checks.append(('contains', condition_id))
+                condition_id += 1
+            elif condition.kind == 'one_of':
+                checks.append(('one_of', condition.fields, frozenset(condition.values)))
+            elif condition.kind == 'starts_with':
+                checks.append(('starts_with', condition.fields, condition.values))
+            else:
+                checks.append(('matches', condition.fields, re.compile(condition.values[0])))
+        compiled_rules.append((spec.category, tuple(checks)))
+
+    scanners = []
+    for field, words in words_by_field.items():
+        # Lookahead en cada posición, la palabra más larga primero; cada palabra
+        # encontrada cumple también las condiciones de las palabras que contiene
+        ordered = sorted(words, key=lambda word: (-len(word), word))
+        scanner = re.compile('(?=(' + '|'.join(map(re.escape, ordered)) + '))', re.IGNORECASE)
+        table = {word: frozenset().union(*(ids for other, ids in words.items() if other in word))
+                 for word in ordered}
+        scanners.append((field, scanner, table))
+
+    categories = tuple(dict.fromkeys([spec.category for spec in rules] + [OTHER]))
+    return _CompiledCode(MESSAGE_SHAPES.get(code), tuple(scanners), tuple(compiled_rules),
+                         tuple(used_fields), categories)
+
+class Categorization:
+    """Conteos de una pasada: por (código, categoría), por clave y por archivo."""
+
+    def __init__(self):
+        self.total = 0
+        self.by_code: Counter = Counter()
+        self.by_category: Counter = Counter()                       # (código, categoría)
+        self.keys: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        self.files: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+
+    def top_codes(self, k: Optional[int] = None) -> List[Tuple[str, int]]:
+        return self.by_code.most_common(k)
+
+    def categories(self, code: str) -> List[Tuple[str, int]]:
+        return Counter({category: count for (item_code, category), count in self.by_category.items()
+                        if item_code == code}).most_common()
+
+    def to_json(self, top: int) -> dict:
+        return {
+            'version': REPORT_VERSION,
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'total': self.total,
+            'codes': {
+                code: {
+                    'count': count,
+                    'categories': {
+                        category: {
+                            'count': category_count,
+                            'hint': CATEGORIZER.hint(code, category),
+                            'top_keys': self.keys[(code, category)].most_common(top),
+                            'top_files': self.files[(code, category)].most_common(top),
+                        }
+                        for category, category_count in self.categories(code)
+                    },
+                }
+                for code, count in self.top_codes()
+            },
+        }
+
+class Categorizer:
+    """Reglas compiladas por código, con memo de (código, campos) → categoría."""
+
+    def __init__(self, rules: Iterable[Rule] = RULES):
+        self.rules = list(rules)
+        self._codes: Dict[str, _CompiledCode] = {}
+        self._memo: Dict[tuple, str] = {}
+        self._hints = {(code, spec.category): spec.hint for spec in self.rules for code in spec.codes}
+
+    def compiled(self, code: str) -> _CompiledCode:
+        compiled = self._codes.get(code)
+        if compiled is None:
+            compiled = self._codes[code] = _compile_code(code, [spec for spec in self.rules if code in spec.codes])
+        return compiled
+
+    def categories(self, code: str) -> Tuple[str, ...]:
+        """Categorías del código en el orden declarado, 'other' al final."""
+        return self.compiled(code).categories
+
+    def hint(self, code: str, category: str) -> str:
+        return self._hints.get((code, category), '')
+
+    def fields(self, code: str, message: str) -> Optional[Dict[str, str]]:
+        """Campos del mensaje según MESSAGE_SHAPES; {} si el código no tiene forma, None si no encaja."""
+        message_shape = self.compiled(code).shape
+        if message_shape is None:
+            return {}
+        match = message_shape.pattern.match(message)
+        return match.groupdict() if match else None
+
+    def category(self, code: str, fields: Dict[str, str]) -> str:
+        compiled = self.compiled(code)
+        memo_key = (code,) + tuple(fields.get(field) for field in compiled.used_fields)
+        category = self._memo.get(memo_key)
+        if category is not None:
+            return category
+
+        hits = set()
+        for field, scanner, table in compiled.scanners:
+            value = fields.get(field)
+            if value:
+                for word in scanner.findall(value):
+                    hits |= table[word.lower()]
+
+        category = OTHER
+        for candidate, checks in compiled.rules:
+            if all(_check(check, fields, hits) for check in checks):
+                category = candidate
+                break
+        self._memo[memo_key] = category
+        return category
+
+    def key(self, code: str, fields: Dict[str, str], message: str) -> str:
+        message_shape = self.compiled(code).shape
+        if message_shape is None or not fields:
+            return message[:80]
+        return ' → '.join(fields.get(name) or '' for name in message_shape.key)
+
+    def categorize(self, diagnostics: Iterable[Diagnostic]) -> Categorization:
+        """Una pasada por los diagnósticos acumulando conteos y top-k."""
+        result = Categorization()
+        for diagnostic in diagnostics:
+            code = diagnostic.code
+            fields = self.fields(code, diagnostic.message)
+            category = UNPARSED if fields is None else self.category(code, fields)
+            bucket = (code, category)
+            result.total += 1
+            result.by_code[code] += 1
+            result.by_category[bucket] += 1
+            result.keys[bucket][self.key(code, fields or {}, diagnostic.message)] += 1
+            result.files[bucket][diagnostic.file] += 1
+        return result
+
+def _check(check: tuple, fields: Dict[str, str], hits: set) -> bool:
+    kind = check[0]
+    if kind == 'contains':
+        return check[1] in hits
+    values = [fields.get(field) for field in check[1]]
+    if kind == 'one_of':
+        return any(value in check[2] for value in values if value is not None)
+    if kind == 'starts_with':
+        return any(value.startswith(check[2]) for value in values if value)
+    return any(check[2].search(value) for value in values if value)
+
+CATEGORIZER = Categorizer()
+
+def print_report(result: Categorization, top: int, only_code: Optional[str] = None):
+    codes = [(code, count) for code, count in result.top_codes() if only_code in (None, code)]
+    print(f"📊 {result.total:,} diagnósticos, {len(result.by_code)} códigos\n")
+    for code, count in codes:
+        print(f"{'═' * 80}\n📌 {code}: {count:,}")
+        for category, category_count in result.categories(code):
+            share = category_count / count * 100
+            print(f"   {category:<22} {category_count:>6,} ({share:>5.1f}%)")
+            hint = CATEGORIZER.hint(code, category)
+            if hint:
+                print(f"      💡 {hint}")
+            bucket = (code, category)
+            for key, key_count in result.keys[bucket].most_common(top):
+                key = key if len(key) <= 70 else key[:67] + '...'
+                print(f"      • {key}: {key_count}")
+            if only_code is not None:
+                for file, file_count in result.files[bucket].most_common(top):
+                    print(f"      📁 {file}: {file_count}")
+        print()
+
+def option_value(name: str, default: Optional[str] = None) -> Optional[str]:
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return default
+
+def main():
+    store = load_diagnostics_from_argv(sys.argv)
+    top = int(option_value('--top', '5'))
+    result = CATEGORIZER.categorize(store.diagnostics)
+
+    output = option_value('--output')
+    if output or '--json' in sys.argv:
+        report = result.to_json(top)
+        if output:
+            Path(output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+        if '--json' in sys.argv:
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+            return
+
+    print_report(result, top, option_value('--code'))
+    if output:
+        print(f"💾 Reporte JSON: {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Almacén compartido de diagnósticos de TypeScript (tsc --noEmit).
+
+Ejecuta `npm run type-check` UNA sola vez (o ingiere un log guardado como
+type-check-temp.txt), lo parsea en streaming (iter_diagnostics) a registros
+estructurados con sus líneas de continuación y lo indexa por
+código de error, archivo y propiedad. El resultado se persiste en
+.codemod-cache/tsc-diagnostics.json junto con el hash de tsconfig.json y
+una huella de los fuentes, de modo que un caché obsoleto se detecta y se
+regenera automáticamente.
+
+Uso desde los scripts:
+    store = load_diagnostics()                       # caché o tsc
+    store = load_diagnostics('type-check-temp.txt')  # log guardado
+    for diag in store.query(code='TS2551'):
+        print(diag.file, diag.line, diag.property, diag.suggestion)
+
+CLI:
+    python scripts/tsc_diagnostics.py [--from archivo.txt] [--refresh]
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from source_files import iter_source_files
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+STORE_PATH = PROJECT_ROOT / '.codemod-cache' / 'tsc-diagnostics.json'
+STORE_VERSION = 2
+
+# Directorios que tsc no compila (ver exclude en tsconfig.json)
+SOURCE_EXCLUDE_DIRS = {'node_modules', '.next', '.git', 'backups', 'dist', 'build', '.vercel'}
+SOURCE_EXTENSIONS = ('.ts', '.tsx')
+
+# Formato: file(line,col): error TS2339: mensaje
+# (las rutas pueden contener paréntesis, ej. app/(auth)/..., por eso el lazy .*?)
+DIAGNOSTIC_PATTERN = re.compile(r'^(?P<file>\S.*?)\((?P<line>\d+),(?P<col>\d+)\): error (?P<code>TS\d+): (?P<message>.*)$')
+
+# Primera propiedad citada en el mensaje:
+#   Property 'x' does not exist ...                                 (TS2339, TS2551)
+#   Object literal may only specify known properties, but 'x' ...   (TS2561)
+#   Object literal may only specify known properties, and 'x' ...   (TS2353)
+PROPERTY_PATTERN = re.compile(r"^(?:Property|Object literal may only specify known properties, (?:and|but)) '([^']+)'")
+SUGGESTION_PATTERN = re.compile(r"Did you mean (?:to write )?'([^']+)'\?")
+
+class Diagnostic(NamedTuple):
+    file: str
+    line: int
+    col: int
+    code: str
+    message: str
+    property: Optional[str]
+    suggestion: Optional[str]
+    # Líneas de continuación indentadas (ej. cadenas "Types of property ...")
+    details: Tuple[str, ...] = ()
+
+    @property
+    def raw(self) -> str:
+        """Línea original tal como la imprime tsc."""
+        return f"{self.file}({self.line},{self.col}): error {self.code}: {self.message}"
+
+    @property
+    def text(self) -> str:
+        """Diagnóstico completo, con sus líneas de continuación."""
+        return '\n'.join((self.raw,) + self.details)
+
+def parse_diagnostic(line: str) -> Optional[Diagnostic]:
+    """Parsea una línea de cabecera de tsc; None si no es un diagnóstico."""
+    match = DIAGNOSTIC_PATTERN.match(line)
+    if not match:
+        return None
+
+    message = match.group('message')
+    prop = PROPERTY_PATTERN.match(message)
+    suggestion = SUGGESTION_PATTERN.search(message)
+
+    return Diagnostic(
+        file=match.group('file'),
+        line=int(match.group('line')),
+        col=int(match.group('col')),
+        code=match.group('code'),
+        message=message,
+        property=prop.group(1) if prop else None,
+        suggestion=suggestion.group(1) if suggestion else None,
+    )
+
+def iter_diagnostics(lines: Iterable[str]) -> Iterator[Diagnostic]:
+    """
+    Parser en streaming: consume la salida de tsc línea a línea (archivo,
+    pipe o stdin) y produce cada Diagnostic con sus líneas de continuación.
+
+    La memoria no depende del tamaño del log: solo se retiene el
+    diagnóstico en curso.
+    """
+    current = None
+    details: List[str] = []
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+
+        # Las continuaciones van indentadas bajo su cabecera
+        if line[:1] in (' ', '\t'):
+            if current is not None:
+                details.append(line)
+            continue
+
+        if current is not None:
+            yield current._replace(details=tuple(details))
+            current = None
+            details = []
+
+        # Filtro barato antes del regex (descarta banners de npm, líneas vacías...)
+        if '): error TS' in line:
+            current = parse_diagnostic(line)
+
+    if current is not None:
+        yield current._replace(details=tuple(details))
+
+def parse_output(output: str) -> List[Diagnostic]:
+    """Parsea la salida completa de tsc ya cargada en memoria."""
+    return list(iter_diagnostics(output.split('\n')))
+
+def read_lines(source: str) -> Iterator[str]:
+    """Itera las líneas de un archivo o de stdin ('-') sin cargarlo entero."""
+    if source == '-':
+        yield from sys.stdin
+        return
+    with open(source, 'r', encoding='utf-8') as f:
+        yield from f
+
+class DiagnosticsStore:
+    """Diagnósticos indexados por código, archivo y propiedad."""
+
+    def __init__(self, diagnostics: List[Diagnostic], origin: str = 'tsc'):
+        self.diagnostics = diagnostics
+        self.origin = origin
+        self.by_code: Dict[str, List[Diagnostic]] = defaultdict(list)
+        self.by_file: Dict[str, List[Diagnostic]] = defaultdict(list)
+        self.by_property: Dict[str, List[Diagnostic]] = defaultdict(list)
+
+        for diagnostic in diagnostics:
+            self.by_code[diagnostic.code].append(diagnostic)
+            self.by_file[diagnostic.file].append(diagnostic)
+            if diagnostic.property:
+                self.by_property[diagnostic.property].append(diagnostic)
+
+    def __len__(self) -> int:
+        return len(self.diagnostics)
+
+    def query(self, code: Optional[str] = None, file: Optional[str] = None,
+              prop: Optional[str] = None, exclude: Iterable[str] = ()) -> List[Diagnostic]:
+        """
+        Devuelve los diagnósticos que cumplen TODOS los filtros dados.
+
+        Parte del índice más selectivo y filtra el resto; exclude descarta
+        archivos cuya ruta contenga alguno de los fragmentos.
+        """
+        candidates = [
+            index.get(key, [])
+            for index, key in ((self.by_code, code), (self.by_file, file), (self.by_property, prop))
+            if key is not None
+        ]
+        results = min(candidates, key=len) if candidates else self.diagnostics
+
+        exclude = tuple(exclude)
+        return [
+            d for d in results
+            if (code is None or d.code == code)
+            and (file is None or d.file == file)
+            and (prop is None or d.property == prop)
+            and not any(fragment in d.file for fragment in exclude)
+        ]
+
+    def count_by_code(self) -> Counter:
+        return Counter({code: len(items) for code, items in self.by_code.items()})
+
+    def to_json(self, fingerprint: dict) -> str:
+        return json.dumps({
+            'version': STORE_VERSION,
+            'origin': self.origin,
+            'fingerprint': fingerprint,
+            'diagnostics': [list(d) for d in self.diagnostics],
+        }, separators=(',', ':'))
+
+def parser_fingerprint() -> str:
+    """Cambia si cambian los patrones de parseo (invalida el caché)."""
+    patterns = (DIAGNOSTIC_PATTERN, PROPERTY_PATTERN, SUGGESTION_PATTERN)
+    return hashlib.sha1('\n'.join(p.pattern for p in patterns).encode('utf-8')).hexdigest()[:16]
+
+def file_sha1(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def sources_fingerprint(root: Path = PROJECT_ROOT) -> dict:
+    """
+    Huella del proyecto: hash de tsconfig.json + schema.prisma y un hash
+    de (ruta, mtime, tamaño) de todos los fuentes TS/TSX (sin leerlos).
+    """
+    digest = hashlib.sha1()
+    # tsc no lee .gitignore: solo se podan los directorios excluidos en tsconfig
+    for path in iter_source_files(extensions=SOURCE_EXTENSIONS, exclude_dirs=SOURCE_EXCLUDE_DIRS,
+                                  respect_ignore=False, root=root):
+        stat = path.stat()
+        digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}\n".encode('utf-8'))
+
+    schema = root / 'prisma' / 'schema.prisma'
+    return {
+        'tsconfig': file_sha1(root / 'tsconfig.json'),
+        'schema': file_sha1(schema) if schema.exists() else None,
+        'sources': digest.hexdigest(),
+    }
+
+def run_type_check(root: Path = PROJECT_ROOT) -> Iterator[str]:
+    """
+    Ejecuta `npm run type-check` (tsc --noEmit) y produce su salida línea a línea.
+
+    tsc sale con código != 0 cuando hay errores de tipos, así que eso solo es
+    un fallo si no apareció ningún diagnóstico (sin node_modules, tsconfig roto,
+    OOM...): entonces se aborta con SystemExit al agotar la salida, antes de
+    que el llamador persista un almacén vacío como si el proyecto compilara.
+    """
+    # TypeScript escribe en stdout y stderr
+    process = subprocess.Popen(
+        ['npm', 'run', 'type-check'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        cwd=root
+    )
+    saw_diagnostic = False
+    tail: Deque[str] = deque(maxlen=10)
+    try:
+        for line in process.stdout:
+            saw_diagnostic = saw_diagnostic or DIAGNOSTIC_PATTERN.match(line) is not None
+            tail.append(line.rstrip())
+            yield line
+    finally:
+        process.stdout.close()
+        process.wait()
+
+    if process.returncode != 0 and not saw_diagnostic:
+        output = '\n'.join(f"   {line}" for line in tail)
+        raise SystemExit(f"❌ npm run type-check falló (código {process.returncode}) sin diagnósticos "
+                         f"de TypeScript; no se actualiza el almacén:\n{output}")
+
+# Almacenes ya cargados en este proceso (ej. TS2551 + TS2561 en el mismo script)
+_LOADED: Dict[tuple, DiagnosticsStore] = {}
+
+def _from_row(row: list) -> Diagnostic:
+    *fields, details = row
+    return Diagnostic(*fields, details=tuple(details))
+
+def _read_store(store_path: Path) -> Optional[dict]:
+    try:
+        data = json.loads(store_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    return data if data.get('version') == STORE_VERSION else None
+
+def _write_store(store: DiagnosticsStore, fingerprint: dict, store_path: Path):
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = store_path.with_suffix('.tmp')
+    tmp_path.write_text(store.to_json(fingerprint), encoding='utf-8')
+    os.replace(tmp_path, store_path)
+
+def load_diagnostics(source: Optional[str] = None, refresh: bool = False,
+                     store_path: Path = STORE_PATH, root: Path = PROJECT_ROOT) -> DiagnosticsStore:
+    """
+    Devuelve el almacén de diagnósticos.
+
+    - source=None: usa el caché si tsconfig/schema/fuentes no cambiaron;
+      si no, ejecuta tsc una vez y persiste el resultado.
+    - source='archivo.txt': ingiere un log guardado (caché por hash del log,
+      en un archivo aparte).
+    - source='-': lee la salida de tsc desde stdin (sin caché).
+    """
+    if source == '-':
+        return DiagnosticsStore(list(iter_diagnostics(sys.stdin)), origin='stdin')
+
+    if source is not None:
+        log_path = Path(source)
+        fingerprint = {'log': file_sha1(log_path)}
+        origin = str(log_path)
+        # Un archivo por log para no pisar el caché de la ejecución de tsc
+        store_path = store_path.with_name(f"tsc-log-{fingerprint['log'][:16]}.json")
+    else:
+        fingerprint = sources_fingerprint(root)
+        origin = 'tsc'
+
+    fingerprint['parser'] = parser_fingerprint()
+    memo_key = (origin, json.dumps(fingerprint, sort_keys=True))
+    if not refresh and memo_key in _LOADED:
+        return _LOADED[memo_key]
+
+    cached = None if refresh else _read_store(store_path)
+    if cached and cached['origin'] == origin and cached['fingerprint'] == fingerprint:
+        store = DiagnosticsStore([_from_row(row) for row in cached['diagnostics']], origin=origin)
+        _LOADED[memo_key] = store
+        return store
+
+    if source is not None:
+        lines = read_lines(str(log_path))
+    else:
+        print("⏳ Ejecutando npm run type-check (una sola vez)...", file=sys.stderr)
+        lines = run_type_check(root)
+
+    store = DiagnosticsStore(list(iter_diagnostics(lines)), origin=origin)
+    _write_store(store, fingerprint, store_path)
+    _LOADED[memo_key] = store
+    return store
+
+def load_diagnostics_from_argv(argv: List[str]) -> DiagnosticsStore:
+    """Atajo para scripts: entiende --from <archivo|-> y --refresh."""
+    source = argv[argv.index('--from') + 1] if '--from' in argv else None
+    return load_diagnostics(source, refresh='--refresh' in argv)
+
+def main():
+    store = load_diagnostics_from_argv(sys.argv)
+
+    print(f"📊 {len(store):,} diagnósticos ({store.origin})")
+    print(f"📁 {len(store.by_file):,} archivos afectados\n")
+    for code, count in store.count_by_code().most_common(15):
+        print(f"  {code:8} {count:6,}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Diff de diagnósticos entre dos snapshots de type-check.
+
+Compara, por ejemplo, type-check-lote9-before.txt con -after.txt y reporta:
+- Errores corregidos (solo en el snapshot anterior)
+- Errores introducidos (solo en el posterior)
+- Errores movidos (mismo archivo + código + mensaje, línea desplazada)
+- Deltas por código de error y por directorio
+
+El emparejamiento usa la clave (archivo, código, mensaje) en un índice hash
+y, dentro de cada clave, recorre las líneas ordenadas con dos punteros
+aceptando una deriva de ±tolerancia líneas. Todo es O(n log n): no hay
+bucles anidados entre snapshots.
+
+Uso:
+    python scripts/tsc_diff.py before.txt after.txt [--tolerance 25] [--depth 2] [--json]
+    python scripts/tsc_diff.py typecheck-scripts-before.txt typecheck-scripts-mid.txt
+"""
+
+import json
+import sys
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from tsc_diagnostics import Diagnostic, iter_diagnostics, read_lines
+
+DEFAULT_TOLERANCE = 25
+DEFAULT_DEPTH = 2
+
+DiagnosticKey = Tuple[str, str, str]
+
+def index_snapshot(source: str) -> Dict[DiagnosticKey, List[Diagnostic]]:
+    """Indexa un snapshot por (archivo, código, mensaje), con las líneas ordenadas."""
+    index = defaultdict(list)
+    for diagnostic in iter_diagnostics(read_lines(source)):
+        index[(diagnostic.file, diagnostic.code, diagnostic.message)].append(diagnostic)
+    for diagnostics in index.values():
+        diagnostics.sort(key=lambda d: (d.line, d.col))
+    return index
+
+def match_key(before: List[Diagnostic], after: List[Diagnostic], tolerance: int) -> dict:
+    """
+    Empareja las ocurrencias de una misma clave.
+
+    1. Misma línea → sin cambios
+    2. Resto, con dos punteros sobre las listas ordenadas → movidos si la
+       deriva es <= tolerance
+    """
+    after_lines = Counter(d.line for d in after)
+    unchanged = []
+    before_rest = []
+    for diagnostic in before:
+        if after_lines[diagnostic.line] > 0:
+            after_lines[diagnostic.line] -= 1
+            unchanged.append(diagnostic)
+        else:
+            before_rest.append(diagnostic)
+
+    before_lines = Counter(d.line for d in unchanged)
+    after_rest = []
+    for diagnostic in after:
+        if before_lines[diagnostic.line] > 0:
+            before_lines[diagnostic.line] -= 1
+        else:
+            after_rest.append(diagnostic)
+
+    moved, fixed, introduced = [], [], []
+    i = j = 0
+    while i < len(before_rest) and j < len(after_rest):
+        old, new = before_rest[i], after_rest[j]
+        if abs(old.line - new.line) <= tolerance:
+            moved.append((old, new))
+            i += 1
+            j += 1
+        elif old.line < new.line:
+            fixed.append(old)
+            i += 1
+        else:
+            introduced.append(new)
+            j += 1
+    fixed.extend(before_rest[i:])
+    introduced.extend(after_rest[j:])
+
+    return {'unchanged': unchanged, 'moved': moved, 'fixed': fixed, 'introduced': introduced}
+
+def directory_of(file_path: str, depth: int) -> str:
+    parts = file_path.split('/')[:-1]
+    return '/'.join(parts[:depth]) or '.'
+
+def diff_snapshots(before_source: str, after_source: str,
+                   tolerance: int = DEFAULT_TOLERANCE, depth: int = DEFAULT_DEPTH) -> dict:
+    """Compara dos snapshots y devuelve el resultado agregado."""
+    before = index_snapshot(before_source)
+    after = index_snapshot(after_source)
+
+    result = {'unchanged': [], 'moved': [], 'fixed': [], 'introduced': []}
+    for key in before.keys() | after.keys():
+        matched = match_key(before.get(key, []), after.get(key, []), tolerance)
+        for bucket, items in matched.items():
+            result[bucket].extend(items)
+
+    by_code = defaultdict(lambda: {'before': 0, 'after': 0})
+    by_directory = defaultdict(lambda: {'before': 0, 'after': 0})
+    for side, index in (('before', before), ('after', after)):
+        for (file_path, code, _), diagnostics in index.items():
+            by_code[code][side] += len(diagnostics)
+            by_directory[directory_of(file_path, depth)][side] += len(diagnostics)
+
+    for table in (by_code, by_directory):
+        for counts in table.values():
+            counts['delta'] = counts['after'] - counts['before']
+
+    result['total_before'] = sum(len(d) for d in before.values())
+    result['total_after'] = sum(len(d) for d in after.values())
+    result['by_code'] = dict(by_code)
+    result['by_directory'] = dict(by_directory)
+
+    for bucket in ('fixed', 'introduced'):
+        result[bucket].sort(key=lambda d: (d.file, d.line, d.col))
+    result['moved'].sort(key=lambda pair: (pair[1].file, pair[1].line))
+    return result
+
+def to_json(result: dict) -> dict:
+    def location(d: Diagnostic) -> dict:
+        return {'file': d.file, 'line': d.line, 'col': d.col, 'code': d.code, 'message': d.message}
+
+    return {
+        'total_before': result['total_before'],
+        'total_after': result['total_after'],
+        'unchanged': len(result['unchanged']),
+        'fixed': [location(d) for d in result['fixed']],
+        'introduced': [location(d) for d in result['introduced']],
+        'moved': [
+            {**location(new), 'from_line': old.line}
+            for old, new in result['moved']
+        ],
+        'by_code': result['by_code'],
+        'by_directory': result['by_directory'],
+    }
+
+def print_deltas(title: str, table: dict, limit: int = 15):
+    rows = [(name, counts) for name, counts in table.items() if counts['delta']]
+    if not rows:
+        return
+
+    print(f"\n{title}")
+    print("─" * 80)
+    # Mayor variación absoluta primero
+    rows.sort(key=lambda row: (-abs(row[1]['delta']), row[0]))
+    for name, counts in rows[:limit]:
+        print(f"  {name:<50} {counts['before']:>5} → {counts['after']:>5}  ({counts['delta']:+d})")
+
+def print_report(result: dict, limit: int = 20):
+    total_delta = result['total_after'] - result['total_before']
+
+    print("=" * 80)
+    print("📊 DIFF DE DIAGNÓSTICOS TYPE-CHECK")
+    print("=" * 80)
+    print(f"\nAntes: {result['total_before']:,}   Después: {result['total_after']:,}   Delta: {total_delta:+,}")
+    print(f"  ✅ Corregidos:   {len(result['fixed']):,}")
+    print(f"  ❌ Introducidos: {len(result['introduced']):,}")
+    print(f"  ↕️  Movidos:      {len(result['moved']):,}")
+    print(f"  ＝ Sin cambios:  {len(result['unchanged']):,}")
+
+    print_deltas("📁 DELTA POR CÓDIGO", result['by_code'])
+    print_deltas("📁 DELTA POR DIRECTORIO", result['by_directory'])
+
+    if result['introduced']:
+        print(f"\n❌ Errores introducidos (primeros {limit}):")
+        for d in result['introduced'][:limit]:
+            print(f"  • {d.file}:{d.line} {d.code} {d.message[:90]}")
+
+def parse_option(argv: List[str], name: str, default: int) -> int:
+    return int(argv[argv.index(name) + 1]) if name in argv else default
+
+def main():
+    args = [a for i, a in enumerate(sys.argv[1:], 1)
+            if not a.startswith('--') and sys.argv[i - 1] not in ('--tolerance', '--depth')]
+    if len(args) != 2:
+        print("Uso: python scripts/tsc_diff.py <before.txt> <after.txt> [--tolerance N] [--depth N] [--json]")
+        print("\nEjemplo:")
+        print("  python scripts/tsc_diff.py type-check-lote9-before.txt type-check-lote9-after.txt")
+        sys.exit(1)
+
+    result = diff_snapshots(
+        args[0], args[1],
+        tolerance=parse_option(sys.argv, '--tolerance', DEFAULT_TOLERANCE),
+        depth=parse_option(sys.argv, '--depth', DEFAULT_DEPTH),
+    )
+
+    if '--json' in sys.argv:
+        print(json.dumps(to_json(result), indent=2, ensure_ascii=False))
+    else:
+        print_report(result)
+
+if __name__ == '__main__':
+    main()
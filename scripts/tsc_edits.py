@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Aplicación por lotes de correcciones guiadas por diagnósticos de tsc.
+
+Los fixers de sugerencias (fix_ts2551_auto.py, fix_ts2561_auto.py) recibían
+un diagnóstico cada vez: releían el archivo entero, reescribían archivo y
+backup por cada error, y el backup se escribía DESPUÉS de editar (guardaba
+el texto ya modificado).
+
+Aquí se agrupan los diagnósticos por archivo:
+- el archivo se lee una vez y se calcula el offset exacto de cada
+  (línea, columna) de tsc (columnas 1-based en unidades UTF-16, como JS),
+- todas las ediciones se aplican en una pasada con replace_spans,
+- se guarda el backup con el contenido ORIGINAL y se escribe el resultado
+  una sola vez de forma atómica (tmp + os.replace).
+
+Uso:
+    result = apply_diagnostic_fixes(path, errors, locate, backup_suffix='.ts2551.bak')
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from ts_scanner import replace_spans
+
+Edit = Tuple[int, int, str]
+# locate(content, offset, línea_inicio, línea_fin, error) → edición o None
+Locator = Callable[[str, int, int, int, dict], Optional[Edit]]
+
+def line_starts(content: str) -> List[int]:
+    """Offset de inicio de cada línea (índice 0 = línea 1)."""
+    starts = [0]
+    for match in re.finditer('\n', content):
+        starts.append(match.end())
+    return starts
+
+def column_offset(line_text: str, col: int) -> int:
+    """
+    Convierte la columna 1-based de tsc (unidades UTF-16) a índice de str.
+
+    Solo difiere si la línea tiene caracteres fuera del BMP (ej. emojis),
+    que cuentan 2 para JS y 1 para Python.
+    """
+    target = col - 1
+    if line_text.isascii():
+        return target
+    units = 0
+    for i, char in enumerate(line_text):
+        if units >= target:
+            return i
+        units += 2 if ord(char) > 0xFFFF else 1
+    return len(line_text)
+
+def nearest_match(pattern: re.Pattern, content: str, start: int, end: int, offset: int):
+    """Coincidencia del patrón en [start, end) más cercana a `offset` (log desfasado)."""
+    matches = list(pattern.finditer(content, start, end))
+    if not matches:
+        return None
+    return min(matches, key=lambda m: abs(m.start() - offset))
+
+def write_atomic(file_path: Path, content: str):
+    tmp_path = file_path.with_name(file_path.name + '.tmp')
+    tmp_path.write_text(content, encoding='utf-8')
+    os.replace(tmp_path, file_path)
+
+def apply_diagnostic_fixes(file_path: Path, errors: Iterable[dict], locate: Locator,
+                           backup_suffix: Optional[str] = None, dry_run: bool = False) -> dict:
+    """
+    Aplica en una pasada las correcciones de todos los diagnósticos del archivo.
+
+    Cada error es un dict con al menos 'line' y 'col'; `locate` devuelve la
+    edición (inicio, fin, texto) para él o None si el código ya no coincide.
+    """
+    content = file_path.read_text(encoding='utf-8')
+    starts = line_starts(content)
+
+    edits: List[Edit] = []
+    skipped = 0
+    for error in errors:
+        line_idx = error['line'] - 1
+        if line_idx >= len(starts):
+            skipped += 1
+            continue
+        line_start = starts[line_idx]
+        line_end = starts[line_idx + 1] - 1 if line_idx + 1 < len(starts) else len(content)
+        offset = line_start + column_offset(content[line_start:line_end], error['col'])
+
+        edit = locate(content, offset, line_start, line_end, error)
+        if edit and content[edit[0]:edit[1]] != edit[2]:
+            edits.append(edit)
+        else:
+            skipped += 1
+
+    new_content = replace_spans(content, edits)
+    fixes = len({(start, end) for start, end, _ in edits})
+    if new_content != content and not dry_run:
+        if backup_suffix:
+            file_path.with_name(file_path.name + backup_suffix).write_text(content, encoding='utf-8')
+        write_atomic(file_path, new_content)
+
+    return {'fixes': fixes, 'skipped': skipped, 'changed': int(new_content != content)}
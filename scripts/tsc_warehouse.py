@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Almacén histórico de diagnósticos de tsc en SQLite.
+
+Cada snapshot (type-check-*.txt, typecheck-scripts-*.txt, la salida de
+`npm run type-check` o stdin) se ingiere como una corrida en una base local
+(.codemod-cache/tsc-warehouse.sqlite), así las tendencias se consultan sin
+abrir los logs de ~680 KB a mano.
+
+Tablas normalizadas:
+- runs:        una fila por snapshot (serie, etiqueta, fecha, sha1 del log, commit)
+- files:       rutas únicas
+- codes:       códigos TSxxxx únicos
+- messages:    (código, texto) únicos, con la categoría de tsc_categories.py
+- diagnostics: (corrida, archivo, código, mensaje, línea, columna)
+
+con índices en diagnostics(code_id, file_id) y diagnostics(run_id, code_id).
+
+La ingesta parsea el log en streaming, resuelve las dimensiones nuevas con un
+INSERT OR IGNORE por tabla y carga los diagnósticos con un executemany, todo
+dentro de UNA transacción: un snapshot de ~3.000 diagnósticos entra en pocos
+ms. Un log ya ingerido (mismo sha1) se salta.
+
+Las corridas se agrupan en series ('project' para type-check-*, 'scripts'
+para typecheck-scripts-*, o --series) y se ordenan por fecha (--at, por
+defecto el mtime del log) y, a igualdad, por orden de ingesta: ingerir los
+logs en orden cronológico.
+
+Consultas predefinidas (por serie, por defecto la de la última corrida):
+- trend:        errores por código a lo largo de las corridas
+- regressions:  archivos con más errores nuevos entre dos corridas
+- time-to-fix:  tiempo medio hasta corregir, por código y categoría (un error
+                es el mismo mientras sigan (archivo, mensaje), aunque se mueva
+                de línea; se corrige en la primera corrida en que no aparece)
+
+Uso:
+    python scripts/tsc_warehouse.py ingest type-check-lote9-before.txt type-check-lote9-after.txt
+    python scripts/tsc_warehouse.py ingest log.txt --label lote10 --at 2025-10-20T18:00 [--series project]
+    python scripts/tsc_warehouse.py ingest                    # ejecuta tsc y guarda el commit
+    npm run type-check 2>&1 | python scripts/tsc_warehouse.py ingest -
+    python scripts/tsc_warehouse.py runs
+    python scripts/tsc_warehouse.py trend [--series scripts] [--code TS2339] [--top 15]
+    python scripts/tsc_warehouse.py regressions [--since RUN] [--until RUN] [--top 20]
+    python scripts/tsc_warehouse.py time-to-fix [--json]
+    (todas aceptan --db ruta.sqlite)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from codemod_cache import CACHE_DIR, PROJECT_ROOT
+from tsc_categories import CATEGORIZER, UNPARSED
+from tsc_diagnostics import file_sha1, iter_diagnostics, read_lines, run_type_check
+
+DB_PATH = CACHE_DIR / 'tsc-warehouse.sqlite'
+SCHEMA_VERSION = 1
+DEFAULT_SERIES = 'project'
+# Prefijo del nombre del log → serie (el primero que encaje)
+SERIES_PREFIXES = (('typecheck-scripts', 'scripts'), ('type-check', 'project'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    series      TEXT NOT NULL,
+    label       TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    sha1        TEXT NOT NULL UNIQUE,
+    taken_at    TEXT NOT NULL,
+    ingested_at TEXT NOT NULL,
+    git_commit  TEXT,
+    total       INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id   INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS codes (
+    id   INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id       INTEGER PRIMARY KEY,
+    code_id  INTEGER NOT NULL REFERENCES codes(id),
+    text     TEXT NOT NULL,
+    category TEXT NOT NULL,
+    UNIQUE (code_id, text)
+);
+CREATE TABLE IF NOT EXISTS diagnostics (
+    run_id     INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    file_id    INTEGER NOT NULL REFERENCES files(id),
+    code_id    INTEGER NOT NULL REFERENCES codes(id),
+    message_id INTEGER NOT NULL REFERENCES messages(id),
+    line       INTEGER NOT NULL,
+    col        INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_diagnostics_code_file ON diagnostics(code_id, file_id);
+CREATE INDEX IF NOT EXISTS idx_diagnostics_run_code ON diagnostics(run_id, code_id);
+CREATE INDEX IF NOT EXISTS idx_runs_series ON runs(series, taken_at, id);
+"""
+
+# -- consultas predefinidas -----------------------------------------------------
+
+TREND_QUERY = """
+SELECT r.id, c.code, COUNT(*) AS errors
+FROM diagnostics d
+JOIN runs r ON r.id = d.run_id
+JOIN codes c ON c.id = d.code_id
+WHERE r.series = :series
+GROUP BY r.id, c.id
+"""
+
+REGRESSIONS_QUERY = """
+SELECT f.path,
+       SUM(d.run_id = :before) AS before,
+       SUM(d.run_id = :after) AS after,
+       SUM(d.run_id = :after) - SUM(d.run_id = :before) AS delta,
+       GROUP_CONCAT(DISTINCT CASE WHEN d.run_id = :after THEN c.code END) AS codes
+FROM diagnostics d
+JOIN files f ON f.id = d.file_id
+JOIN codes c ON c.id = d.code_id
+WHERE d.run_id IN (:before, :after)
+GROUP BY d.file_id
+HAVING delta > 0
+ORDER BY delta DESC, f.path
+LIMIT :top
+"""
+
+# Rachas de presencia de (archivo, mensaje) en corridas consecutivas de la
+# serie (gaps-and-islands); una racha está corregida si existe la corrida
+# siguiente a su última aparición.
+TIME_TO_FIX_QUERY = """
+WITH ordered AS (
+    SELECT id, taken_at, ROW_NUMBER() OVER (ORDER BY taken_at, id) AS n
+    FROM runs WHERE series = :series
+),
+present AS (
+    SELECT DISTINCT d.file_id, d.message_id, o.n
+    FROM diagnostics d JOIN ordered o ON o.id = d.run_id
+),
+streaks AS (
+    SELECT file_id, message_id, n,
+           n - ROW_NUMBER() OVER (PARTITION BY file_id, message_id ORDER BY n) AS island
+    FROM present
+),
+spans AS (
+    SELECT message_id, MIN(n) AS first_n, MAX(n) AS last_n
+    FROM streaks GROUP BY file_id, message_id, island
+)
+SELECT c.code, m.category,
+       SUM(fixed.n IS NOT NULL) AS fixed,
+       SUM(fixed.n IS NULL) AS open,
+       AVG(CASE WHEN fixed.n IS NOT NULL
+                THEN (julianday(fixed.taken_at) - julianday(seen.taken_at)) * 24 END) AS hours,
+       AVG(CASE WHEN fixed.n IS NOT NULL THEN fixed.n - s.first_n END) AS runs
+FROM spans s
+JOIN messages m ON m.id = s.message_id
+JOIN codes c ON c.id = m.code_id
+JOIN ordered seen ON seen.n = s.first_n
+LEFT JOIN ordered fixed ON fixed.n = s.last_n + 1
+GROUP BY c.code, m.category
+ORDER BY fixed DESC, open DESC, c.code, m.category
+"""
+
+def connect(db_path: Path = DB_PATH) -> sqlite3.Connection:
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path))
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version not in (0, SCHEMA_VERSION):
+        raise SystemExit(f"❌ {db_path}: esquema v{version}, se esperaba v{SCHEMA_VERSION}")
+    with conn:
+        conn.executescript(SCHEMA)
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    return conn
+
+def series_for(source: str) -> str:
+    name = Path(source).name
+    for prefix, series in SERIES_PREFIXES:
+        if name.startswith(prefix):
+            return series
+    return DEFAULT_SERIES
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _hashed(lines: Iterable[str], digest) -> Iterator[str]:
+    for line in lines:
+        digest.update(line.encode('utf-8', 'surrogateescape'))
+        yield line
+
+def _resolve(conn: sqlite3.Connection, table: str, column: str, wanted: Iterable[str]) -> Dict[str, int]:
+    """Ids de los valores de una dimensión, insertando los nuevos con un executemany."""
+    ids = dict(conn.execute(f'SELECT {column}, id FROM {table}'))
+    missing = [(value,) for value in dict.fromkeys(wanted) if value not in ids]
+    if missing:
+        conn.executemany(f'INSERT OR IGNORE INTO {table} ({column}) VALUES (?)', missing)
+        ids = dict(conn.execute(f'SELECT {column}, id FROM {table}'))
+    return ids
+
+def _message_ids(conn: sqlite3.Connection) -> Dict[Tuple[int, str], int]:
+    return {(code_id, text): message_id
+            for message_id, code_id, text in conn.execute('SELECT id, code_id, text FROM messages')}
+
+def ingest(conn: sqlite3.Connection, source: Optional[str] = None, label: Optional[str] = None,
+           taken_at: Optional[str] = None, series: Optional[str] = None) -> dict:
+    """
+    Ingiere un snapshot: source = ruta del log, '-' (stdin) o None (ejecuta tsc).
+    Devuelve id, etiqueta, total, dimensiones nuevas y tiempos; skipped=True
+    si el log ya estaba.
+    """
+    start = time.perf_counter()
+    now = datetime.now().isoformat(timespec='seconds')
+    if source in (None, '-'):
+        # Sin archivo: el sha1 se calcula sobre las líneas a medida que se leen
+        if source is None:
+            print("⏳ Ejecutando npm run type-check...", file=sys.stderr)
+        lines, origin = (run_type_check(), 'tsc') if source is None else (sys.stdin, 'stdin')
+        digest = hashlib.sha1()
+        diagnostics = list(iter_diagnostics(_hashed(lines, digest)))
+        sha1 = digest.hexdigest()
+        commit = git_commit() if source is None else None
+        taken_at = taken_at or now
+        label = label or f"{origin}-{taken_at}"
+        series = series or DEFAULT_SERIES
+    else:
+        origin = str(source)
+        diagnostics = list(iter_diagnostics(read_lines(source)))
+        sha1 = file_sha1(Path(source))
+        commit = None
+        taken_at = taken_at or datetime.fromtimestamp(Path(source).stat().st_mtime).isoformat(timespec='seconds')
+        label = label or Path(source).stem
+        series = series or series_for(source)
+    parsed = time.perf_counter()
+
+    existing = conn.execute('SELECT id, label FROM runs WHERE sha1 = ?', (sha1,)).fetchone()
+    if existing:
+        return {'id': existing[0], 'label': existing[1], 'total': len(diagnostics), 'skipped': True}
+
+    with conn:
+        cursor = conn.execute(
+            'INSERT INTO runs (series, label, source, sha1, taken_at, ingested_at, git_commit, total) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (series, label, origin, sha1, taken_at, now, commit, len(diagnostics)))
+        run_id = cursor.lastrowid
+
+        files_before = conn.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+        file_ids = _resolve(conn, 'files', 'path', (d.file for d in diagnostics))
+        code_ids = _resolve(conn, 'codes', 'code', (d.code for d in diagnostics))
+
+        # Mensajes: solo los nuevos pasan por el categorizador
+        message_ids = _message_ids(conn)
+        new_messages = {}
+        for d in diagnostics:
+            key = (code_ids[d.code], d.message)
+            if key not in message_ids and key not in new_messages:
+                fields = CATEGORIZER.fields(d.code, d.message)
+                new_messages[key] = UNPARSED if fields is None else CATEGORIZER.category(d.code, fields)
+        if new_messages:
+            conn.executemany('INSERT INTO messages (code_id, text, category) VALUES (?, ?, ?)',
+                             [(code_id, text, category) for (code_id, text), category in new_messages.items()])
+            message_ids = _message_ids(conn)
+
+        conn.executemany(
+            'INSERT INTO diagnostics (run_id, file_id, code_id, message_id, line, col) VALUES (?, ?, ?, ?, ?, ?)',
+            [(run_id, file_ids[d.file], code_ids[d.code], message_ids[(code_ids[d.code], d.message)],
+              d.line, d.col) for d in diagnostics])
+
+    done = time.perf_counter()
+    return {'id': run_id, 'label': label, 'series': series, 'total': len(diagnostics), 'skipped': False,
+            'new_files': len(file_ids) - files_before, 'new_messages': len(new_messages),
+            'parse_ms': (parsed - start) * 1000, 'sqlite_ms': (done - parsed) * 1000}
+
+# -- consultas ------------------------------------------------------------------
+
+def list_runs(conn: sqlite3.Connection, series: Optional[str] = None) -> List[dict]:
+    query = 'SELECT id, series, label, taken_at, total, git_commit, source FROM runs'
+    params: Tuple = ()
+    if series:
+        query += ' WHERE series = ?'
+        params = (series,)
+    columns = ('id', 'series', 'label', 'taken_at', 'total', 'git_commit', 'source')
+    return [dict(zip(columns, row)) for row in conn.execute(query + ' ORDER BY series, taken_at, id', params)]
+
+def latest_series(conn: sqlite3.Connection) -> Optional[str]:
+    row = conn.execute('SELECT series FROM runs ORDER BY taken_at DESC, id DESC LIMIT 1').fetchone()
+    return row[0] if row else None
+
+def resolve_run(conn: sqlite3.Connection, series: str, ref: Optional[str], offset: int) -> Optional[int]:
+    """Corrida por id o etiqueta; sin ref, la penúltima (offset=1) o la última (offset=0) de la serie."""
+    if ref is not None:
+        row = conn.execute('SELECT id FROM runs WHERE CAST(id AS TEXT) = ? OR label = ? '
+                           'ORDER BY id DESC LIMIT 1', (ref, ref)).fetchone()
+        return row[0] if row else None
+    row = conn.execute('SELECT id FROM runs WHERE series = ? ORDER BY taken_at DESC, id DESC LIMIT 1 OFFSET ?',
+                       (series, offset)).fetchone()
+    return row[0] if row else None
+
+def trend(conn: sqlite3.Connection, series: str, code: Optional[str] = None, top: int = 15) -> dict:
+    """{'runs': [...], 'codes': {código: [errores por corrida]}} con los códigos de la última corrida primero."""
+    runs = list_runs(conn, series)
+    position = {run['id']: i for i, run in enumerate(runs)}
+    table: Dict[str, List[int]] = {}
+    for run_id, run_code, errors in conn.execute(TREND_QUERY, {'series': series}):
+        if code in (None, run_code):
+            table.setdefault(run_code, [0] * len(runs))[position[run_id]] = errors
+    ordered = sorted(table.items(), key=lambda item: (-item[1][-1], -max(item[1]), item[0]))
+    return {'runs': runs, 'codes': dict(ordered[:top])}
+
+def regressions(conn: sqlite3.Connection, before: int, after: int, top: int = 20) -> List[dict]:
+    columns = ('path', 'before', 'after', 'delta', 'codes')
+    rows = conn.execute(REGRESSIONS_QUERY, {'before': before, 'after': after, 'top': top})
+    return [dict(zip(columns, row)) for row in rows]
+
+def time_to_fix(conn: sqlite3.Connection, series: str) -> List[dict]:
+    rows = []
+    for code, category, fixed, still_open, hours, runs in conn.execute(TIME_TO_FIX_QUERY, {'series': series}):
+        rows.append({'code': code, 'category': category, 'fixed': fixed, 'open': still_open,
+                     'hours': None if hours is None else round(hours, 2),
+                     'runs': None if runs is None else round(runs, 2)})
+    return rows
+
+# -- CLI ------------------------------------------------------------------------
+
+def option_value(name: str, default: Optional[str] = None) -> Optional[str]:
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return default
+
+def print_trend(result: dict):
+    runs = result['runs']
+    if not runs:
+        print("❌ Sin corridas en la serie")
+        return
+    # Sin el prefijo común ('type-check-'), que no distingue corridas
+    prefix = os.path.commonprefix([run['label'] for run in runs]) if len(runs) > 1 else ''
+    labels = [(run['label'][len(prefix):] or run['label'])[-14:] for run in runs]
+    print(f"📈 Errores por código ({runs[0]['series']}, {len(runs)} corridas)\n")
+    print(f"   {'código':<8} " + ' '.join(f"{label:>14}" for label in labels))
+    print(f"   {'total':<8} " + ' '.join(f"{run['total']:>14,}" for run in runs))
+    for code, counts in result['codes'].items():
+        print(f"   {code:<8} " + ' '.join(f"{count:>14,}" for count in counts))
+
+def print_regressions(rows: List[dict], before: str, after: str):
+    print(f"📉 Archivos con más errores nuevos: {before} → {after}\n")
+    if not rows:
+        print("   ✅ Ningún archivo empeoró")
+    for row in rows:
+        print(f"   {row['before']:>4} → {row['after']:>4}  ({row['delta']:+d})  {row['path']}  [{row['codes']}]")
+
+def print_time_to_fix(rows: List[dict], series: str):
+    print(f"⏱️  Tiempo medio hasta corregir ({series})\n")
+    print(f"   {'código':<8} {'categoría':<22} {'corregidos':>10} {'abiertos':>9} {'horas':>8} {'corridas':>9}")
+    for row in rows:
+        hours = f"{row['hours']:.1f}" if row['hours'] is not None else '-'
+        runs = f"{row['runs']:.1f}" if row['runs'] is not None else '-'
+        print(f"   {row['code']:<8} {row['category']:<22} {row['fixed']:>10,} {row['open']:>9,} {hours:>8} {runs:>9}")
+
+def main():
+    option_values = {'--db', '--label', '--at', '--series', '--code', '--top', '--since', '--until'}
+    args = [a for i, a in enumerate(sys.argv[1:], 1)
+            if not a.startswith('--') and sys.argv[i - 1] not in option_values]
+    # '-' (stdin) no empieza por '--' y entra en args
+    command = args[0] if args else None
+    commands = ('ingest', 'runs', 'trend', 'regressions', 'time-to-fix')
+    if command not in commands:
+        print(f"Uso: python scripts/tsc_warehouse.py {{{'|'.join(commands)}}} [...]")
+        print("\nEjemplo:")
+        print("  python scripts/tsc_warehouse.py ingest type-check-lote9-before.txt type-check-lote9-after.txt")
+        print("  python scripts/tsc_warehouse.py trend")
+        sys.exit(1)
+
+    conn = connect(Path(option_value('--db', str(DB_PATH))))
+    as_json = '--json' in sys.argv
+    top = int(option_value('--top', '20' if command == 'regressions' else '15'))
+
+    if command == 'ingest':
+        sources = args[1:] or [None]
+        label = option_value('--label') if len(sources) == 1 else None
+        results = []
+        for source in sources:
+            result = ingest(conn, source, label=label, taken_at=option_value('--at'),
+                            series=option_value('--series'))
+            results.append(result)
+            if as_json:
+                continue
+            if result['skipped']:
+                print(f"⏭️  {result['label']}: ya ingerido (corrida {result['id']})")
+            else:
+                print(f"✅ {result['label']} [{result['series']}]: {result['total']:,} diagnósticos "
+                      f"→ corrida {result['id']} ({result['new_files']} archivos y "
+                      f"{result['new_messages']:,} mensajes nuevos; parseo {result['parse_ms']:.0f}ms, "
+                      f"SQLite {result['sqlite_ms']:.0f}ms)")
+        if as_json:
+            print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+
+    if command == 'runs':
+        runs = list_runs(conn, option_value('--series'))
+        if as_json:
+            print(json.dumps(runs, indent=2, ensure_ascii=False))
+            return
+        for run in runs:
+            commit = f"  @{run['git_commit']}" if run['git_commit'] else ''
+            print(f"   {run['id']:>4}  {run['series']:<8} {run['taken_at']}  {run['total']:>6,}  {run['label']}{commit}")
+        return
+
+    series = option_value('--series') or latest_series(conn)
+    if series is None:
+        print("❌ El almacén está vacío: python scripts/tsc_warehouse.py ingest <log>")
+        sys.exit(1)
+
+    if command == 'trend':
+        result = trend(conn, series, option_value('--code'), top)
+        if as_json:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        else:
+            print_trend(result)
+    elif command == 'regressions':
+        before = resolve_run(conn, series, option_value('--since'), 1)
+        after = resolve_run(conn, series, option_value('--until'), 0)
+        if before is None or after is None:
+            print(f"❌ Se necesitan dos corridas en la serie {series} (o --since/--until)")
+            sys.exit(1)
+        rows = regressions(conn, before, after, top)
+        if as_json:
+            print(json.dumps({'before': before, 'after': after, 'files': rows}, indent=2, ensure_ascii=False))
+        else:
+            names = dict(conn.execute('SELECT id, label FROM runs WHERE id IN (?, ?)', (before, after)))
+            print_regressions(rows, names[before], names[after])
+    else:
+        rows = time_to_fix(conn, series)
+        if as_json:
+            print(json.dumps(rows, indent=2, ensure_ascii=False))
+        else:
+            print_time_to_fix(rows, series)
+
+if __name__ == '__main__':
+    main()